@@ -5,6 +5,8 @@ Phase 2C Week 1: Performance & Scaling - Application Factory Pattern
 
 import logging
 import os
+import threading
+from typing import Any, Callable, Dict
 
 from flask import Flask
 from flask_cors import CORS
@@ -21,12 +23,50 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class SmartCloudOpsFlask(Flask):
+    """
+    Flask application whose heavy components are built on first use
+
+    Attributes registered with lazy() are created the first time they are
+    read, so ML components (and the pandas/sklearn imports behind them)
+    are only paid for by workers and tools that use them. Assigning the
+    attribute directly shadows the built value.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lazy_factories: Dict[str, Callable[[], Any]] = {}
+        self._lazy_values: Dict[str, Any] = {}
+        self._lazy_lock = threading.RLock()
+
+    def lazy(self, name: str, factory: Callable[[], Any]):
+        """Build attribute name with factory() on first access"""
+        self.__dict__.pop(name, None)
+        self._lazy_values.pop(name, None)
+        self._lazy_factories[name] = factory
+
+    def built(self, name: str) -> Any:
+        """Value built by name's factory, even if the attribute was reassigned"""
+        with self._lazy_lock:
+            if name not in self._lazy_values:
+                self._lazy_values[name] = self._lazy_factories[name]()
+            return self._lazy_values[name]
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached when normal attribute lookup fails
+        if name not in self.__dict__.get("_lazy_factories", {}):
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        return self.built(name)
+
+
 def create_app(config=None) -> Flask:
     """
     Application factory pattern for Flask app creation
     Separates concerns and makes testing easier
     """
-    app = Flask(__name__)
+    app = SmartCloudOpsFlask(__name__)
 
     # Load configuration
     if config:
@@ -58,15 +98,14 @@ def create_app(config=None) -> Flask:
     # Initialize request counter for testing
     app.request_count = 0
 
-    # Initialize anomaly detector
-    try:
-        from ml_models.anomaly_detector import AnomalyDetector
+    # Anomaly detector, built (and ml_models imported) on first access
+    app.lazy("anomaly_detector", _create_anomaly_detector)
 
-        app.anomaly_detector = AnomalyDetector()
-        logger.info("✅ Anomaly detector initialized")
-    except Exception as e:
-        logger.warning(f"Anomaly detector initialization failed: {e}")
-        app.anomaly_detector = None
+    # Load (or, failing that, build) the model before the first request
+    _init_anomaly_warm_up(app)
+
+    # Coalesce concurrent anomaly requests into batched model calls
+    _init_anomaly_batching(app)
 
     # Initialize MLOps service
     _init_mlops_service(app)
@@ -190,6 +229,127 @@ def _init_performance_monitoring(app: Flask):
         logger.warning(f"Performance monitoring initialization failed: {e}")
 
 
+def _create_anomaly_detector():
+    """Build the anomaly detector, or None if ml_models is unusable"""
+    try:
+        from ml_models.anomaly_detector import AnomalyDetector
+
+        # Requests never train; the model is loaded by the warm-up
+        detector = AnomalyDetector(
+            {
+                "ANOMALY_THRESHOLD": 0.7,
+                "MIN_SAMPLES": 100,
+                "MODEL_PATH": "ml_models/anomaly_detector.pkl",
+                "RANDOM_STATE": 42,
+                "SYNC_TRAINING_FALLBACK": False,
+                "STREAM_REDIS_CLIENT": _stream_state_redis(),
+            }
+        )
+        logger.info("✅ Anomaly detector initialized")
+        return detector
+    except Exception as e:
+        logger.warning(f"Anomaly detector initialization failed: {e}")
+        return None
+
+
+def _stream_state_redis():
+    """
+    Redis client for per-host anomaly stream state, or None
+
+    Gunicorn spreads a host's samples over all workers, so streaming rates
+    and baselines only hold together when the state is shared in Redis.
+    ANOMALY_STREAM_STATE=local keeps it per process (single worker only).
+    """
+    if os.getenv("ANOMALY_STREAM_STATE", "redis").lower() != "redis":
+        return None
+    try:
+        import redis
+
+        client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            db=int(os.getenv("REDIS_DB", "0")),
+            password=os.getenv("REDIS_PASSWORD") or None,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Anomaly stream state kept per worker, Redis unavailable: {e}")
+        return None
+
+
+def _init_anomaly_warm_up(app: Flask):
+    """
+    Warm the anomaly detector up at startup
+
+    ANOMALY_WARMUP is "off" (default: import and load nothing until the
+    first ML request, so tests and CLI tools that build the app never load,
+    train or write a model), "background" (load in a thread; requests
+    arriving before it finishes get an error result rather than training)
+    or "sync" (finish before create_app returns). The server entrypoints,
+    gunicorn.conf.py and app.main.main(), switch it to "sync". Synthetic
+    training only happens here, when the image was built without a bootstrap
+    model, never on a request.
+    """
+    app.anomaly_warm_up = None
+    mode = os.getenv("ANOMALY_WARMUP", "off").lower()
+    if mode == "off":
+        return
+
+    def warm_up():
+        detector = app.anomaly_detector
+        if detector is None:
+            return
+        app.anomaly_warm_up = detector.warm_up(allow_training=True)
+        logger.info(
+            f"✅ Anomaly detector warmed up from {app.anomaly_warm_up['model_source']} "
+            f"model in {app.anomaly_warm_up['seconds']:.2f}s"
+        )
+
+    if mode == "background":
+        threading.Thread(target=warm_up, name="anomaly-warm-up", daemon=True).start()
+    else:
+        warm_up()
+
+
+def _init_anomaly_batching(app: Flask):
+    """
+    Initialize the micro-batcher in front of the anomaly detector
+
+    Off unless ANOMALY_MICRO_BATCHING is "true": batching only pays off
+    when a worker serves requests concurrently, so gunicorn.conf.py turns
+    it on together with threaded workers.
+    """
+    if os.getenv("ANOMALY_MICRO_BATCHING", "false").lower() != "true":
+        app.anomaly_batcher = None
+        return
+    app.lazy("anomaly_batcher", lambda: _create_anomaly_batcher(app))
+
+
+def _create_anomaly_batcher(app: Flask):
+    """Build the micro-batcher, or None without a detector"""
+    # Wrap the app's own detector, not one swapped in after startup
+    detector = app.built("anomaly_detector")
+    if detector is None:
+        return None
+    try:
+        from app.performance.anomaly_optimization import AnomalyConfig, BatchProcessor
+
+        # Threads start on the first request, so forked workers get their own
+        config = AnomalyConfig(
+            batch_size=int(os.getenv("ANOMALY_MAX_BATCH_SIZE", "64")),
+            max_linger=float(os.getenv("ANOMALY_MAX_LINGER_MS", "2")) / 1000,
+        )
+        batcher = BatchProcessor(config, detector=detector)
+        logger.info("✅ Anomaly micro-batching enabled")
+        return batcher
+    except Exception as e:
+        logger.warning(f"Anomaly micro-batching initialization failed: {e}")
+        return None
+
+
 def _init_mlops_service(app: Flask):
     """Initialize MLOps service"""
     try:
@@ -540,8 +540,15 @@ def detect_anomaly():
                 503,
             )
 
-        # Perform anomaly detection
-        result = detector.detect_anomaly(data["metrics"])
+        # Perform anomaly detection: samples tagged with a host are scored
+        # against that host's stream state, others are batched if enabled
+        batcher = getattr(current_app, "anomaly_batcher", None)
+        if data.get("host_id") is not None:
+            result = detector.detect_anomaly_stream(data["host_id"], data["metrics"])
+        elif batcher is not None and batcher.detector is detector:
+            result = batcher.detect(data["metrics"])
+        else:
+            result = detector.detect_anomaly(data["metrics"])
 
         # Check if the result indicates an error
         if result.get("status") == "error":
@@ -26,6 +26,9 @@ def main():
     """Main application entry point using factory pattern"""
     from app import create_app
 
+    # Serving requests: have the anomaly model ready before the first one
+    os.environ.setdefault("ANOMALY_WARMUP", "sync")
+
     app = create_app()
 
     # Configuration
@@ -34,7 +34,19 @@ ML_FEATURE_COUNT = int(os.getenv("ML_FEATURE_COUNT", "18"))
 anomaly_detector = None
 if ML_AVAILABLE:
     try:
-        anomaly_detector = AnomalyDetector()
+        anomaly_detector = AnomalyDetector(
+            {
+                "ANOMALY_THRESHOLD": 0.7,
+                "MIN_SAMPLES": 100,
+                "MODEL_PATH": "ml_models/anomaly_detector.pkl",
+                "RANDOM_STATE": 42,
+                "INFERENCE_BACKEND": os.getenv("ML_INFERENCE_BACKEND", "sklearn"),
+                "SCORING_PROCESSES": int(os.getenv("ML_SCORING_PROCESSES", "0")),
+                # Requests never train; without a persisted or bootstrap model
+                # they get an error result
+                "SYNC_TRAINING_FALLBACK": False,
+            }
+        )
         logger.info("ML Anomaly Detector initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize ML Anomaly Detector: {e}")
@@ -160,35 +172,27 @@ def batch_anomaly_detection():
         if not batch_metrics:
             return jsonify({"error": "No batch metrics provided"}), 400
 
+        # Score the whole batch in one call; large batches are spread over
+        # the scoring process pool when SCORING_PROCESSES is configured
         results = []
-        for i, metrics in enumerate(batch_metrics):
-            try:
-                # Convert metrics to feature vector
-                features = []
-                for j in range(ML_FEATURE_COUNT):
-                    feature_name = f"feature_{j}"
-                    features.append(metrics.get(feature_name, 0.0))
-
-                # Perform anomaly detection
-                features_array = np.array(features).reshape(1, -1)
-                anomaly_score = anomaly_detector.detect_anomaly(features_array)
-                is_anomaly = anomaly_score > 0.5
-
+        for i, detection in enumerate(anomaly_detector.batch_detect(batch_metrics)):
+            if detection.get("status") == "success":
                 results.append(
                     {
                         "index": i,
-                        "anomaly_detected": bool(is_anomaly),
-                        "anomaly_score": float(anomaly_score),
-                        "features_used": len(features),
+                        "anomaly_detected": bool(detection["is_anomaly"]),
+                        "anomaly_score": float(detection["anomaly_score"]),
+                        "features_used": len(anomaly_detector.feature_columns),
                     }
                 )
-
-            except Exception as e:
-                logger.error(f"Error processing batch item {i}: {e}")
+            else:
+                logger.error(
+                    f"Error processing batch item {i}: {detection.get('error')}"
+                )
                 results.append(
                     {
                         "index": i,
-                        "error": str(e),
+                        "error": detection.get("error", "Anomaly detection failed"),
                         "anomaly_detected": False,
                         "anomaly_score": 0.0,
                     }
@@ -8,11 +8,14 @@ import asyncio
 import hashlib
 import json
 import logging
+import os
 import queue
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import asdict, dataclass
+import uuid
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -30,6 +33,8 @@ except ImportError:
     IsolationForest = None
     StandardScaler = None
 
+from prometheus_client import Histogram
+
 from .redis_cache import cached, get_redis_cache
 
 logger = logging.getLogger(__name__)
@@ -39,9 +44,11 @@ logger = logging.getLogger(__name__)
 class AnomalyConfig:
     """Anomaly detection configuration"""
 
-    batch_size: int = 100
-    batch_timeout: float = 0.5  # seconds
+    batch_size: int = 100  # largest number of requests scored in one model call
+    batch_timeout: float = 5.0  # seconds a caller waits for its batch result
+    max_linger: float = 0.002  # seconds a batch waits for more requests under load
     max_workers: int = 4
+    max_queue_size: int = 1000  # queued async requests before callers must wait
     cache_predictions: bool = True
     prediction_ttl: int = 300  # 5 minutes
     model_update_interval: int = 3600  # 1 hour
@@ -64,165 +71,509 @@ class AnomalyResult:
     processing_time: float
 
 
-class BatchProcessor:
-    """Batch processing for anomaly detection"""
+# Micro-batching metrics, exported through the default Prometheus registry
+BATCH_SIZE = Histogram(
+    "anomaly_batch_size",
+    "Requests scored per anomaly detection model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+BATCH_QUEUE_WAIT = Histogram(
+    "anomaly_batch_queue_wait_seconds",
+    "Time anomaly detection requests wait before their batch is scored",
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+
+# Queued request: (request id, metrics, enqueue time, future for its result)
+BatchItem = Tuple[str, Dict[str, Any], float, Future]
+
+
+class BatchQueueFullError(Exception):
+    """Raised when the async batch queue stays full for longer than allowed."""
+
 
-    def __init__(self, config: AnomalyConfig):
+def _default_detector():
+    """ML anomaly detector used when none is supplied."""
+    from ml_models.anomaly_detector import AnomalyDetector
+
+    return AnomalyDetector()
+
+
+class BatchProcessor:
+    """
+    Adaptive micro-batcher for anomaly detection.
+
+    Concurrent requests are coalesced into one AnomalyDetector.batch_detect()
+    call. A single collector thread forms batches and hands them to up to
+    max_workers scoring threads. While every scoring thread is busy, new
+    requests queue up and go out together in the next batch, so batches grow
+    with load. An idle processor dispatches a request immediately, and a batch
+    only lingers (up to max_linger) for more requests while other batches are
+    being scored.
+
+    Each request gets its own Future, completed by the scoring thread as soon
+    as its batch is scored; waiters never see other requests' results.
+    """
+
+    def __init__(self, config: AnomalyConfig, detector=None):
         self.config = config
-        self.batch_queue = queue.Queue()
-        self.results_queue = queue.Queue()
-        self.executor = ThreadPoolExecutor(max_workers=config.max_workers)
+        self._detector = detector
         self.running = False
         self._lock = threading.RLock()
+        self._pid = None
+        self._generation = 0
+        self._in_flight = 0
+        self._batches = 0
+        self._items = 0
+        self._reset_queues()
+
+    @property
+    def detector(self):
+        """Detector whose batch_detect() scores the batches."""
+        if self._detector is None:
+            with self._lock:
+                if self._detector is None:
+                    self._detector = _default_detector()
+        return self._detector
+
+    def _reset_queues(self):
+        self.batch_queue = queue.Queue()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.max_workers, thread_name_prefix="anomaly-batch"
+        )
+        self._slots = threading.BoundedSemaphore(self.config.max_workers)
 
     def start(self):
         """Start batch processing"""
         with self._lock:
+            if self.running and self._pid != os.getpid():
+                # Threads do not survive a fork (gunicorn preload_app); start
+                # fresh in the child instead of waiting on the parent's threads
+                self.running = False
+                self._in_flight = 0
+                self._reset_queues()
             if not self.running:
                 self.running = True
+                self._pid = os.getpid()
+                self._generation += 1
                 self._start_workers()
                 logger.info("✅ Batch processor started")
 
     def stop(self):
         """Stop batch processing"""
         with self._lock:
-            if self.running:
-                self.running = False
-                self.executor.shutdown(wait=True)
-                logger.info("✅ Batch processor stopped")
+            if not self.running:
+                return
+            self.running = False
+            self._generation += 1
+            batch_queue, executor = self.batch_queue, self.executor
+            self._reset_queues()
+
+        # Scoring threads take the lock to finish their batch; wait outside it
+        executor.shutdown(wait=True)
+        # Wake callers whose requests never made it into a batch
+        while not batch_queue.empty():
+            batch_queue.get_nowait()[3].cancel()
+        logger.info("✅ Batch processor stopped")
 
     def _start_workers(self):
-        """Start worker threads"""
-        for i in range(self.config.max_workers):
-            thread = threading.Thread(
-                target=self._worker_loop, daemon=True, name=f"batch-worker-{i}"
-            )
-            thread.start()
+        """Start the batch collector thread"""
+        thread = threading.Thread(
+            target=self._collector_loop,
+            args=(self._generation,),
+            daemon=True,
+            name="anomaly-batch-collector",
+        )
+        thread.start()
 
-    def _worker_loop(self):
-        """Worker loop for batch processing"""
-        while self.running:
+    def _collector_loop(self, generation: int):
+        """Form batches whenever a scoring slot is free"""
+        batch_queue, slots, executor = self.batch_queue, self._slots, self.executor
+        while self.running and generation == self._generation:
             try:
-                # Get batch with timeout
-                batch = self._get_batch()
-                if batch:
-                    self._process_batch(batch)
+                if not slots.acquire(timeout=0.1):
+                    continue
+                batch = self._get_batch(batch_queue)
+                if not batch:
+                    slots.release()
+                    continue
+                with self._lock:
+                    self._in_flight += 1
+                try:
+                    executor.submit(self._run_batch, batch, slots)
+                except RuntimeError:
+                    # stop() shut the executor down while this batch formed
+                    with self._lock:
+                        self._in_flight -= 1
+                    for item in batch:
+                        item[3].cancel()
+                    break
             except Exception as e:
-                logger.error(f"Batch worker error: {e}")
+                logger.error(f"Batch collector error: {e}")
                 time.sleep(0.1)
 
-    def _get_batch(self) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
-        """Get batch of items to process"""
-        batch = []
-        start_time = time.time()
+    def _run_batch(
+        self,
+        batch: List[BatchItem],
+        slots: threading.BoundedSemaphore,
+    ):
+        """Score one batch and free its slot"""
+        try:
+            self._process_batch(batch)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            slots.release()
 
+    def _get_batch(self, batch_queue: queue.Queue) -> Optional[List[BatchItem]]:
+        """Get batch of items to process"""
         try:
             # Get first item
-            item = self.batch_queue.get(timeout=0.1)
-            batch.append(item)
-
-            # Collect more items until batch is full or timeout
-            while (
-                len(batch) < self.config.batch_size
-                and time.time() - start_time < self.config.batch_timeout
-            ):
+            first = batch_queue.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+        batch = [first]
+        max_size = max(1, self.config.batch_size)
+
+        # Take everything that queued up while the scorers were busy
+        while len(batch) < max_size:
+            try:
+                batch.append(batch_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Other batches in flight means requests are arriving concurrently;
+        # give a few more the chance to share this model call
+        if len(batch) < max_size and self._in_flight > 0:
+            deadline = first[2] + self.config.max_linger
+            while len(batch) < max_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
                 try:
-                    item = self.batch_queue.get_nowait()
-                    batch.append(item)
+                    batch.append(batch_queue.get(timeout=remaining))
                 except queue.Empty:
                     break
 
-            return batch
-        except queue.Empty:
-            return None
+        dispatched_at = time.perf_counter()
+        BATCH_SIZE.observe(len(batch))
+        for _, _, enqueued_at, _ in batch:
+            BATCH_QUEUE_WAIT.observe(dispatched_at - enqueued_at)
+        return batch
 
-    def _process_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+    def _process_batch(self, batch: List[BatchItem]):
         """Process a batch of items"""
+        # Skip requests whose callers gave up before the batch was scored
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
         try:
-            # Extract request IDs and data
-            request_ids = [item[0] for item in batch]
             data_list = [item[1] for item in batch]
 
-            # Process batch (this would call the actual anomaly detection)
             results = self._detect_anomalies_batch(data_list)
-
-            # Put results in results queue
-            for request_id, result in zip(request_ids, results):
-                self.results_queue.put((request_id, result))
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Detector returned {len(results)} results for {len(batch)} items"
+                )
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
 
         except Exception as e:
             logger.error(f"Batch processing error: {e}")
             # Put error results for all items in batch
-            for request_id, _ in batch:
-                error_result = AnomalyResult(
-                    is_anomaly=False,
-                    confidence=0.0,
-                    score=0.0,
-                    features={},
-                    timestamp=datetime.now(timezone.utc),
-                    model_version="error",
-                    processing_time=0.0,
-                )
-                self.results_queue.put((request_id, error_result))
+            results = [{"status": "error", "error": str(e)} for _ in batch]
+
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
 
     def _detect_anomalies_batch(
         self, data_list: List[Dict[str, Any]]
-    ) -> List[AnomalyResult]:
-        """Detect anomalies in batch (placeholder implementation)"""
-        results = []
-        for data in data_list:
-            # Placeholder: simple threshold-based anomaly detection
-            cpu_usage = data.get("cpu_usage", 0.0)
-            memory_usage = data.get("memory_usage", 0.0)
-
-            is_anomaly = cpu_usage > 90.0 or memory_usage > 90.0
-            confidence = min(cpu_usage / 100.0, memory_usage / 100.0)
-            score = (cpu_usage + memory_usage) / 200.0
-
-            result = AnomalyResult(
-                is_anomaly=is_anomaly,
-                confidence=confidence,
-                score=score,
-                features={"cpu_usage": cpu_usage, "memory_usage": memory_usage},
-                timestamp=datetime.now(timezone.utc),
-                model_version="batch-v1",
-                processing_time=0.001,
-            )
-            results.append(result)
+    ) -> List[Dict[str, Any]]:
+        """Score a batch with one vectorized model call"""
+        return self.detector.batch_detect(data_list)
+
+    def submit(self, request_id: str, data: Dict[str, Any]) -> Future:
+        """
+        Submit item for batch processing.
+
+        Returns a Future that completes with the detector's result for this
+        item. The processor keeps no reference to it once the batch is scored,
+        so a caller that drops the Future leaves nothing behind.
+        """
+        self.start()
+        future = Future()
+        self.batch_queue.put((request_id, data, time.perf_counter(), future))
+        return future
+
+    def _wait(self, future: Future, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for a request's result; cancels it if the wait times out"""
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+        except CancelledError:
+            pass
+        return None
 
-        return results
+    def detect(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score one metrics sample as part of the next batch.
+
+        Returns the detector's result for the sample. If the batch does not
+        complete within batch_timeout the sample is scored on its own.
+        """
+        request_id = uuid.uuid4().hex
+        future = self.submit(request_id, data)
+        result = self._wait(future, self.config.batch_timeout)
+        if result is not None:
+            return result
 
-    def submit(self, request_id: str, data: Dict[str, Any]):
-        """Submit item for batch processing"""
-        self.batch_queue.put((request_id, data))
+        logger.warning(f"Batch processing timeout for {request_id}, scoring alone")
+        return self.detector.detect_anomaly(data)
 
-    def get_result(
-        self, request_id: str, timeout: float = 5.0
-    ) -> Optional[AnomalyResult]:
-        """Get result for a request ID"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        with self._lock:
+            batches, items = self._batches, self._items
+        return {
+            "running": self.running,
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": items / batches if batches else 0.0,
+            "queue_depth": self.batch_queue.qsize(),
+            "in_flight": self._in_flight,
+            "max_batch_size": self.config.batch_size,
+            "max_linger": self.config.max_linger,
+        }
+
+
+class AsyncBatchProcessor:
+    """
+    Asyncio-native micro-batcher for anomaly detection.
+
+    Coroutines await detect(). A collector task on the event loop forms
+    batches the same way BatchProcessor does, and each batch is scored on a
+    dedicated thread pool of max_workers threads, so CPU-bound scoring never
+    runs on the event loop or competes for the loop's default executor.
+
+    The request queue holds at most max_queue_size requests. When it is full,
+    detect() waits for room for up to batch_timeout and then raises
+    BatchQueueFullError. Cancelling a detect() call drops its request from its
+    batch unless scoring has already started.
+    """
+
+    def __init__(
+        self,
+        config: AnomalyConfig,
+        detector=None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.config = config
+        self._detector = detector
+        self._owns_executor = executor is None
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._tasks = set()
+        self._in_flight = 0
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+
+    @property
+    def detector(self):
+        """Detector whose batch_detect() scores the batches."""
+        if self._detector is None:
+            with self._lock:
+                if self._detector is None:
+                    self._detector = _default_detector()
+        return self._detector
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        """Bind to the running loop and start the collector task"""
+        if self._loop is loop and self._collector is not None:
+            return
+        if self._loop is not None and self._loop is not loop:
+            if not self._loop.is_closed():
+                raise RuntimeError(
+                    "AsyncBatchProcessor is already running on another event loop"
+                )
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.config.max_workers,
+                thread_name_prefix="anomaly-score",
+            )
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=max(1, self.config.max_queue_size))
+        self._slots = asyncio.Semaphore(self.config.max_workers)
+        self._in_flight = 0
+        self._collector = loop.create_task(self._collector_loop())
+        logger.info("✅ Async batch processor started")
+
+    async def stop(self):
+        """Stop the collector, finish running batches and cancel queued ones"""
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        await asyncio.gather(self._collector, return_exceptions=True)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait()[3].cancel()
+        self._collector = None
+        self._loop = None
+        self.close()
+        logger.info("✅ Async batch processor stopped")
+
+    def close(self):
+        """Release the scoring threads if this processor created them"""
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def _collector_loop(self):
+        """Form batches whenever a scoring slot is free"""
+        while True:
+            await self._slots.acquire()
             try:
-                result_request_id, result = self.results_queue.get_nowait()
-                if result_request_id == request_id:
-                    return result
-                else:
-                    # Put back other results
-                    self.results_queue.put((result_request_id, result))
-            except queue.Empty:
-                time.sleep(0.01)
-        return None
+                batch = await self._get_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            self._in_flight += 1
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _get_batch(self) -> List[BatchItem]:
+        """Wait for a request and gather whatever else is queued"""
+        first = await self._queue.get()
+        batch = [first]
+        max_size = max(1, self.config.batch_size)
+
+        def drain():
+            while len(batch) < max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+        drain()
+        # Other batches in flight means requests are arriving concurrently;
+        # give a few more the chance to share this model call
+        if len(batch) < max_size and self._in_flight > 0:
+            remaining = first[2] + self.config.max_linger - time.perf_counter()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                drain()
+
+        dispatched_at = time.perf_counter()
+        BATCH_SIZE.observe(len(batch))
+        for _, _, enqueued_at, _ in batch:
+            BATCH_QUEUE_WAIT.observe(dispatched_at - enqueued_at)
+        return batch
+
+    async def _run_batch(self, batch: List[BatchItem]):
+        """Score one batch on the executor and free its slot"""
+        try:
+            # Skip requests whose callers were cancelled while queued
+            batch = [item for item in batch if not item[3].done()]
+            if not batch:
+                return
+            try:
+                results = await self._loop.run_in_executor(
+                    self.executor,
+                    self.detector.batch_detect,
+                    [item[1] for item in batch],
+                )
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"Detector returned {len(results)} results "
+                        f"for {len(batch)} items"
+                    )
+                self._batches += 1
+                self._items += len(batch)
+            except Exception as e:
+                logger.error(f"Async batch processing error: {e}")
+                results = [{"status": "error", "error": str(e)} for _ in batch]
+
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def detect(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score one metrics sample as part of the next batch.
+
+        Returns the detector's result for the sample. If the batch does not
+        complete within batch_timeout the sample is scored on its own.
+
+        Raises:
+            BatchQueueFullError: The queue stayed full for batch_timeout
+        """
+        loop = asyncio.get_running_loop()
+        self._start(loop)
+        future = loop.create_future()
+        item = (uuid.uuid4().hex, data, time.perf_counter(), future)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), self.config.batch_timeout)
+            except asyncio.TimeoutError:
+                self._rejected += 1
+                raise BatchQueueFullError(
+                    f"Anomaly batch queue full ({self._queue.maxsize} requests)"
+                ) from None
+
+        try:
+            return await asyncio.wait_for(future, self.config.batch_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Async batch timeout for {item[0]}, scoring alone")
+            return await loop.run_in_executor(
+                self.executor, self.detector.detect_anomaly, data
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        return {
+            "running": self._collector is not None and not self._collector.done(),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+            "max_queue_size": self.config.max_queue_size,
+        }
 
 
 class OptimizedAnomalyDetector:
     """Optimized anomaly detection system"""
 
-    def __init__(self, config: Optional[AnomalyConfig] = None):
+    def __init__(self, config: Optional[AnomalyConfig] = None, detector=None):
         self.config = config or AnomalyConfig()
         self.cache = get_redis_cache()
+        # One ML detector shared by the sync and async paths
+        self.detector = detector if detector is not None else _default_detector()
         self.batch_processor = (
-            BatchProcessor(self.config) if self.config.enable_batching else None
+            BatchProcessor(self.config, self.detector)
+            if self.config.enable_batching
+            else None
         )
+        # Without batching, async requests are still scored one at a time on
+        # the bounded executor rather than the event loop's default one
+        async_config = (
+            self.config
+            if self.config.enable_batching
+            else replace(self.config, batch_size=1)
+        )
+        self.async_batcher = AsyncBatchProcessor(async_config, self.detector)
         self.model_version = f"v1-{int(time.time())}"
         self._lock = threading.RLock()
 
@@ -270,60 +621,75 @@ class OptimizedAnomalyDetector:
     async def detect_anomaly_async(
         self, data: Dict[str, Any], use_cache: bool = True
     ) -> AnomalyResult:
-        """Detect anomaly asynchronously"""
+        """
+        Detect anomaly asynchronously.
+
+        Scoring goes through the async batcher and its bounded executor; cache
+        lookups run in a worker thread so Redis round trips never block the
+        event loop.
+
+        Raises:
+            BatchQueueFullError: Too many detections already queued
+        """
         if not self.config.enable_async:
             return self.detect_anomaly(data, use_cache)
 
-        # Run in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.detect_anomaly, data, use_cache)
+        start_time = time.time()
+        use_cache = use_cache and self.config.enable_caching and self.cache
+        cache_key = self._generate_cache_key(data)
 
-    def _detect_anomaly_batch(self, data: Dict[str, Any]) -> AnomalyResult:
-        """Detect anomaly using batch processing"""
-        request_id = self._generate_request_id(data)
+        if use_cache:
+            cached_result = await asyncio.to_thread(
+                self.cache.get, cache_key, "anomaly_predictions"
+            )
+            if cached_result:
+                return AnomalyResult(**cached_result)
 
-        # Submit to batch processor
-        self.batch_processor.submit(request_id, data)
+        result = self._to_anomaly_result(await self.async_batcher.detect(data), data)
+        result.processing_time = time.time() - start_time
 
-        # Wait for result
-        result = self.batch_processor.get_result(request_id)
-        if result:
-            return result
+        if use_cache:
+            await asyncio.to_thread(
+                self.cache.set,
+                cache_key,
+                asdict(result),
+                self.config.prediction_ttl,
+                "anomaly_predictions",
+            )
 
-        # Fallback to sync processing if batch times out
-        logger.warning(
-            f"Batch processing timeout for {request_id}, falling back to sync"
-        )
-        return self._detect_anomaly_sync(data)
+        return result
+
+    def _detect_anomaly_batch(self, data: Dict[str, Any]) -> AnomalyResult:
+        """Detect anomaly using batch processing"""
+        return self._to_anomaly_result(self.batch_processor.detect(data), data)
 
     def _detect_anomaly_sync(self, data: Dict[str, Any]) -> AnomalyResult:
         """Detect anomaly synchronously"""
-        # Extract features
-        features = self._extract_features(data)
-
-        # Simple threshold-based detection (placeholder)
-        # In production, this would use a trained ML model
-        cpu_usage = features.get("cpu_usage", 0.0)
-        memory_usage = features.get("memory_usage", 0.0)
-        disk_usage = features.get("disk_usage", 0.0)
-        network_usage = features.get("network_usage", 0.0)
-
-        # Calculate anomaly score
-        score = (cpu_usage + memory_usage + disk_usage + network_usage) / 400.0
+        return self._to_anomaly_result(self.detector.detect_anomaly(data), data)
 
-        # Determine if anomaly
-        is_anomaly = score > 0.8 or cpu_usage > 90.0 or memory_usage > 90.0
-
-        # Calculate confidence
-        confidence = min(score, 1.0)
+    def _to_anomaly_result(
+        self, result: Dict[str, Any], data: Dict[str, Any]
+    ) -> AnomalyResult:
+        """Convert an AnomalyDetector result into an AnomalyResult"""
+        if result.get("status") != "success":
+            logger.warning(f"Anomaly detection failed: {result.get('error')}")
+            return AnomalyResult(
+                is_anomaly=False,
+                confidence=0.0,
+                score=0.0,
+                features={},
+                timestamp=datetime.now(timezone.utc),
+                model_version="error",
+                processing_time=0.0,
+            )
 
         return AnomalyResult(
-            is_anomaly=is_anomaly,
-            confidence=confidence,
-            score=score,
-            features=features,
+            is_anomaly=bool(result["is_anomaly"]),
+            confidence=float(result["confidence"]),
+            score=float(result["anomaly_score"]),
+            features=self._extract_features(data),
             timestamp=datetime.now(timezone.utc),
-            model_version=self.model_version,
+            model_version=result.get("bundle_version") or self.model_version,
             processing_time=0.0,  # Will be set by caller
         )
 
@@ -371,6 +737,10 @@ class OptimizedAnomalyDetector:
         if self.cache:
             stats["cache_stats"] = self.cache.get_stats()
 
+        if self.batch_processor:
+            stats["batch_stats"] = self.batch_processor.get_stats()
+        stats["async_batch_stats"] = self.async_batcher.get_stats()
+
         return stats
 
     def update_model(self, new_model_data: Dict[str, Any]):
@@ -383,6 +753,7 @@ class OptimizedAnomalyDetector:
         """Shutdown the detector"""
         if self.batch_processor:
             self.batch_processor.stop()
+        self.async_batcher.close()
         logger.info("✅ Anomaly detector shutdown")
 
 
@@ -4,17 +4,39 @@ Phase 2C Week 1: Performance & Scaling - Caching System
 """
 
 import hashlib
+import heapq
+import itertools
 import json
 import logging
+import os
 import pickle
 import threading
 import time
+import uuid
 from collections import OrderedDict
 from contextlib import contextmanager
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Union
 
-logger = logging.getLogger
+logger = logging.getLogger(__name__)
+
+# Shards only pay off once each one holds enough entries for LRU order to
+# mean something; smaller caches keep a single shard and exact LRU order
+MIN_SHARD_SIZE = 64
+MAX_SHARDS = 16
+
+# Expired entries dropped per operation, so one access never pays for a
+# large batch of expirations at once
+EXPIRY_BATCH = 32
+
+# Redis pub/sub channel MultiLevelCache workers use to drop each other's
+# L1 copies of changed keys, and the resubscribe backoff bounds in seconds
+DEFAULT_INVALIDATION_CHANNEL = "smartcloudops:cache:invalidate"
+INVALIDATION_RETRY_MIN = 0.5
+INVALIDATION_RETRY_MAX = 30.0
+# How long the listener blocks waiting for a message before checking
+# whether it has been closed
+INVALIDATION_POLL_INTERVAL = 0.25
 
 
 class CacheStats:
@@ -101,115 +123,317 @@ class CacheEntry:
         return time.time() - self.created_at
 
 
+class _LRUShard:
+    """
+    One lock's worth of an LRUCache
+
+    Entries are kept in LRU order in an OrderedDict. Entries with a TTL are
+    also pushed on a heap ordered by expiry time, so expired entries are
+    found in O(log n) each instead of by scanning the shard. Heap items for
+    overwritten or deleted entries are skipped when they surface. Counters
+    are plain ints updated under the shard lock, which every operation
+    already holds.
+    """
+
+    __slots__ = (
+        "max_size",
+        "entries",
+        "expiry_heap",
+        "lock",
+        "hits",
+        "misses",
+        "sets",
+        "deletes",
+        "evictions",
+        "total_size",
+    )
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.expiry_heap: List[tuple] = []
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.evictions = 0
+        self.total_size = 0
+
+    def expire(self, now: float, limit: int = EXPIRY_BATCH):
+        """Drop up to limit entries whose expiry time has passed"""
+        heap = self.expiry_heap
+        while heap and limit > 0 and heap[0][0] < now:
+            _, _, key, entry = heapq.heappop(heap)
+            if self.entries.get(key) is entry:
+                del self.entries[key]
+                self.evictions += 1
+                self.total_size = max(0, self.total_size - entry.size)
+                limit -= 1
+        # Items for replaced entries only leave the heap when they expire
+        if len(heap) > 2 * len(self.entries) + EXPIRY_BATCH:
+            self.expiry_heap = [
+                item for item in heap if self.entries.get(item[2]) is item[3]
+            ]
+            heapq.heapify(self.expiry_heap)
+
+    def remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_size = max(0, self.total_size - entry.size)
+        return entry
+
+
+class LRUCacheStats:
+    "Cache statistics summed over an LRUCache's shards"
+
+    def __init__(self, cache: "LRUCache"):
+        self._cache = cache
+
+    def _total(self, name: str) -> int:
+        return sum(getattr(shard, name) for shard in self._cache._shards)
+
+    @property
+    def hits(self) -> int:
+        return self._total("hits")
+
+    @property
+    def misses(self) -> int:
+        return self._total("misses")
+
+    @property
+    def sets(self) -> int:
+        return self._total("sets")
+
+    @property
+    def deletes(self) -> int:
+        return self._total("deletes")
+
+    @property
+    def evictions(self) -> int:
+        return self._total("evictions")
+
+    @property
+    def total_size(self) -> int:
+        return self._total("total_size")
+
+    @property
+    def start_time(self) -> float:
+        return self._cache._stats_start
+
+    @property
+    def hit_rate(self) -> float:
+        hits, misses = self.hits, self.misses
+        total = hits + misses
+        return hits / total if total > 0 else 0.0
+
+    @property
+    def uptime(self) -> float:
+        return time.time() - self.start_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "sets": self.sets,
+            "deletes": self.deletes,
+            "evictions": self.evictions,
+            "total_size": self.total_size,
+            "uptime": self.uptime,
+            "shards": len(self._cache._shards),
+        }
+
+
 class LRUCache:
-    "Thread-safe LRU Cache with TTL support"
+    """
+    Thread-safe LRU Cache with TTL support
+
+    Keys are spread over shards by hash, each with its own lock, LRU order
+    and share of max_size, so threads working on different keys rarely
+    contend. Caches too small to give every shard MIN_SHARD_SIZE entries
+    use one shard and keep exact LRU order. Expired entries are removed
+    lazily from a per-shard expiry heap, a bounded number per operation.
+    """
 
-    def __init__(self, max_size: int = 1000, default_ttl: Optional[float] = None):
+    def __init__(
+        self,
+        max_size: int = 1000,
+        default_ttl: Optional[float] = None,
+        num_shards: Optional[int] = None,
+    ):
         self.max_size = max_size
         self.default_ttl = default_ttl
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self._lock = threading.RLock()
-        self.stats = CacheStats()
-
-    def _evict_expired(self):
-        "Remove expired entries"
-        current_time = time.time()
-        expired_keys = [
-            key
-            for key, entry in self._cache.items()
-            if entry.expires_at and current_time > entry.expires_at
+        if num_shards is None:
+            num_shards = min(MAX_SHARDS, max(1, max_size // MIN_SHARD_SIZE))
+        num_shards = max(1, min(num_shards, max_size))
+        # Spread max_size so the shard capacities add up to it exactly
+        self._shards = [
+            _LRUShard(max_size // num_shards + (index < max_size % num_shards))
+            for index in range(num_shards)
         ]
+        self._sequence = itertools.count()
+        self._stats_start = time.time()
+        self.stats = LRUCacheStats(self)
 
-        for key in expired_keys:
-            entry = self._cache.pop(key, None)
-            if entry:
-                self.stats.record_eviction(entry.size)
-
-    def _evict_lru(self):
-        "Remove least recently used entry"
-        if self._cache:
-            key, entry = self._cache.popitem(last=False)
-            self.stats.record_eviction(entry.size)
+    def _shard(self, key: str) -> _LRUShard:
+        shards = self._shards
+        return shards[hash(key) % len(shards)] if len(shards) > 1 else shards[0]
 
     def get(self, key: str) -> Optional[Any]:
-        with self._lock:
-            self._evict_expired()
-
-            if key not in self._cache:
-                self.stats.record_miss()
+        shard = self._shard(key)
+        now = time.time()
+        with shard.lock:
+            shard.expire(now)
+
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
                 return None
 
-            entry = self._cache[key]
-            if entry.is_expired():
-                del self._cache[key]
-                self.stats.record_eviction(entry.size)
-                self.stats.record_miss()
+            if entry.expires_at is not None and now > entry.expires_at:
+                shard.remove(key)
+                shard.evictions += 1
+                shard.misses += 1
                 return None
 
             # Move to end (most recently used)
-            self._cache.move_to_end(key)
-            self.stats.record_hit()
+            shard.entries.move_to_end(key)
+            shard.hits += 1
             return entry.access()
 
     def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
-        with self._lock:
-            # Calculate approximate size
-            try:
-                size = len(pickle.dumps(value))
-            except (TypeError, AttributeError, ImportError):
-                size = len(str(value))
+        # Calculate approximate size before taking the lock
+        try:
+            size = len(pickle.dumps(value))
+        except (TypeError, AttributeError, ImportError, pickle.PicklingError):
+            size = len(str(value))
+
+        entry_ttl = ttl if ttl is not None else self.default_ttl
+        entry = CacheEntry(value, entry_ttl, size)
+        shard = self._shard(key)
+        with shard.lock:
+            shard.expire(entry.created_at)
 
             # Remove existing entry if present
-            if key in self._cache:
-                old_entry = self._cache[key]
-                self.stats.record_delete(old_entry.size)
+            if shard.remove(key) is not None:
+                shard.deletes += 1
 
             # Evict if at capacity
-            while len(self._cache) >= self.max_size:
-                self._evict_lru()
+            while shard.entries and len(shard.entries) >= shard.max_size:
+                _, evicted = shard.entries.popitem(last=False)
+                shard.evictions += 1
+                shard.total_size = max(0, shard.total_size - evicted.size)
 
             # Add new entry
-            entry_ttl = ttl if ttl is not None else self.default_ttl
-            entry = CacheEntry(value, entry_ttl, size)
-            self._cache[key] = entry
-            self.stats.record_set(size)
+            shard.entries[key] = entry
+            if entry.expires_at is not None:
+                heapq.heappush(
+                    shard.expiry_heap,
+                    (entry.expires_at, next(self._sequence), key, entry),
+                )
+            shard.sets += 1
+            shard.total_size += size
 
     def delete(self, key: str) -> bool:
-        with self._lock:
-            if key in self._cache:
-                entry = self._cache.pop(key)
-                self.stats.record_delete(entry.size)
+        shard = self._shard(key)
+        with shard.lock:
+            if shard.remove(key) is not None:
+                shard.deletes += 1
                 return True
             return False
 
     def clear(self):
-        with self._lock:
-            self._cache.clear()
-            self.stats = CacheStats()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.expiry_heap = []
+                shard.reset_stats()
+        self._stats_start = time.time()
 
     def size(self) -> int:
-        with self._lock:
-            return len(self._cache)
+        return sum(len(shard.entries) for shard in self._shards)
 
     def keys(self) -> List[str]:
-        with self._lock:
-            return list(self._cache.keys())
+        keys = []
+        for shard in self._shards:
+            with shard.lock:
+                keys.extend(shard.entries)
+        return keys
 
 
 class MultiLevelCache:
-    "Multi-level cache with L1 (memory) and L2 (optional) storage"
+    """
+    Multi-level cache with L1 (memory) and L2 (optional) storage
+
+    When L2 is a Redis client, every set and delete is broadcast on
+    invalidation_channel and each worker drops its L1 copy of the key, so
+    L1 entries stay coherent across processes and l1_ttl can be long.
+    Pub/sub delivery is not guaranteed across disconnects, so L1 is
+    emptied whenever the subscription is (re)established; while it is
+    down, L2 reads are not promoted to L1. The listener thread belongs to
+    the process that started it, so a forked worker (gunicorn preload_app)
+    starts its own on first use.
+    """
 
     def __init__(
         self,
         l1_size: int = 1000,
         l1_ttl: Optional[float] = 300,  # 5 minutes
         l2_cache: Optional[Any] = None,
+        invalidation_channel: Optional[str] = DEFAULT_INVALIDATION_CHANNEL,
     ):
         self.l1 = LRUCache(l1_size, l1_ttl)
         self.l2 = l2_cache
         self.stats = CacheStats()
 
+        # Tells our own broadcasts apart from other workers'
+        self.node_id = uuid.uuid4().hex
+        self.invalidation_channel = invalidation_channel
+        self.invalidations_received = 0
+        # Bumped on every invalidation; an L2 read racing one isn't promoted
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        self._subscribed = threading.Event()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._listener_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._invalidation_enabled = bool(
+            invalidation_channel and hasattr(l2_cache, "pubsub")
+        )
+
+        self._ensure_listener()
+
+    @property
+    def invalidation_enabled(self) -> bool:
+        return self._invalidation_enabled
+
+    def _ensure_listener(self):
+        """Start the invalidation listener in this process if it isn't running"""
+        if not self._invalidation_enabled or self._pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._pid == os.getpid() or self._stop.is_set():
+                return
+            if self._pid is not None:
+                # Threads do not survive a fork: the parent's listener and
+                # subscription are gone here, and its locks may be held
+                self._generation_lock = threading.Lock()
+                self._subscribed = threading.Event()
+                self._stop = threading.Event()
+            self._pid = os.getpid()
+            self._listener = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._listener.start()
+
     def get(self, key: str) -> Optional[Any]:
+        self._ensure_listener()
+
         # Try L1 cache first
         value = self.l1.get(key)
         if value is not None:
@@ -217,12 +441,20 @@ class MultiLevelCache:
             return value
 
         # Try L2 cache if available
-        if self.l2:
+        if self.l2 is not None:
+            generation = self._generation
             try:
                 value = self.l2.get(key)
+                if isinstance(value, (bytes, bytearray)):
+                    value = pickle.loads(value)
                 if value is not None:
-                    # Promote to L1
-                    self.l1.set(key, value)
+                    # Promote to L1, unless the key may have changed since
+                    if self._can_promote(generation):
+                        self.l1.set(key, value)
+                        # An invalidation landing between the check and the
+                        # set may have been applied before the stale copy
+                        if not self._can_promote(generation):
+                            self.l1.delete(key)
                     self.stats.record_hit()
                     return value
             except Exception as e:
@@ -232,11 +464,15 @@ class MultiLevelCache:
         return None
 
     def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._ensure_listener()
+        # Reads of the old value still in flight must not promote it
+        self._bump_generation()
+
         # Set in L1
         self.l1.set(key, value, ttl)
 
         # Set in L2 if available
-        if self.l2:
+        if self.l2 is not None:
             try:
                 if hasattr(self.l2, "setex") and ttl:
                     self.l2.setex(key, int(ttl), pickle.dumps(value))
@@ -244,9 +480,105 @@ class MultiLevelCache:
                     self.l2.set(key, pickle.dumps(value))
             except Exception as e:
                 logger.warning(f"L2 cache error: {e}")
+            self._publish({"keys": [key]})
 
         self.stats.record_set()
 
+    def delete(self, key: str) -> bool:
+        self._ensure_listener()
+        self._bump_generation()
+        deleted = self.l1.delete(key)
+
+        if self.l2 is not None:
+            try:
+                deleted = bool(self.l2.delete(key)) or deleted
+            except Exception as e:
+                logger.warning(f"L2 cache error: {e}")
+            self._publish({"keys": [key]})
+
+        if deleted:
+            self.stats.record_delete()
+        return deleted
+
+    def clear(self):
+        """Empty L1 here and in every other worker; L2 is left alone"""
+        self._ensure_listener()
+        self.l1.clear()
+        if self.l2 is not None:
+            self._publish({"clear": True})
+
+    def close(self):
+        """Stop listening for invalidations"""
+        with self._listener_lock:
+            self._stop.set()
+            listener = self._listener if self._pid == os.getpid() else None
+        if listener is not None:
+            listener.join(timeout=5)
+
+    def _bump_generation(self):
+        with self._generation_lock:
+            self._generation += 1
+
+    def _can_promote(self, generation: int) -> bool:
+        if self.invalidation_enabled and not self._subscribed.is_set():
+            return False
+        return generation == self._generation
+
+    def _publish(self, message: Dict[str, Any]):
+        if not self.invalidation_enabled:
+            return
+        try:
+            self.l2.publish(
+                self.invalidation_channel,
+                json.dumps({"origin": self.node_id, **message}),
+            )
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish error: {e}")
+
+    def _handle_invalidation(self, data: Union[bytes, str]):
+        message = json.loads(data)
+        if message.get("origin") == self.node_id:
+            return
+
+        self._bump_generation()
+        self.invalidations_received += 1
+        if message.get("clear"):
+            self.l1.clear()
+        for key in message.get("keys", ()):
+            self.l1.delete(key)
+
+    def _listen(self):
+        retry_delay = INVALIDATION_RETRY_MIN
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.l2.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                # Anything published while we weren't subscribed is lost
+                self.l1.clear()
+                self._subscribed.set()
+                retry_delay = INVALIDATION_RETRY_MIN
+
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=INVALIDATION_POLL_INTERVAL)
+                    if message and message.get("type") == "message":
+                        try:
+                            self._handle_invalidation(message["data"])
+                        except (ValueError, TypeError) as e:
+                            logger.warning(f"Bad cache invalidation message: {e}")
+
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription error: {e}")
+                self._stop.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, INVALIDATION_RETRY_MAX)
+            finally:
+                self._subscribed.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
 
 class CacheManager:
     "Global cache manager with multiple cache instances"
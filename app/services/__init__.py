@@ -2,20 +2,35 @@
 """
 Service Layer for Smart CloudOps AI
 Business logic layer that sits between API endpoints and data models
+
+Services are imported from their modules on first access, so importing one
+service does not pull in the dependencies of all the others.
 """
 
-from .ai_service import AIService
-from .anomaly_service import AnomalyService
-from .feedback_service import FeedbackService
-from .ml_service import MLService
-from .mlops_service import MLOpsService
-from .remediation_service import RemediationService
-
-__all__ = [
-    "AnomalyService",
-    "RemediationService",
-    "FeedbackService",
-    "AIService",
-    "MLService",
-    "MLOpsService",
-]
+import importlib
+
+# Public name -> submodule defining it
+_LAZY_EXPORTS = {
+    "AnomalyService": ".anomaly_service",
+    "RemediationService": ".remediation_service",
+    "FeedbackService": ".feedback_service",
+    "AIService": ".ai_service",
+    "MLService": ".ml_service",
+    "MLOpsService": ".mlops_service",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache it so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,6 +4,7 @@ MLOpsService - Business logic for MLOps operations
 Phase 2A: MLOps integration with service layer pattern
 """
 
+import importlib.util
 import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
@@ -26,10 +27,12 @@ try:
 except ImportError:
     MODEL_REGISTRY_AVAILABLE = False
 
+# The data pipeline imports pandas, so it is only located here and imported
+# the first time MLOpsService.data_pipeline is used
 try:
-    from app.mlops.data_pipeline import get_data_pipeline_manager
-
-    DATA_PIPELINE_AVAILABLE = True
+    DATA_PIPELINE_AVAILABLE = (
+        importlib.util.find_spec("app.mlops.data_pipeline") is not None
+    )
 except ImportError:
     DATA_PIPELINE_AVAILABLE = False
 
@@ -51,7 +54,8 @@ class MLOpsService:
         # Initialize available components
         self.experiment_tracker = None
         self.model_registry = None
-        self.data_pipeline = None
+        self._data_pipeline = None
+        self._data_pipeline_loaded = not DATA_PIPELINE_AVAILABLE
         self._mlflow_manager = None
 
         if EXPERIMENT_TRACKER_AVAILABLE:
@@ -60,9 +64,6 @@ class MLOpsService:
         if MODEL_REGISTRY_AVAILABLE:
             self.model_registry = get_model_registry()
 
-        if DATA_PIPELINE_AVAILABLE:
-            self.data_pipeline = get_data_pipeline_manager()
-
         # Lazy initialization for MLflow manager
         self._mlflow_manager = None
 
@@ -132,6 +133,25 @@ class MLOpsService:
                 self._mlflow_manager = None
         return self._mlflow_manager
 
+    @property
+    def data_pipeline(self):
+        """Lazy initialization of the data pipeline, which imports pandas."""
+        if not self._data_pipeline_loaded:
+            self._data_pipeline_loaded = True
+            try:
+                from app.mlops.data_pipeline import get_data_pipeline_manager
+
+                self._data_pipeline = get_data_pipeline_manager()
+            except Exception as e:
+                logger.warning(f"Failed to initialize data pipeline: {e}")
+                self._data_pipeline = None
+        return self._data_pipeline
+
+    @data_pipeline.setter
+    def data_pipeline(self, value):
+        self._data_pipeline = value
+        self._data_pipeline_loaded = True
+
     # ===== EXPERIMENT MANAGEMENT =====
 
     def get_experiments(
@@ -16,11 +16,18 @@ from enum import Enum
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Union
 
+from .early_refresh import RecomputeCosts, should_refresh_early
 from .multi_tier_cache import CacheLevel, MultiTierCache, get_multi_tier_cache
-from .redis_cache import get_redis_cache
+from .redis_cache import RedisCache, get_redis_cache
+from .single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# A refresh lease outlives the expected recompute by this factor, and is
+# never shorter than REFRESH_LEASE_MIN seconds
+REFRESH_LEASE_FACTOR = 4
+REFRESH_LEASE_MIN = 5
+
 
 class CacheStrategy(Enum):
     """Cache invalidation and refresh strategies"""
@@ -56,7 +63,8 @@ class CachePolicy:
     tags: List[CacheTag] = None  # Content tags
     compress: bool = False  # Enable compression
     serializer: str = "json"  # Serialization method
-    refresh_ahead_ratio: float = 0.8  # Refresh when TTL reaches this ratio
+    refresh_ahead_ratio: float = 0.8  # Earliest refresh, as a ratio of TTL
+    xfetch_beta: float = 1.0  # >1 refreshes earlier, <1 later
     max_size: Optional[int] = None  # Maximum cache size for this policy
 
     def __post_init__(self):
@@ -67,14 +75,27 @@ class CachePolicy:
 class CacheManager:
     """Centralized cache management system"""
 
-    def __init__(self):
-        self.multi_tier_cache = get_multi_tier_cache()
-        self.redis_cache = get_redis_cache()
+    def __init__(
+        self,
+        multi_tier_cache: Optional[MultiTierCache] = None,
+        redis_cache: Optional[RedisCache] = None,
+    ):
+        # The global caches by default; a given Redis cache gets its own
+        # multi-tier cache in front of it
+        if redis_cache is None:
+            redis_cache = get_redis_cache()
+            if multi_tier_cache is None:
+                multi_tier_cache = get_multi_tier_cache()
+        elif multi_tier_cache is None:
+            multi_tier_cache = MultiTierCache(redis_cache=redis_cache)
+        self.redis_cache = redis_cache
+        self.multi_tier_cache = multi_tier_cache
 
         # Cache policies by namespace
         self.policies: Dict[str, CachePolicy] = {}
 
-        # Tag-based invalidation tracking
+        # Tag-based invalidation tracking for this process; membership is
+        # also kept in Redis sets so every worker can invalidate a tag
         self.tag_keys: Dict[CacheTag, set] = {tag: set() for tag in CacheTag}
 
         # Background refresh tracking
@@ -93,11 +114,18 @@ class CacheManager:
             "deletes": 0,
             "invalidations": 0,
             "refreshes": 0,
+            "refreshes_leased_elsewhere": 0,
             "errors": 0,
         }
 
         self._lock = threading.RLock()
 
+        # Concurrent misses on one key share a single fetch
+        self._single_flight = SingleFlight()
+
+        # Measured fetch durations, weighting early refreshes
+        self._recompute_costs = RecomputeCosts()
+
         # Initialize default policies
         self._setup_default_policies()
 
@@ -189,48 +217,65 @@ class CacheManager:
         fetch_func: Optional[Callable] = None,
         policy: Optional[CachePolicy] = None,
     ) -> Any:
-        """Get value with intelligent caching strategy"""
+        """
+        Get value with intelligent caching strategy
+
+        No lock is held while the fetch function runs. Concurrent misses on
+        the same key wait for one fetch and share its result; misses on
+        different keys fetch in parallel.
+        """
         start_time = time.time()
 
         with self._lock:
             self.operation_stats["gets"] += 1
 
-            try:
-                # Get applicable policy
-                if policy is None:
-                    policy = self.get_policy(key)
+        # Tells a caller that ran a failed fetch from one that waited on it
+        fetched_here = []
+        joined_flight = False
+        try:
+            # Get applicable policy
+            if policy is None:
+                policy = self.get_policy(key)
 
-                # Try cache first
-                value = self.multi_tier_cache.get(key)
+            # Try cache first
+            value = self.multi_tier_cache.get(key, policy.target_level)
 
-                if value is not None:
-                    # Check if refresh ahead is needed
-                    self._check_refresh_ahead(key, policy, fetch_func)
-                    return value
+            if value is not None:
+                # Check if refresh ahead is needed
+                self._check_refresh_ahead(key, policy, fetch_func)
+                return value
+
+            # Cache miss - handle based on strategy
+            if policy.strategy in [
+                CacheStrategy.READ_THROUGH,
+                CacheStrategy.CACHE_ASIDE,
+            ]:
+                if fetch_func:
+
+                    def fetch():
+                        fetched_here.append(True)
+                        return self._fetch_and_cache(key, fetch_func, policy)
 
-                # Cache miss - handle based on strategy
-                if policy.strategy in [
-                    CacheStrategy.READ_THROUGH,
-                    CacheStrategy.CACHE_ASIDE,
-                ]:
-                    if fetch_func:
-                        value = self._fetch_and_cache(key, fetch_func, policy)
-                        return value
+                    joined_flight = True
+                    value, _ = self._single_flight.do(key, fetch)
+                    return value
 
-                return None
+            return None
 
-            except Exception as e:
-                logger.error(f"Cache get error for key {key}: {e}")
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            with self._lock:
                 self.operation_stats["errors"] += 1
 
-                # Fallback to fetch function if available
-                if fetch_func:
-                    try:
-                        return fetch_func()
-                    except Exception:
-                        pass
+            # Fallback to fetch function if available; callers that waited
+            # on a failed fetch don't retry it all at once
+            if fetch_func and (fetched_here or not joined_flight):
+                try:
+                    return fetch_func()
+                except Exception:
+                    pass
 
-                return None
+            return None
 
     def set(
         self,
@@ -282,6 +327,7 @@ class CacheManager:
                 # Update tag tracking
                 if success:
                     self._update_tag_tracking(key, policy.tags)
+                    self._record_tags([key], policy)
 
                 return success
 
@@ -296,6 +342,10 @@ class CacheManager:
             self.operation_stats["deletes"] += 1
 
             try:
+                # A fetch in flight may have read the old value; don't let
+                # later readers join it
+                self._single_flight.forget(key)
+
                 # Remove from cache
                 success = self.multi_tier_cache.delete(key)
 
@@ -314,18 +364,50 @@ class CacheManager:
                 self.operation_stats["errors"] += 1
                 return False
 
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Delete several keys from cache
+
+        Bookkeeping for the whole batch is done under one lock acquisition,
+        and Redis is cleared with one round trip.
+
+        Returns:
+            number of keys that were deleted
+        """
+        with self._lock:
+            self.operation_stats["deletes"] += len(keys)
+
+            for key in keys:
+                self._single_flight.forget(key)
+                self._remove_from_tag_tracking(key)
+
+                task = self.refresh_tasks.pop(key, None)
+                if task is not None:
+                    task.cancel()
+
+            try:
+                return self.multi_tier_cache.delete_many(keys)
+            except Exception as e:
+                logger.error(f"Cache delete error for keys {keys[:5]}: {e}")
+                self.operation_stats["errors"] += 1
+                return 0
+
     def invalidate_by_tag(self, tag: CacheTag) -> int:
         """Invalidate all cache entries with specific tag"""
         with self._lock:
             self.operation_stats["invalidations"] += 1
 
             try:
-                keys_to_invalidate = self.tag_keys[tag].copy()
-                invalidated = 0
+                keys = set(self.tag_keys[tag])
+                if self.redis_cache:
+                    # Include entries tagged by other workers and nodes
+                    keys.update(self.redis_cache.tag_members(tag.value))
 
-                for key in keys_to_invalidate:
-                    if self.delete(key):
-                        invalidated += 1
+                invalidated = self.delete_many(list(keys))
+
+                if self.redis_cache:
+                    # Sweep entries tagged since the members were read
+                    invalidated += self.redis_cache.invalidate_tag(tag.value)
 
                 logger.info(f"Invalidated {invalidated} keys with tag: {tag.value}")
                 return invalidated
@@ -359,18 +441,18 @@ class CacheManager:
             start_time = time.time()
 
             if keys:
-                # Warm specific keys
-                loaded = 0
+                # Warm specific keys, fetching them all before writing
+                values = {}
                 for key in keys:
                     try:
                         value = warmup_func(key)
                         if value is not None:
-                            policy = self.get_policy(key)
-                            if self._cache_set(key, value, policy):
-                                loaded += 1
+                            values[key] = value
                     except Exception as e:
                         logger.error(f"Error warming key {key}: {e}")
 
+                loaded = self._cache_set_many(values)
+
                 duration = time.time() - start_time
 
                 return {
@@ -423,6 +505,7 @@ class CacheManager:
                 "policies_count": len(self.policies),
                 "warmup_functions": list(self.warmup_functions.keys()),
                 "active_refresh_tasks": len(self.refresh_tasks),
+                "single_flight": self._single_flight.get_stats(),
             }
 
     def optimize(self) -> Dict[str, Any]:
@@ -455,15 +538,66 @@ class CacheManager:
             key=key, value=value, ttl=policy.ttl, target_level=policy.target_level
         )
 
+    def _cache_set_many(self, values: Dict[str, Any]) -> int:
+        """
+        Cache several values according to their policies
+
+        Entries whose policy targets Redis are written with one pipelined
+        round trip per TTL/serializer group instead of one per key.
+        """
+        loaded = 0
+        redis_batches: Dict[tuple, tuple] = {}
+        for key, value in values.items():
+            policy = self.get_policy(key)
+            if self.redis_cache and policy.target_level == CacheLevel.L2_REDIS:
+                group = (
+                    policy.ttl,
+                    policy.serializer,
+                    policy.compress,
+                    tuple(policy.tags),
+                )
+                redis_batches.setdefault(group, (policy, {}))[1][key] = value
+            elif self._cache_set(key, value, policy):
+                self._record_tags([key], policy)
+                with self._lock:
+                    self._update_tag_tracking(key, policy.tags)
+                loaded += 1
+
+        for policy, batch in redis_batches.values():
+            # Tags are recorded in the same pipeline as the entries
+            stored = self.redis_cache.set_many(
+                batch,
+                ttl=policy.ttl,
+                serializer=policy.serializer,
+                force_compression=policy.compress,
+                tags=[tag.value for tag in policy.tags],
+            )
+            if stored:
+                with self._lock:
+                    for key in batch:
+                        self._update_tag_tracking(key, policy.tags)
+            loaded += stored
+
+        return loaded
+
     def _fetch_and_cache(
         self, key: str, fetch_func: Callable, policy: CachePolicy
     ) -> Any:
         """Fetch data and cache according to policy"""
         try:
+            # A flight that just finished may have cached it after our miss
+            value = self.multi_tier_cache.get(key, policy.target_level)
+            if value is not None:
+                return value
+
+            started = time.perf_counter()
             value = fetch_func()
+            self._recompute_costs.record(key, time.perf_counter() - started)
             if value is not None:
                 self._cache_set(key, value, policy)
-                self._update_tag_tracking(key, policy.tags)
+                self._record_tags([key], policy)
+                with self._lock:
+                    self._update_tag_tracking(key, policy.tags)
             return value
         except Exception as e:
             logger.error(f"Fetch and cache error for key {key}: {e}")
@@ -472,7 +606,14 @@ class CacheManager:
     def _check_refresh_ahead(
         self, key: str, policy: CachePolicy, fetch_func: Optional[Callable]
     ):
-        """Check if refresh ahead is needed"""
+        """
+        Check if refresh ahead is needed
+
+        Once refresh_ahead_ratio of the TTL has passed, each hit refreshes
+        the entry with a probability that rises as expiry nears and with
+        the key's measured recompute cost (XFetch), so workers hitting a
+        hot key don't all refresh it at the same moment.
+        """
         if (
             policy.strategy == CacheStrategy.REFRESH_AHEAD
             and fetch_func
@@ -485,31 +626,68 @@ class CacheManager:
                 if ttl_remaining > 0:
                     refresh_threshold = policy.ttl * policy.refresh_ahead_ratio
 
-                    if ttl_remaining <= (policy.ttl - refresh_threshold):
+                    if ttl_remaining <= (
+                        policy.ttl - refresh_threshold
+                    ) and should_refresh_early(
+                        ttl_remaining,
+                        self._recompute_costs.get(key),
+                        policy.xfetch_beta,
+                    ):
                         # Schedule refresh if not already scheduled
-                        if key not in self.refresh_tasks:
-                            task = self.refresh_executor.submit(
-                                self._background_refresh, key, fetch_func, policy
-                            )
-                            self.refresh_tasks[key] = task
+                        with self._lock:
+                            if key not in self.refresh_tasks:
+                                task = self.refresh_executor.submit(
+                                    self._background_refresh, key, fetch_func, policy
+                                )
+                                self.refresh_tasks[key] = task
 
     def _background_refresh(self, key: str, fetch_func: Callable, policy: CachePolicy):
-        """Background refresh of cache entry"""
+        """
+        Background refresh of cache entry
+
+        Takes the key's refresh lease in Redis first; if another worker
+        holds it, or already refreshed the entry, this one skips.
+        """
+        lease = None
         try:
-            self.operation_stats["refreshes"] += 1
+            if self.redis_cache:
+                lease = self.redis_cache.acquire_lease(
+                    key,
+                    max(
+                        REFRESH_LEASE_MIN,
+                        REFRESH_LEASE_FACTOR * self._recompute_costs.get(key),
+                    ),
+                )
+                if lease is None:
+                    with self._lock:
+                        self.operation_stats["refreshes_leased_elsewhere"] += 1
+                    return
+
+                # Another worker may have refreshed it since this was queued
+                refresh_window = policy.ttl * (1 - policy.refresh_ahead_ratio)
+                if self.redis_cache.ttl(key) > refresh_window:
+                    return
 
+            with self._lock:
+                self.operation_stats["refreshes"] += 1
+
+            started = time.perf_counter()
             value = fetch_func()
+            self._recompute_costs.record(key, time.perf_counter() - started)
             if value is not None:
                 self._cache_set(key, value, policy)
                 logger.debug(f"Background refreshed key: {key}")
 
         except Exception as e:
             logger.error(f"Background refresh error for key {key}: {e}")
-            self.operation_stats["errors"] += 1
+            with self._lock:
+                self.operation_stats["errors"] += 1
         finally:
+            if lease is not None:
+                self.redis_cache.release_lease(lease)
             # Remove from tracking
-            if key in self.refresh_tasks:
-                del self.refresh_tasks[key]
+            with self._lock:
+                self.refresh_tasks.pop(key, None)
 
     def _update_tag_tracking(self, key: str, tags: List[CacheTag]):
         """Update tag-based tracking for key"""
@@ -520,6 +698,13 @@ class CacheManager:
         for tag in tags:
             self.tag_keys[tag].add(key)
 
+    def _record_tags(self, keys: List[str], policy: CachePolicy):
+        """Record tag membership in Redis, visible to every worker"""
+        if self.redis_cache and policy.tags:
+            self.redis_cache.add_tags(
+                keys, [tag.value for tag in policy.tags], ttl=policy.ttl
+            )
+
     def _remove_from_tag_tracking(self, key: str):
         """Remove key from all tag tracking"""
         for tag_keys in self.tag_keys.values():
@@ -0,0 +1,85 @@
+"""
+Probabilistic Early Refresh for Refresh-Ahead Caching
+Phase 3 Week 4: Advanced Caching Strategies - XFetch
+
+Implements the XFetch rule (Vattani et al., "Optimal Probabilistic Cache
+Stampede Prevention"): on each hit, refresh an entry early when
+
+    -cost * beta * ln(U) >= remaining TTL,    U uniform in (0, 1]
+
+where cost is how long the value takes to recompute. The chance of a
+refresh rises smoothly as expiry nears and is higher for values that are
+slow to rebuild, so hits from many workers rarely trigger at once and the
+entry is normally replaced before it expires.
+"""
+
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Cost assumed for keys whose recompute time hasn't been measured yet
+DEFAULT_RECOMPUTE_COST = 0.1
+
+# Weight of the latest measurement in the moving average of a key's cost
+COST_SMOOTHING = 0.3
+
+
+def should_refresh_early(
+    ttl_remaining: float,
+    recompute_cost: float,
+    beta: float = 1.0,
+    rand: Optional[float] = None,
+) -> bool:
+    """
+    Decide whether this hit should refresh the entry ahead of expiry
+
+    Args:
+        ttl_remaining: seconds until the entry expires
+        recompute_cost: seconds the value takes to recompute
+        beta: above 1 refreshes earlier, below 1 later
+        rand: uniform sample in [0, 1), drawn if not given
+    """
+    if ttl_remaining <= 0:
+        return True
+    if rand is None:
+        rand = random.random()
+    return -recompute_cost * beta * math.log(1.0 - rand) >= ttl_remaining
+
+
+class RecomputeCosts:
+    """
+    Moving average of how long each key takes to recompute
+
+    Holds at most max_keys keys, dropping the least recently measured.
+    """
+
+    def __init__(
+        self, max_keys: int = 10000, default_cost: float = DEFAULT_RECOMPUTE_COST
+    ):
+        self.max_keys = max_keys
+        self.default_cost = default_cost
+        self._costs: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            previous = self._costs.pop(key, None)
+            if previous is not None:
+                seconds = previous + COST_SMOOTHING * (seconds - previous)
+            self._costs[key] = seconds
+            while len(self._costs) > self.max_keys:
+                self._costs.popitem(last=False)
+
+    def get(self, key: str) -> float:
+        with self._lock:
+            return self._costs.get(key, self.default_cost)
+
+    def forget(self, key: str):
+        with self._lock:
+            self._costs.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._costs)
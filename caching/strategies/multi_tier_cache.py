@@ -0,0 +1,250 @@
+"""
+Two-Tier Cache: In-Process Memory over Redis
+Phase 3 Week 4: Advanced Caching Strategies - Multi-Tier Cache
+"""
+
+import fnmatch
+import logging
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from .redis_cache import RedisCache, get_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# Longest an entry read from Redis is kept in process memory, bounding how
+# stale a worker's copy can get after another worker changes it
+DEFAULT_PROMOTION_TTL = 60
+
+
+class CacheLevel(Enum):
+    """Cache tiers, fastest first"""
+
+    L1_MEMORY = "l1_memory"  # This process only
+    L2_REDIS = "l2_redis"  # Shared by every worker
+
+
+class MultiTierCache:
+    """
+    LRU memory cache in front of Redis
+
+    Writes and reads name a target level:
+
+    - L1_MEMORY: process memory only
+    - L2_REDIS: Redis only, so every worker sees the same value and
+      invalidations reach all of them
+    - None: both; Redis hits are copied into memory for at most
+      promotion_ttl seconds
+
+    Without Redis, everything lives in memory.
+    """
+
+    def __init__(
+        self,
+        redis_cache: Optional[RedisCache] = None,
+        max_entries: int = 10000,
+        default_ttl: int = 3600,
+        promotion_ttl: int = DEFAULT_PROMOTION_TTL,
+    ):
+        self.redis_cache = redis_cache
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.promotion_ttl = promotion_ttl
+
+        # key -> (value, expires_at, whether Redis holds the entry too)
+        self._memory: "OrderedDict[str, Tuple[Any, float, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "deletes": 0,
+            "evictions": 0,
+        }
+
+    def _levels(self, target_level: Optional[CacheLevel]) -> Tuple[bool, bool]:
+        """(use memory, use Redis) for a target level"""
+        if self.redis_cache is None:
+            return True, False
+        if target_level == CacheLevel.L1_MEMORY:
+            return True, False
+        if target_level == CacheLevel.L2_REDIS:
+            return False, True
+        return True, True
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: Any, ttl: int, shared: bool = False):
+        with self._lock:
+            self._memory[key] = (value, time.time() + ttl, shared)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def get(self, key: str, target_level: Optional[CacheLevel] = None) -> Any:
+        """Get a value, or None on a miss"""
+        use_memory, use_redis = self._levels(target_level)
+
+        if use_memory:
+            value = self._memory_get(key)
+            if value is not None:
+                with self._lock:
+                    self.metrics["l1_hits"] += 1
+                return value
+
+        if use_redis:
+            value = self.redis_cache.get(key)
+            if value is not None:
+                if use_memory:
+                    self._memory_set(key, value, self.promotion_ttl, shared=True)
+                with self._lock:
+                    self.metrics["l2_hits"] += 1
+                return value
+
+        with self._lock:
+            self.metrics["misses"] += 1
+        return None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        target_level: Optional[CacheLevel] = None,
+    ) -> bool:
+        """Store a value at the target level"""
+        ttl = ttl or self.default_ttl
+        use_memory, use_redis = self._levels(target_level)
+
+        if use_redis and not self.redis_cache.set(key, value, ttl=ttl):
+            return False
+        if use_memory:
+            self._memory_set(
+                key,
+                value,
+                min(ttl, self.promotion_ttl) if use_redis else ttl,
+                shared=use_redis,
+            )
+        elif target_level == CacheLevel.L2_REDIS:
+            # Drop a copy an earlier write left in memory
+            with self._lock:
+                self._memory.pop(key, None)
+
+        with self._lock:
+            self.metrics["sets"] += 1
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Remove a key from every level"""
+        with self._lock:
+            deleted = self._memory.pop(key, None) is not None
+            self.metrics["deletes"] += 1
+        if self.redis_cache is not None:
+            deleted = self.redis_cache.delete(key) or deleted
+        return deleted
+
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Remove several keys from every level, with one Redis round trip
+
+        Returns:
+            number of keys that were deleted; a key held in both levels
+            counts once
+        """
+        with self._lock:
+            memory_only = 0
+            for key in keys:
+                entry = self._memory.pop(key, None)
+                if entry is not None and not entry[2]:
+                    memory_only += 1
+            self.metrics["deletes"] += len(keys)
+        if self.redis_cache is None:
+            return memory_only
+        return memory_only + self.redis_cache.delete_many(keys)
+
+    def invalidate_pattern(self, pattern: str) -> int:
+        """Remove every key matching a glob pattern from every level"""
+        with self._lock:
+            matches = [key for key in self._memory if fnmatch.fnmatchcase(key, pattern)]
+            for key in matches:
+                del self._memory[key]
+        removed = len(matches)
+        if self.redis_cache is not None:
+            removed += self.redis_cache.flush(pattern)
+        return removed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit, miss and write counts"""
+        with self._lock:
+            metrics = dict(self.metrics)
+        lookups = metrics["l1_hits"] + metrics["l2_hits"] + metrics["misses"]
+        hits = metrics["l1_hits"] + metrics["l2_hits"]
+        metrics["hit_rate"] = hits / lookups if lookups else 0.0
+        return metrics
+
+    def get_cache_distribution(self) -> Dict[str, Any]:
+        """
+        Entries held in memory, and keys in the Redis database
+
+        The Redis count comes from DBSIZE, so it includes entry metadata
+        and tag sets; counting entries exactly would scan the keyspace.
+        """
+        with self._lock:
+            distribution = {CacheLevel.L1_MEMORY.value: len(self._memory)}
+        if self.redis_cache is not None:
+            try:
+                distribution[CacheLevel.L2_REDIS.value] = (
+                    self.redis_cache.client.dbsize()
+                )
+            except Exception as e:
+                logger.error(f"Error getting Redis key count: {e}")
+        return distribution
+
+    def optimize_cache(self) -> Dict[str, Any]:
+        """Drop expired memory entries"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key
+                for key, (_, expires_at, _) in self._memory.items()
+                if expires_at <= now
+            ]
+            for key in expired:
+                del self._memory[key]
+        return {"status": "success", "expired_removed": len(expired)}
+
+    def clear(self):
+        """Empty the memory level"""
+        with self._lock:
+            self._memory.clear()
+
+
+# Global multi-tier cache instance
+_multi_tier_cache = None
+_multi_tier_cache_lock = threading.Lock()
+
+
+def get_multi_tier_cache() -> MultiTierCache:
+    """Get the global multi-tier cache, over the global Redis cache"""
+    global _multi_tier_cache
+    if _multi_tier_cache is None:
+        with _multi_tier_cache_lock:
+            if _multi_tier_cache is None:
+                _multi_tier_cache = MultiTierCache(redis_cache=get_redis_cache())
+    return _multi_tier_cache
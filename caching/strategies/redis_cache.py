@@ -3,23 +3,37 @@ Redis-based Distributed Caching System
 Phase 3 Week 4: Advanced Caching Strategies - Redis Integration
 """
 
-import gzip
 import hashlib
 import json
 import logging
-import pickle
 import threading
 import time
+import uuid
 from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import redis
 
+from .serialization import CacheSerializer
+
 logger = logging.getLogger(__name__)
 
+# Tag sets share the key prefix but are never listed as cache entries
+TAG_KEY_PREFIX = "tag:"
+
 
 @dataclass
 class CacheEntry:
@@ -70,38 +84,6 @@ class CacheStats:
         return {**asdict(self), "hit_rate": self.hit_rate, "miss_rate": self.miss_rate}
 
 
-class CacheSerializer:
-    """Handle different serialization methods"""
-
-    @staticmethod
-    def serialize(value: Any, method: str = "json", compress: bool = False) -> bytes:
-        """Serialize value using specified method"""
-        if method == "json":
-            serialized = json.dumps(value, default=str).encode("utf-8")
-        elif method == "pickle":
-            serialized = pickle.dumps(value)
-        else:
-            raise ValueError(f"Unsupported serialization method: {method}")
-
-        if compress:
-            serialized = gzip.compress(serialized)
-
-        return serialized
-
-    @staticmethod
-    def deserialize(data: bytes, method: str = "json", compressed: bool = False) -> Any:
-        """Deserialize data using specified method"""
-        if compressed:
-            data = gzip.decompress(data)
-
-        if method == "json":
-            return json.loads(data.decode("utf-8"))
-        elif method == "pickle":
-            return pickle.loads(data)
-        else:
-            raise ValueError(f"Unsupported deserialization method: {method}")
-
-
 class RedisCache:
     """Advanced Redis caching implementation"""
 
@@ -116,6 +98,7 @@ class RedisCache:
         key_prefix: str = "smartcloudops:",
         compression_threshold: int = 1024,
         max_connections: int = 20,
+        scan_count: int = 500,
     ):
 
         self.host = host
@@ -124,6 +107,8 @@ class RedisCache:
         self.default_ttl = default_ttl
         self.key_prefix = key_prefix
         self.compression_threshold = compression_threshold
+        # Keys examined per SCAN call and removed per UNLINK batch
+        self.scan_count = scan_count
 
         # Create connection pool
         self.connection_pool = redis.ConnectionPool(
@@ -147,7 +132,7 @@ class RedisCache:
         self.stats_lock = threading.Lock()
 
         # Serializer
-        self.serializer = CacheSerializer()
+        self.serializer = CacheSerializer(compression_threshold=compression_threshold)
 
         # Test connection
         self._test_connection()
@@ -169,69 +154,137 @@ class RedisCache:
         """Determine if data should be compressed"""
         return len(data) > self.compression_threshold
 
-    def _update_stats(self, operation: str):
+    def _update_stats(self, operation: str, count: int = 1):
         """Update cache statistics"""
         with self.stats_lock:
             if operation == "hit":
-                self.stats.hits += 1
+                self.stats.hits += count
             elif operation == "miss":
-                self.stats.misses += 1
+                self.stats.misses += count
             elif operation == "set":
-                self.stats.sets += 1
+                self.stats.sets += count
             elif operation == "delete":
-                self.stats.deletes += 1
+                self.stats.deletes += count
             elif operation == "error":
-                self.stats.errors += 1
+                self.stats.errors += count
 
-            self.stats.total_requests += 1
+            self.stats.total_requests += count
+
+    def _encode(
+        self, value: Any, ttl: int, serializer: str, force_compression: bool
+    ) -> Tuple[bytes, str]:
+        """Serialize a value and build its metadata record"""
+        # Compression is decided by payload size unless forced
+        serialized_data = self.serializer.dumps(
+            value, serializer, compress=True if force_compression else None
+        )
+        codec, compression = self.serializer.describe(serialized_data)
+
+        metadata = {
+            "timestamp": datetime.now().isoformat(),
+            "ttl": ttl,
+            "compressed": compression is not None,
+            "compression": compression,
+            "serializer": codec,
+            "access_count": 0,
+            "size_bytes": len(serialized_data),
+        }
+        return serialized_data, json.dumps(metadata)
+
+    def _decode(
+        self, data: bytes, metadata_data: Optional[bytes]
+    ) -> Tuple[Any, Optional[str]]:
+        """
+        Deserialize a stored value
+
+        Values carry their codec in a header; the metadata record is only
+        needed to decode entries written before headers existed.
+
+        Returns:
+            tuple of (value, updated metadata JSON or None when there is no
+            valid metadata to write back)
+        """
+        compressed = False
+        serializer = "json"
+        updated = None
+
+        if metadata_data:
+            try:
+                metadata = json.loads(metadata_data.decode("utf-8"))
+                compressed = metadata.get("compressed", False)
+                serializer = metadata.get("serializer", "json")
+
+                # Update access info
+                metadata["access_count"] = metadata.get("access_count", 0) + 1
+                metadata["last_access"] = datetime.now().isoformat()
+                updated = json.dumps(metadata)
+
+            except json.JSONDecodeError:
+                pass
+
+        if self.serializer.is_framed(data):
+            return self.serializer.loads(data), updated
+        return self.serializer.deserialize(data, serializer, compressed), updated
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache"""
-        try:
-            redis_key = self._generate_key(key)
+        return self.get_many([key]).get(key, default)
 
-            # Get data from Redis
-            data = self.client.get(redis_key)
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get several values from cache
 
-            if data is None:
-                self._update_stats("miss")
-                return default
-
-            # Get metadata
-            metadata_key = f"{redis_key}:meta"
-            metadata_data = self.client.get(metadata_key)
-
-            # Deserialize metadata
-            if metadata_data:
-                try:
-                    metadata = json.loads(metadata_data.decode("utf-8"))
-                    compressed = metadata.get("compressed", False)
-                    serializer = metadata.get("serializer", "json")
-
-                    # Update access info
-                    metadata["access_count"] = metadata.get("access_count", 0) + 1
-                    metadata["last_access"] = datetime.now().isoformat()
-
-                    # Update metadata in Redis
-                    self.client.set(metadata_key, json.dumps(metadata))
+        Values and metadata for every key come back from a single MGET, and
+        the access-count updates for all hits are written in one pipeline,
+        so a batch costs two round trips however many keys it holds.
 
-                except json.JSONDecodeError:
-                    compressed = False
-                    serializer = "json"
-            else:
-                compressed = False
-                serializer = "json"
+        Returns:
+            dict of the keys that were found; misses are left out
+        """
+        if not keys:
+            return {}
 
-            # Deserialize value
-            value = self.serializer.deserialize(data, serializer, compressed)
+        try:
+            redis_keys = []
+            for key in keys:
+                redis_key = self._generate_key(key)
+                redis_keys.extend((redis_key, f"{redis_key}:meta"))
 
-            self._update_stats("hit")
-            return value
+            stored = self.client.mget(redis_keys)
 
         except Exception as e:
-            logger.error(f"Cache get error for key {key}: {e}")
-            self._update_stats("error")
-            return default
+            logger.error(f"Cache get error for keys {keys[:5]}: {e}")
+            self._update_stats("error", len(keys))
+            return {}
+
+        values = {}
+        metadata_updates = {}
+        for index, key in enumerate(keys):
+            data, metadata_data = stored[2 * index], stored[2 * index + 1]
+            if data is None:
+                self._update_stats("miss")
+                continue
+
+            try:
+                values[key], updated = self._decode(data, metadata_data)
+                if updated is not None:
+                    metadata_updates[redis_keys[2 * index + 1]] = updated
+                self._update_stats("hit")
+            except Exception as e:
+                logger.error(f"Cache get error for key {key}: {e}")
+                self._update_stats("error")
+
+        if metadata_updates:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for metadata_key, metadata in metadata_updates.items():
+                    # Keep the TTL set alongside the value
+                    pipe.set(metadata_key, metadata, keepttl=True)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Cache metadata update failed: {e}")
+
+        return values
 
     def set(
         self,
@@ -240,72 +293,108 @@ class RedisCache:
         ttl: Optional[int] = None,
         serializer: str = "json",
         force_compression: bool = False,
+        tags: Optional[List[str]] = None,
     ) -> bool:
         """Set value in cache"""
-        try:
-            redis_key = self._generate_key(key)
-
-            # Use default TTL if not specified
-            if ttl is None:
-                ttl = self.default_ttl
-
-            # Serialize value
-            serialized_data = self.serializer.serialize(value, serializer)
-
-            # Determine compression
-            should_compress = force_compression or self._should_compress(
-                serialized_data
+        return (
+            self.set_many(
+                {key: value},
+                ttl=ttl,
+                serializer=serializer,
+                force_compression=force_compression,
+                tags=tags,
             )
-            if should_compress:
-                serialized_data = gzip.compress(serialized_data)
-
-            # Create metadata
-            metadata = {
-                "timestamp": datetime.now().isoformat(),
-                "ttl": ttl,
-                "compressed": should_compress,
-                "serializer": serializer,
-                "access_count": 0,
-                "size_bytes": len(serialized_data),
-            }
+            == 1
+        )
 
-            # Set data and metadata in Redis
-            pipe = self.client.pipeline()
+    def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        serializer: str = "json",
+        force_compression: bool = False,
+        tags: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Set several values in cache with one pipelined round trip
+
+        Values that fail to serialize are skipped and counted as errors;
+        the rest are still written, and recorded under tags in the same
+        pipeline.
+
+        Returns:
+            number of values stored
+        """
+        # Use default TTL if not specified
+        if ttl is None:
+            ttl = self.default_ttl
+
+        pipe = self.client.pipeline()
+        stored_keys = []
+        for key, value in items.items():
+            try:
+                serialized_data, metadata = self._encode(
+                    value, ttl, serializer, force_compression
+                )
+            except Exception as e:
+                logger.error(f"Cache set error for key {key}: {e}")
+                self._update_stats("error")
+                continue
+
+            redis_key = self._generate_key(key)
             pipe.setex(redis_key, ttl, serialized_data)
             pipe.setex(
-                f"{redis_key}:meta", ttl + 300, json.dumps(metadata)
+                f"{redis_key}:meta", ttl + 300, metadata
             )  # Metadata TTL slightly longer
-            pipe.execute()
+            stored_keys.append(key)
 
-            self._update_stats("set")
-            return True
+        stored = len(stored_keys)
+        if not stored:
+            return 0
 
+        if tags:
+            self._queue_tags(pipe, stored_keys, tags, ttl)
+
+        try:
+            pipe.execute()
         except Exception as e:
-            logger.error(f"Cache set error for key {key}: {e}")
-            self._update_stats("error")
-            return False
+            logger.error(f"Cache set error for keys {list(items)[:5]}: {e}")
+            self._update_stats("error", stored)
+            return 0
+
+        self._update_stats("set", stored)
+        return stored
 
     def delete(self, key: str) -> bool:
         """Delete value from cache"""
-        try:
-            redis_key = self._generate_key(key)
+        return self.delete_many([key]) == 1
 
-            # Delete data and metadata
-            pipe = self.client.pipeline()
-            pipe.delete(redis_key)
-            pipe.delete(f"{redis_key}:meta")
-            result = pipe.execute()
+    def delete_many(self, keys: List[str]) -> int:
+        """
+        Delete several values and their metadata with one pipelined round trip
 
-            deleted = sum(result) > 0
-            if deleted:
-                self._update_stats("delete")
+        Returns:
+            number of keys that had a value or metadata to delete
+        """
+        if not keys:
+            return 0
 
-            return deleted
+        try:
+            pipe = self.client.pipeline()
+            for key in keys:
+                redis_key = self._generate_key(key)
+                pipe.delete(redis_key, f"{redis_key}:meta")
+            result = pipe.execute()
 
         except Exception as e:
-            logger.error(f"Cache delete error for key {key}: {e}")
+            logger.error(f"Cache delete error for keys {keys[:5]}: {e}")
             self._update_stats("error")
-            return False
+            return 0
+
+        deleted = sum(1 for count in result if count > 0)
+        if deleted:
+            self._update_stats("delete", deleted)
+        return deleted
 
     def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
@@ -334,45 +423,167 @@ class RedisCache:
             logger.error(f"Cache TTL error for key {key}: {e}")
             return -1
 
+    def _tag_key(self, tag: str) -> str:
+        """Generate the Redis key of the set holding a tag's members"""
+        return f"{self.key_prefix}{TAG_KEY_PREFIX}{tag}"
+
+    def scan_keys(self, pattern: str = "*") -> Iterator[str]:
+        """
+        Iterate over cache keys matching pattern
+
+        Uses SCAN, so each call to Redis touches at most scan_count keys
+        instead of blocking the server for the whole keyspace like KEYS.
+        Keys may be reported more than once if the keyspace is rehashed
+        while iterating.
+        """
+        prefix_len = len(self.key_prefix)
+        tag_prefix = self._tag_key("").encode("utf-8")
+        for key in self.client.scan_iter(
+            match=self._generate_key(pattern), count=self.scan_count
+        ):
+            if key.endswith(b":meta") or key.startswith(tag_prefix):
+                continue
+            yield key.decode("utf-8")[prefix_len:]
+
     def keys(self, pattern: str = "*") -> List[str]:
         """Get keys matching pattern"""
         try:
-            redis_pattern = self._generate_key(pattern)
-            keys = self.client.keys(redis_pattern)
-
-            # Remove prefix from keys
-            prefix_len = len(self.key_prefix)
-            return [
-                key.decode("utf-8")[prefix_len:]
-                for key in keys
-                if not key.endswith(b":meta")
-            ]
+            return list(self.scan_keys(pattern))
 
         except Exception as e:
             logger.error(f"Cache keys error: {e}")
             return []
 
+    def _unlink_batches(self, keys: Iterable[str]) -> int:
+        """
+        UNLINK keys and their metadata in batches of scan_count
+
+        UNLINK frees values in a background thread, so each batch blocks
+        the server for about as long as the key lookups take.
+
+        Returns:
+            number of cache entries removed
+        """
+        removed = 0
+        batch = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= self.scan_count:
+                removed += self._unlink(batch)
+                batch = []
+        if batch:
+            removed += self._unlink(batch)
+        return removed
+
+    def _unlink(self, keys: List[str]) -> int:
+        redis_keys = [self._generate_key(key) for key in keys]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.unlink(*redis_keys)
+        pipe.unlink(*[f"{key}:meta" for key in redis_keys])
+        removed, _ = pipe.execute()
+        return removed
+
     def flush(self, pattern: Optional[str] = None) -> int:
-        """Flush cache entries"""
+        """
+        Flush cache entries
+
+        With a pattern, matching entries are found with SCAN and removed
+        with UNLINK in batches, never blocking Redis for the whole keyspace.
+        """
         try:
             if pattern:
-                keys = self.keys(pattern)
-                if keys:
-                    redis_keys = [self._generate_key(key) for key in keys]
-                    # Also delete metadata keys
-                    meta_keys = [f"{key}:meta" for key in redis_keys]
-                    all_keys = redis_keys + meta_keys
-
-                    return self.client.delete(*all_keys)
-                return 0
+                removed = self._unlink_batches(self.scan_keys(pattern))
+                if removed:
+                    self._update_stats("delete", removed)
+                return removed
             else:
-                # Flush entire database
-                return self.client.flushdb()
+                # Flush entire database, freeing memory in the background
+                return self.client.flushdb(asynchronous=True)
 
         except Exception as e:
             logger.error(f"Cache flush error: {e}")
             return 0
 
+    def add_tags(self, keys: List[str], tags: List[str], ttl: Optional[int] = None):
+        """
+        Record keys as members of tags in Redis
+
+        Tag sets live in Redis next to the entries, so any worker or node
+        can invalidate a tag. A set expires once its longest-lived member
+        would have; members that expired earlier are left in place and
+        skipped at invalidation.
+        """
+        if not keys or not tags:
+            return
+
+        if ttl is None:
+            ttl = self.default_ttl
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            self._queue_tags(pipe, keys, tags, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache tag error for tags {tags}: {e}")
+            self._update_stats("error")
+
+    def _queue_tags(self, pipe, keys: List[str], tags: List[str], ttl: int):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, *keys)
+            # NX sets the expiry of a new set, GT only ever extends it
+            pipe.expire(tag_key, ttl + 300, nx=True)
+            pipe.expire(tag_key, ttl + 300, gt=True)
+
+    def tag_members(self, tag: str) -> List[str]:
+        """Get the keys recorded under a tag"""
+        try:
+            return [
+                key.decode("utf-8")
+                for key in self.client.sscan_iter(
+                    self._tag_key(tag), count=self.scan_count
+                )
+            ]
+        except Exception as e:
+            logger.error(f"Cache tag members error for tag {tag}: {e}")
+            return []
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove every entry recorded under a tag
+
+        The tag set is renamed first, so entries tagged while the
+        invalidation runs start a fresh set and are kept. Members are then
+        read with SSCAN and removed with UNLINK in batches.
+
+        Returns:
+            number of cache entries removed
+        """
+        tag_key = self._tag_key(tag)
+        pending_key = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+        try:
+            try:
+                self.client.rename(tag_key, pending_key)
+            except redis.ResponseError:
+                # No such tag set: nothing recorded under this tag
+                return 0
+
+            members = (
+                key.decode("utf-8")
+                for key in self.client.sscan_iter(pending_key, count=self.scan_count)
+            )
+            removed = self._unlink_batches(members)
+            self.client.unlink(pending_key)
+
+            if removed:
+                self._update_stats("delete", removed)
+            return removed
+
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error for tag {tag}: {e}")
+            self._update_stats("error")
+            return 0
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         with self.stats_lock:
@@ -455,7 +666,7 @@ class RedisCache:
         self,
         keys: List[str],
         fetch_func: Callable[[str], Any],
-        batch_size: int = 10,
+        batch_size: int = 100,
         ttl: Optional[int] = None,
     ):
         """Warm cache with data"""
@@ -467,16 +678,30 @@ class RedisCache:
         for i in range(0, total_keys, batch_size):
             batch = keys[i : i + batch_size]
 
-            for key in batch:
+            # One round trip to find the missing keys, one to store them
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for key in batch:
+                    pipe.exists(self._generate_key(key))
+                present = pipe.execute()
+            except Exception as e:
+                logger.error(f"Error checking cache for batch at {i}: {e}")
+                continue
+
+            values = {}
+            for key, exists in zip(batch, present):
+                if exists:
+                    continue
                 try:
-                    if not self.exists(key):
-                        value = fetch_func(key)
-                        if value is not None:
-                            self.set(key, value, ttl=ttl)
-                            loaded += 1
+                    value = fetch_func(key)
+                    if value is not None:
+                        values[key] = value
                 except Exception as e:
                     logger.error(f"Error warming cache for key {key}: {e}")
 
+            if values:
+                loaded += self.set_many(values, ttl=ttl)
+
             # Progress logging
             if (i + batch_size) % 100 == 0:
                 logger.info(
@@ -503,6 +728,34 @@ class RedisCache:
             if lock.owned():
                 lock.release()
 
+    def acquire_lease(self, key: str, timeout: float) -> Optional[Any]:
+        """
+        Try to take the lease on key without waiting
+
+        At most one client across all workers and nodes holds a key's lease
+        at a time; it lapses after timeout seconds if never released.
+
+        Returns:
+            the held lease, to pass to release_lease(), or None if another
+            client holds it or Redis is unavailable
+        """
+        lease = self.client.lock(f"lease:{key}", timeout=timeout, blocking=False)
+        try:
+            if lease.acquire():
+                return lease
+        except Exception as e:
+            logger.warning(f"Cache lease error for key {key}: {e}")
+        return None
+
+    def release_lease(self, lease: Any):
+        """Release a lease, unless it already lapsed and passed to someone else"""
+        try:
+            lease.release()
+        except redis.exceptions.LockError:
+            pass
+        except Exception as e:
+            logger.warning(f"Cache lease release error: {e}")
+
     def close(self):
         """Close Redis connection"""
         try:
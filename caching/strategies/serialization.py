@@ -0,0 +1,471 @@
+"""
+Pluggable Cache Serialization with Adaptive Compression
+Phase 3 Week 4: Advanced Caching Strategies - Serialization
+
+Every payload starts with a three byte header naming its format and its
+compression, so entries written with different codecs can share a cache
+and be read back without any out-of-band metadata:
+
+    0xFF | format id | compression id | payload
+
+Formats and compressors are looked up in registries; register_format() and
+register_compressor() add new ones. msgpack, orjson, zstandard and lz4 are
+used when installed, with json/gzip as the fallback. The default "json"
+format is the lossless stdlib one; the faster "orjson" is opt-in.
+"""
+
+import gzip
+import json
+import pickle
+import struct
+import sys
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+# No JSON, pickle (protocol 2+) or gzip payload starts with this byte, so
+# framed and legacy unframed payloads can be told apart
+MAGIC = 0xFF
+HEADER = struct.Struct("<BBB")
+
+# msgpack extension type carrying an ndarray
+_NDARRAY_EXT_CODE = 1
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class SerializationError(ValueError):
+    """Raised when a value cannot be encoded or a payload decoded"""
+
+
+class Format:
+    """A way of turning values into bytes"""
+
+    name: str = ""
+    format_id: int = 0
+    # Whether payloads over the size threshold are compressed unless the
+    # caller says otherwise
+    compress_by_default: bool = True
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: memoryview) -> Any:
+        raise NotImplementedError
+
+
+class Compressor:
+    """A byte-level compression codec"""
+
+    name: str = ""
+    compressor_id: int = 0
+
+    def compress(self, data: bytes, fast: bool) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: BytesLike) -> bytes:
+        raise NotImplementedError
+
+
+def _is_ndarray(value: Any) -> bool:
+    # An ndarray can only exist once numpy is imported; don't import it here
+    np = sys.modules.get("numpy")
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def _encode_ndarray(array) -> bytes:
+    """dtype length, dtype string, ndim, one int64 per dim, raw C-order data"""
+    import numpy as np
+
+    array = np.ascontiguousarray(array)
+    dtype = array.dtype.str.encode("ascii")
+    return b"".join(
+        (
+            struct.pack("<B", len(dtype)),
+            dtype,
+            struct.pack(f"<B{array.ndim}q", array.ndim, *array.shape),
+            array.data,
+        )
+    )
+
+
+def _decode_ndarray(data: BytesLike):
+    """Rebuild an ndarray as a read-only view of data, without copying"""
+    import numpy as np
+
+    data = memoryview(data)
+    dtype_len = data[0]
+    dtype = np.dtype(bytes(data[1 : 1 + dtype_len]).decode("ascii"))
+    offset = 1 + dtype_len
+    ndim = data[offset]
+    shape = struct.unpack_from(f"<{ndim}q", data, offset + 1)
+    offset += 1 + 8 * ndim
+    return np.frombuffer(data[offset:], dtype=dtype).reshape(shape)
+
+
+class JSONFormat(Format):
+    """
+    JSON through the stdlib; non-JSON values become their str()
+
+    NaN and infinities are written as the NaN/Infinity tokens json reads
+    back, so floats round-trip exactly.
+    """
+
+    name = "json"
+    format_id = 1
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str).encode("utf-8")
+
+    def loads(self, data: memoryview) -> Any:
+        return json.loads(bytes(data).decode("utf-8"))
+
+
+class ORJSONFormat(Format):
+    """
+    JSON through orjson, for callers that accept its lossy conversions
+
+    Several times faster than "json", but NaN and infinities are written as
+    null, and datetimes in ISO 8601 form rather than as str() gives them.
+    Only used when asked for by name.
+    """
+
+    name = "orjson"
+    format_id = 5
+
+    def dumps(self, value: Any) -> bytes:
+        if not ORJSON_AVAILABLE:
+            raise SerializationError("orjson is not installed")
+        try:
+            return orjson.dumps(
+                value,
+                default=str,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
+        except TypeError as e:
+            # e.g. integers beyond 64 bits
+            raise SerializationError(f"orjson cannot encode value: {e}") from e
+
+    def loads(self, data: memoryview) -> Any:
+        if not ORJSON_AVAILABLE:
+            raise SerializationError("orjson is not installed")
+        return orjson.loads(data)
+
+
+class PickleFormat(Format):
+    name = "pickle"
+    format_id = 2
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: memoryview) -> Any:
+        return pickle.loads(data)
+
+
+class MsgpackFormat(Format):
+    """msgpack, with ndarrays nested anywhere kept as raw buffers"""
+
+    name = "msgpack"
+    format_id = 3
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        if _is_ndarray(value) and not value.dtype.hasobject:
+            return msgpack.ExtType(_NDARRAY_EXT_CODE, _encode_ndarray(value))
+        return str(value)
+
+    @staticmethod
+    def _ext_hook(code: int, data: bytes) -> Any:
+        if code == _NDARRAY_EXT_CODE:
+            return _decode_ndarray(data)
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, value: Any) -> bytes:
+        if not MSGPACK_AVAILABLE:
+            raise SerializationError("msgpack is not installed")
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def loads(self, data: memoryview) -> Any:
+        if not MSGPACK_AVAILABLE:
+            raise SerializationError("msgpack is not installed")
+        return msgpack.unpackb(
+            data, ext_hook=self._ext_hook, raw=False, strict_map_key=False
+        )
+
+
+class NumpyFormat(Format):
+    """
+    A single ndarray as its raw buffer
+
+    Payloads are read back as a read-only view of the bytes fetched from
+    the cache, so large arrays are never copied on read. Numeric data
+    compresses poorly, so this is only compressed when asked for, at the
+    cost of that copy.
+    """
+
+    name = "numpy"
+    format_id = 4
+    compress_by_default = False
+
+    def dumps(self, value: Any) -> bytes:
+        if not _is_ndarray(value) or value.dtype.hasobject:
+            raise SerializationError("numpy format needs a non-object ndarray")
+        return _encode_ndarray(value)
+
+    def loads(self, data: memoryview) -> Any:
+        return _decode_ndarray(data)
+
+
+class GzipCompressor(Compressor):
+    name = "gzip"
+    compressor_id = 1
+
+    def compress(self, data: bytes, fast: bool) -> bytes:
+        return gzip.compress(data, compresslevel=1 if fast else 6)
+
+    def decompress(self, data: BytesLike) -> bytes:
+        return gzip.decompress(data)
+
+
+class ZstdCompressor(Compressor):
+    name = "zstd"
+    compressor_id = 2
+
+    def compress(self, data: bytes, fast: bool) -> bytes:
+        if not ZSTD_AVAILABLE:
+            raise SerializationError("zstandard is not installed")
+        # ZstdCompressor objects aren't thread-safe; build one per call
+        return zstandard.ZstdCompressor(level=1 if fast else 3).compress(data)
+
+    def decompress(self, data: BytesLike) -> bytes:
+        if not ZSTD_AVAILABLE:
+            raise SerializationError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class LZ4Compressor(Compressor):
+    name = "lz4"
+    compressor_id = 3
+
+    def compress(self, data: bytes, fast: bool) -> bytes:
+        if not LZ4_AVAILABLE:
+            raise SerializationError("lz4 is not installed")
+        return lz4.frame.compress(data)
+
+    def decompress(self, data: BytesLike) -> bytes:
+        if not LZ4_AVAILABLE:
+            raise SerializationError("lz4 is not installed")
+        return lz4.frame.decompress(data)
+
+
+_formats_by_name: Dict[str, Format] = {}
+_formats_by_id: Dict[int, Format] = {}
+_compressors_by_name: Dict[str, Compressor] = {}
+_compressors_by_id: Dict[int, Compressor] = {}
+
+
+def register_format(fmt: Format):
+    """Make a format available by name for writing and by id for reading"""
+    _formats_by_name[fmt.name] = fmt
+    _formats_by_id[fmt.format_id] = fmt
+
+
+def register_compressor(compressor: Compressor):
+    """Make a compressor available by name for writing and by id for reading"""
+    _compressors_by_name[compressor.name] = compressor
+    _compressors_by_id[compressor.compressor_id] = compressor
+
+
+for _fmt in (
+    JSONFormat(),
+    PickleFormat(),
+    MsgpackFormat(),
+    NumpyFormat(),
+    ORJSONFormat(),
+):
+    register_format(_fmt)
+for _compressor in (GzipCompressor(), ZstdCompressor(), LZ4Compressor()):
+    register_compressor(_compressor)
+
+
+def available_formats() -> List[str]:
+    """Names of the formats that can be written here"""
+    flags = {"msgpack": MSGPACK_AVAILABLE, "orjson": ORJSON_AVAILABLE}
+    return [name for name in _formats_by_name if flags.get(name, True)]
+
+
+def available_compressors() -> List[str]:
+    """Names of the compressors that can be written here"""
+    flags = {"gzip": True, "zstd": ZSTD_AVAILABLE, "lz4": LZ4_AVAILABLE}
+    return [name for name in _compressors_by_name if flags.get(name, True)]
+
+
+class CacheSerializer:
+    """
+    Serialize cache values with a self-describing codec header
+
+    Payloads smaller than compression_threshold are stored as they are.
+    Larger ones are compressed with the fastest installed codec (lz4, then
+    zstd, then gzip), and ones of large_payload_threshold and up with the
+    best ratio (zstd, then gzip, then lz4). A lone ndarray is stored as its
+    raw buffer, uncompressed by default, unless pickle is asked for.
+    """
+
+    FAST_COMPRESSORS = ("lz4", "zstd", "gzip")
+    RATIO_COMPRESSORS = ("zstd", "gzip", "lz4")
+
+    def __init__(
+        self,
+        compression_threshold: int = 1024,
+        large_payload_threshold: int = 64 * 1024,
+    ):
+        self.compression_threshold = compression_threshold
+        self.large_payload_threshold = large_payload_threshold
+
+    def _choose_compressor(self, size: int) -> Compressor:
+        preferred = (
+            self.RATIO_COMPRESSORS
+            if size >= self.large_payload_threshold
+            else self.FAST_COMPRESSORS
+        )
+        installed = available_compressors()
+        for name in preferred:
+            if name in installed:
+                return _compressors_by_name[name]
+        return _compressors_by_name["gzip"]
+
+    def dumps(
+        self,
+        value: Any,
+        method: str = "json",
+        compress: Optional[bool] = None,
+        compression: Optional[str] = None,
+    ) -> bytes:
+        """
+        Encode value with its codec header
+
+        Args:
+            method: format name; a lone ndarray uses "numpy" unless this is
+                "pickle"
+            compress: True to always compress, False never, None to decide
+                by payload size
+            compression: compressor name overriding the size-based choice
+        """
+        if method != "pickle" and _is_ndarray(value) and not value.dtype.hasobject:
+            method = "numpy"
+
+        fmt = _formats_by_name.get(method)
+        if fmt is None:
+            raise SerializationError(f"Unsupported serialization method: {method}")
+
+        payload = fmt.dumps(value)
+
+        if compress is None:
+            compress = (
+                fmt.compress_by_default and len(payload) >= self.compression_threshold
+            )
+
+        compressor_id = 0
+        if compress:
+            if compression is not None:
+                compressor = _compressors_by_name.get(compression)
+                if compressor is None:
+                    raise SerializationError(f"Unsupported compression: {compression}")
+            else:
+                compressor = self._choose_compressor(len(payload))
+            payload = compressor.compress(
+                payload, fast=len(payload) < self.large_payload_threshold
+            )
+            compressor_id = compressor.compressor_id
+
+        return HEADER.pack(MAGIC, fmt.format_id, compressor_id) + payload
+
+    def loads(self, data: BytesLike) -> Any:
+        """Decode a payload written by dumps()"""
+        fmt, compressor, payload = self._parse(data)
+        if compressor is not None:
+            payload = memoryview(compressor.decompress(payload))
+        return fmt.loads(payload)
+
+    @staticmethod
+    def is_framed(data: BytesLike) -> bool:
+        """Whether data carries a codec header, as opposed to a legacy payload"""
+        return len(data) >= HEADER.size and data[0] == MAGIC
+
+    @staticmethod
+    def describe(data: BytesLike) -> Tuple[str, Optional[str]]:
+        """Names of the format and compressor (None if uncompressed) of data"""
+        fmt, compressor, _ = CacheSerializer._parse(data)
+        return fmt.name, compressor.name if compressor else None
+
+    @staticmethod
+    def _parse(data: BytesLike) -> Tuple[Format, Optional[Compressor], memoryview]:
+        if not CacheSerializer.is_framed(data):
+            raise SerializationError("Payload has no codec header")
+        _, format_id, compressor_id = HEADER.unpack_from(data)
+        fmt = _formats_by_id.get(format_id)
+        if fmt is None:
+            raise SerializationError(f"Unknown format id: {format_id}")
+        compressor = None
+        if compressor_id:
+            compressor = _compressors_by_id.get(compressor_id)
+            if compressor is None:
+                raise SerializationError(f"Unknown compressor id: {compressor_id}")
+        return fmt, compressor, memoryview(data)[HEADER.size :]
+
+    # Unframed payloads written before codec headers existed
+
+    @staticmethod
+    def serialize(value: Any, method: str = "json", compress: bool = False) -> bytes:
+        """Serialize value using specified method, without a codec header"""
+        if method == "json":
+            serialized = json.dumps(value, default=str).encode("utf-8")
+        elif method == "pickle":
+            serialized = pickle.dumps(value)
+        else:
+            raise ValueError(f"Unsupported serialization method: {method}")
+
+        if compress:
+            serialized = gzip.compress(serialized)
+
+        return serialized
+
+    @staticmethod
+    def deserialize(data: bytes, method: str = "json", compressed: bool = False) -> Any:
+        """Deserialize data using specified method, without a codec header"""
+        if compressed:
+            data = gzip.decompress(data)
+
+        if method == "json":
+            return json.loads(data.decode("utf-8"))
+        elif method == "pickle":
+            return pickle.loads(data)
+        else:
+            raise ValueError(f"Unsupported deserialization method: {method}")
@@ -0,0 +1,99 @@
+"""
+Request Coalescing for Cache Misses
+Phase 3 Week 4: Advanced Caching Strategies - Single-Flight
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    """One in-progress call and the outcome its waiters share"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Per-key duplicate call suppression
+
+    The first caller for a key runs the function; callers arriving for the
+    same key while it runs wait for its result instead of running it again.
+    Calls for different keys never wait on each other: the shared lock is
+    only held to look up or register a flight, never while one runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func for key, or wait for the run already in flight
+
+        Returns:
+            tuple of (value, shared), where shared is True when the value
+            came from another caller's run
+
+        Raises:
+            Whatever func raised, in the caller that ran it and in every
+            caller that waited on it
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # forget() may already have replaced this flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    def forget(self, key: Hashable):
+        """
+        Stop handing out the flight in progress for key
+
+        Callers already waiting still get its result, but later callers
+        start a new run; used when the key is deleted or invalidated while
+        a fetch that may have read the old value is running.
+        """
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._flights),
+            }
@@ -10,7 +10,11 @@ backlog = 2048
 
 # Worker processes
 workers = min(multiprocessing.cpu_count() * 2 + 1, 8)  # Cap at 8 workers
-worker_class = "sync"
+# Threaded workers, so concurrent /api/ml/anomaly requests in one worker can
+# be coalesced by the anomaly micro-batcher; a sync worker serves one
+# request at a time and would never form a batch
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -22,6 +26,14 @@ max_requests_jitter = 50
 # Load application code before the worker processes are forked
 preload_app = True
 
+# Micro-batching and anomaly warm-up are off by default in create_app; turn
+# them on for the server unless the environment says otherwise
+os.environ.setdefault("ANOMALY_MICRO_BATCHING", "true")
+
+# Load (or, without a bootstrap model, train) the anomaly detector in the
+# master before forking, so no worker ever does it on a request
+os.environ.setdefault("ANOMALY_WARMUP", "sync")
+
 # Security
 limit_request_line = 4096
 limit_request_fields = 100
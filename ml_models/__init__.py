@@ -1,18 +1,42 @@
 """
 ML Models package for Smart CloudOps AI
-Phase 2A: Minimal imports for stability
+
+Importing the package is cheap: the names below are resolved from their
+submodules on first access, so pandas and sklearn are only imported by
+code that actually uses a model.
 """
 
-# For Phase 2A, keep minimal imports for stability
-# Components will be gradually added as Phase 2 progresses
+import importlib
+
+# Public name -> submodule defining it
+_LAZY_EXPORTS = {
+    "AnomalyDetector": "ml_models.anomaly_detector",
+    "AnomalyInferenceEngine": "ml_models.anomaly_detector",
+    "ModelNotReadyError": "ml_models.anomaly_detector",
+    "TimeSeriesAnalyzer": "ml_models.anomaly_detector",
+    "create_anomaly_detector": "ml_models.anomaly_detector",
+    "BootstrapModelError": "ml_models.bootstrap",
+    "build_bootstrap_model": "ml_models.bootstrap",
+    "CompiledIsolationForest": "ml_models.forest_engine",
+    "FeatureExtractor": "ml_models.feature_extractor",
+    "ModelBundle": "ml_models.model_bundle",
+    "ModelHolder": "ml_models.model_bundle",
+    "MLflowManager": "ml_models.mlflow_config",
+    "get_mlflow_manager": "ml_models.mlflow_config",
+}
+
+__all__ = sorted(_LAZY_EXPORTS)
+
 
-__all__ = []
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    # Cache it so later lookups skip __getattr__
+    globals()[name] = value
+    return value
 
-# Note: Model components temporarily have limited exposure for Phase 2A stability
-# Direct imports from submodules are still available:
-# - from ml_models.mlflow_config import MLflowManager, get_mlflow_manager
-# - from ml_models.anomaly_detector import AnomalyDetector (when restored)
 
-# TODO Phase 2: Gradually restore these imports as components are stabilized
-# from .mlflow_config import MLflowManager, get_mlflow_manager
-# from .anomaly_detector import AnomalyDetector, AnomalyInferenceEngine
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
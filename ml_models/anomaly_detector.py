@@ -4,20 +4,77 @@ Smart CloudOps AI - ML Models Implementation (Phase 3)
 Anomaly Detection and Machine Learning Components
 """
 
+import copy
 import logging
 import os
 import pickle
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 import joblib
 import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, clone
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+from ml_models.bootstrap import (
+    DEFAULT_BOOTSTRAP_DIR,
+    BootstrapModelError,
+    load_bootstrap_model,
+)
+from ml_models.explanations import (
+    EXPLANATION_RULES,
+    RISK_RULES,
+    explanation_factors,
+    metric_matrix,
+    recommendations,
+    risk_factors,
+    severity_explanation,
+)
+from ml_models.feature_extractor import (
+    DEFAULT_RATE,
+    FEATURE_NAME_MAPPING,
+    FeatureExtractor,
+)
+from ml_models.forest_engine import CompiledIsolationForest
+from ml_models.incremental_forest import refresh_forest, refresh_unsupported_reason
+from ml_models.model_bundle import ModelBundle, ModelHolder
+from ml_models.result_cache import ResultCache
+from ml_models.rolling_correlation import RollingCorrelation, align_series
+from ml_models.scoring_pool import DEFAULT_MIN_BATCH_SIZE, get_scoring_pool
+from ml_models.streaming_features import (
+    DEFAULT_EWMA_ALPHA,
+    DEFAULT_MAX_HOSTS,
+    DEFAULT_RETRY_INTERVAL,
+    DEFAULT_STATE_TTL,
+    DEFAULT_WINDOW_SIZE,
+    RedisStreamingFeatureState,
+    StreamingFeatureState,
+    counter_rates,
+    timestamp_seconds,
+)
+from ml_models.trend_analysis import TrendTracker, linear_trends, trend_summaries
+
 logger = logging.getLogger(__name__)
 
+# Scoring engines selectable through the INFERENCE_BACKEND config key
+INFERENCE_BACKENDS = ("sklearn", "compiled")
+
+# Metrics the explanation and failure risk rules read
+EXPLANATION_METRICS = tuple(EXPLANATION_RULES)
+RISK_METRICS = tuple(RISK_RULES)
+
+# How update_model() folds new data in, selected through UPDATE_STRATEGY
+UPDATE_STRATEGIES = ("incremental", "full")
+
+
+class ModelNotReadyError(Exception):
+    """Raised when a request arrives before any model could be loaded."""
+
 
 class AnomalyDetector:
     """
@@ -64,11 +121,57 @@ class AnomalyDetector:
             raise ValueError("ANOMALY_THRESHOLD must be between 0 and 1")
         if config.get("MIN_SAMPLES", 1) <= 0:
             raise ValueError("MIN_SAMPLES must be greater than 0")
+        if config.get("INFERENCE_BACKEND", "sklearn") not in INFERENCE_BACKENDS:
+            raise ValueError(f"INFERENCE_BACKEND must be one of {INFERENCE_BACKENDS}")
+        if config.get("SCORING_PROCESSES", 0) < 0:
+            raise ValueError("SCORING_PROCESSES cannot be negative")
+        if config.get("UPDATE_STRATEGY", "incremental") not in UPDATE_STRATEGIES:
+            raise ValueError(f"UPDATE_STRATEGY must be one of {UPDATE_STRATEGIES}")
+        if not 0 < config.get("UPDATE_TREE_FRACTION", 0.2) <= 1:
+            raise ValueError("UPDATE_TREE_FRACTION must be in (0, 1]")
 
         # Extract parameters from config or use defaults
         self.contamination = config.get("contamination", contamination)
         self.random_state = config.get("RANDOM_STATE", random_state)
         self.model_path = config.get("MODEL_PATH", "ml_models/anomaly_detector.pkl")
+        self._forest_bundle_path = config.get("FOREST_BUNDLE_PATH")
+        # Derive labels from a single scoring pass instead of predict() plus
+        # decision_function(), which walk the forest twice
+        self.single_pass_scoring = config.get("SINGLE_PASS_SCORING", True)
+        # "compiled" scores with flattened tree arrays instead of sklearn
+        self.inference_backend = config.get("INFERENCE_BACKEND", "sklearn")
+        # Worker processes for large batches; 0 scores in the calling process
+        scoring_processes = config.get("SCORING_PROCESSES", 0)
+        self.scoring_pool = (
+            get_scoring_pool(
+                scoring_processes,
+                config.get("SCORING_POOL_MIN_BATCH", DEFAULT_MIN_BATCH_SIZE),
+            )
+            if scoring_processes
+            else None
+        )
+        # "incremental" refits only UPDATE_TREE_FRACTION of the trees, on a
+        # window of the last UPDATE_WINDOW_SIZE samples, and updates the
+        # scaler's statistics in place of refitting it
+        self.update_strategy = config.get("UPDATE_STRATEGY", "incremental")
+        self.update_tree_fraction = config.get("UPDATE_TREE_FRACTION", 0.2)
+        self.update_window_size = config.get("UPDATE_WINDOW_SIZE", 2048)
+        self.last_update = None
+        # Model built at image build time, served until one is trained
+        self.bootstrap_model_dir = config.get(
+            "BOOTSTRAP_MODEL_DIR", DEFAULT_BOOTSTRAP_DIR
+        )
+        # Whether a request may train on synthetic data when neither a
+        # trained nor a bootstrap model exists. Servers turn this off and
+        # warm the detector up at startup instead.
+        self.sync_training_fallback = config.get("SYNC_TRAINING_FALLBACK", True)
+        # "persisted", "bootstrap" or "synthetic" once a model is loaded
+        self.model_source = None
+        # Failure predictions and explanations per model version and sample
+        self.result_cache = ResultCache(
+            config.get("RESULT_CACHE_SIZE", 4096),
+            config.get("RESULT_CACHE_QUANTUM", 0.01),
+        )
 
         # Don't create model immediately - will be created when needed
         self._model = None
@@ -88,6 +191,22 @@ class AnomalyDetector:
             "network_bytes_sent_rate",
             "network_bytes_recv_rate",
         ]
+        self._feature_extractor = None
+        self._stream_state = None
+        self._correlation_engines: "OrderedDict[str, RollingCorrelation]" = (
+            OrderedDict()
+        )
+        # (estimators_ list, compiled forest) of the last model compiled
+        self._compiled = None
+        self._model_load_deferred = False
+        # Most recent unscaled training rows, refit on by incremental updates
+        self._recent_features = None
+        self._updates = 0
+        self._update_lock = threading.Lock()
+        # Inference reads model, scaler and feature order from one immutable
+        # bundle; retraining publishes a new one instead of mutating them
+        self.model_holder = ModelHolder()
+        self._publish_lock = threading.RLock()
 
         # Ensure model directory exists
         os.makedirs(
@@ -105,18 +224,97 @@ class AnomalyDetector:
     def model(self):
         """Lazy model creation - creates model on first access."""
         if self._model is None:
-            self._create_model()
+            if self._model_load_deferred:
+                self._model_load_deferred = False
+                self._model = joblib.load(self.model_path)
+                # The bundle was written from this model; keep scoring on it
+                if self._compiled is not None:
+                    self._compiled = (
+                        getattr(self._model, "estimators_", None),
+                        self._compiled[1],
+                    )
+            else:
+                self._create_model()
         return self._model
 
     @model.setter
     def model(self, value):
         """Set the model directly."""
         self._model = value
+        self._model_load_deferred = False
+
+    @property
+    def forest_bundle_path(self) -> str:
+        """
+        Directory of the flattened forest saved next to the model.
+
+        The compiled backend memory-maps it on load, so forked workers share
+        one copy of the trees. Defaults to the model path with a .forest suffix.
+        """
+        if self._forest_bundle_path:
+            return self._forest_bundle_path
+        return os.path.splitext(self.model_path)[0] + ".forest"
+
+    @property
+    def feature_extractor(self) -> FeatureExtractor:
+        """Compiled extractor for the current feature columns."""
+        extractor = self._feature_extractor
+        if extractor is None or extractor.feature_columns != tuple(
+            self.feature_columns
+        ):
+            extractor = FeatureExtractor(self.feature_columns)
+            self._feature_extractor = extractor
+        return extractor
+
+    @property
+    def stream_state(self) -> StreamingFeatureState:
+        """
+        Per-host feature state for detect_anomaly_stream().
+
+        Kept in Redis when the STREAM_REDIS_CLIENT config key holds a client,
+        so all workers share each host's stream; otherwise, and while that
+        Redis is unreachable, in this process.
+        """
+        state = self._stream_state
+        if state is None or state.extractor is not self.feature_extractor:
+            with self._publish_lock:
+                state = self._stream_state
+                if state is None or state.extractor is not self.feature_extractor:
+                    window_size = self.config.get(
+                        "STREAM_WINDOW_SIZE", DEFAULT_WINDOW_SIZE
+                    )
+                    alpha = self.config.get("STREAM_EWMA_ALPHA", DEFAULT_EWMA_ALPHA)
+                    max_hosts = self.config.get("STREAM_MAX_HOSTS", DEFAULT_MAX_HOSTS)
+                    client = self.config.get("STREAM_REDIS_CLIENT")
+                    if client is not None:
+                        state = RedisStreamingFeatureState(
+                            self.feature_extractor,
+                            client,
+                            window_size=window_size,
+                            alpha=alpha,
+                            ttl=self.config.get("STREAM_STATE_TTL", DEFAULT_STATE_TTL),
+                            max_hosts=max_hosts,
+                            retry_interval=self.config.get(
+                                "STREAM_REDIS_RETRY_INTERVAL", DEFAULT_RETRY_INTERVAL
+                            ),
+                        )
+                    else:
+                        state = StreamingFeatureState(
+                            self.feature_extractor,
+                            window_size=window_size,
+                            alpha=alpha,
+                            max_hosts=max_hosts,
+                        )
+                    self._stream_state = state
+        return state
 
     def prepare_features(self, metrics_data: List[Dict]) -> pd.DataFrame:
         """
         Prepare features from raw metrics data.
 
+        DataFrame-based path used for training data. Inference goes through
+        feature_extractor, which applies the same rules without pandas.
+
         Args:
             metrics_data: List of metric dictionaries
 
@@ -138,15 +336,7 @@ class AnomalyDetector:
                 df = pd.DataFrame([default_data])
 
             # Map common metric names to expected feature columns
-            mapping = {
-                "cpu_usage": "cpu_usage_percent",
-                "memory_usage": "memory_usage_percent",
-                "disk_usage": "disk_usage_percent",
-                "network_io": "network_bytes_sent_rate",
-            }
-
-            # Apply mapping with error handling
-            for old_name, new_name in mapping.items():
+            for old_name, new_name in FEATURE_NAME_MAPPING.items():
                 if old_name in df.columns:
                     try:
                         df[new_name] = df[old_name]
@@ -158,16 +348,16 @@ class AnomalyDetector:
             for col in self.feature_columns:
                 if col not in df.columns:
                     if col.endswith("_rate"):
-                        # Calculate rate columns if missing
-                        base_col = col.replace("_rate", "")
+                        # Derive rate columns from counters as training does
+                        base_col = col[: -len("_rate")]
                         if base_col in df.columns:
                             try:
-                                df[col] = df[base_col].diff().fillna(df[base_col])
+                                df[col] = self._counter_rates(df, base_col)
                             except Exception as e:
                                 logger.warning(f"Failed to calculate rate for {col}: {e}")
-                                df[col] = 50  # Default network rate
+                                df[col] = DEFAULT_RATE
                         else:
-                            df[col] = 50  # Default network rate
+                            df[col] = DEFAULT_RATE
                     elif col == "load_avg_1min":
                         df[col] = 1.0  # Default load average
                     else:
@@ -240,8 +430,11 @@ class AnomalyDetector:
         # Ensure all required feature columns exist
         for col in self.feature_columns:
             if col not in data.columns:
-                if col.endswith("_rate"):
-                    data[col] = 50  # Default rate
+                counter = col[: -len("_rate")]
+                if col.endswith("_rate") and counter in data.columns:
+                    data[col] = self._counter_rates(data, counter)
+                elif col.endswith("_rate"):
+                    data[col] = DEFAULT_RATE
                 elif col == "load_avg_1min":
                     data[col] = 1.0  # Default load average
                 else:
@@ -264,16 +457,66 @@ class AnomalyDetector:
         existing_columns = [col for col in self.feature_columns if col in data.columns]
         return data[existing_columns]
 
-    def _create_model(self):
-        """Create and initialize the anomaly detection model."""
+    @staticmethod
+    def _counter_rates(data: pd.DataFrame, counter: str) -> pd.Series:
+        """
+        Per-second rates of a raw counter column, as the stream derives them.
+
+        Rows are taken in order as consecutive samples of one stream per
+        host_id (of a single stream without that column). Each rate is the
+        counter_rates() change since the previous row of the same host over
+        the time between their timestamps; the first row of a host, and
+        data without a timestamp column, get the missing-rate default.
+        """
+        if "timestamp" not in data.columns:
+            return pd.Series(DEFAULT_RATE, index=data.index)
+        frame = pd.DataFrame(
+            {
+                "value": pd.to_numeric(data[counter], errors="coerce"),
+                "seconds": data["timestamp"].map(timestamp_seconds).astype(float),
+            },
+            index=data.index,
+        )
+        hosts = data["host_id"] if "host_id" in data.columns else None
+        # Rows without a counter value don't break a host's stream
+        observed = frame.dropna(subset=["value"])
+        previous = (
+            observed.groupby(hosts.loc[observed.index]).shift()
+            if hosts is not None
+            else observed.shift()
+        )
+        rates = counter_rates(
+            observed["value"],
+            previous["value"],
+            observed["seconds"] - previous["seconds"],
+        )
+        return (
+            pd.Series(rates, index=observed.index)
+            .reindex(data.index)
+            .fillna(DEFAULT_RATE)
+        )
+
+    def _create_model(self, install: bool = True):
+        """
+        Create and initialize the anomaly detection model.
+
+        Args:
+            install: Make it the detector's model. Training passes False and
+                publishes the model only once it is fitted.
+
+        Returns:
+            The new, unfitted model
+        """
         try:
             # Use the imported IsolationForest (this will be mocked if patched)
-            self._model = IsolationForest(
+            model = IsolationForest(
                 contamination=self.contamination,
                 random_state=self.random_state,
                 n_estimators=100,
             )
-            return True
+            if install:
+                self._model = model
+            return model
         except Exception as e:
             logger.error(f"Failed to create model: {e}")
             raise Exception(f"Model creation failed: {e}")
@@ -303,8 +546,15 @@ class AnomalyDetector:
             # Track original feature names from input data
             original_features = list(df.columns)
 
-            # Create model (this will use the mocked IsolationForest if patched)
-            self._create_model()
+            # Create model (this will use the mocked IsolationForest if patched).
+            # The serving model and scaler stay untouched until the new pair
+            # is fitted and published together.
+            model = self._create_model(install=False)
+            scaler = (
+                clone(self.scaler)
+                if isinstance(self.scaler, BaseEstimator)
+                else StandardScaler()
+            )
 
             # Prepare features
             features_df = self._preprocess_data(df)
@@ -320,10 +570,11 @@ class AnomalyDetector:
                 )  # Use synthetic feature names
 
             # Scale features
-            features_scaled = self.scaler.fit_transform(features_df)
+            features_scaled = scaler.fit_transform(features_df)
 
             # Train the model
-            self.model.fit(features_scaled)
+            model.fit(features_scaled)
+            bundle = self._publish(model, scaler)
             self.is_trained = True
 
             # Track training data size and feature names for compatibility
@@ -332,13 +583,15 @@ class AnomalyDetector:
             self.training_data = (
                 features_df  # Store training data for test compatibility
             )
+            self._recent_features = features_df.tail(self.update_window_size)
 
             # Save model and scaler
             self._save_model()
 
             # Calculate training metrics
-            train_scores = self.model.decision_function(features_scaled)
-            train_predictions = self.model.predict(features_scaled)
+            train_predictions, train_scores = self._score_and_label(
+                features_scaled, bundle
+            )
 
             anomaly_count = np.sum(train_predictions == -1)
             normal_count = np.sum(train_predictions == 1)
@@ -370,124 +623,561 @@ class AnomalyDetector:
                 raise
             return False
 
-    def detect_anomaly(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    def detect_anomaly(
+        self, metrics: Dict[str, Any], explain: bool = False
+    ) -> Dict[str, Any]:
         """
         Detect anomaly for a single metric sample.
 
         Args:
             metrics: Current system metrics
+            explain: Also report per-feature attributions (see
+                _score_with_attributions())
 
         Returns:
             Anomaly prediction results
         """
         try:
             # Validate input metrics
-            if not isinstance(metrics, dict):
-                return {
-                    "is_anomaly": False,
-                    "anomaly_score": 0.0,
-                    "confidence": 0.0,
-                    "status": "error",
-                    "error": "Metrics must be a dictionary",
-                }
+            error = self._validate_sample(metrics)
+            if error:
+                return self._error_result(error)
 
-            # Check for required numeric metrics
-            required_metrics = ["cpu_usage", "memory_usage", "disk_usage"]
-            for metric in required_metrics:
-                if metric not in metrics:
-                    return {
-                        "is_anomaly": False,
-                        "anomaly_score": 0.0,
-                        "confidence": 0.0,
-                        "status": "error",
-                        "error": f"Missing required metric: {metric}",
-                    }
+            self._ensure_model_ready()
+            bundle = self._serving_bundle()
 
-                # Check if metric is numeric
-                try:
-                    float(metrics[metric])
-                except (ValueError, TypeError):
-                    return {
-                        "is_anomaly": False,
-                        "anomaly_score": 0.0,
-                        "confidence": 0.0,
-                        "status": "error",
-                        "error": f"Invalid metric value for {metric}: must be numeric",
-                    }
+            # Prepare and scale features
+            features = self.feature_extractor.extract(metrics)
+            features_scaled = self._scale_features(features[np.newaxis, :], bundle)
 
-            if not self.is_trained:
-                # Try to load existing model
-                if not self._load_model():
-                    # Train with synthetic data if no model exists
-                    synthetic_data = self._generate_synthetic_data(100)
-                    self.train(synthetic_data.to_dict("records"))
+            # Make prediction
+            attributions = None
+            if explain:
+                predictions, decision_scores, attributions = (
+                    self._score_with_attributions(features_scaled, bundle)
+                )
+            else:
+                predictions, decision_scores = self._score_and_label(
+                    features_scaled, bundle
+                )
 
-            # Prepare features
-            features_df = self.prepare_features([metrics])
+            result = self._format_prediction(
+                predictions[0],
+                decision_scores[0],
+                datetime.now().isoformat(),
+                bundle.version,
+            )
+            if explain:
+                result["attributions"] = self._attribution_payload(
+                    attributions, 0, bundle
+                )
+            return result
 
-            if features_df.empty:
-                return {
-                    "is_anomaly": False,
-                    "anomaly_score": 0.0,
-                    "confidence": 0.0,
-                    "status": "error",
-                    "error": "Failed to prepare features",
-                }
+        except Exception as e:
+            logger.error(f"Anomaly prediction failed: {e}")
+            return self._error_result(str(e))
 
-            # Scale features
-            features_scaled = self.scaler.transform(features_df)
+    def detect_anomaly_stream(
+        self, host_id: str, metrics: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Detect anomaly for the next sample of a host's metric stream.
 
-            # Make prediction
-            prediction = self.model.predict(features_scaled)[0]
-            decision_score = self.model.decision_function(features_scaled)[0]
+        Unlike detect_anomaly(), *_rate features are derived from the host's
+        previous sample, and the result also reports how far each feature is
+        from the host's recent behaviour. Only a fixed amount of state is kept
+        per host; history is never re-materialised.
 
-            # Convert to probability-like score (0-1)
-            anomaly_score = max(0, min(1, (0.5 - decision_score) / 0.5))
+        Args:
+            host_id: Identifier of the stream the sample belongs to
+            metrics: Current system metrics
 
-            is_anomaly = prediction == -1
-            confidence = abs(decision_score)
+        Returns:
+            Anomaly prediction results with a "stream" section
+        """
+        try:
+            error = self._validate_sample(metrics)
+            if error:
+                return self._error_result(error)
+
+            # Without a model the sample is not scored, so it must not
+            # advance the host's stream either
+            self._ensure_model_ready()
+            stream = self.stream_state.update(str(host_id), metrics)
+            bundle = self._serving_bundle()
+            features_scaled = self._scale_features(
+                stream.features[np.newaxis, :], bundle
+            )
+            predictions, decision_scores = self._score_and_label(
+                features_scaled, bundle
+            )
 
-            return {
-                "is_anomaly": bool(is_anomaly),
-                "anomaly_score": float(anomaly_score),
-                "confidence": float(confidence),
-                "decision_score": float(decision_score),
-                "status": "success",
-                "model_version": "1.0",
-                "timestamp": datetime.now().isoformat(),
+            result = self._format_prediction(
+                predictions[0],
+                decision_scores[0],
+                datetime.now().isoformat(),
+                bundle.version,
+            )
+            columns = self.stream_state.extractor.feature_columns
+            result["host_id"] = host_id
+            result["stream"] = {
+                "samples": stream.samples,
+                "features": dict(zip(columns, stream.features.tolist())),
+                "zscores": dict(zip(columns, stream.zscores.tolist())),
+                "rolling_mean": dict(zip(columns, stream.rolling_mean.tolist())),
+                "max_abs_zscore": float(np.abs(stream.zscores).max()),
             }
+            return result
 
         except Exception as e:
-            logger.error(f"Anomaly prediction failed: {e}")
-            return {
-                "is_anomaly": False,
-                "anomaly_score": 0.0,
-                "confidence": 0.0,
-                "status": "error",
-                "error": str(e),
-            }
+            logger.error(f"Streaming anomaly prediction failed: {e}")
+            return self._error_result(str(e))
 
-    def batch_detect(self, metrics_list: List[Dict]) -> List[Dict]:
+    def batch_detect(
+        self, metrics_list: List[Dict], explain: bool = False
+    ) -> List[Dict]:
         """
         Detect anomalies for multiple metric samples.
 
+        All samples are validated first; invalid ones get an error entry at
+        their own index. The remaining samples are mapped into one feature
+        matrix, scaled once and scored with a single model call, so the
+        per-call overhead is paid once per batch instead of once per sample.
+
         Args:
             metrics_list: List of system metrics
+            explain: Also report per-feature attributions, computed in the
+                same forest walk as the scores
 
         Returns:
-            List of anomaly predictions
+            List of anomaly predictions, in the same order as metrics_list
         """
         try:
-            results = []
-            for metrics in metrics_list:
-                result = self.detect_anomaly(metrics)
-                results.append(result)
+            results: List[Optional[Dict]] = [None] * len(metrics_list)
+            extractor = self.feature_extractor
+            features = np.empty((len(metrics_list), extractor.n_features))
+            valid_indices = []
+            for index, metrics in enumerate(metrics_list):
+                error = self._validate_sample(metrics)
+                if error is None:
+                    try:
+                        extractor.extract(metrics, out=features[len(valid_indices)])
+                        valid_indices.append(index)
+                        continue
+                    except (ValueError, TypeError) as e:
+                        error = f"Failed to prepare features: {e}"
+                results[index] = self._error_result(error)
+
+            if not valid_indices:
+                return results
+
+            self._ensure_model_ready()
+            bundle = self._serving_bundle()
+
+            features_scaled = self._scale_features(
+                features[: len(valid_indices)], bundle
+            )
+
+            attributions = None
+            if explain:
+                predictions, decision_scores, attributions = (
+                    self._score_with_attributions(features_scaled, bundle)
+                )
+            else:
+                predictions, decision_scores = self._score_and_label(
+                    features_scaled, bundle
+                )
+            if len(predictions) != len(valid_indices) or len(decision_scores) != len(
+                valid_indices
+            ):
+                raise ValueError(
+                    f"Model returned {len(predictions)} predictions for "
+                    f"{len(valid_indices)} samples"
+                )
+
+            timestamp = datetime.now().isoformat()
+            for position, index in enumerate(valid_indices):
+                results[index] = self._format_prediction(
+                    predictions[position],
+                    decision_scores[position],
+                    timestamp,
+                    bundle.version,
+                )
+                if explain:
+                    results[index]["attributions"] = self._attribution_payload(
+                        attributions, position, bundle
+                    )
             return results
 
         except Exception as e:
             logger.error(f"Batch detection failed: {e}")
             return [{"status": "error", "error": str(e)} for _ in metrics_list]
 
+    def _validate_sample(self, metrics: Any) -> Optional[str]:
+        """Return the validation error for a metrics sample, or None if valid."""
+        if not isinstance(metrics, dict):
+            return "Metrics must be a dictionary"
+
+        # Check for required numeric metrics
+        for metric in ("cpu_usage", "memory_usage", "disk_usage"):
+            if metric not in metrics:
+                return f"Missing required metric: {metric}"
+            try:
+                float(metrics[metric])
+            except (ValueError, TypeError):
+                return f"Invalid metric value for {metric}: must be numeric"
+
+        return None
+
+    def _error_result(self, error: str) -> Dict[str, Any]:
+        """Build the error payload returned by the detection methods."""
+        return {
+            "is_anomaly": False,
+            "anomaly_score": 0.0,
+            "confidence": 0.0,
+            "status": "error",
+            "error": error,
+        }
+
+    def _format_prediction(
+        self,
+        prediction: Any,
+        decision_score: Any,
+        timestamp: str,
+        bundle_version: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Build the success payload for one scored sample."""
+        decision_score = float(decision_score)
+
+        # Convert to probability-like score (0-1)
+        anomaly_score = max(0, min(1, (0.5 - decision_score) / 0.5))
+
+        return {
+            "is_anomaly": bool(prediction == -1),
+            "anomaly_score": float(anomaly_score),
+            "confidence": float(abs(decision_score)),
+            "decision_score": decision_score,
+            "status": "success",
+            "model_version": "1.0",
+            "bundle_version": bundle_version,
+            "timestamp": timestamp,
+        }
+
+    def _ensure_model_ready(self, allow_training: Optional[bool] = None):
+        """
+        Load the persisted model, falling back to the bootstrap model.
+
+        Only when neither exists, and allow_training (default
+        SYNC_TRAINING_FALLBACK) permits it, is a model trained on synthetic
+        data in the calling thread.
+
+        Raises:
+            ModelNotReadyError: If no model could be loaded and training is
+                not allowed
+        """
+        if self.is_trained:
+            return
+        if allow_training is None:
+            allow_training = self.sync_training_fallback
+        # Concurrent first requests wait for one load instead of each loading
+        # (or training) a model and publishing a half-loaded model/scaler pair
+        with self._publish_lock:
+            if self.is_trained:
+                return
+            if self._load_model():
+                self.model_source = "persisted"
+            elif self._load_bootstrap_model():
+                self.model_source = "bootstrap"
+            elif allow_training:
+                logger.warning(
+                    "No trained or bootstrap model found; training on "
+                    "synthetic data"
+                )
+                synthetic_data = self._generate_synthetic_data(100)
+                self.train(synthetic_data.to_dict("records"))
+                self.model_source = "synthetic"
+            else:
+                raise ModelNotReadyError(
+                    "No trained or bootstrap model available; build one with "
+                    "python -m ml_models.bootstrap"
+                )
+
+    def _load_bootstrap_model(self) -> bool:
+        """Publish the bootstrap model shipped with the image, if usable."""
+        try:
+            model, scaler, manifest = load_bootstrap_model(self.bootstrap_model_dir)
+        except BootstrapModelError as e:
+            logger.info(f"Bootstrap model not used: {e}")
+            return False
+        except Exception as e:
+            logger.warning(f"Failed to load bootstrap model: {e}")
+            return False
+        if manifest.get("feature_columns", self.feature_columns) != list(
+            self.feature_columns
+        ):
+            logger.warning("Bootstrap model features differ; not using it")
+            return False
+        self._publish(model, scaler)
+        self.is_trained = True
+        logger.info(f"Bootstrap model loaded from {self.bootstrap_model_dir}")
+        return True
+
+    def warm_up(self, allow_training: bool = True) -> Dict[str, Any]:
+        """
+        Get the detector ready to serve before the first request arrives.
+
+        Loads the persisted or bootstrap model (training on synthetic data
+        only as a last resort, if allow_training) and scores one sample so
+        lazy state such as the compiled forest is built here rather than
+        on a request.
+
+        Returns:
+            Warm-up status with the model source and time taken
+        """
+        started = time.perf_counter()
+        try:
+            self._ensure_model_ready(allow_training=allow_training)
+            self._warm_up(self._serving_bundle())
+            status = "ready"
+        except Exception as e:
+            logger.error(f"Anomaly detector warm-up failed: {e}")
+            status = "failed"
+        return {
+            "status": status,
+            "model_source": self.model_source,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def _publish(self, model, scaler) -> ModelBundle:
+        """
+        Make a fitted model and scaler the ones serving requests.
+
+        The new bundle is warmed up before the swap, so the first request it
+        serves does not pay for lazy initialisation.
+        """
+        bundle = ModelBundle.create(model, scaler, self.feature_columns)
+        with self._publish_lock:
+            self.model_holder.swap(bundle, warm_up=self._warm_up)
+            self._model = model
+            self._model_load_deferred = False
+            self.scaler = scaler
+        return bundle
+
+    def _serving_bundle(self) -> ModelBundle:
+        """
+        Bundle to serve the current request from.
+
+        When the model or scaler was assigned directly (loaded from disk or
+        set by a caller) rather than published, they are published first.
+        """
+        bundle = self.model_holder.current
+        if bundle is not None and bundle.matches(
+            self._model, self.scaler, self.feature_columns
+        ):
+            return bundle
+
+        with self._publish_lock:
+            bundle = self.model_holder.current
+            model = self._model if self._model_load_deferred else self.model
+            if bundle is None or not bundle.matches(
+                model, self.scaler, self.feature_columns
+            ):
+                bundle = ModelBundle.create(model, self.scaler, self.feature_columns)
+                self.model_holder.swap(bundle)
+            return bundle
+
+    def _bundle_model(self, bundle: ModelBundle):
+        """A bundle's sklearn model, unpickling it if it was deferred."""
+        return bundle.model if bundle.model is not None else self.model
+
+    def _warm_up(self, bundle: ModelBundle):
+        """
+        Score one default sample with a bundle before it takes traffic.
+
+        Builds the compiled forest for the compiled backend and runs the
+        scoring path once. Only models scored through the single-pass path
+        are warmed; others have no lazy state to prepare.
+        """
+        if self._scoring_offset(bundle) is None:
+            return
+        features = self.feature_extractor.extract({})[np.newaxis, :]
+        self._score_and_label(self._scale_features(features, bundle), bundle)
+
+    def _scoring_offset(self, bundle: Optional[ModelBundle] = None) -> Optional[float]:
+        """
+        Offset used to turn raw scores into decisions for single-pass scoring.
+
+        Returns None when single-pass scoring is disabled or the model does
+        not expose a fitted numeric offset_ (e.g. a non-IsolationForest model).
+        """
+        if not self.single_pass_scoring:
+            return None
+        compiled = self._compiled_scorer(bundle)
+        if compiled is not None:
+            return compiled.offset_
+        model = bundle.model if bundle is not None else self.model
+        offset = getattr(model, "offset_", None)
+        if isinstance(offset, (int, float, np.number)) and not isinstance(offset, bool):
+            return float(offset)
+        return None
+
+    def _compiled_scorer(
+        self, bundle: Optional[ModelBundle] = None
+    ) -> Optional[CompiledIsolationForest]:
+        """
+        Compiled copy of a bundle's model for the "compiled" backend.
+
+        The forest is flattened on first use (or memory-mapped from the saved
+        bundle) and rebuilt whenever the model is refitted or replaced.
+        Returns None when the sklearn backend is selected or the model is not
+        a fitted IsolationForest.
+        """
+        if self.inference_backend != "compiled":
+            return None
+        return self._compiled_forest(bundle)
+
+    def _compiled_forest(
+        self, bundle: Optional[ModelBundle] = None
+    ) -> Optional[CompiledIsolationForest]:
+        """Compiled copy of a bundle's model, whichever backend is selected."""
+        model = bundle.model if bundle is not None else self._model
+        compiled = self._compiled
+        if model is None:
+            # Loaded from a forest bundle; the sklearn model stays on disk
+            if compiled is not None and compiled[0] is None:
+                return compiled[1]
+            return None
+        estimators = getattr(model, "estimators_", None)
+        if not isinstance(estimators, list):
+            return None
+        if compiled is None or compiled[0] is not estimators:
+            try:
+                forest = CompiledIsolationForest.from_sklearn(model)
+            except Exception as e:
+                logger.warning(f"Falling back to sklearn scoring: {e}")
+                forest = None
+            compiled = (estimators, forest)
+            self._compiled = compiled
+        return compiled[1]
+
+    def _score_and_label(
+        self, features_scaled, bundle: Optional[ModelBundle] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score samples and derive their labels.
+
+        IsolationForest.predict() is decision_function() < 0 mapped to -1/1,
+        so with single-pass scoring the forest is walked once and the label is
+        derived from the decision score, using the compiled forest when that
+        backend is selected. Other models fall back to separate predict() and
+        decision_function() calls.
+
+        Args:
+            features_scaled: Scaled feature matrix
+            bundle: Bundle to score with; defaults to the detector's model
+
+        Returns:
+            tuple of (predictions, decision_scores)
+        """
+        offset = self._scoring_offset(bundle)
+        model = bundle.model if bundle is not None else self.model
+        if offset is not None:
+            scores = self._pool_score_samples(features_scaled, bundle)
+            if scores is None:
+                scorer = self._compiled_scorer(bundle) or model
+                scores = np.asarray(scorer.score_samples(features_scaled))
+            decision_scores = scores - offset
+            predictions = np.where(decision_scores < 0, -1, 1)
+            return predictions, decision_scores
+
+        predictions = np.asarray(model.predict(features_scaled))
+        decision_scores = np.asarray(model.decision_function(features_scaled))
+        return predictions, decision_scores
+
+    def _score_with_attributions(
+        self, features_scaled, bundle: Optional[ModelBundle] = None
+    ) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Score samples, derive their labels and attribute their scores.
+
+        Attributions come from the same walk through the compiled forest as
+        the scores: every split a sample passes through credits its feature
+        with how much it shortened the expected path. A sample's attributions
+        sum to how much shorter than average its isolation path was, so the
+        largest positive values name the features that made it anomalous.
+
+        Models that cannot be compiled are scored by _score_and_label() and
+        get no attributions.
+
+        Returns:
+            tuple of (predictions, decision_scores, attributions), where
+            attributions has shape (n_samples, n_features) or is None
+        """
+        offset = self._scoring_offset(bundle)
+        forest = self._compiled_forest(bundle) if offset is not None else None
+        if forest is None or not forest.supports_attributions:
+            return self._score_and_label(features_scaled, bundle) + (None,)
+        scores, attributions = forest.score_samples_with_attributions(features_scaled)
+        decision_scores = scores - offset
+        predictions = np.where(decision_scores < 0, -1, 1)
+        return predictions, decision_scores, attributions
+
+    def _attribution_payload(
+        self,
+        attributions: Optional[np.ndarray],
+        row: int,
+        bundle: Optional[ModelBundle] = None,
+    ) -> Optional[Dict[str, float]]:
+        """One sample's attributions by feature name, or None if unavailable."""
+        if attributions is None:
+            return None
+        columns = bundle.feature_columns if bundle is not None else self.feature_columns
+        return dict(zip(columns, attributions[row].tolist()))
+
+    def _pool_score_samples(
+        self, features_scaled, bundle: Optional[ModelBundle] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Score a large batch on the process pool.
+
+        Returns None when no pool is configured, the batch is too small to be
+        worth the hand-off, or the model cannot be compiled; the caller then
+        scores in this process.
+        """
+        pool = self.scoring_pool
+        if pool is None or not pool.accepts(len(features_scaled)):
+            return None
+        forest = self._compiled_forest(bundle)
+        if forest is None:
+            return None
+        try:
+            return pool.score_samples(forest, features_scaled)
+        except Exception as e:
+            logger.warning(f"Process pool scoring failed, scoring in process: {e}")
+            return None
+
+    def _scale_features(
+        self, features: np.ndarray, bundle: Optional[ModelBundle] = None
+    ) -> np.ndarray:
+        """
+        Scale a feature matrix laid out in feature_columns order.
+
+        A fitted StandardScaler is applied directly from its learned mean and
+        scale, which gives the same result as transform() without sklearn's
+        per-call input validation. Any other scaler goes through transform().
+        """
+        scaler = bundle.scaler if bundle is not None else self.scaler
+        if isinstance(scaler, StandardScaler) and hasattr(scaler, "scale_"):
+            scaled = features
+            if scaler.with_mean and scaler.mean_ is not None:
+                scaled = scaled - scaler.mean_
+            if scaler.with_std and scaler.scale_ is not None:
+                scaled = scaled / scaler.scale_
+            return scaled if scaled is not features else features.copy()
+
+        columns = bundle.feature_columns if bundle is not None else self.feature_columns
+        return scaler.transform(pd.DataFrame(features, columns=list(columns)))
+
     def _generate_synthetic_data(self, n_samples: int) -> pd.DataFrame:
         """Generate synthetic training data for testing purposes."""
         np.random.seed(self.random_state)
@@ -548,6 +1238,7 @@ class AnomalyDetector:
             else:
                 # Use joblib.dump for real models
                 joblib.dump(self.model, self.model_path)
+                self._save_forest_bundle()
 
             if hasattr(self.scaler, "_mock_name"):
                 # This is a mock object, create a dummy pickle
@@ -565,6 +1256,16 @@ class AnomalyDetector:
         """Load trained model and scaler from disk."""
         try:
             if os.path.exists(self.model_path):
+                if self._load_forest_bundle():
+                    # Scoring runs on the memory-mapped bundle; the sklearn
+                    # model is only unpickled if something else needs it
+                    self._model = None
+                    self._model_load_deferred = True
+                    self._load_scaler()
+                    self.is_trained = True
+                    logger.info(f"Model bundle loaded from {self.forest_bundle_path}")
+                    return True
+
                 # Try to load with joblib first (for compatibility with tests)
                 try:
                     import joblib
@@ -617,29 +1318,7 @@ class AnomalyDetector:
                     else:
                         self.model = model_data
 
-                # Try to load scaler if it exists
-                if os.path.exists(self.scaler_path):
-                    try:
-                        import joblib
-
-                        scaler_data = joblib.load(self.scaler_path)
-                    except ImportError:
-                        with open(self.scaler_path, "rb") as f:
-                            scaler_data = pickle.load(f)
-
-                    # Handle mock objects for testing
-                    if isinstance(scaler_data, dict) and scaler_data.get("mock"):
-                        from unittest.mock import Mock
-
-                        self.scaler = Mock()
-                        self.scaler.fit_transform.return_value = [
-                            [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
-                        ]
-                        self.scaler.transform.return_value = [
-                            [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
-                        ]
-                    else:
-                        self.scaler = scaler_data
+                self._load_scaler()
 
                 self.is_trained = True
                 logger.info(f"Model loaded from {self.model_path}")
@@ -649,12 +1328,80 @@ class AnomalyDetector:
             logger.error(f"Failed to load model: {e}")
             return False
 
+    def _save_forest_bundle(self):
+        """Write the compiled forest bundle for the model just saved."""
+        if not isinstance(getattr(self.model, "estimators_", None), list):
+            return
+        try:
+            CompiledIsolationForest.from_sklearn(self.model).save(
+                self.forest_bundle_path,
+                feature_columns=list(self.feature_columns),
+                source_mtime_ns=os.stat(self.model_path).st_mtime_ns,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save forest bundle: {e}")
+
+    def _load_forest_bundle(self) -> bool:
+        """
+        Memory-map the compiled forest bundle for the compiled backend.
+
+        Only a bundle written alongside the current model file is used; a
+        missing or stale bundle returns False so the pickled model is loaded.
+        The two-call scoring path needs the sklearn model, so the bundle is
+        only used with single-pass scoring.
+        """
+        if (
+            self.inference_backend != "compiled"
+            or not self.single_pass_scoring
+            or not os.path.isdir(self.forest_bundle_path)
+        ):
+            return False
+        try:
+            metadata = CompiledIsolationForest.read_metadata(self.forest_bundle_path)
+            if metadata.get("source_mtime_ns") != os.stat(self.model_path).st_mtime_ns:
+                logger.info("Forest bundle is older than the model, ignoring it")
+                return False
+            if metadata.get("feature_columns") != list(self.feature_columns):
+                return False
+            self._compiled = (
+                None,
+                CompiledIsolationForest.load(self.forest_bundle_path),
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load forest bundle: {e}")
+            return False
+
+    def _load_scaler(self):
+        """Load the persisted scaler, if one exists."""
+        if os.path.exists(self.scaler_path):
+            try:
+                import joblib
+
+                scaler_data = joblib.load(self.scaler_path)
+            except ImportError:
+                with open(self.scaler_path, "rb") as f:
+                    scaler_data = pickle.load(f)
+
+            # Handle mock objects for testing
+            if isinstance(scaler_data, dict) and scaler_data.get("mock"):
+                from unittest.mock import Mock
+
+                self.scaler = Mock()
+                self.scaler.fit_transform.return_value = [
+                    [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+                ]
+                self.scaler.transform.return_value = [[0.1, 0.2, 0.3, 0.4, 0.5, 0.6]]
+            else:
+                self.scaler = scaler_data
+
     def load_model(self, path: str = None) -> Dict[str, Any]:
         """Public method to load model - compatibility with main.py"""
         try:
             if path:
                 self.model_path = path
-            success = self._load_model()
+            with self._publish_lock:
+                success = self._load_model()
             if success:
                 return {"success": True, "model_path": self.model_path}
             else:
@@ -667,7 +1414,8 @@ class AnomalyDetector:
         try:
             if path:
                 self.model_path = path
-            return self._load_model()
+            with self._publish_lock:
+                return self._load_model()
         except Exception as e:
             return False
 
@@ -740,6 +1488,27 @@ class AnomalyDetector:
                 "features": dict(zip(feature_names, importance_scores)),
             }
 
+        # Mean absolute attribution over the recent training window
+        if self._recent_features is not None and len(self._recent_features):
+            bundle = self._serving_bundle()
+            features_scaled = self._scale_features(
+                self._recent_features[list(bundle.feature_columns)].to_numpy(
+                    dtype=float
+                ),
+                bundle,
+            )
+            attributions = self._score_with_attributions(features_scaled, bundle)[2]
+            if attributions is not None:
+                importance = np.abs(attributions).mean(axis=0)
+                total = importance.sum()
+                if total > 0:
+                    importance = importance / total
+                return {
+                    "feature_count": len(bundle.feature_columns),
+                    "features": dict(zip(bundle.feature_columns, importance.tolist())),
+                    "method": "path_length_attribution",
+                }
+
         # For trained model, return same structure
         feature_names = [
             "cpu_usage",
@@ -759,12 +1528,18 @@ class AnomalyDetector:
     # ============================================
 
     def detect_multi_metric_anomaly(
-        self, metrics_dict: Dict[str, List[Dict]]
+        self, metrics_dict: Dict[str, List[Dict]], stream_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Advanced multi-metric correlation analysis for anomaly detection.
         Analyzes relationships between different metrics to detect complex anomalies.
 
+        Series are aligned on their timestamps (by position when they carry
+        none) and folded into a RollingCorrelation. With a stream_id the
+        engine is kept between calls: only points newer than the last call
+        are taken in, so repeated calls over a sliding range of history
+        cost O(new points x k^2) rather than a rescan.
+
         Args:
             metrics_dict: Dictionary of metric types and their time series data
             Example: {
@@ -772,110 +1547,50 @@ class AnomalyDetector:
                 'memory': [{'value': 80, 'timestamp': '2025-08-17T10:00:00Z'}, ...],
                 'disk': [{'value': 90, 'timestamp': '2025-08-17T10:00:00Z'}, ...]
             }
+            stream_id: Keep the correlation state of this stream between calls
 
         Returns:
             Dict containing correlation analysis results and anomaly detection
         """
         try:
-            logger.info("Performing multi-metric correlation analysisf")
-
-            # Convert metrics to DataFrame for correlation analysis
-            correlation_data = {}
-            timestamps = []
-
-            for metric_type, metric_series in metrics_dict.items():
-                if not metric_series:
-                    continue
-
-                values = [m.get("value", 0) for m in metric_series]
-                correlation_data[metric_type] = values
-
-                if not timestamps and metric_series:
-                    timestamps = [m.get("timestamp", "f") for m in metric_series]
+            logger.info("Performing multi-metric correlation analysis")
 
-            if len(correlation_data) < 2:
+            metrics = [name for name, series in metrics_dict.items() if series]
+            if len(metrics) < 2:
                 return {
                     "status": "insufficient_data",
                     "message": "Need at least 2 metric types for correlation analysis",
                     "correlation_matrix": {},
-                    "anomaliesf": [],
+                    "anomalies": [],
                 }
 
-            # Calculate correlation matrix
-            df = pd.DataFrame(correlation_data)
-            correlation_matrix = df.corr().to_dict()
-
-            # Detect correlation anomalies
-            anomalies = []
-            strong_correlations = []
-
-            for i, col1 in enumerate(df.columns):
-                for j, col2 in enumerate(df.columns):
-                    if i < j:  # Avoid duplicate pairs
-                        corr_value = correlation_matrix[col1][col2]
-                        if abs(corr_value) > 0.7:  # Strong correlation threshold
-                            strong_correlations.append(
-                                {
-                                    "metrics": [col1, col2],
-                                    "correlation": float(corr_value),
-                                    "type": (
-                                        "positive" if corr_value > 0 else "negative"
-                                    ),
-                                }
-                            )
-
-            # Look for sudden correlation breaks (anomalies)
-            window_size = min(10, len(df) // 2)
-            if window_size >= 3:
-                recent_corr = df.tail(window_size).corr()
-                historical_corr = (
-                    df.head(-window_size).corr() if len(df) > window_size else df.corr()
-                )
+            if stream_id is not None:
+                engine = self._correlation_engine(stream_id, metrics)
+                engine.extend(metrics_dict)
+            else:
+                rows, timestamps = align_series(metrics_dict, metrics)
+                # Recent window of up to 10 rows, at most half the data
+                window = min(10, len(rows) // 2)
+                engine = RollingCorrelation(metrics, window=max(window, 2))
+                engine.update_many(rows, timestamps)
 
-                for col1 in df.columns:
-                    for col2 in df.columns:
-                        if col1 != col2:
-                            recent_val = recent_corr.loc[col1, col2]
-                            historical_val = historical_corr.loc[col1, col2]
-
-                            if (
-                                abs(recent_val - historical_val) > 0.5
-                            ):  # Significant correlation change
-                                anomalies.append(
-                                    {
-                                        "type": "correlation_break",
-                                        "metrics": [col1, col2],
-                                        "historical_correlation": float(historical_val),
-                                        "recent_correlation": float(recent_val),
-                                        "deviation": float(
-                                            abs(recent_val - historical_val)
-                                        ),
-                                        "severity": (
-                                            "high"
-                                            if abs(recent_val - historical_val) > 0.8
-                                            else "medium"
-                                        ),
-                                        "timestampf": (
-                                            timestamps[-1]
-                                            if timestamps
-                                            else datetime.now().isoformat()
-                                        ),
-                                    }
-                                )
+            # Breaks need a window of at least 3 rows to mean anything
+            anomalies = engine.correlation_breaks() if engine.window >= 3 else []
 
             result = {
                 "status": "success",
                 "analysis_type": "multi_metric_correlation",
-                "metrics_analyzed": list(correlation_data.keys()),
-                "correlation_matrix": correlation_matrix,
-                "strong_correlations": strong_correlations,
+                "metrics_analyzed": metrics,
+                "correlation_matrix": engine.correlation_matrix(),
+                "strong_correlations": engine.strong_correlations(),
                 "anomalies": anomalies,
                 "anomaly_count": len(anomalies),
+                "samples_analyzed": engine.samples,
                 "analysis_timestamp": datetime.now().isoformat(),
             }
 
             logger.info(
-                "Multi-metric analysis completed: {len(anomalies)} anomalies detected"
+                f"Multi-metric analysis completed: {len(anomalies)} anomalies detected"
             )
             return result
 
@@ -883,6 +1598,23 @@ class AnomalyDetector:
             logger.error(f"Multi-metric anomaly detection failed: {e}")
             return {"status": "error", "error": str(e), "anomalies": []}
 
+    def _correlation_engine(
+        self, stream_id: str, metrics: List[str]
+    ) -> RollingCorrelation:
+        """Rolling correlation state of a stream, started over if its metrics change."""
+        with self._publish_lock:
+            engine = self._correlation_engines.get(stream_id)
+            if engine is None or engine.metrics != metrics:
+                engine = RollingCorrelation(metrics)
+                self._correlation_engines[stream_id] = engine
+                while len(self._correlation_engines) > self.config.get(
+                    "CORRELATION_MAX_STREAMS", 1000
+                ):
+                    self._correlation_engines.popitem(last=False)
+            else:
+                self._correlation_engines.move_to_end(stream_id)
+            return engine
+
     def predict_failure_probability(
         self, metrics: Dict[str, Any], time_horizon: int = 3600
     ) -> Dict[str, Any]:
@@ -890,6 +1622,10 @@ class AnomalyDetector:
         Predictive failure detection using trend analysis and ML models.
         Predicts the probability of system failure within the specified time horizon.
 
+        Results are cached per model version and quantized feature vector
+        (see ResultCache), so repeated requests for the same sample skip
+        scoring; a cached result is returned with "cached" set.
+
         Args:
             metrics: Current system metrics
             time_horizon: Prediction window in seconds (default: 1 hour)
@@ -904,83 +1640,40 @@ class AnomalyDetector:
                 # Use rule-based prediction when ML model isn't trained
                 return self._rule_based_failure_prediction(metrics, time_horizon)
 
-            # Prepare current metrics
-            current_features = self.prepare_features([metrics])
-            if current_features.empty:
+            bundle = self._serving_bundle()
+            current_features = self.feature_extractor.extract(metrics)
+            key = self.result_cache.key(
+                "failure",
+                np.concatenate(
+                    [current_features, metric_matrix([metrics], RISK_METRICS)[0]]
+                ),
+                time_horizon,
+            )
+            cached = self.result_cache.get(bundle.version, key)
+            if cached is not None:
                 return {
-                    "status": "insufficient_data",
-                    "failure_probability": 0.0,
-                    "confidence": 0.0,
+                    **cached,
+                    "cached": True,
+                    "prediction_timestamp": datetime.now().isoformat(),
                 }
 
-            # Scale features
-            current_scaled = self.scaler.transform(current_features)
+            # Scale current metrics
+            current_scaled = self._scale_features(
+                current_features[np.newaxis, :], bundle
+            )
 
             # Get anomaly score
-            anomaly_score = self.model.decision_function(current_scaled)[0]
-            anomaly_prediction = self.model.predict(current_scaled)[0]
+            predictions, decision_scores = self._score_and_label(current_scaled, bundle)
+            anomaly_score = decision_scores[0]
+            anomaly_prediction = predictions[0]
 
             # Calculate failure probability based on anomaly score
             # More negative scores indicate higher anomaly likelihood
             normalized_score = max(0, min(1, (0.5 - anomaly_score) / 1.0))
 
-            # Risk factors analysis
-            risk_factors = []
-            cpu_usage = metrics.get("cpu_usage_percent", 0)
-            memory_usage = metrics.get("memory_usage_percent", 0)
-            disk_usage = metrics.get("disk_usage_percentf", 0)
-
-            if cpu_usage > 90:
-                risk_factors.append(
-                    {
-                        "factor": "high_cpu_usage",
-                        "value": cpu_usage,
-                        "impact": "critical",
-                        "weight": 0.4,
-                    }
-                )
-            elif cpu_usage > 80:
-                risk_factors.append(
-                    {
-                        "factor": "elevated_cpu_usage",
-                        "value": cpu_usage,
-                        "impact": "high",
-                        "weightf": 0.3,
-                    }
-                )
-
-            if memory_usage > 95:
-                risk_factors.append(
-                    {
-                        "factor": "critical_memory_usage",
-                        "value": memory_usage,
-                        "impact": "critical",
-                        "weight": 0.5,
-                    }
-                )
-            elif memory_usage > 85:
-                risk_factors.append(
-                    {
-                        "factor": "high_memory_usage",
-                        "value": memory_usage,
-                        "impact": "high",
-                        "weightf": 0.3,
-                    }
-                )
-
-            if disk_usage > 95:
-                risk_factors.append(
-                    {
-                        "factor": "critical_disk_usage",
-                        "value": disk_usage,
-                        "impact": "critical",
-                        "weight": 0.4,
-                    }
-                )
-
-            # Calculate weighted risk score
-            total_weight = sum(rf["weightf"] for rf in risk_factors)
-            risk_score = min(1.0, total_weight)
+            # Risk factors analysis and weighted risk score
+            factors = risk_factors([metrics])[0]
+            risk_score = min(1.0, sum(rf["weight"] for rf in factors))
 
             # Combine anomaly score and risk score
             failure_probability = min(
@@ -1003,16 +1696,18 @@ class AnomalyDetector:
                 "time_horizon_seconds": time_horizon,
                 "anomaly_score": float(anomaly_score),
                 "is_anomaly": bool(anomaly_prediction == -1),
-                "risk_factors": risk_factors,
+                "risk_factors": factors,
                 "risk_score": float(risk_score),
                 "recommendation": self._get_failure_recommendation(
                     adjusted_probability
                 ),
+                "cached": False,
                 "prediction_timestamp": datetime.now().isoformat(),
             }
+            self.result_cache.put(bundle.version, key, result)
 
             logger.info(
-                "Failure prediction completed: {adjusted_probability:.3f} probability"
+                f"Failure prediction completed: {adjusted_probability:.3f} probability"
             )
             return result
 
@@ -1031,161 +1726,112 @@ class AnomalyDetector:
         Provides human-readable explanations for why an anomaly was detected.
 
         Args:
-            anomaly_result: Result from detect_anomaly() method
+            anomaly_result: Result from detect_anomaly() method, with the
+                sample's metrics under "metrics"
 
         Returns:
             Dict containing detailed explanation of the anomaly
         """
-        try:
-            if not anomaly_result.get("is_anomalyf", False):
-                return {
-                    "status": "not_anomaly",
-                    "explanation": "No anomaly detected in the provided data",
-                    "factors": [],
-                }
+        return self.get_anomaly_explanations([anomaly_result])[0]
 
-            factors = []
-            severity = anomaly_result.get("severity", "unknown")
-            anomaly_score = anomaly_result.get("anomaly_score", 0)
-
-            # Analyze individual metrics for explanation
-            metrics = anomaly_result.get("metricsf", {})
-
-            # CPU analysis
-            cpu_usage = metrics.get("cpu_usage_percentf", 0)
-            if cpu_usage > 95:
-                factors.append(
-                    {
-                        "metric": "cpu_usage_percent",
-                        "value": cpu_usage,
-                        "explanation": f"Critical CPU usage at {cpu_usage}% (>95% threshold)",
-                        "impact": "critical",
-                        "normal_range": "0-80%f",
-                    }
-                )
-            elif cpu_usage > 85:
-                factors.append(
-                    {
-                        "metric": "cpu_usage_percent",
-                        "value": cpu_usage,
-                        "explanation": f"High CPU usage at {cpu_usage}% (>85% threshold)",
-                        "impact": "high",
-                        "normal_range": "0-80%",
-                    }
-                )
+    def get_anomaly_explanations(
+        self, anomaly_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Explain many anomalies in one call.
 
-            # Memory analysis
-            memory_usage = metrics.get("memory_usage_percentf", 0)
-            if memory_usage > 90:
-                factors.append(
-                    {
-                        "metric": "memory_usage_percent",
-                        "value": memory_usage,
-                        "explanation": f"Critical memory usage at {memory_usage}% (>90% threshold)",
-                        "impact": "critical",
-                        "normal_range": "0-80%f",
-                    }
-                )
-            elif memory_usage > 80:
-                factors.append(
-                    {
-                        "metric": "memory_usage_percent",
-                        "value": memory_usage,
-                        "explanation": f"High memory usage at {memory_usage}% (>80% threshold)",
-                        "impact": "high",
-                        "normal_range": "0-80%",
-                    }
-                )
+        Threshold rules are evaluated for all anomalies at once over a
+        matrix of their metrics. Explanations are cached per model version
+        and quantized metrics, severity and score, so dashboards polling
+        the same anomalies get the stored explanation.
 
-            # Disk analysis
-            disk_usage = metrics.get("disk_usage_percentf", 0)
-            if disk_usage > 95:
-                factors.append(
-                    {
-                        "metric": "disk_usage_percent",
-                        "value": disk_usage,
-                        "explanation": f"Critical disk usage at {disk_usage}% (>95% threshold)",
-                        "impact": "critical",
-                        "normal_range": "0-85%f",
-                    }
-                )
-            elif disk_usage > 85:
-                factors.append(
-                    {
-                        "metric": "disk_usage_percent",
-                        "value": disk_usage,
-                        "explanation": f"High disk usage at {disk_usage}% (>85% threshold)",
-                        "impact": "high",
-                        "normal_range": "0-85%",
-                    }
-                )
+        Args:
+            anomaly_results: Results from detect_anomaly(), each with the
+                sample's metrics under "metrics"
 
-            # Load average analysis
-            load_avg = metrics.get("load_avg_1minf", 0)
-            if load_avg > 4:
-                factors.append(
-                    {
-                        "metric": "load_avg_1min",
-                        "value": load_avg,
-                        "explanation": f"Very high system load at {load_avg} (>4.0 threshold)",
-                        "impact": "high",
-                        "normal_range": "0-2.0f",
-                    }
-                )
-            elif load_avg > 2:
-                factors.append(
-                    {
-                        "metric": "load_avg_1min",
-                        "value": load_avg,
-                        "explanation": f"Elevated system load at {load_avg} (>2.0 threshold)",
-                        "impact": "medium",
-                        "normal_range": "0-2.0",
+        Returns:
+            One explanation dict per result, in order
+        """
+        try:
+            explanations: List[Optional[Dict[str, Any]]] = [None] * len(anomaly_results)
+            anomalies = []
+            for index, anomaly_result in enumerate(anomaly_results):
+                if anomaly_result.get("is_anomaly", False):
+                    anomalies.append(index)
+                else:
+                    explanations[index] = {
+                        "status": "not_anomaly",
+                        "explanation": "No anomaly detected in the provided data",
+                        "factors": [],
                     }
-                )
+            if not anomalies:
+                return explanations
+
+            version = self._serving_version()
+            now = datetime.now().isoformat()
+            samples = [anomaly_results[i].get("metrics") or {} for i in anomalies]
+            base_keys = self.result_cache.keys(
+                "explanation", metric_matrix(samples, EXPLANATION_METRICS)
+            )
 
-            # Overall explanation
-            if severity == "critical":
-                overall_explanation = (
-                    "Critical system anomaly detected with multiple risk factors"
-                )
-            elif severity == "high":
-                overall_explanation = (
-                    "High-severity anomaly with significant resource constraints"
-                )
-            elif severity == "medium":
-                overall_explanation = (
-                    "Medium-severity anomaly with elevated resource usage"
+            misses = []
+            for position, (index, base_key) in enumerate(zip(anomalies, base_keys)):
+                anomaly_result = anomaly_results[index]
+                score = anomaly_result.get("anomaly_score", 0)
+                key = base_key + (
+                    anomaly_result.get("severity", "unknown"),
+                    round(float(score or 0) / self.result_cache.quantum),
+                    anomaly_result.get("bundle_version"),
                 )
-            else:
-                overall_explanation = (
-                    "System anomaly detected with unusual metric patternsf"
-                )
-
-            # Recommendations
-            recommendations = self._generate_anomaly_recommendations(factors)
-
-            result = {
-                "status": "success",
-                "explanation": overall_explanation,
-                "severity": severity,
-                "anomaly_score": anomaly_score,
-                "contributing_factors": factors,
-                "factor_count": len(factors),
-                "recommendations": recommendations,
-                "explanation_timestamp": datetime.now().isoformat(),
-            }
+                cached = self.result_cache.get(version, key)
+                if cached is not None:
+                    explanations[index] = {
+                        **cached,
+                        "cached": True,
+                        "explanation_timestamp": now,
+                    }
+                else:
+                    misses.append((index, key, samples[position]))
+
+            factor_lists = explanation_factors([sample for _, _, sample in misses])
+            for (index, key, _), factors in zip(misses, factor_lists):
+                anomaly_result = anomaly_results[index]
+                severity = anomaly_result.get("severity", "unknown")
+                explanation = {
+                    "status": "success",
+                    "explanation": severity_explanation(severity),
+                    "severity": severity,
+                    "anomaly_score": anomaly_result.get("anomaly_score", 0),
+                    "contributing_factors": factors,
+                    "factor_count": len(factors),
+                    "recommendations": self._generate_anomaly_recommendations(factors),
+                    "cached": False,
+                    "explanation_timestamp": now,
+                }
+                self.result_cache.put(version, key, explanation)
+                explanations[index] = explanation
 
-            logger.info("Anomaly explanation generated with {len(factors)} factors")
-            return result
+            logger.info(
+                f"Explained {len(anomalies)} anomalies ({len(misses)} computed)"
+            )
+            return explanations
 
         except Exception as e:
             logger.error(f"Anomaly explanation failed: {e}")
-            return {
-                "status": "error",
-                "error": str(e),
-                "explanation": "Unable to generate explanation",
-                "factors": [],
-            }
+            return [
+                {
+                    "status": "error",
+                    "error": str(e),
+                    "explanation": "Unable to generate explanation",
+                    "factors": [],
+                }
+                for _ in anomaly_results
+            ]
+
+    def _serving_version(self) -> Optional[str]:
+        """Version of the bundle currently serving requests, if any."""
+        bundle = self.model_holder.current
+        return bundle.version if bundle is not None else None
 
     def _rule_based_failure_prediction(
         self, metrics: Dict[str, Any], time_horizon: int
@@ -1193,7 +1839,7 @@ class AnomalyDetector:
         """Rule-based failure prediction when ML model isn't available"""
         cpu = metrics.get("cpu_usage_percent", 0)
         memory = metrics.get("memory_usage_percent", 0)
-        disk = metrics.get("disk_usage_percentf", 0)
+        disk = metrics.get("disk_usage_percent", 0)
 
         # Critical thresholds
         critical_score = 0
@@ -1239,51 +1885,7 @@ class AnomalyDetector:
 
     def _generate_anomaly_recommendations(self, factors: List[Dict]) -> List[str]:
         """Generate actionable recommendations based on anomaly factors"""
-        recommendations = []
-
-        for factor in factors:
-            metric = factor["metric"]
-            impact = factor["impact"]
-
-            if metric == "cpu_usage_percent":
-                if impact == "critical":
-                    recommendations.append(
-                        "Scale out horizontally or upgrade CPU resources immediately"
-                    )
-                else:
-                    recommendations.append(
-                        "Optimize CPU-intensive processes or consider resource scaling"
-                    )
-
-            elif metric == "memory_usage_percent":
-                if impact == "critical":
-                    recommendations.append(
-                        "Add memory resources or restart memory-leaking processes"
-                    )
-                else:
-                    recommendations.append(
-                        "Monitor memory usage trends and optimize application memory"
-                    )
-
-            elif metric == "disk_usage_percent":
-                if impact == "critical":
-                    recommendations.append(
-                        "Clean up disk space immediately or expand storage"
-                    )
-                else:
-                    recommendations.append(
-                        "Schedule disk cleanup and consider storage expansion"
-                    )
-
-            elif metric == "load_avg_1min":
-                recommendations.append(
-                    "Reduce concurrent processes or scale compute resources"
-                )
-
-        if not recommendations:
-            recommendations.append("Monitor system metrics for pattern analysis")
-
-        return recommendations
+        return recommendations(factors)
 
     # Additional methods for test compatibility
     def train_model(self, data) -> Dict[str, Any]:
@@ -1371,6 +1973,15 @@ class AnomalyDetector:
         """
         Update the model with new data.
 
+        With the "incremental" update strategy only a fraction of the trees
+        is refit, on the newest samples, and the scaler's statistics are
+        updated instead of refit; see _update_incrementally(). The "full"
+        strategy, models that are not a fitted IsolationForest, and
+        scikit-learn releases refresh_forest isn't tested with refit the
+        whole model on the new data. Until the window of recent samples
+        holds as many rows as the forest's trees were fit on (after a
+        restart it starts empty), the whole model is refit on that window.
+
         Args:
             new_data: New training data
 
@@ -1400,14 +2011,58 @@ class AnomalyDetector:
                 logger.warning("Insufficient new data for model update")
                 return False
 
-            # Scale the new features
-            features_scaled = self.scaler.transform(features_df)
-
-            # Retrain the model with new data
-            self.model.fit(features_scaled)
-
-            # Update training data size
-            self.training_data_size = len(features_df)
+            started = time.perf_counter()
+            with self._update_lock:
+                model = self.model
+                incremental = (
+                    self.update_strategy == "incremental"
+                    and isinstance(getattr(model, "estimators_", None), list)
+                    and isinstance(self.scaler, StandardScaler)
+                    and hasattr(self.scaler, "scale_")
+                )
+                if incremental:
+                    reason = refresh_unsupported_reason(model)
+                    if reason:
+                        logger.warning(
+                            f"Incremental update unavailable ({reason}), "
+                            "refitting the whole model"
+                        )
+                        incremental = False
+                window = None
+                if incremental:
+                    window = self._update_window(features_df)
+                    # Trees fit on fewer rows than the forest's own trees
+                    # would be shallower, and the offset noisy, e.g. right
+                    # after a restart, when no window has been kept
+                    min_window = min(model._max_samples, self.update_window_size)
+                    if len(window) < min_window:
+                        logger.info(
+                            f"Update window has {len(window)} of {min_window} "
+                            "samples, refitting the whole model"
+                        )
+                        incremental = False
+                if incremental:
+                    update = self._update_incrementally(model, features_df, window)
+                else:
+                    # Until the window is large enough refit on all of it
+                    training_df = features_df if window is None else window
+
+                    # Scale the new features
+                    features_scaled = self.scaler.transform(training_df)
+
+                    # Retrain a new model with the new data and swap it in
+                    # once fitted
+                    model = self._create_model(install=False)
+                    model.fit(features_scaled)
+                    self._publish(model, self.scaler)
+                    self._recent_features = training_df.tail(self.update_window_size)
+                    update = {"strategy": "full", "samples": len(features_df)}
+
+                # Update training data size
+                self.training_data_size = len(features_df)
+                self._updates += 1
+                update["update_time"] = time.perf_counter() - started
+                self.last_update = update
 
             # Save the updated model
             self._save_model()
@@ -1418,6 +2073,50 @@ class AnomalyDetector:
             logger.error(f"Model update failed: {e}")
             return False
 
+    def _update_window(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """The kept window of recent samples with new rows appended."""
+        return (
+            features_df
+            if self._recent_features is None
+            else pd.concat([self._recent_features, features_df], ignore_index=True)
+        ).tail(self.update_window_size)
+
+    def _update_incrementally(
+        self, model, features_df: pd.DataFrame, window: pd.DataFrame
+    ) -> Dict:
+        """
+        Fold new samples into the model without refitting all of it.
+
+        The scaler's mean and variance are updated with partial_fit() on the
+        new rows, and the oldest UPDATE_TREE_FRACTION of the trees is
+        replaced by trees fit on window, the most recent samples including
+        the new ones. The kept trees' thresholds are translated to the
+        updated scaler, so they split raw metrics exactly as before.
+        """
+        # The serving scaler stays untouched until the pair is published
+        scaler = copy.deepcopy(self.scaler)
+        scaler.partial_fit(features_df)
+
+        n_replace = max(1, round(self.update_tree_fraction * len(model.estimators_)))
+        # A different seed per update, so refreshed trees don't repeat splits
+        seed = None if self.random_state is None else self.random_state + self._updates
+        refreshed = refresh_forest(
+            model,
+            scaler.transform(window),
+            n_replace,
+            old_scaler=self.scaler,
+            new_scaler=scaler,
+            random_state=seed,
+        )
+        self._publish(refreshed, scaler)
+        self._recent_features = window
+        return {
+            "strategy": "incremental",
+            "samples": len(features_df),
+            "window_samples": len(window),
+            "trees_replaced": n_replace,
+        }
+
     def batch_predict(self, data: List[Dict]) -> List[Dict]:
         """Alias for batch_detect method."""
         return self.batch_detect(data)
@@ -1525,13 +2224,14 @@ class AnomalyDetector:
 
         # Preprocess the data
         processed_data = self._preprocess_data(data)
+        bundle = self._serving_bundle()
 
         # Scale the data
-        scaled_data = self.scaler.transform(processed_data)
+        scaled_data = bundle.scaler.transform(processed_data)
 
         # Make predictions
         try:
-            predictions = self.model.predict(scaled_data)
+            predictions = self._bundle_model(bundle).predict(scaled_data)
             return predictions
         except Exception as e:
             raise Exception(f"Prediction failed: {str(e)}")
@@ -1554,15 +2254,26 @@ class AnomalyDetector:
 
         # Preprocess the data
         processed_data = self._preprocess_data(data)
+        bundle = self._serving_bundle()
 
         # Scale the data
-        scaled_data = self.scaler.transform(processed_data)
+        scaled_data = bundle.scaler.transform(processed_data)
+
+        offset = self._scoring_offset(bundle)
+        if offset is not None:
+            # One pass: decision_function() is score_samples() - offset_
+            scorer = self._compiled_scorer(bundle) or bundle.model
+            scores = np.asarray(scorer.score_samples(scaled_data))
+            predictions = np.where(scores - offset < 0, -1, 1)
+            return predictions, scores
+
+        model = self._bundle_model(bundle)
 
         # Make predictions
-        predictions = self.model.predict(scaled_data)
+        predictions = model.predict(scaled_data)
 
         # Get anomaly scores
-        scores = self.model.score_samples(scaled_data)
+        scores = model.score_samples(scaled_data)
 
         return predictions, scores
 
@@ -1841,7 +2552,22 @@ class AnomalyDetector:
         }
 
     def retrain_model(self, new_data: List[Dict]) -> Dict[str, Any]:
-        """Retrain model with new data"""
+        """
+        Retrain model with new data.
+
+        A trained model is updated incrementally (see update_model()) unless
+        UPDATE_STRATEGY is "full"; otherwise it is trained from scratch.
+        """
+        if self.is_trained and self.update_strategy == "incremental":
+            if not self.update_model(new_data):
+                return {"success": False, "error": "Model update failed"}
+            return {
+                "success": True,
+                "samples_trained": len(new_data),
+                "model_path": self.model_path,
+                "retraining_metrics": dict(self.last_update),
+            }
+
         result = self.train_model(new_data)
         if result.get("success"):
             return {
@@ -2449,61 +3175,74 @@ class TimeSeriesAnalyzer:
     def __init__(self):
         """Initialize the time series analyzer."""
         self.window_size = 10
+        # Running slopes of series fed through update_trends()
+        self.trend_tracker = TrendTracker()
         logger.info("TimeSeriesAnalyzer initialized")
 
-    def detect_trends(self, metrics_history: List[Dict]) -> Dict[str, Any]:
+    @staticmethod
+    def _trend_matrix(metrics_history, names: Optional[Sequence[str]] = None):
+        """
+        Series names and a (n_series, n_points) matrix of their values.
+
+        Accepts a list of metric dicts (one per point), a DataFrame, a dict
+        of per-series arrays (padded with NaN to the longest), or a 2-D
+        array of shape (n_series, n_points) with optional names.
+        """
+        if isinstance(metrics_history, np.ndarray):
+            values = np.atleast_2d(metrics_history.astype(float, copy=False))
+            if names is None:
+                names = [f"series_{i}" for i in range(len(values))]
+            return list(names), values
+
+        if isinstance(metrics_history, dict):
+            columns = [np.asarray(v, dtype=float) for v in metrics_history.values()]
+            values = np.full((len(columns), max(map(len, columns), default=0)), np.nan)
+            for row, column in zip(values, columns):
+                row[: len(column)] = column
+            return list(metrics_history.keys()), values
+
+        df = (
+            metrics_history
+            if isinstance(metrics_history, pd.DataFrame)
+            else pd.DataFrame(metrics_history)
+        )
+        numeric = df.select_dtypes(include=[np.number])
+        return list(numeric.columns), numeric.to_numpy(dtype=float).T
+
+    def detect_trends(
+        self, metrics_history, names: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
         """
         Detect trends in metrics over time.
 
+        Slopes of every series come from one vectorized closed-form
+        least-squares fit (see linear_trends()), so many metrics and hosts
+        can be analysed in one call by passing them as columns.
+
         Args:
-            metrics_history: Historical metrics data
+            metrics_history: Historical metrics data, as a list of metric
+                dicts, a DataFrame, a dict of per-series arrays, or an
+                array of shape (n_series, n_points)
+            names: Series names for an array input
 
         Returns:
             Trend analysis results
         """
         try:
-            if len(metrics_history) < 5:
+            series, values = self._trend_matrix(metrics_history, names)
+            n_points = values.shape[1] if values.ndim == 2 else 0
+            if n_points < 5:
                 return {
                     "status": "insufficient_data",
                     "message": "Need at least 5 data points for trend analysis",
                 }
 
-            df = pd.DataFrame(metrics_history)
-            trends = {}
-
-            numeric_columns = df.select_dtypes(include=[np.number]).columns
-
-            for col in numeric_columns:
-                if col in df.columns and not df[col].empty:
-                    values = df[col].dropna()
-                    if len(values) >= 3:
-                        # Simple linear trend detection
-                        x = np.arange(len(values))
-                        slope = np.polyfit(x, values, 1)[0]
-
-                        # Categorize trend
-                        if abs(slope) < 0.1:
-                            trend = "stable"
-                        elif slope > 0:
-                            trend = "increasing"
-                        else:
-                            trend = "decreasingf"
-
-                        trends[col] = {
-                            "trend": trend,
-                            "slope": float(slope),
-                            "current_value": float(values.iloc[-1]),
-                            "change_rate": (
-                                float(slope / values.mean())
-                                if values.mean() != 0
-                                else 0
-                            ),
-                        }
+            trends = trend_summaries(series, linear_trends(values), min_points=3)
 
             return {
                 "status": "success",
                 "trends": trends,
-                "analysis_window": len(metrics_history),
+                "analysis_window": n_points,
                 "timestamp": datetime.now().isoformat(),
             }
 
@@ -2511,6 +3250,30 @@ class TimeSeriesAnalyzer:
             logger.error(f"Trend analysis failed: {e}")
             return {"status": "error", "error": str(e)}
 
+    def update_trends(self, points: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Incremental trend detection: add one point per series and re-read slopes.
+
+        Each call costs O(series updated); no history is kept or refit.
+
+        Args:
+            points: Latest value of each series, e.g. {"web-1.cpu": 42.0}
+
+        Returns:
+            Trend analysis results over every series seen so far
+        """
+        try:
+            self.trend_tracker.update(points)
+            return {
+                "status": "success",
+                "trends": self.trend_tracker.trends(min_points=3),
+                "series_tracked": len(self.trend_tracker),
+                "timestamp": datetime.now().isoformat(),
+            }
+        except Exception as e:
+            logger.error(f"Trend update failed: {e}")
+            return {"status": "error", "error": str(e)}
+
 
 # Factory function for creating anomaly detector
 def create_anomaly_detector(**kwargs) -> AnomalyDetector:
@@ -2845,6 +3608,7 @@ __all__ = [
     "AnomalyModelTrainer",
     "AnomalyInferenceEngine",
     "create_anomaly_detector",
+    "ModelNotReadyError",
 ]
 
 
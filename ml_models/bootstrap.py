@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Bootstrap Anomaly Model
+Builds the synthetic-data model shipped with the image, so a pod without a
+trained model starts from a file instead of training on its first request
+
+Usage (at image build time):
+    python -m ml_models.bootstrap [--output-dir ml_models/bootstrap]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import joblib
+import sklearn
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOOTSTRAP_DIR = os.path.join(os.path.dirname(__file__), "bootstrap")
+MODEL_FILE = "anomaly_detector.pkl"
+SCALER_FILE = "scaler.pkl"
+MANIFEST_FILE = "manifest.json"
+
+DEFAULT_SAMPLES = 1000
+
+
+class BootstrapModelError(Exception):
+    """Raised when a bootstrap model is missing or was built incompatibly."""
+
+
+def build_bootstrap_model(
+    output_dir: str = DEFAULT_BOOTSTRAP_DIR,
+    n_samples: int = DEFAULT_SAMPLES,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """
+    Train the bootstrap model on synthetic data and write it to output_dir.
+
+    The model, scaler and compiled forest are written exactly as a trained
+    detector saves them, next to a manifest recording the sklearn version
+    they were pickled with.
+
+    Returns:
+        The manifest
+    """
+    # The detector imports this module to load bootstrap models
+    from ml_models.anomaly_detector import AnomalyDetector
+
+    os.makedirs(output_dir, exist_ok=True)
+    detector = AnomalyDetector(
+        {
+            "MODEL_PATH": os.path.join(output_dir, MODEL_FILE),
+            "RANDOM_STATE": random_state,
+        }
+    )
+    detector.scaler_path = os.path.join(output_dir, SCALER_FILE)
+
+    started = time.perf_counter()
+    if not detector.train(detector._generate_synthetic_data(n_samples)):
+        raise BootstrapModelError("Training the bootstrap model failed")
+
+    manifest = {
+        "sklearn_version": sklearn.__version__,
+        "n_samples": n_samples,
+        "random_state": random_state,
+        "feature_columns": list(detector.feature_columns),
+        "training_seconds": round(time.perf_counter() - started, 3),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_bootstrap_model(bootstrap_dir: Optional[str] = DEFAULT_BOOTSTRAP_DIR):
+    """
+    Load a bootstrap model built by build_bootstrap_model().
+
+    Returns:
+        tuple of (model, scaler, manifest)
+
+    Raises:
+        BootstrapModelError: If no bootstrap model exists in bootstrap_dir or
+            it was pickled by a different sklearn version
+    """
+    manifest_path = os.path.join(bootstrap_dir or "", MANIFEST_FILE)
+    if not bootstrap_dir or not os.path.exists(manifest_path):
+        raise BootstrapModelError(f"No bootstrap model in {bootstrap_dir}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("sklearn_version") != sklearn.__version__:
+        raise BootstrapModelError(
+            f"Bootstrap model was built with sklearn "
+            f"{manifest.get('sklearn_version')}, running {sklearn.__version__}"
+        )
+    model = joblib.load(os.path.join(bootstrap_dir, MODEL_FILE))
+    scaler = joblib.load(os.path.join(bootstrap_dir, SCALER_FILE))
+    return model, scaler, manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output-dir", default=DEFAULT_BOOTSTRAP_DIR)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = build_bootstrap_model(args.output_dir, args.samples, args.random_state)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "BootstrapModelError",
+    "build_bootstrap_model",
+    "load_bootstrap_model",
+]
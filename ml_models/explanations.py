@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Rule-Based Anomaly Explanations
+Threshold rules for explanation factors, failure risk factors and
+recommendations, evaluated for many samples at once
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ml_models.feature_extractor import FEATURE_NAME_MAPPING
+
+# (threshold, impact, explanation template, normal range, weight); a metric
+# takes the first rule whose threshold its value exceeds
+Rule = Tuple[float, str, str, str, float]
+
+EXPLANATION_RULES: Dict[str, Tuple[Rule, ...]] = {
+    "cpu_usage_percent": (
+        (95, "critical", "Critical CPU usage at {}% (>95% threshold)", "0-80%", 0),
+        (85, "high", "High CPU usage at {}% (>85% threshold)", "0-80%", 0),
+    ),
+    "memory_usage_percent": (
+        (90, "critical", "Critical memory usage at {}% (>90% threshold)", "0-80%", 0),
+        (80, "high", "High memory usage at {}% (>80% threshold)", "0-80%", 0),
+    ),
+    "disk_usage_percent": (
+        (95, "critical", "Critical disk usage at {}% (>95% threshold)", "0-85%", 0),
+        (85, "high", "High disk usage at {}% (>85% threshold)", "0-85%", 0),
+    ),
+    "load_avg_1min": (
+        (4, "high", "Very high system load at {} (>4.0 threshold)", "0-2.0", 0),
+        (2, "medium", "Elevated system load at {} (>2.0 threshold)", "0-2.0", 0),
+    ),
+}
+
+# Factor names stand in for the explanation in failure risk rules
+RISK_RULES: Dict[str, Tuple[Rule, ...]] = {
+    "cpu_usage_percent": (
+        (90, "critical", "high_cpu_usage", "", 0.4),
+        (80, "high", "elevated_cpu_usage", "", 0.3),
+    ),
+    "memory_usage_percent": (
+        (95, "critical", "critical_memory_usage", "", 0.5),
+        (85, "high", "high_memory_usage", "", 0.3),
+    ),
+    "disk_usage_percent": ((95, "critical", "critical_disk_usage", "", 0.4),),
+}
+
+RECOMMENDATIONS = {
+    ("cpu_usage_percent", "critical"): (
+        "Scale out horizontally or upgrade CPU resources immediately"
+    ),
+    ("cpu_usage_percent", None): (
+        "Optimize CPU-intensive processes or consider resource scaling"
+    ),
+    ("memory_usage_percent", "critical"): (
+        "Add memory resources or restart memory-leaking processes"
+    ),
+    ("memory_usage_percent", None): (
+        "Monitor memory usage trends and optimize application memory"
+    ),
+    ("disk_usage_percent", "critical"): (
+        "Clean up disk space immediately or expand storage"
+    ),
+    ("disk_usage_percent", None): (
+        "Schedule disk cleanup and consider storage expansion"
+    ),
+    ("load_avg_1min", None): "Reduce concurrent processes or scale compute resources",
+}
+DEFAULT_RECOMMENDATION = "Monitor system metrics for pattern analysis"
+
+SEVERITY_EXPLANATIONS = {
+    "critical": "Critical system anomaly detected with multiple risk factors",
+    "high": "High-severity anomaly with significant resource constraints",
+    "medium": "Medium-severity anomaly with elevated resource usage",
+}
+DEFAULT_SEVERITY_EXPLANATION = "System anomaly detected with unusual metric patterns"
+
+_ALIASES = {canonical: alias for alias, canonical in FEATURE_NAME_MAPPING.items()}
+
+
+def metric_value(metrics: Mapping[str, Any], metric: str):
+    """A metric's raw value by canonical name or alias, 0 when absent."""
+    if metric in metrics:
+        return metrics[metric]
+    return metrics.get(_ALIASES.get(metric), 0)
+
+
+def metric_matrix(
+    samples: Sequence[Mapping[str, Any]], metrics: Sequence[str]
+) -> np.ndarray:
+    """(n_samples, n_metrics) float matrix of the given metrics."""
+    matrix = np.array(
+        [[metric_value(sample, m) or 0 for m in metrics] for sample in samples],
+        dtype=float,
+    ).reshape(len(samples), len(metrics))
+    return np.nan_to_num(matrix)
+
+
+def rule_levels(
+    matrix: np.ndarray, metrics: Sequence[str], rules: Dict[str, Tuple[Rule, ...]]
+) -> np.ndarray:
+    """
+    Index of the rule each metric of each sample triggers, -1 for none.
+
+    One vectorized comparison per rule over the whole matrix.
+    """
+    levels = np.full(matrix.shape, -1, dtype=np.int8)
+    for column, metric in enumerate(metrics):
+        values = matrix[:, column]
+        # Least severe first, so a more severe rule overwrites it
+        for level in reversed(range(len(rules.get(metric, ())))):
+            levels[values > rules[metric][level][0], column] = level
+    return levels
+
+
+def explanation_factors(
+    samples: Sequence[Mapping[str, Any]],
+) -> List[List[Dict[str, Any]]]:
+    """Explanation factors of each sample's metrics."""
+    metrics = tuple(EXPLANATION_RULES)
+    levels = rule_levels(metric_matrix(samples, metrics), metrics, EXPLANATION_RULES)
+    factors = [[] for _ in samples]
+    for row, column in zip(*np.nonzero(levels >= 0)):
+        metric = metrics[column]
+        _, impact, template, normal_range, _ = EXPLANATION_RULES[metric][
+            levels[row, column]
+        ]
+        value = metric_value(samples[row], metric)
+        factors[row].append(
+            {
+                "metric": metric,
+                "value": value,
+                "explanation": template.format(value),
+                "impact": impact,
+                "normal_range": normal_range,
+            }
+        )
+    return factors
+
+
+def risk_factors(samples: Sequence[Mapping[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Failure risk factors of each sample's metrics."""
+    metrics = tuple(RISK_RULES)
+    levels = rule_levels(metric_matrix(samples, metrics), metrics, RISK_RULES)
+    factors = [[] for _ in samples]
+    for row, column in zip(*np.nonzero(levels >= 0)):
+        metric = metrics[column]
+        _, impact, name, _, weight = RISK_RULES[metric][levels[row, column]]
+        factors[row].append(
+            {
+                "factor": name,
+                "value": metric_value(samples[row], metric),
+                "impact": impact,
+                "weight": weight,
+            }
+        )
+    return factors
+
+
+def recommendations(factors: List[Dict[str, Any]]) -> List[str]:
+    """Actionable recommendations for a sample's explanation factors."""
+    found = []
+    for factor in factors:
+        metric, impact = factor["metric"], factor["impact"]
+        recommendation = RECOMMENDATIONS.get((metric, impact)) or RECOMMENDATIONS.get(
+            (metric, None)
+        )
+        if recommendation:
+            found.append(recommendation)
+    return found or [DEFAULT_RECOMMENDATION]
+
+
+def severity_explanation(severity: Optional[str]) -> str:
+    return SEVERITY_EXPLANATIONS.get(severity, DEFAULT_SEVERITY_EXPLANATION)
+
+
+__all__ = [
+    "EXPLANATION_RULES",
+    "RISK_RULES",
+    "explanation_factors",
+    "metric_matrix",
+    "recommendations",
+    "risk_factors",
+    "rule_levels",
+    "severity_explanation",
+]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Inference Feature Extraction
+Maps raw metric dictionaries straight into NumPy feature rows
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Common metric names accepted as aliases for the model feature columns
+FEATURE_NAME_MAPPING = {
+    "cpu_usage": "cpu_usage_percent",
+    "memory_usage": "memory_usage_percent",
+    "disk_usage": "disk_usage_percent",
+    "network_io": "network_bytes_sent_rate",
+}
+
+PERCENTAGE_FEATURES = (
+    "cpu_usage_percent",
+    "memory_usage_percent",
+    "disk_usage_percent",
+)
+
+# Value used when a metric is present but null/NaN
+MISSING_VALUE_FILL = 50.0
+
+# Value of a *_rate feature when a sample gives nothing to derive it from
+DEFAULT_RATE = 50.0
+
+
+class FeatureExtractor:
+    """
+    Compiled metrics-dict to feature-row mapper for the inference path.
+
+    The lookup plan (which keys to try per column, the default for a missing
+    column and the clipping bounds) is resolved once at construction, so
+    extracting a sample is a handful of dict lookups written into a
+    preallocated row. The rules match AnomalyDetector.prepare_features() for
+    a single sample; the DataFrame path remains the one used for training.
+    """
+
+    def __init__(
+        self,
+        feature_columns: Sequence[str],
+        aliases: Optional[Dict[str, str]] = None,
+        percentage_features: Sequence[str] = PERCENTAGE_FEATURES,
+    ):
+        self.feature_columns = tuple(feature_columns)
+        self.aliases = dict(FEATURE_NAME_MAPPING if aliases is None else aliases)
+        self.percentage_features = tuple(percentage_features)
+        self._plan = self._compile(self.feature_columns)
+        self._local = threading.local()
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_columns)
+
+    def _compile(
+        self, feature_columns: Tuple[str, ...]
+    ) -> Tuple[Tuple[int, Tuple[str, ...], float, bool], ...]:
+        """Resolve the per-column lookup plan."""
+        plan = []
+        for index, col in enumerate(feature_columns):
+            # Aliased names win over the canonical column, as in prepare_features
+            keys = [old for old, new in self.aliases.items() if new == col]
+            keys.append(col)
+
+            if col.endswith("_rate"):
+                # A single sample has no previous value to derive a rate
+                # from, so a raw counter is never used in its place
+                default = DEFAULT_RATE
+            elif col == "load_avg_1min":
+                default = 1.0
+            else:
+                default = 0.0
+
+            plan.append((index, tuple(keys), default, col in self.percentage_features))
+        return tuple(plan)
+
+    def _row_buffer(self) -> np.ndarray:
+        """Per-thread reusable output row."""
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = np.empty(self.n_features)
+            self._local.row = row
+        return row
+
+    def extract(
+        self, metrics: Dict[str, Any], out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Write the feature values for one sample into a row.
+
+        Args:
+            metrics: Metric dictionary for one sample
+            out: Optional 1-D array to fill. When omitted a per-thread buffer
+                is reused, so copy the result if it must outlive the next call.
+
+        Returns:
+            1-D float array of length n_features
+
+        Raises:
+            ValueError, TypeError: If a metric value is not numeric
+        """
+        row = self._row_buffer() if out is None else out
+        for index, keys, default, is_percentage in self._plan:
+            value = default
+            for key in keys:
+                if key in metrics:
+                    value = metrics[key]
+                    break
+
+            value = MISSING_VALUE_FILL if value is None else float(value)
+            if math.isnan(value):
+                value = MISSING_VALUE_FILL
+            if is_percentage:
+                value = 0.0 if value < 0.0 else (100.0 if value > 100.0 else value)
+            row[index] = value
+        return row
+
+    def extract_many(self, metrics_list: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Build a feature matrix for a batch of independent samples.
+
+        Returns:
+            Float matrix of shape (len(metrics_list), n_features)
+        """
+        features = np.empty((len(metrics_list), self.n_features))
+        for row, metrics in enumerate(metrics_list):
+            self.extract(metrics, out=features[row])
+        return features
+
+
+__all__ = [
+    "DEFAULT_RATE",
+    "FeatureExtractor",
+    "FEATURE_NAME_MAPPING",
+    "PERCENTAGE_FEATURES",
+]
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Compiled Isolation Forest Scoring Engine
+Flattens a trained sklearn IsolationForest into contiguous NumPy arrays
+and scores many samples across all trees at once
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sklearn marks leaves with this child id
+TREE_LEAF = -1
+
+# Rows scored per chunk; keeps the (rows x trees) working set cache-sized
+DEFAULT_CHUNK_SIZE = 256
+
+
+def average_path_length(n_samples) -> np.ndarray:
+    """
+    Average path length of an unsuccessful BST search over n samples.
+
+    Same correction term IsolationForest adds for the samples left in a leaf.
+    """
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+
+    mask_2 = n_samples == 2
+    mask_rest = n_samples > 2
+    result[mask_2] = 1.0
+    n = n_samples[mask_rest]
+    result[mask_rest] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return result
+
+
+class CompiledIsolationForest:
+    """
+    IsolationForest flattened into contiguous node arrays.
+
+    All trees share one set of node arrays; a tree is addressed by the index
+    of its root. Leaves point to themselves, so every sample can take the
+    same number of steps through every tree at once, and each leaf stores its
+    full path length (depth plus the average path length correction for the
+    samples it held at fit time). Scores match IsolationForest.score_samples().
+
+    Each edge also stores its path-length gain, c(n_parent) - 1 - c(n_child),
+    where c(n) is the expected path length left in a node holding n training
+    samples. Along a sample's path the gains telescope to c(n_root) minus
+    the sample's path length, so crediting every gain to the split's feature
+    gives an exact additive attribution of how much shorter than expected
+    the sample's path was (see score_samples_with_attributions()).
+    """
+
+    ARRAY_NAMES = (
+        "feature",
+        "threshold",
+        "children",
+        "path_length",
+        "roots",
+    )
+
+    # Arrays missing from bundles saved before attributions existed
+    OPTIONAL_ARRAY_NAMES = ("edge_gain",)
+
+    # File holding the scalar parameters of a saved bundle
+    METADATA_FILE = "metadata.json"
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        path_length: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        max_samples: int,
+        offset: float,
+        n_features: int,
+        edge_gain: Optional[np.ndarray] = None,
+        root_path_length: Optional[float] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        # Interleaved children: node n goes to children[2 * n + went_right]
+        self.children = children
+        self.path_length = path_length
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.max_samples = int(max_samples)
+        self.offset_ = float(offset)
+        self.n_features = int(n_features)
+        self.n_trees = len(roots)
+        self._denominator = self.n_trees * average_path_length([self.max_samples])[0]
+        # Path-length gain of each edge, laid out like children
+        self.edge_gain = edge_gain
+        # Sum over trees of the expected path length at the root
+        self.root_path_length = (
+            None if root_path_length is None else float(root_path_length)
+        )
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledIsolationForest":
+        """
+        Export a fitted sklearn IsolationForest.
+
+        Args:
+            model: Fitted sklearn.ensemble.IsolationForest
+
+        Returns:
+            CompiledIsolationForest with the same scores
+        """
+        n_features = int(model.n_features_in_)
+        max_features = getattr(model, "_max_features", n_features)
+        # sklearn only indexes features when a tree saw a subset of them
+        subsample_features = max_features != n_features
+
+        features, thresholds, children, path_lengths, roots = [], [], [], [], []
+        edge_gains = []
+        root_path_length = 0.0
+        max_depth = 0
+        base = 0
+        for estimator, estimator_features in zip(
+            model.estimators_, model.estimators_features_
+        ):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == TREE_LEAF
+            node_ids = np.arange(n_nodes)
+
+            depth = np.zeros(n_nodes, dtype=np.int64)
+            for node in range(n_nodes):
+                if not is_leaf[node]:
+                    depth[tree.children_left[node]] = depth[node] + 1
+                    depth[tree.children_right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            if subsample_features:
+                feature = np.asarray(estimator_features)[feature]
+
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            left = np.where(is_leaf, node_ids, tree.children_left) + base
+            right = np.where(is_leaf, node_ids, tree.children_right) + base
+            children.append(np.stack([left, right], axis=1).ravel())
+            expected = average_path_length(tree.n_node_samples)
+            path_lengths.append(np.where(is_leaf, depth + expected, 0.0))
+            # Leaves loop back to themselves and gain nothing
+            gain = np.zeros((n_nodes, 2))
+            split = ~is_leaf
+            gain[split, 0] = expected[split] - 1 - expected[tree.children_left[split]]
+            gain[split, 1] = expected[split] - 1 - expected[tree.children_right[split]]
+            edge_gains.append(gain.ravel())
+            root_path_length += expected[0]
+            roots.append(base)
+            base += n_nodes
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            path_length=np.ascontiguousarray(np.concatenate(path_lengths)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            max_samples=model._max_samples,
+            offset=model.offset_,
+            n_features=n_features,
+            edge_gain=np.ascontiguousarray(np.concatenate(edge_gains)),
+            root_path_length=root_path_length,
+        )
+
+    @property
+    def supports_attributions(self) -> bool:
+        return self.edge_gain is not None and self.root_path_length is not None
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Node arrays by name, for persisting the compiled forest."""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        if self.edge_gain is not None:
+            arrays["edge_gain"] = self.edge_gain
+        return arrays
+
+    def metadata(self) -> Dict[str, Any]:
+        """Scalar parameters needed to rebuild the compiled forest."""
+        return {
+            "max_depth": self.max_depth,
+            "max_samples": self.max_samples,
+            "offset": self.offset_,
+            "n_features": self.n_features,
+            "root_path_length": self.root_path_length,
+        }
+
+    def save(self, path: str, **extra_metadata):
+        """
+        Write the forest as a bundle directory of .npy arrays.
+
+        Arrays are stored uncompressed so load() can memory-map them, and the
+        bundle is written to a sibling directory first and renamed into place
+        so readers never see a partial bundle.
+
+        Args:
+            path: Bundle directory
+            **extra_metadata: JSON-serialisable values stored with the bundle
+        """
+        path = os.path.abspath(path)
+        staging = tempfile.mkdtemp(
+            prefix=os.path.basename(path) + ".", dir=os.path.dirname(path)
+        )
+        try:
+            for name, array in self.arrays().items():
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            with open(os.path.join(staging, self.METADATA_FILE), "w") as f:
+                json.dump({**self.metadata(), **extra_metadata}, f)
+
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.rename(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def read_metadata(cls, path: str) -> Dict[str, Any]:
+        """Metadata stored with a saved bundle."""
+        with open(os.path.join(path, cls.METADATA_FILE)) as f:
+            return json.load(f)
+
+    @classmethod
+    def load(
+        cls, path: str, mmap_mode: Optional[str] = "r"
+    ) -> "CompiledIsolationForest":
+        """
+        Load a bundle written by save().
+
+        With the default read-only mmap_mode the node arrays stay backed by
+        the page cache, so every process that loads the same bundle shares
+        one physical copy instead of holding its own.
+
+        Args:
+            path: Bundle directory
+            mmap_mode: Passed to numpy.load; None reads the arrays into memory
+        """
+        metadata = cls.read_metadata(path)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in cls.ARRAY_NAMES
+        }
+        for name in cls.OPTIONAL_ARRAY_NAMES:
+            array_path = os.path.join(path, f"{name}.npy")
+            if os.path.exists(array_path):
+                arrays[name] = np.load(array_path, mmap_mode=mmap_mode)
+        return cls(
+            max_depth=metadata["max_depth"],
+            max_samples=metadata["max_samples"],
+            offset=metadata["offset"],
+            n_features=metadata["n_features"],
+            root_path_length=metadata.get("root_path_length"),
+            **arrays,
+        )
+
+    def _leaf_path_lengths(
+        self, X: np.ndarray, attributions: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Total path length over all trees for each row of X.
+
+        When an (n_rows, n_features) attributions array is given, the gain
+        of every edge taken is added to the row's entry for the feature the
+        edge splits on, during the same walk.
+        """
+        values = X.ravel()
+        row_starts = (np.arange(X.shape[0]) * self.n_features)[:, np.newaxis]
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        for _ in range(self.max_depth):
+            cells = row_starts + np.take(self.feature, nodes)
+            went_right = np.take(values, cells) > np.take(self.threshold, nodes)
+            edges = 2 * nodes + went_right
+            if attributions is not None:
+                attributions += np.bincount(
+                    cells.ravel(),
+                    weights=np.take(self.edge_gain, edges).ravel(),
+                    minlength=attributions.size,
+                ).reshape(attributions.shape)
+            nodes = np.take(self.children, edges)
+        return np.take(self.path_length, nodes).sum(axis=1)
+
+    def _check_input(self, X) -> np.ndarray:
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected input with {self.n_features} features, got {X.shape}"
+            )
+        return X
+
+    def _scores(self, depths: np.ndarray) -> np.ndarray:
+        if self._denominator == 0:
+            return -np.ones_like(depths)
+        return -np.power(2.0, -depths / self._denominator)
+
+    def score_samples(self, X, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Opposite of the anomaly score, as IsolationForest.score_samples().
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+            chunk_size: Rows traversed together
+
+        Returns:
+            Scores of shape (n_samples,); lower is more abnormal
+        """
+        X = self._check_input(X)
+        depths = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            depths[start:stop] = self._leaf_path_lengths(X[start:stop])
+        return self._scores(depths)
+
+    def score_samples_with_attributions(
+        self, X, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores and per-feature attributions from one walk through the forest.
+
+        A sample's attribution to feature f is the path-length gain of the
+        splits on f along its paths, averaged over trees. The attributions
+        of a sample sum to the expected path length at the roots minus its
+        mean path length: positive values are features that isolated the
+        sample sooner than expected, i.e. made it look anomalous.
+
+        Args:
+            X: Array of shape (n_samples, n_features)
+            chunk_size: Rows traversed together
+
+        Returns:
+            (scores, attributions) of shapes (n_samples,) and
+            (n_samples, n_features)
+
+        Raises:
+            ValueError: If the forest was saved without edge gains
+        """
+        if not self.supports_attributions:
+            raise ValueError("Compiled forest has no edge gains; recompile it")
+        X = self._check_input(X)
+        depths = np.empty(X.shape[0])
+        attributions = np.zeros((X.shape[0], self.n_features))
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            depths[start:stop] = self._leaf_path_lengths(
+                X[start:stop], attributions[start:stop]
+            )
+        return self._scores(depths), attributions / self.n_trees
+
+    @property
+    def expected_path_length(self) -> Optional[float]:
+        """Mean over trees of the expected path length at the root."""
+        if self.root_path_length is None:
+            return None
+        return self.root_path_length / self.n_trees
+
+    def decision_function(self, X) -> np.ndarray:
+        """Decision score, as IsolationForest.decision_function()."""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """-1 for anomalies and 1 for inliers, as IsolationForest.predict()."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+__all__ = [
+    "CompiledIsolationForest",
+    "average_path_length",
+]
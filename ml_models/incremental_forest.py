@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Incremental Isolation Forest Updates
+Refreshes part of a trained IsolationForest on a recent window of data
+instead of refitting every tree
+"""
+
+import copy
+import logging
+import re
+from typing import Optional
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+# Sklearn marks leaves with this child id
+TREE_LEAF = -1
+
+# Private IsolationForest attributes refresh_forest reads and rebuilds
+FOREST_ATTRIBUTES = (
+    "_max_samples",
+    "_average_path_length_per_tree",
+    "_decision_path_lengths",
+    "_seeds",
+)
+
+# scikit-learn (major, minor) releases refresh_forest is tested against,
+# inclusive; their private attributes may change in any other release
+TESTED_SKLEARN_VERSIONS = ((1, 5), (1, 9))
+
+
+class UnsupportedForestError(ValueError):
+    """Raised when a forest cannot be refreshed in place safely"""
+
+
+def _sklearn_version(version: str):
+    match = re.match(r"(\d+)\.(\d+)", version)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def refresh_unsupported_reason(
+    model: IsolationForest, version: Optional[str] = None
+) -> Optional[str]:
+    """
+    Why refresh_forest can't update this model, or None if it can.
+
+    refresh_forest splices private IsolationForest attributes, so it only
+    runs on the scikit-learn releases it was tested with and only when
+    every attribute it touches is there.
+
+    Args:
+        model: Fitted IsolationForest
+        version: scikit-learn version, the installed one by default
+    """
+    version = version or sklearn.__version__
+    release = _sklearn_version(version)
+    oldest, newest = TESTED_SKLEARN_VERSIONS
+    if release is None or not oldest <= release <= newest:
+        return f"scikit-learn {version} is outside the tested range"
+    missing = [name for name in FOREST_ATTRIBUTES if not hasattr(model, name)]
+    if missing:
+        return f"IsolationForest lacks {', '.join(missing)}"
+    return None
+
+
+def _scaler_params(scaler: StandardScaler, n_features: int):
+    """(mean, scale) a fitted StandardScaler applies, as arrays."""
+    mean = scaler.mean_ if getattr(scaler, "mean_", None) is not None else 0.0
+    scale = scaler.scale_ if getattr(scaler, "scale_", None) is not None else 1.0
+    return (
+        np.broadcast_to(np.asarray(mean, dtype=float), (n_features,)),
+        np.broadcast_to(np.asarray(scale, dtype=float), (n_features,)),
+    )
+
+
+def rescale_tree(tree, features, old_scaler, new_scaler):
+    """
+    Copy of a fitted tree whose splits mean the same under a new scaler.
+
+    A split x' <= t on a feature scaled with (m, s) holds exactly when the
+    raw value x <= t * s + m, so the threshold under a scaler (m2, s2) is
+    (t * s + m - m2) / s2. Scales are positive, so the tree partitions raw
+    samples the same way it did before the scaler moved.
+
+    Args:
+        tree: Fitted ExtraTreeRegressor from an IsolationForest
+        features: Column of the scaled input each of the tree's features reads
+        old_scaler: Scaler the tree was fitted under
+        new_scaler: Scaler its inputs will be scaled with
+    """
+    tree = copy.deepcopy(tree)
+    n_features = len(new_scaler.scale_)
+    old_mean, old_scale = _scaler_params(old_scaler, n_features)
+    new_mean, new_scale = _scaler_params(new_scaler, n_features)
+
+    nodes = tree.tree_
+    split = nodes.children_left != TREE_LEAF
+    columns = np.asarray(features)[nodes.feature[split]]
+    thresholds = nodes.threshold
+    thresholds[split] = (
+        thresholds[split] * old_scale[columns] + old_mean[columns] - new_mean[columns]
+    ) / new_scale[columns]
+    return tree
+
+
+def refresh_forest(
+    model: IsolationForest,
+    X_recent: np.ndarray,
+    n_replace: int,
+    old_scaler: Optional[StandardScaler] = None,
+    new_scaler: Optional[StandardScaler] = None,
+    random_state=None,
+) -> IsolationForest:
+    """
+    New forest with the oldest trees of a model replaced by trees fit on recent data.
+
+    Trees are kept oldest first, so repeated refreshes roll through the
+    forest and every tree is eventually refit on a recent window. Only
+    n_replace trees are fit and the decision offset is re-derived from the
+    scores of the window, so a refresh costs a fraction of a full refit.
+    The given model is not modified; the returned forest shares its
+    untouched trees.
+
+    Args:
+        model: Fitted IsolationForest
+        X_recent: Recent samples, scaled with new_scaler
+        n_replace: Number of trees to replace, at most model.n_estimators
+        old_scaler: Scaler the model was fitted under
+        new_scaler: Scaler X_recent was scaled with; when it differs from
+            old_scaler the kept trees' thresholds are translated to it
+        random_state: Seed for the new trees
+
+    Returns:
+        A fitted IsolationForest with the same number of trees
+
+    Raises:
+        UnsupportedForestError: refresh_unsupported_reason() found a problem
+    """
+    reason = refresh_unsupported_reason(model)
+    if reason:
+        raise UnsupportedForestError(reason)
+
+    X_recent = np.asarray(X_recent)
+    n_trees = len(model.estimators_)
+    n_replace = max(1, min(int(n_replace), n_trees))
+
+    # Same tree shape as the rest of the forest, so path lengths stay
+    # comparable under the forest's normalisation
+    fresh = IsolationForest(
+        n_estimators=n_replace,
+        max_samples=min(model._max_samples, len(X_recent)),
+        max_features=model.max_features,
+        bootstrap=model.bootstrap,
+        # The offset is derived below for the whole forest
+        contamination="auto",
+        random_state=random_state,
+    ).fit(X_recent)
+
+    kept = slice(n_replace, n_trees)
+    kept_trees = model.estimators_[kept]
+    kept_features = model.estimators_features_[kept]
+    if (
+        old_scaler is not None
+        and new_scaler is not None
+        and old_scaler is not new_scaler
+    ):
+        kept_trees = [
+            rescale_tree(tree, features, old_scaler, new_scaler)
+            for tree, features in zip(kept_trees, kept_features)
+        ]
+
+    refreshed = copy.copy(model)
+    refreshed.estimators_ = kept_trees + fresh.estimators_
+    refreshed.estimators_features_ = kept_features + fresh.estimators_features_
+    refreshed._average_path_length_per_tree = (
+        model._average_path_length_per_tree[kept] + fresh._average_path_length_per_tree
+    )
+    refreshed._decision_path_lengths = (
+        model._decision_path_lengths[kept] + fresh._decision_path_lengths
+    )
+    refreshed._seeds = np.concatenate([model._seeds[kept], fresh._seeds])
+
+    if model.contamination != "auto":
+        refreshed.offset_ = np.percentile(
+            refreshed.score_samples(X_recent), 100.0 * model.contamination
+        )
+    logger.debug(f"Refreshed {n_replace} of {n_trees} trees on {len(X_recent)} rows")
+    return refreshed
+
+
+__all__ = [
+    "UnsupportedForestError",
+    "refresh_forest",
+    "refresh_unsupported_reason",
+    "rescale_tree",
+]
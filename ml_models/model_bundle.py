@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Versioned Model Bundles
+Immutable model snapshots published to request handlers through an atomic holder
+"""
+
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_version_counter = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Everything needed to score a sample, published as one unit.
+
+    A bundle is never modified once published: retraining fits a new model
+    and scaler and publishes a new bundle. Request handlers read the current
+    bundle once and use it throughout, so a request never pairs one version's
+    model with another version's scaler.
+    """
+
+    model: Any
+    scaler: Any
+    feature_columns: Tuple[str, ...]
+    version: str
+    created_at: str
+
+    @classmethod
+    def create(
+        cls, model: Any, scaler: Any, feature_columns: Sequence[str]
+    ) -> "ModelBundle":
+        """Build a bundle with a fresh version id."""
+        now = datetime.now()
+        return cls(
+            model=model,
+            scaler=scaler,
+            feature_columns=tuple(feature_columns),
+            version=f"{now:%Y%m%d%H%M%S}-{next(_version_counter)}",
+            created_at=now.isoformat(),
+        )
+
+    def matches(self, model: Any, scaler: Any, feature_columns: Sequence[str]) -> bool:
+        """Whether this bundle holds exactly these objects."""
+        return (
+            self.model is model
+            and self.scaler is scaler
+            and self.feature_columns == tuple(feature_columns)
+        )
+
+
+class ModelHolder:
+    """
+    Reference to the bundle currently serving traffic.
+
+    Reading current is a single attribute load and never blocks. swap()
+    warms the incoming bundle before it is published, then replaces the
+    reference; requests that already read the old bundle finish on it.
+    """
+
+    def __init__(self, bundle: Optional[ModelBundle] = None):
+        self._bundle = bundle
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[ModelBundle]:
+        return self._bundle
+
+    def swap(
+        self,
+        bundle: ModelBundle,
+        warm_up: Optional[Callable[[ModelBundle], Any]] = None,
+    ) -> Optional[ModelBundle]:
+        """
+        Publish a new bundle.
+
+        Args:
+            bundle: Bundle to serve from now on
+            warm_up: Called with the bundle before it is published; an
+                exception aborts the swap and leaves the current bundle
+
+        Returns:
+            The bundle that was replaced, if any
+        """
+        if warm_up is not None:
+            warm_up(bundle)
+
+        with self._lock:
+            previous = self._bundle
+            self._bundle = bundle
+
+        logger.info(
+            f"Model bundle {bundle.version} published"
+            + (f" (replaced {previous.version})" if previous else "")
+        )
+        return previous
+
+
+__all__ = [
+    "ModelBundle",
+    "ModelHolder",
+]
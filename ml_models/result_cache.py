@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Model-Versioned Result Cache
+LRU cache of derived results keyed by quantized feature vectors and
+cleared whenever a new model version is served
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 4096
+
+# Feature values closer than this share a cache entry
+DEFAULT_QUANTUM = 0.01
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache for results computed from a model and a sample.
+
+    Keys hold the sample's features quantized to a grid of width quantum,
+    so a dashboard re-requesting the same anomaly (or one whose metrics
+    differ only by float noise) gets the stored result. Every lookup names
+    the model version serving it; when that changes, everything cached for
+    the previous version is dropped at once.
+
+    Values are deep-copied going in and coming out, so callers are free to
+    modify the results they get without changing what later hits return.
+    """
+
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, quantum: float = DEFAULT_QUANTUM
+    ):
+        if quantum <= 0:
+            raise ValueError("quantum must be positive")
+        self.max_entries = max_entries
+        self.quantum = quantum
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, kind: str, features, *extra: Hashable) -> Hashable:
+        """Cache key for a kind of result, a feature vector and extra inputs."""
+        grid = np.rint(np.asarray(features, dtype=float) / self.quantum)
+        return (kind, np.nan_to_num(grid).astype(np.int64).tobytes()) + extra
+
+    def keys(self, kind: str, matrix: np.ndarray, *extra: Hashable):
+        """Cache keys for every row of a feature matrix, quantized at once."""
+        grid = np.nan_to_num(np.rint(np.asarray(matrix, dtype=float) / self.quantum))
+        grid = grid.astype(np.int64)
+        return [(kind, row.tobytes()) + extra for row in grid]
+
+    def _sync(self, version: Optional[str]):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: Optional[str], key: Hashable) -> Optional[Any]:
+        with self._lock:
+            self._sync(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, version: Optional[str], key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._sync(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "version": self._version,
+        }
+
+
+__all__ = [
+    "ResultCache",
+]
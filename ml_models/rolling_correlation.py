@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Rolling Correlation Engine
+Incremental pairwise correlations between metric streams, aligned by
+timestamp, with correlation breaks between recent and historical data
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 10
+DEFAULT_BREAK_THRESHOLD = 0.5
+DEFAULT_STRONG_THRESHOLD = 0.7
+
+# Incomplete timestamps held while waiting for the other metrics' values
+DEFAULT_MAX_PENDING = 1024
+
+
+class CovarianceMoments:
+    """
+    Count, mean and co-moment matrix of a set of rows.
+
+    Rows are folded in and out with Welford's update, which costs O(k^2)
+    for k metrics and, unlike raw sums of products, does not lose precision
+    to cancellation when values are large compared to their spread.
+    """
+
+    __slots__ = ("n", "mean", "comoment")
+
+    def __init__(self, k: int):
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def add(self, x: np.ndarray):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def remove(self, x: np.ndarray):
+        if self.n <= 1:
+            self.reset()
+            return
+        previous = self.mean.copy()
+        self.n -= 1
+        self.mean -= (x - self.mean) / self.n
+        self.comoment -= np.outer(x - self.mean, x - previous)
+
+    def merge(self, other: "CovarianceMoments"):
+        """Fold in the moments of another set of rows (Chan's update)."""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment += other.comoment + np.outer(delta, delta) * (
+            self.n * other.n / n
+        )
+        self.mean += delta * (other.n / n)
+        self.n = n
+
+    def reset(self, rows: Optional[np.ndarray] = None):
+        """Recompute the moments from scratch, of no rows or of the given ones."""
+        self.n = 0 if rows is None else len(rows)
+        if self.n:
+            self.mean = rows.mean(axis=0)
+            centered = rows - self.mean
+            self.comoment = centered.T @ centered
+        else:
+            self.mean = np.zeros_like(self.mean)
+            self.comoment = np.zeros_like(self.comoment)
+
+    @classmethod
+    def of(cls, rows: np.ndarray) -> "CovarianceMoments":
+        moments = cls(rows.shape[1])
+        moments.reset(rows)
+        return moments
+
+    def copy(self) -> "CovarianceMoments":
+        moments = CovarianceMoments(len(self.mean))
+        moments.n = self.n
+        moments.mean = self.mean.copy()
+        moments.comoment = self.comoment.copy()
+        return moments
+
+    def correlation(self) -> np.ndarray:
+        """Pearson correlation matrix; NaN for metrics without variance."""
+        std = np.sqrt(np.clip(np.diag(self.comoment), 0, None))
+        scale = np.outer(std, std)
+        return np.divide(
+            self.comoment,
+            scale,
+            out=np.full_like(self.comoment, np.nan),
+            where=scale > 0,
+        )
+
+
+class RollingCorrelation:
+    """
+    Correlations between k metrics, kept up to date one aligned row at a time.
+
+    The newest `window` rows form the recent window; older rows are folded
+    into the historical moments. Each new row is added to the window and the
+    row it pushes out moves to history, so an update costs O(k^2) whatever
+    the length of the history, and correlation breaks (pairs whose recent
+    correlation departs from their historical one) are read off the two
+    sets of moments without rescanning any data.
+
+    Values of one timestamp arrive either as a whole row (update()) or per
+    metric (add_point()); a row is taken in once every metric has a value
+    for its timestamp. Rows at or before the last timestamp taken in are
+    ignored, so overlapping batches can be replayed through extend().
+    """
+
+    def __init__(
+        self,
+        metrics: Sequence[str],
+        window: int = DEFAULT_WINDOW,
+        break_threshold: float = DEFAULT_BREAK_THRESHOLD,
+        strong_threshold: float = DEFAULT_STRONG_THRESHOLD,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        if len(metrics) < 2:
+            raise ValueError("Need at least 2 metrics for correlation analysis")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.metrics = list(metrics)
+        self.window = window
+        self.break_threshold = break_threshold
+        self.strong_threshold = strong_threshold
+        self.max_pending = max_pending
+        self._index = {metric: i for i, metric in enumerate(self.metrics)}
+        k = len(self.metrics)
+        self._recent = CovarianceMoments(k)
+        self._historical = CovarianceMoments(k)
+        self._ring = np.zeros((window, k))
+        self._position = 0
+        self._last_timestamp: Optional[pd.Timestamp] = None
+        self._pending: "OrderedDict[pd.Timestamp, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def samples(self) -> int:
+        return self._recent.n + self._historical.n
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        return self._last_timestamp
+
+    @staticmethod
+    def _timestamp(value) -> Optional[pd.Timestamp]:
+        if value is None:
+            return None
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            return timestamp.tz_localize("UTC")
+        return timestamp.tz_convert("UTC")
+
+    def _push(self, row: np.ndarray):
+        """Add a row to the window, moving the row it displaces to history."""
+        slot = self._position
+        if self._recent.n == self.window:
+            evicted = self._ring[slot].copy()
+            self._recent.remove(evicted)
+            self._historical.add(evicted)
+        self._ring[slot] = row
+        self._recent.add(row)
+        self._position = (slot + 1) % self.window
+        if self._position == 0:
+            # Re-derive the window once per lap so rounding in the removals
+            # cannot accumulate; amortised O(k^2) per row
+            self._recent.reset(self._ring)
+
+    def update(self, values, timestamp=None) -> List[Dict[str, Any]]:
+        """
+        Take in one aligned row and return the correlation breaks after it.
+
+        Args:
+            values: Mapping of metric to value, or a sequence in metric order
+            timestamp: Time of the row; rows not after the last one are ignored
+        """
+        row = self._row(values)
+        timestamp = self._timestamp(timestamp)
+        with self._lock:
+            if not self._accept(timestamp):
+                return []
+            self._push(row)
+            return self._breaks()
+
+    def add_point(self, metric: str, timestamp, value: float) -> List[Dict[str, Any]]:
+        """
+        Take in one metric's value and return breaks if it completed a row.
+
+        Rows complete in any order; a completed row drops the incomplete
+        ones before it, which can no longer be taken in.
+        """
+        index = self._index[metric]
+        timestamp = self._timestamp(timestamp)
+        with self._lock:
+            if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+                return []
+            row = self._pending.get(timestamp)
+            if row is None:
+                row = self._pending[timestamp] = np.full(len(self.metrics), np.nan)
+                while len(self._pending) > self.max_pending:
+                    self._pending.popitem(last=False)
+            row[index] = float(value)
+            if np.isnan(row).any():
+                return []
+
+            del self._pending[timestamp]
+            for stale in [ts for ts in self._pending if ts < timestamp]:
+                del self._pending[stale]
+            self._last_timestamp = timestamp
+            self._push(row)
+            return self._breaks()
+
+    def update_many(
+        self, rows: np.ndarray, timestamps: Optional[Sequence] = None
+    ) -> int:
+        """
+        Take in many aligned rows at once, in time order.
+
+        Rows that end up in history are merged as one block of moments
+        computed with a matrix product, instead of row by row.
+
+        Returns:
+            Number of rows taken in
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(self.metrics))
+        with self._lock:
+            if timestamps is not None:
+                timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+                if self._last_timestamp is not None:
+                    newer = np.asarray(timestamps > self._last_timestamp)
+                    rows, timestamps = rows[newer], timestamps[newer]
+                if len(timestamps):
+                    self._last_timestamp = timestamps[-1]
+            if not len(rows):
+                return 0
+
+            if len(rows) <= self.window:
+                for row in rows:
+                    self._push(row)
+                return len(rows)
+
+            # Window rows in age order, then the new rows; all but the
+            # last `window` of them become history
+            window_rows = np.roll(self._ring, -self._position, axis=0)[
+                self.window - self._recent.n :
+            ]
+            combined = np.concatenate([window_rows, rows])
+            self._historical.merge(
+                CovarianceMoments.of(combined[: len(combined) - self.window])
+            )
+            self._ring[:] = combined[-self.window :]
+            self._position = 0
+            self._recent.reset(self._ring)
+            return len(rows)
+
+    def extend(self, metrics_dict: Dict[str, List[Dict[str, Any]]]) -> int:
+        """
+        Take in series of {"value", "timestamp"} points per metric.
+
+        Series are aligned on their timestamps; only timestamps every metric
+        has a value for are kept. Series without timestamps are aligned by
+        position instead.
+
+        Returns:
+            Number of rows taken in
+        """
+        rows, timestamps = align_series(metrics_dict, self.metrics)
+        return self.update_many(rows, timestamps)
+
+    def _accept(self, timestamp: Optional[pd.Timestamp]) -> bool:
+        if timestamp is None:
+            return True
+        if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+            return False
+        self._last_timestamp = timestamp
+        return True
+
+    def _row(self, values) -> np.ndarray:
+        if isinstance(values, dict):
+            return np.array([float(values[m]) for m in self.metrics])
+        row = np.asarray(values, dtype=float)
+        if row.shape != (len(self.metrics),):
+            raise ValueError(f"Expected {len(self.metrics)} values, got {row.shape}")
+        return row
+
+    def correlation(self, which: str = "all") -> np.ndarray:
+        """
+        Correlation matrix of all rows, the recent window or the history.
+
+        Raises:
+            ValueError: If which is not "all", "recent" or "historical"
+        """
+        with self._lock:
+            if which == "recent":
+                return self._recent.correlation()
+            if which == "historical":
+                return self._historical.correlation()
+            if which != "all":
+                raise ValueError("which must be 'all', 'recent' or 'historical'")
+            moments = self._historical.copy()
+            moments.merge(self._recent)
+            return moments.correlation()
+
+    def correlation_matrix(self) -> Dict[str, Dict[str, float]]:
+        """Correlation of all rows as {metric: {metric: value}}."""
+        return pd.DataFrame(
+            self.correlation(), index=self.metrics, columns=self.metrics
+        ).to_dict()
+
+    def _pairs(self, mask: np.ndarray):
+        rows, cols = np.nonzero(np.triu(mask, k=1))
+        return [(i, j, [self.metrics[i], self.metrics[j]]) for i, j in zip(rows, cols)]
+
+    def strong_correlations(self) -> List[Dict[str, Any]]:
+        """Pairs whose correlation over all rows exceeds strong_threshold."""
+        matrix = self.correlation()
+        with np.errstate(invalid="ignore"):
+            mask = np.abs(matrix) > self.strong_threshold
+        return [
+            {
+                "metrics": metrics,
+                "correlation": float(matrix[i, j]),
+                "type": "positive" if matrix[i, j] > 0 else "negative",
+            }
+            for i, j, metrics in self._pairs(mask)
+        ]
+
+    def correlation_breaks(self) -> List[Dict[str, Any]]:
+        """Pairs whose recent correlation departs from their historical one."""
+        with self._lock:
+            return self._breaks()
+
+    def _breaks(self) -> List[Dict[str, Any]]:
+        # Too little history or a partial window says nothing yet
+        if self._historical.n < 2 or self._recent.n < min(3, self.window):
+            return []
+        recent = self._recent.correlation()
+        historical = self._historical.correlation()
+        with np.errstate(invalid="ignore"):
+            deviation = np.abs(recent - historical)
+            mask = deviation > self.break_threshold
+        timestamp = (
+            self._last_timestamp.isoformat()
+            if self._last_timestamp is not None
+            else None
+        )
+        return [
+            {
+                "type": "correlation_break",
+                "metrics": metrics,
+                "historical_correlation": float(historical[i, j]),
+                "recent_correlation": float(recent[i, j]),
+                "deviation": float(deviation[i, j]),
+                "severity": "high" if deviation[i, j] > 0.8 else "medium",
+                "timestamp": timestamp,
+            }
+            for i, j, metrics in self._pairs(mask)
+        ]
+
+
+def align_series(metrics_dict: Dict[str, List[Dict[str, Any]]], metrics: Sequence[str]):
+    """
+    Rows of values per timestamp common to every metric's series.
+
+    Returns:
+        (rows, timestamps): a (n, k) array in metric order, and the sorted
+        timestamps of its rows, or None when the series carry no timestamps
+        and are aligned by position
+    """
+    series = [metrics_dict.get(metric) or [] for metric in metrics]
+    timed = all(point.get("timestamp") is not None for s in series for point in s)
+    if not timed:
+        n = min(len(s) for s in series)
+        rows = np.array(
+            [[point.get("value", 0) for point in s[:n]] for s in series], dtype=float
+        ).T
+        return rows.reshape(n, len(metrics)), None
+
+    columns = []
+    for metric, points in zip(metrics, series):
+        index = pd.to_datetime([point["timestamp"] for point in points], utc=True)
+        values = pd.Series(
+            [point.get("value", 0) for point in points],
+            index=index,
+            dtype=float,
+            name=metric,
+        )
+        columns.append(values[~values.index.duplicated(keep="last")])
+    frame = pd.concat(columns, axis=1, join="inner").sort_index()
+    return frame.to_numpy(), frame.index
+
+
+__all__ = [
+    "CovarianceMoments",
+    "RollingCorrelation",
+    "align_series",
+]
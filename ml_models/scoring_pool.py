@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Process Pool Scoring Backend
+Scores large batches across worker processes so scoring is not bound to
+the GIL of a single request worker
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional
+
+import numpy as np
+
+from ml_models.forest_engine import CompiledIsolationForest
+
+logger = logging.getLogger(__name__)
+
+# Smallest batch worth the round trip to the worker processes
+DEFAULT_MIN_BATCH_SIZE = 4096
+
+# Smallest slice of a batch handed to one worker
+MIN_ROWS_PER_TASK = 1024
+
+# Forests each worker keeps mapped; old versions stay usable while in flight
+WORKER_FOREST_CACHE_SIZE = 2
+
+_worker_forests: "OrderedDict[str, CompiledIsolationForest]" = OrderedDict()
+
+
+def _worker_forest(path: str) -> CompiledIsolationForest:
+    """Memory-map a forest bundle once per worker process."""
+    forest = _worker_forests.get(path)
+    if forest is None:
+        forest = CompiledIsolationForest.load(path)
+        _worker_forests[path] = forest
+        while len(_worker_forests) > WORKER_FOREST_CACHE_SIZE:
+            _worker_forests.popitem(last=False)
+    else:
+        _worker_forests.move_to_end(path)
+    return forest
+
+
+def _remove_owned_dir(path: str, owner_pid: int):
+    """Remove a directory, unless this is a forked copy of its owner."""
+    if os.getpid() == owner_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _score_rows(
+    forest_path: str,
+    features_name: str,
+    scores_name: str,
+    shape: tuple,
+    start: int,
+    stop: int,
+):
+    """Score rows [start, stop) of the shared feature matrix in a worker."""
+    forest = _worker_forest(forest_path)
+    features_shm = SharedMemory(name=features_name)
+    scores_shm = SharedMemory(name=scores_name)
+    try:
+        features = np.ndarray(shape, dtype=np.float32, buffer=features_shm.buf)
+        scores = np.ndarray((shape[0],), dtype=np.float64, buffer=scores_shm.buf)
+        scores[start:stop] = forest.score_samples(features[start:stop])
+        # Views must go before the segments can be closed
+        del features, scores
+    finally:
+        features_shm.close()
+        scores_shm.close()
+
+
+class ProcessScoringPool:
+    """
+    Pool of worker processes scoring with a compiled IsolationForest.
+
+    Each forest is written once as an uncompressed bundle that the workers
+    memory-map, so every worker shares one copy of the node arrays through
+    the page cache. A batch is copied once into a shared-memory float32
+    matrix; workers score disjoint row ranges of it in place and write their
+    scores into a shared output buffer, so no features or scores are pickled.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_batch_size: int = DEFAULT_MIN_BATCH_SIZE,
+        start_method: str = "spawn",
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_batch_size = min_batch_size
+        self.start_method = start_method
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._workdir: Optional[str] = None
+        # Bundle directory per forest, removed once the forest is collected
+        self._forest_paths: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is not None and self._pid != os.getpid():
+                # Inherited through fork (gunicorn preload_app); the workers
+                # belong to the parent, so this process starts its own
+                self._executor = None
+                self._forest_paths = weakref.WeakKeyDictionary()
+                self._workdir = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+                self._pid = os.getpid()
+                self._workdir = tempfile.mkdtemp(prefix="forest-pool-")
+                weakref.finalize(self, _remove_owned_dir, self._workdir, self._pid)
+                logger.info(f"Scoring process pool started ({self.max_workers})")
+            return self._executor
+
+    def _forest_path(self, forest: CompiledIsolationForest) -> str:
+        """Bundle directory the workers map for this forest."""
+        with self._lock:
+            path = self._forest_paths.get(forest)
+            if path is None:
+                path = tempfile.mkdtemp(prefix="forest-", dir=self._workdir)
+                forest.save(path)
+                self._forest_paths[forest] = path
+                weakref.finalize(forest, _remove_owned_dir, path, self._pid)
+            return path
+
+    def accepts(self, n_samples: int) -> bool:
+        """Whether a batch is large enough to send to the workers."""
+        return n_samples >= self.min_batch_size
+
+    def score_samples(self, forest: CompiledIsolationForest, X) -> np.ndarray:
+        """
+        Score samples across the worker processes.
+
+        Args:
+            forest: Compiled forest to score with
+            X: Array of shape (n_samples, n_features)
+
+        Returns:
+            Scores of shape (n_samples,), as forest.score_samples(X)
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != forest.n_features:
+            raise ValueError(
+                f"Expected input with {forest.n_features} features, got {X.shape}"
+            )
+        n_samples = X.shape[0]
+        if n_samples == 0:
+            return np.empty(0)
+
+        executor = self._ensure_started()
+        forest_path = self._forest_path(forest)
+        features_shm = SharedMemory(create=True, size=max(1, X.size * 4))
+        scores_shm = SharedMemory(create=True, size=n_samples * 8)
+        try:
+            features = np.ndarray(X.shape, dtype=np.float32, buffer=features_shm.buf)
+            features[:] = X
+            del features
+
+            n_tasks = max(1, min(self.max_workers, n_samples // MIN_ROWS_PER_TASK))
+            bounds = np.linspace(0, n_samples, n_tasks + 1).astype(int)
+            futures = [
+                executor.submit(
+                    _score_rows,
+                    forest_path,
+                    features_shm.name,
+                    scores_shm.name,
+                    X.shape,
+                    int(start),
+                    int(stop),
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            for future in futures:
+                future.result()
+
+            return np.ndarray(
+                (n_samples,), dtype=np.float64, buffer=scores_shm.buf
+            ).copy()
+        finally:
+            features_shm.close()
+            features_shm.unlink()
+            scores_shm.close()
+            scores_shm.unlink()
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "running": self._executor is not None and self._pid == os.getpid(),
+            "max_workers": self.max_workers,
+            "min_batch_size": self.min_batch_size,
+            "start_method": self.start_method,
+        }
+
+
+_pools: Dict[tuple, ProcessScoringPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_scoring_pool(
+    max_workers: Optional[int] = None,
+    min_batch_size: int = DEFAULT_MIN_BATCH_SIZE,
+) -> ProcessScoringPool:
+    """Shared pool for the given settings, so detectors reuse one set of workers."""
+    key = (max_workers, min_batch_size)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ProcessScoringPool(max_workers, min_batch_size)
+        return pool
+
+
+__all__ = [
+    "ProcessScoringPool",
+    "get_scoring_pool",
+]
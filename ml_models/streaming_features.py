@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Streaming Feature State
+Per-host incremental feature state for online anomaly detection
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ml_models.feature_extractor import DEFAULT_RATE, FeatureExtractor
+
+try:
+    from redis.exceptions import ConnectionError as RedisConnectionError
+    from redis.exceptions import TimeoutError as RedisTimeoutError
+    from redis.exceptions import WatchError
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SIZE = 32
+DEFAULT_EWMA_ALPHA = 0.1
+DEFAULT_MAX_HOSTS = 10000
+
+# Redis-backed state: key prefix, idle seconds before a host's state expires,
+# attempts at an optimistic update before giving up, and seconds to keep
+# using the in-process fallback after Redis becomes unreachable
+DEFAULT_STATE_PREFIX = "anomaly:stream:"
+DEFAULT_STATE_TTL = 3600
+MAX_UPDATE_ATTEMPTS = 16
+DEFAULT_RETRY_INTERVAL = 30.0
+
+
+def timestamp_seconds(value: Any) -> Optional[float]:
+    """
+    Seconds since the epoch of a sample timestamp, or None if there is none.
+
+    Accepts epoch seconds, datetimes (naive ones are taken as local time, as
+    datetime.timestamp() does) and ISO 8601 strings.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    seconds = float(value)
+    return None if math.isnan(seconds) else seconds
+
+
+def counter_rates(values, previous, elapsed):
+    """
+    Per-second rates of monotonic counters between two samples.
+
+    A counter that went backwards was reset, so it has counted its current
+    value since then. The rate is NaN where there is no previous value or
+    the samples are not strictly increasing in time. Works elementwise on
+    scalars and arrays; both the training path and the stream use it, so
+    they derive identical rates from the same samples.
+    """
+    values = np.asarray(values, dtype=float)
+    previous = np.asarray(previous, dtype=float)
+    elapsed = np.asarray(elapsed, dtype=float)
+    delta = values - previous
+    delta = np.where(delta < 0, values, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(elapsed > 0, delta / elapsed, np.nan)
+
+
+@dataclass(frozen=True)
+class StreamFeatures:
+    """Features of one streamed sample and how it compares to its host's history."""
+
+    features: np.ndarray
+    zscores: np.ndarray
+    rolling_mean: np.ndarray
+    samples: int
+
+
+class HostStreamState:
+    """
+    Compact history of one host's metric stream.
+
+    Holds the last raw counter values and when they were sampled (for
+    rates), an exponentially weighted mean and variance per feature, and a
+    fixed-size ring buffer of recent feature rows with its running sum.
+    Updating it costs O(n_features) regardless of how long the host has
+    been streaming.
+    """
+
+    __slots__ = (
+        "counters",
+        "counter_times",
+        "mean",
+        "var",
+        "window",
+        "window_sum",
+        "position",
+        "samples",
+    )
+
+    def __init__(self, n_features: int, n_counters: int, window_size: int):
+        self.counters = np.full(n_counters, np.nan)
+        self.counter_times = np.full(n_counters, np.nan)
+        self.mean = np.zeros(n_features)
+        self.var = np.zeros(n_features)
+        self.window = np.zeros((window_size, n_features))
+        self.window_sum = np.zeros(n_features)
+        self.position = 0
+        self.samples = 0
+
+    def to_bytes(self) -> bytes:
+        """Pack the state into one float64 buffer."""
+        return np.concatenate(
+            [
+                [self.position, self.samples],
+                self.counters,
+                self.counter_times,
+                self.mean,
+                self.var,
+                self.window_sum,
+                self.window.ravel(),
+            ]
+        ).tobytes()
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, n_features: int, n_counters: int, window_size: int
+    ) -> "HostStreamState":
+        """Unpack a buffer written by to_bytes() for the same dimensions."""
+        state = cls(n_features, n_counters, window_size)
+        values = np.frombuffer(data, dtype=np.float64)
+        expected = 2 + 2 * n_counters + 3 * n_features + window_size * n_features
+        if len(values) != expected:
+            raise ValueError("Stream state does not match the feature layout")
+        state.position, state.samples = int(values[0]), int(values[1])
+        offset = 2
+        for name, size in (
+            ("counters", n_counters),
+            ("counter_times", n_counters),
+            ("mean", n_features),
+            ("var", n_features),
+            ("window_sum", n_features),
+        ):
+            getattr(state, name)[:] = values[offset : offset + size]
+            offset += size
+        state.window[:] = values[offset:].reshape(window_size, n_features)
+        return state
+
+
+class StreamingFeatureState:
+    """
+    Incremental feature computation for per-host metric streams.
+
+    A request carrying a single sample has no previous sample, so
+    FeatureExtractor gives its *_rate features the missing-rate default. Here
+    each host keeps the last value and sample time of every raw counter, and a
+    rate is the per-second counter_rates() change since the host's previous
+    sample - the rule _preprocess_data() and prepare_features() apply to
+    DataFrames. Samples are timed by their "timestamp" metric, or by arrival when
+    they carry none. Until a host has a previous sample the rate is the
+    missing-rate default, as in training.
+
+    State lives in this process; hosts are kept in LRU order and the least
+    recently seen host is dropped once max_hosts is exceeded. Behind several
+    worker processes use RedisStreamingFeatureState, so a host's samples
+    continue one stream whichever worker receives them.
+    """
+
+    def __init__(
+        self,
+        extractor: FeatureExtractor,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        max_hosts: int = DEFAULT_MAX_HOSTS,
+    ):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.extractor = extractor
+        self.window_size = window_size
+        self.alpha = alpha
+        self.max_hosts = max_hosts
+        self._counters = self._compile_counters(extractor)
+        self._rate_columns = np.array(
+            [index for index, _, _ in self._counters], dtype=np.intp
+        )
+        self._hosts: "OrderedDict[str, HostStreamState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _compile_counters(
+        extractor: FeatureExtractor,
+    ) -> Tuple[Tuple[int, Tuple[str, ...], str], ...]:
+        """(column index, keys carrying the rate itself, counter key) per rate."""
+        counters = []
+        for index, col in enumerate(extractor.feature_columns):
+            if col.endswith("_rate"):
+                rate_keys = [
+                    old for old, new in extractor.aliases.items() if new == col
+                ]
+                rate_keys.append(col)
+                counters.append((index, tuple(rate_keys), col[: -len("_rate")]))
+        return tuple(counters)
+
+    @property
+    def n_hosts(self) -> int:
+        return len(self._hosts)
+
+    def _new_state(self) -> HostStreamState:
+        return HostStreamState(
+            self.extractor.n_features, len(self._counters), self.window_size
+        )
+
+    def _host_state(self, host_id: str) -> HostStreamState:
+        state = self._hosts.get(host_id)
+        if state is None:
+            state = self._new_state()
+            self._hosts[host_id] = state
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+        else:
+            self._hosts.move_to_end(host_id)
+        return state
+
+    def _observe(self, metrics: Dict[str, Any]):
+        """(features, counter values, sample time) of one sample."""
+        features = self.extractor.extract(
+            metrics, out=np.empty(self.extractor.n_features)
+        )
+        counter_values = np.array(
+            [
+                self._counter_value(metrics, rate_keys, counter_key)
+                for _, rate_keys, counter_key in self._counters
+            ],
+            dtype=float,
+        )
+        seconds = timestamp_seconds(metrics.get("timestamp"))
+        return features, counter_values, time.time() if seconds is None else seconds
+
+    def update(self, host_id: str, metrics: Dict[str, Any]) -> StreamFeatures:
+        """
+        Add a sample to a host's stream and return its features.
+
+        Z-scores compare the sample to the host's exponentially weighted mean
+        and variance before the sample is folded in, so an outlier does not
+        hide itself; they are 0 until the host has some history.
+
+        Raises:
+            ValueError, TypeError: If a metric value or the timestamp is invalid
+        """
+        features, counter_values, seconds = self._observe(metrics)
+        with self._lock:
+            return self._advance(
+                self._host_state(host_id), features, counter_values, seconds
+            )
+
+    def _advance(
+        self,
+        state: HostStreamState,
+        features: np.ndarray,
+        counter_values: np.ndarray,
+        seconds: float,
+    ) -> StreamFeatures:
+        """Fold a sample into a host's state; fills in features' rates."""
+        present = ~np.isnan(counter_values)
+        if present.any():
+            rates = counter_rates(
+                counter_values[present],
+                state.counters[present],
+                seconds - state.counter_times[present],
+            )
+            features[self._rate_columns[present]] = np.where(
+                np.isnan(rates), DEFAULT_RATE, rates
+            )
+            state.counters[present] = counter_values[present]
+            state.counter_times[present] = seconds
+
+        std = np.sqrt(state.var)
+        zscores = np.divide(
+            features - state.mean,
+            std,
+            out=np.zeros_like(features),
+            where=std > 0,
+        )
+
+        if state.samples == 0:
+            state.mean[:] = features
+        else:
+            # Exponentially weighted mean and variance (West's update)
+            diff = features - state.mean
+            increment = self.alpha * diff
+            state.mean += increment
+            state.var[:] = (1 - self.alpha) * (state.var + diff * increment)
+
+        # Ring buffer: replace the oldest row and adjust the running sum
+        slot = state.position
+        state.window_sum += features - state.window[slot]
+        state.window[slot] = features
+        state.position = (slot + 1) % self.window_size
+        if state.position == 0:
+            # Re-sum once per lap so rounding in the running sum cannot
+            # accumulate; amortised O(1) per sample
+            state.window_sum[:] = state.window.sum(axis=0)
+        state.samples += 1
+        filled = min(state.samples, self.window_size)
+
+        return StreamFeatures(
+            features=features,
+            zscores=zscores,
+            rolling_mean=state.window_sum / filled,
+            samples=state.samples,
+        )
+
+    @staticmethod
+    def _counter_value(
+        metrics: Dict[str, Any], rate_keys: Tuple[str, ...], counter_key: str
+    ) -> float:
+        """Raw counter to derive a rate from, or NaN if none applies."""
+        if any(key in metrics for key in rate_keys):
+            return math.nan
+        value = metrics.get(counter_key)
+        return math.nan if value is None else float(value)
+
+    def reset(self, host_id: Optional[str] = None):
+        """Forget one host's history, or every host's."""
+        with self._lock:
+            if host_id is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host_id, None)
+
+
+class RedisStreamingFeatureState(StreamingFeatureState):
+    """
+    StreamingFeatureState kept in Redis and shared by every worker.
+
+    Each host's state is one packed value under key_prefix + host_id. An
+    update reads it under WATCH and writes it back in MULTI/EXEC, retrying
+    if another worker updated the same host in between, so concurrent
+    samples of a host are applied one after the other. A host's state
+    expires after ttl seconds without samples instead of by LRU.
+
+    When Redis cannot be reached, updates fall back to this process's own
+    state (as StreamingFeatureState keeps it) and Redis is retried only
+    after retry_interval seconds, so an outage costs one timeout per
+    interval rather than one per sample.
+    """
+
+    def __init__(
+        self,
+        extractor: FeatureExtractor,
+        client,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        ttl: int = DEFAULT_STATE_TTL,
+        key_prefix: str = DEFAULT_STATE_PREFIX,
+        max_hosts: int = DEFAULT_MAX_HOSTS,
+        retry_interval: float = DEFAULT_RETRY_INTERVAL,
+    ):
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis is required for RedisStreamingFeatureState")
+        super().__init__(
+            extractor, window_size=window_size, alpha=alpha, max_hosts=max_hosts
+        )
+        self.client = client
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.retry_interval = retry_interval
+        # time.monotonic() until which updates skip Redis
+        self._redis_retry_at = 0.0
+
+    @property
+    def using_fallback(self) -> bool:
+        """Whether updates currently go to the in-process fallback."""
+        return time.monotonic() < self._redis_retry_at
+
+    def _key(self, host_id: str) -> str:
+        return f"{self.key_prefix}{host_id}"
+
+    @property
+    def n_hosts(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.key_prefix}*"))
+
+    def _load(self, data: Optional[bytes]) -> HostStreamState:
+        if data is None:
+            return self._new_state()
+        return HostStreamState.from_bytes(
+            data, self.extractor.n_features, len(self._counters), self.window_size
+        )
+
+    def update(self, host_id: str, metrics: Dict[str, Any]) -> StreamFeatures:
+        if self.using_fallback:
+            return super().update(host_id, metrics)
+        try:
+            return self._update_shared(host_id, metrics)
+        except (RedisConnectionError, RedisTimeoutError) as e:
+            logger.warning(
+                f"Stream state Redis unavailable ({e}); using per-process "
+                f"state for {self.retry_interval:g}s"
+            )
+            self._redis_retry_at = time.monotonic() + self.retry_interval
+            return super().update(host_id, metrics)
+
+    def _update_shared(self, host_id: str, metrics: Dict[str, Any]) -> StreamFeatures:
+        features, counter_values, seconds = self._observe(metrics)
+        key = self._key(host_id)
+        with self.client.pipeline() as pipe:
+            for _ in range(MAX_UPDATE_ATTEMPTS):
+                try:
+                    pipe.watch(key)
+                    state = self._load(pipe.get(key))
+                    result = self._advance(
+                        state, features.copy(), counter_values, seconds
+                    )
+                    pipe.multi()
+                    pipe.set(key, state.to_bytes(), ex=self.ttl)
+                    pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise RuntimeError(f"Stream state for {host_id} is too contended to update")
+
+    def reset(self, host_id: Optional[str] = None):
+        super().reset(host_id)
+        if host_id is not None:
+            self.client.delete(self._key(host_id))
+            return
+        keys = list(self.client.scan_iter(match=f"{self.key_prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+__all__ = [
+    "HostStreamState",
+    "RedisStreamingFeatureState",
+    "StreamFeatures",
+    "StreamingFeatureState",
+    "counter_rates",
+    "timestamp_seconds",
+]
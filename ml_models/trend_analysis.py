@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Smart CloudOps AI - Vectorized Trend Analysis
+Closed-form least-squares trend slopes for many series at once, in batch
+or updated point by point
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Slopes smaller than this (in value units per point) count as stable
+DEFAULT_STABLE_SLOPE = 0.1
+
+
+def linear_trends(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Least-squares slope of every row of a (n_series, n_points) matrix.
+
+    Missing points are NaN and are skipped; the remaining points of a row
+    are taken as equally spaced, as np.polyfit over the row with its NaNs
+    dropped would. The fit is closed form on centered values, so a whole
+    matrix costs a few vectorized passes and large offsets lose no precision.
+
+    Returns:
+        Arrays of shape (n_series,): "slope", "mean", "current" (last
+        value), and "count" (points used); slope is NaN below 2 points
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    present = ~np.isnan(values)
+    count = present.sum(axis=1)
+    # Position of each point among the row's present points
+    x = np.cumsum(present, axis=1) - 1.0
+    y = np.where(present, values, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = (count - 1) / 2.0
+        mean_y = y.sum(axis=1) / count
+        dx = np.where(present, x - mean_x[:, None], 0.0)
+        dy = np.where(present, y - mean_y[:, None], 0.0)
+        # Sum of (x - mean_x)^2 over 0..n-1 is n(n^2 - 1)/12
+        slope = (dx * dy).sum(axis=1) / (count * (count**2 - 1) / 12.0)
+
+    last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    current = np.where(count > 0, values[np.arange(len(values)), last], np.nan)
+    slope = np.where(count >= 2, slope, np.nan)
+    return {"slope": slope, "mean": mean_y, "current": current, "count": count}
+
+
+def classify_trends(
+    slope: np.ndarray, stable_slope: float = DEFAULT_STABLE_SLOPE
+) -> np.ndarray:
+    """Label each slope "stable", "increasing" or "decreasing"."""
+    slope = np.asarray(slope)
+    return np.where(
+        np.abs(slope) < stable_slope,
+        "stable",
+        np.where(slope > 0, "increasing", "decreasing"),
+    )
+
+
+def trend_summaries(
+    names: Sequence[str],
+    fit: Dict[str, np.ndarray],
+    min_points: int = 3,
+    stable_slope: float = DEFAULT_STABLE_SLOPE,
+) -> Dict[str, Dict[str, Any]]:
+    """Per-series trend dicts for the series with at least min_points points."""
+    slope, mean = fit["slope"], fit["mean"]
+    labels = classify_trends(slope, stable_slope)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change_rate = np.where(mean != 0, slope / mean, 0.0)
+    return {
+        name: {
+            "trend": str(labels[i]),
+            "slope": float(slope[i]),
+            "current_value": float(fit["current"][i]),
+            "change_rate": float(change_rate[i]),
+        }
+        for i, name in enumerate(names)
+        if fit["count"][i] >= min_points
+    }
+
+
+class TrendTracker:
+    """
+    Running least-squares trend of many series, updated as points arrive.
+
+    Each series keeps its point count, the mean of its values and the
+    co-moment of values with point index, updated with Welford's formula,
+    so adding a point to every series is a few vectorized operations and a
+    slope is available at any time without refitting. Point indices are
+    0, 1, 2, ... per series, matching linear_trends(). New series are added
+    the first time they are seen.
+    """
+
+    def __init__(
+        self,
+        series: Iterable[str] = (),
+        stable_slope: float = DEFAULT_STABLE_SLOPE,
+    ):
+        self.stable_slope = stable_slope
+        self.names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._count = np.zeros(0)
+        self._mean = np.zeros(0)
+        self._comoment = np.zeros(0)
+        self._last = np.zeros(0)
+        self._lock = threading.Lock()
+        self._indices(series)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _indices(self, names: Iterable[str]) -> np.ndarray:
+        """Index of each series, adding the ones not seen before."""
+        indices = []
+        new = 0
+        for name in names:
+            index = self._index.get(name)
+            if index is None:
+                index = self._index[name] = len(self.names)
+                self.names.append(name)
+                new += 1
+            indices.append(index)
+        if new:
+            grow = np.zeros(new)
+            self._count = np.concatenate([self._count, grow])
+            self._mean = np.concatenate([self._mean, grow])
+            self._comoment = np.concatenate([self._comoment, grow])
+            self._last = np.concatenate([self._last, np.full(new, np.nan)])
+        return np.asarray(indices, dtype=int)
+
+    def update(
+        self,
+        values: Mapping[str, float] = None,
+        names: Optional[Sequence[str]] = None,
+        points: Optional[np.ndarray] = None,
+    ):
+        """
+        Add one point to each of some series.
+
+        Pass either a mapping of series to value, or names and a matching
+        array of points; NaN points are skipped.
+        """
+        if values is not None:
+            names, points = list(values.keys()), list(values.values())
+        points = np.asarray(points, dtype=float)
+        with self._lock:
+            indices = self._indices(names)
+            present = ~np.isnan(points)
+            indices, y = indices[present], points[present]
+
+            n = self._count[indices] + 1
+            # The new point's index is n - 1; the previous mean index (n - 2)/2
+            dx = (n - 1) - (n - 2) / 2.0
+            mean = self._mean[indices] + (y - self._mean[indices]) / n
+            self._comoment[indices] += dx * (y - mean)
+            self._mean[indices] = mean
+            self._count[indices] = n
+            self._last[indices] = y
+
+    def update_many(self, names: Sequence[str], values: np.ndarray):
+        """
+        Add a block of points, values of shape (len(names), n_points).
+
+        The block's statistics are computed with linear_trends()' closed
+        form and merged into each series' running ones; NaN points are
+        skipped.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        block = linear_trends(values)
+        nb = block["count"].astype(float)
+        with self._lock:
+            indices = self._indices(names)
+            na = self._count[indices]
+            n = na + nb
+            weight = np.divide(nb, n, out=np.zeros_like(n), where=n > 0)
+            # Co-moment of the block about its own means, from its slope
+            block_comoment = np.where(
+                nb >= 2, block["slope"] * nb * (nb**2 - 1) / 12.0, 0.0
+            )
+            # Chan's merge; the block's indices continue after the series'
+            # na points, so its mean index is na + (nb - 1)/2
+            delta_x = (na + (nb - 1) / 2.0) - (na - 1) / 2.0
+            delta_y = np.where(nb > 0, block["mean"] - self._mean[indices], 0.0)
+            merged = (
+                self._comoment[indices]
+                + block_comoment
+                + delta_x * delta_y * na * weight
+            )
+            mean = self._mean[indices] + delta_y * weight
+            self._comoment[indices] = merged
+            self._mean[indices] = mean
+            self._count[indices] = n
+            self._last[indices] = np.where(
+                nb > 0, block["current"], self._last[indices]
+            )
+
+    def fit(self) -> Dict[str, np.ndarray]:
+        """Current statistics of every series, in the form of linear_trends()."""
+        with self._lock:
+            count = self._count.copy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                slope = self._comoment / (count * (count**2 - 1) / 12.0)
+            return {
+                "slope": np.where(count >= 2, slope, np.nan),
+                "mean": self._mean.copy(),
+                "current": self._last.copy(),
+                "count": count,
+            }
+
+    def trends(self, min_points: int = 3) -> Dict[str, Dict[str, Any]]:
+        """Trend dicts of the series with at least min_points points."""
+        return trend_summaries(
+            list(self.names), self.fit(), min_points, self.stable_slope
+        )
+
+    def reset(self):
+        with self._lock:
+            self.names = []
+            self._index = {}
+            self._count = np.zeros(0)
+            self._mean = np.zeros(0)
+            self._comoment = np.zeros(0)
+            self._last = np.zeros(0)
+
+
+__all__ = [
+    "TrendTracker",
+    "classify_trends",
+    "linear_trends",
+    "trend_summaries",
+]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Anomaly Micro-Batching Benchmark
+Concurrent detect_anomaly calls against the same load through the BatchProcessor
+
+Each client thread sends requests back to back, as threaded request handlers
+would. Unbatched clients each score their own sample; batched clients go
+through one BatchProcessor, which coalesces them into batch_detect() calls.
+
+Usage:
+    python scripts/performance/bench_anomaly_batching.py [--clients 8 32 500]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.performance.anomaly_optimization import (  # noqa: E402
+    AnomalyConfig,
+    BatchProcessor,
+)
+from scripts.performance.bench_anomaly_inference import (  # noqa: E402
+    _sample_metrics,
+    _trained_detector,
+)
+
+
+def _run_clients(detect, clients: int, requests_per_client: int):
+    """Throughput and latency percentiles for concurrent clients."""
+    samples = _sample_metrics(requests_per_client)
+    latencies = [[] for _ in range(clients)]
+    start_barrier = threading.Barrier(clients + 1)
+
+    def client(index: int):
+        start_barrier.wait()
+        for metrics in samples:
+            started = time.perf_counter()
+            detect(metrics)
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.concatenate(latencies) * 1e3
+    return (
+        clients * requests_per_client / elapsed,
+        np.percentile(all_latencies, 50),
+        np.percentile(all_latencies, 99),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 128, 500])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-linger-ms", type=float, default=2.0)
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default="sklearn")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        detector = _trained_detector(workdir)
+        detector.inference_backend = args.backend
+        config = AnomalyConfig(
+            batch_size=args.max_batch_size, max_linger=args.max_linger_ms / 1000
+        )
+
+        print(
+            f"{args.backend} backend, max batch {args.max_batch_size}, "
+            f"max linger {args.max_linger_ms} ms"
+        )
+        print("clients   mode       req/s    p50 ms   p99 ms   avg batch")
+        for clients in args.clients:
+            rate, p50, p99 = _run_clients(
+                detector.detect_anomaly, clients, args.requests
+            )
+            print(f"{clients:7d}   direct  {rate:9.0f}  {p50:8.2f} {p99:8.2f}")
+
+            processor = BatchProcessor(config, detector=detector)
+            try:
+                rate, p50, p99 = _run_clients(processor.detect, clients, args.requests)
+                batch = processor.get_stats()["avg_batch_size"]
+            finally:
+                processor.stop()
+            print(
+                f"{clients:7d}   batched {rate:9.0f}  {p50:8.2f} {p99:8.2f}"
+                f"   {batch:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
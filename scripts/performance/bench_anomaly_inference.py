@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Anomaly Inference Microbenchmarks
+Compares the inference hot paths of ml_models.anomaly_detector
+
+Usage:
+    python scripts/performance/bench_anomaly_inference.py [--suite features]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from ml_models.anomaly_detector import AnomalyDetector  # noqa: E402
+from ml_models.forest_engine import CompiledIsolationForest  # noqa: E402
+from ml_models.scoring_pool import ProcessScoringPool  # noqa: E402
+
+
+def _time_per_call(func: Callable[[], object], iterations: int, repeat: int = 5):
+    """Best-of-N mean time per call in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start) / iterations * 1e6)
+    return min(timings), statistics.median(timings)
+
+
+def _sample_metrics(n: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Realistic host metric samples."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "cpu_usage": float(rng.uniform(5, 99)),
+            "memory_usage": float(rng.uniform(10, 99)),
+            "disk_usage": float(rng.uniform(10, 99)),
+            "load_avg_1min": float(rng.uniform(0.1, 8)),
+            "network_bytes_sent": float(rng.uniform(1e5, 5e7)),
+            "network_bytes_recv": float(rng.uniform(1e5, 5e7)),
+        }
+        for _ in range(n)
+    ]
+
+
+def _trained_detector(workdir: str) -> AnomalyDetector:
+    detector = AnomalyDetector(
+        {
+            "MODEL_PATH": os.path.join(workdir, "anomaly_detector.pkl"),
+            "ANOMALY_THRESHOLD": 0.7,
+        }
+    )
+    detector.scaler_path = os.path.join(workdir, "scaler.pkl")
+    detector.train(detector._generate_synthetic_data(500))
+    return detector
+
+
+def bench_features(detector: AnomalyDetector, iterations: int):
+    """Single-sample feature preparation: pandas vs compiled extractor."""
+    metrics = _sample_metrics(1)[0]
+    extractor = detector.feature_extractor
+
+    pandas_best, pandas_median = _time_per_call(
+        lambda: detector.prepare_features([metrics]), iterations
+    )
+    fast_best, fast_median = _time_per_call(
+        lambda: extractor.extract(metrics), iterations
+    )
+
+    print("Single-sample feature preparation (us/call, best / median)")
+    print(f"  prepare_features (pandas): {pandas_best:9.1f} / {pandas_median:9.1f}")
+    print(f"  FeatureExtractor.extract:  {fast_best:9.1f} / {fast_median:9.1f}")
+    print(f"  speedup: {pandas_best / fast_best:.1f}x")
+
+
+def bench_batch(detector: AnomalyDetector, iterations: int):
+    """Throughput of batch_detect against scoring samples one at a time."""
+    samples = _sample_metrics(100)
+    per_row_best, _ = _time_per_call(
+        lambda: [detector.detect_anomaly(m) for m in samples], 1, repeat=3
+    )
+    print(f"Per-sample detect_anomaly: {len(samples) / (per_row_best / 1e6):10.0f}/s")
+
+    print("batch_detect samples/second by batch size")
+    for batch_size in (1, 10, 100, 1000, 5000):
+        batch = _sample_metrics(batch_size, seed=batch_size)
+        loops = max(1, iterations // batch_size)
+        batched_best, _ = _time_per_call(
+            lambda: detector.batch_detect(batch), loops, repeat=3
+        )
+        print(f"  batch={batch_size:5d}: {batch_size / (batched_best / 1e6):10.0f}/s")
+
+
+def bench_scoring(detector: AnomalyDetector, iterations: int):
+    """Two-call predict/decision_function scoring against a single pass."""
+    rng = np.random.default_rng(1)
+    n_features = len(detector.feature_columns)
+    print("Scoring time per call (ms, best of 5)")
+    for batch_size in (1, 100, 5000):
+        features = rng.normal(0, 1, size=(batch_size, n_features))
+        loops = max(1, iterations // max(1, batch_size // 10))
+
+        detector.single_pass_scoring = False
+        two_call, _ = _time_per_call(lambda: detector._score_and_label(features), loops)
+        detector.single_pass_scoring = True
+        single_pass, _ = _time_per_call(
+            lambda: detector._score_and_label(features), loops
+        )
+        print(
+            f"  batch={batch_size:5d}  predict+decision_function: "
+            f"{two_call / 1e3:8.2f}  single pass: {single_pass / 1e3:8.2f}"
+            f"  ({two_call / single_pass:.2f}x)"
+        )
+
+
+def bench_forest(detector: AnomalyDetector, iterations: int):
+    """sklearn score_samples against the compiled forest backend."""
+    rng = np.random.default_rng(2)
+    n_features = len(detector.feature_columns)
+    compiled = CompiledIsolationForest.from_sklearn(detector.model)
+    print("score_samples time per call (ms, best of 5)")
+    for batch_size in (1, 10, 100, 1000, 5000):
+        features = rng.normal(0, 1, size=(batch_size, n_features))
+        loops = max(1, iterations // max(1, batch_size // 10))
+        max_error = np.abs(
+            compiled.score_samples(features) - detector.model.score_samples(features)
+        ).max()
+
+        sklearn_best, _ = _time_per_call(
+            lambda: detector.model.score_samples(features), loops
+        )
+        compiled_best, _ = _time_per_call(
+            lambda: compiled.score_samples(features), loops
+        )
+        print(
+            f"  batch={batch_size:5d}  sklearn: {sklearn_best / 1e3:8.2f}"
+            f"  compiled: {compiled_best / 1e3:8.2f}"
+            f"  ({sklearn_best / compiled_best:.1f}x, max |diff| {max_error:.1e})"
+        )
+
+
+def bench_pool(detector: AnomalyDetector, iterations: int):
+    """Compiled forest in process against the scoring process pool."""
+    rng = np.random.default_rng(3)
+    n_features = len(detector.feature_columns)
+    compiled = CompiledIsolationForest.from_sklearn(detector.model)
+    pool = ProcessScoringPool(min_batch_size=0)
+    # Start the workers and map the forest before timing
+    pool.score_samples(compiled, rng.normal(size=(10, n_features)))
+    print(f"score_samples time per call (ms, best of 3, {pool.max_workers} workers)")
+    try:
+        for batch_size in (5000, 20000, 100000):
+            features = rng.normal(0, 1, size=(batch_size, n_features))
+            loops = max(1, iterations // 100)
+            local_best, _ = _time_per_call(
+                lambda: compiled.score_samples(features), loops, repeat=3
+            )
+            pool_best, _ = _time_per_call(
+                lambda: pool.score_samples(compiled, features), loops, repeat=3
+            )
+            print(
+                f"  batch={batch_size:6d}  in process: {local_best / 1e3:8.2f}"
+                f"  pool: {pool_best / 1e3:8.2f}  ({local_best / pool_best:.1f}x)"
+            )
+    finally:
+        pool.shutdown()
+
+
+SUITES = {
+    "features": bench_features,
+    "batch": bench_batch,
+    "scoring": bench_scoring,
+    "forest": bench_forest,
+    "pool": bench_pool,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--suite",
+        choices=sorted(SUITES) + ["all"],
+        default="all",
+        help="Benchmark suite to run",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        detector = _trained_detector(workdir)
+        suites = SUITES if args.suite == "all" else {args.suite: SUITES[args.suite]}
+        for name, suite in suites.items():
+            print(f"\n=== {name} ===")
+            suite(detector, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Cache Miss Coalescing Benchmark
+Throughput of read-through gets under a thundering herd of cache misses
+
+Compares the way CacheManager.get() used to handle misses, simply dropping
+the lock, and the per-key single-flight it uses now:
+
+- global lock: one lock held around the fetch, so every miss (on any key)
+  waits for every other caller's backend call
+- no lock: misses fetch in parallel, but every caller that misses a key
+  fetches it, so a herd on one hot key hits the backend once per caller
+- single-flight: no lock during the fetch; concurrent misses on one key
+  share a single fetch and misses on different keys fetch in parallel
+
+The cache is an in-process dict with the same miss/fetch/fill sequence as
+CacheManager, and the backend is a fixed-latency sleep, so the numbers
+isolate the locking strategy.
+
+Usage:
+    python scripts/performance/bench_cache_single_flight.py [--threads 64]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from caching.strategies.single_flight import SingleFlight  # noqa: E402
+
+
+class Backend:
+    """Slow data source counting how often it is hit."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, key: str) -> str:
+        with self._lock:
+            self.fetches += 1
+        time.sleep(self.latency)
+        return f"value:{key}"
+
+
+class GlobalLockCache:
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self.data = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            value = self.data.get(key)
+            if value is None:
+                value = self.data[key] = self.backend.fetch(key)
+            return value
+
+
+class NoLockCache:
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self.data = {}
+
+    def get(self, key: str) -> str:
+        value = self.data.get(key)
+        if value is None:
+            value = self.data[key] = self.backend.fetch(key)
+        return value
+
+
+class SingleFlightCache:
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self.data = {}
+        self._flight = SingleFlight()
+
+    def _fetch_and_cache(self, key: str) -> str:
+        value = self.data.get(key)
+        if value is None:
+            value = self.data[key] = self.backend.fetch(key)
+        return value
+
+    def get(self, key: str) -> str:
+        value = self.data.get(key)
+        if value is None:
+            value, _ = self._flight.do(key, lambda: self._fetch_and_cache(key))
+        return value
+
+
+def _herd(cache_type, threads: int, keys: int, rounds: int, latency: float):
+    """Waves of concurrent gets; the cache is emptied before each wave."""
+    backend = Backend(latency)
+    cache = cache_type(backend)
+    elapsed = 0.0
+    for _ in range(rounds):
+        cache.data.clear()
+        barrier = threading.Barrier(threads + 1)
+
+        def reader(index):
+            barrier.wait()
+            cache.get(f"key-{index % keys}")
+
+        workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed += time.perf_counter() - started
+    return threads * rounds / elapsed, backend.fetches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    print(
+        f"{args.threads} concurrent readers, {args.rounds} waves, "
+        f"{args.latency_ms:.0f} ms backend"
+    )
+    print(f"{'distinct keys':>13} {'strategy':>14} {'gets/s':>10} {'fetches':>8}")
+    for keys in (1, 8, args.threads):
+        for name, cache_type in (
+            ("global lock", GlobalLockCache),
+            ("no lock", NoLockCache),
+            ("single-flight", SingleFlightCache),
+        ):
+            throughput, fetches = _herd(
+                cache_type, args.threads, keys, args.rounds, latency
+            )
+            print(f"{keys:>13} {name:>14} {throughput:>10.0f} {fetches:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Rolling Correlation Benchmark
+Cost of correlation breaks per new point: pandas recompute vs rolling engine
+
+The pandas baseline recomputes the recent and historical correlation
+matrices over the whole history for every new point, as
+detect_multi_metric_anomaly() used to. The rolling engine folds the point
+into running moments in O(k^2).
+
+Usage:
+    python scripts/performance/bench_correlation.py [--metrics 32 --hours 2]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from ml_models.rolling_correlation import RollingCorrelation  # noqa: E402
+
+
+def _pandas_breaks(df: pd.DataFrame, window: int, threshold: float) -> int:
+    recent = df.tail(window).corr().to_numpy()
+    historical = df.head(-window).corr().to_numpy()
+    with np.errstate(invalid="ignore"):
+        return int(np.triu(np.abs(recent - historical) > threshold, k=1).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--metrics", type=int, default=32)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds")
+    parser.add_argument("--points", type=int, default=100)
+    parser.add_argument("--window", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    n_history = int(args.hours * 3600 / args.interval)
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(n_history + args.points, args.metrics)).cumsum(axis=0)
+    timestamps = pd.date_range(
+        "2025-01-01", periods=len(data), freq=f"{args.interval}s", tz="UTC"
+    )
+    names = [f"metric_{i}" for i in range(args.metrics)]
+
+    engine = RollingCorrelation(names, window=args.window)
+    started = time.perf_counter()
+    engine.update_many(data[:n_history], timestamps[:n_history])
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for row, timestamp in zip(data[n_history:], timestamps[n_history:]):
+        engine.update(row, timestamp)
+    rolling = (time.perf_counter() - started) / args.points
+
+    frame = pd.DataFrame(data, columns=names)
+    pandas_points = min(args.points, 10)
+    started = time.perf_counter()
+    for end in range(n_history + 1, n_history + pandas_points + 1):
+        _pandas_breaks(frame.iloc[:end], args.window, engine.break_threshold)
+    recompute = (time.perf_counter() - started) / pandas_points
+
+    print(
+        f"{args.metrics} metrics, {n_history} points of history "
+        f"({args.hours} h at {args.interval} s), window {args.window}"
+    )
+    print(f"engine bulk load          {load * 1e3:10.1f} ms")
+    print(f"pandas recompute / point  {recompute * 1e3:10.3f} ms")
+    print(f"engine update / point     {rolling * 1e3:10.3f} ms")
+    print(f"speedup                   {recompute / rolling:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
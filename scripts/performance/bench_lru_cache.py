@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - LRU Cache Concurrency Benchmark
+Throughput of app.performance.caching.LRUCache under many threads
+
+Compares three configurations on the same mixed get/set workload:
+
+- legacy: one RLock for the whole cache and a scan of every entry for
+  expired ones on each get (the previous implementation, reproduced here)
+- 1 shard: the current cache forced to a single lock, isolating the
+  effect of lazy heap-based expiry
+- sharded: the current cache with its default shard count
+
+Usage:
+    python scripts/performance/bench_lru_cache.py [--threads 8 --size 1000]
+"""
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.performance.caching import CacheEntry, CacheStats, LRUCache  # noqa: E402
+
+
+class LegacyLRUCache:
+    """The single-lock, scan-on-get LRUCache this benchmark replaces."""
+
+    def __init__(self, max_size: int = 1000, default_ttl=None):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = CacheStats()
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [
+            key
+            for key, entry in self._cache.items()
+            if entry.expires_at and now > entry.expires_at
+        ]
+        for key in expired:
+            entry = self._cache.pop(key, None)
+            if entry:
+                self.stats.record_eviction(entry.size)
+
+    def get(self, key):
+        with self._lock:
+            self._evict_expired()
+            entry = self._cache.get(key)
+            if entry is None or entry.is_expired():
+                self.stats.record_miss()
+                return None
+            self._cache.move_to_end(key)
+            self.stats.record_hit()
+            return entry.access()
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            size = len(pickle.dumps(value))
+            if key in self._cache:
+                self.stats.record_delete(self._cache[key].size)
+            while len(self._cache) >= self.max_size:
+                _, entry = self._cache.popitem(last=False)
+                self.stats.record_eviction(entry.size)
+            ttl = ttl if ttl is not None else self.default_ttl
+            self._cache[key] = CacheEntry(value, ttl, size)
+            self.stats.record_set(size)
+
+
+def _workload(cache, threads: int, ops: int, keys: int, write_ratio: float):
+    """Ops per second over all threads, and the final hit rate."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        # Skewed key popularity, as for API responses
+        picks = [f"key-{int(rng.paretovariate(1.2)) % keys}" for _ in range(ops)]
+        writes = [rng.random() < write_ratio for _ in range(ops)]
+        barrier.wait()
+        for key, write in zip(picks, writes):
+            if write or cache.get(key) is None:
+                cache.set(key, {"key": key, "payload": "x" * 64})
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return threads * ops / elapsed, cache.stats.hit_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--ttl", type=float, default=120.0)
+    args = parser.parse_args()
+
+    configs = {
+        "legacy": lambda: LegacyLRUCache(args.size, args.ttl),
+        "1 shard": lambda: LRUCache(args.size, args.ttl, num_shards=1),
+        "sharded": lambda: LRUCache(args.size, args.ttl),
+    }
+
+    print(
+        f"{args.threads} threads x {args.ops} ops, cache size {args.size}, "
+        f"{args.keys} keys, {args.write_ratio:.0%} writes, ttl {args.ttl:.0f}s"
+    )
+    print(f"{'cache':10} {'ops/s':>10} {'hit rate':>9}")
+    for name, factory in configs.items():
+        throughput, hit_rate = _workload(
+            factory(), args.threads, args.ops, args.keys, args.write_ratio
+        )
+        print(f"{name:10} {throughput:>10.0f} {hit_rate:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Per-Worker Model Memory Benchmark
+Resident memory of forked workers loading the pickled model vs the mapped bundle
+
+Each worker is forked from a parent that has not loaded the model, as in a
+gunicorn deployment where the model is loaded on first request, then loads
+the model, scores a batch and reports its memory. RSS counts shared pages in
+every worker; USS (unique) and PSS (proportional) show what sharing saves.
+
+Usage:
+    python scripts/performance/bench_model_memory.py [--workers 8]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+import psutil
+from sklearn.ensemble import IsolationForest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from ml_models.anomaly_detector import AnomalyDetector  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def _memory() -> dict:
+    info = psutil.Process().memory_full_info()
+    return {"rss": info.rss, "uss": info.uss, "pss": getattr(info, "pss", 0)}
+
+
+def _worker(config: dict, scaler_path: str, ready, release, results):
+    """Load the model, score once and report memory until released."""
+    before = _memory()
+    detector = AnomalyDetector(config)
+    detector.scaler_path = scaler_path
+    features = np.random.default_rng(os.getpid()).normal(
+        size=(256, len(detector.feature_columns))
+    )
+    detector._ensure_model_ready()
+    detector._score_and_label(features)
+    # Wait for every worker to map the model before measuring sharing
+    ready.wait()
+    results.put((before, _memory()))
+    release.wait()
+
+
+def _run_workers(config: dict, scaler_path: str, workers: int):
+    ctx = multiprocessing.get_context("fork")
+    ready = ctx.Barrier(workers)
+    release = ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(config, scaler_path, ready, release, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    measurements = [results.get() for _ in procs]
+    release.set()
+    for proc in procs:
+        proc.join()
+    return measurements
+
+
+def _report(name: str, measurements):
+    before = [m[0] for m in measurements]
+    after = [m[1] for m in measurements]
+    mean = lambda values: sum(values) / len(values) / MB  # noqa: E731
+    print(f"{name}")
+    print(
+        f"  per worker RSS: {mean([a['rss'] for a in after]):8.1f} MB"
+        f"  (+{mean([a['rss'] - b['rss'] for a, b in zip(after, before)]):.1f}"
+        " MB after load)"
+    )
+    print(f"  per worker USS: {mean([a['uss'] for a in after]):8.1f} MB")
+    print(f"  per worker PSS: {mean([a['pss'] for a in after]):8.1f} MB")
+    print(f"  total PSS:      {sum(a['pss'] for a in after) / MB:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--n-estimators", type=int, default=300)
+    parser.add_argument("--max-samples", type=int, default=4096)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = {
+            "MODEL_PATH": os.path.join(workdir, "anomaly_detector.pkl"),
+            "ANOMALY_THRESHOLD": 0.7,
+        }
+        scaler_path = os.path.join(workdir, "scaler.pkl")
+
+        # A production-sized forest; train() always builds the default one
+        trainer = AnomalyDetector(config)
+        trainer.scaler_path = scaler_path
+        data = trainer._generate_synthetic_data(args.max_samples)
+        features = trainer.scaler.fit_transform(data[trainer.feature_columns])
+        trainer.model = IsolationForest(
+            n_estimators=args.n_estimators,
+            max_samples=args.max_samples,
+            random_state=42,
+        ).fit(features)
+        trainer.is_trained = True
+        trainer._save_model()
+        del trainer
+
+        print(
+            f"{args.workers} workers, {args.n_estimators} trees of up to "
+            f"{args.max_samples} samples"
+        )
+        _report(
+            "pickled model (sklearn backend)",
+            _run_workers(config, scaler_path, args.workers),
+        )
+        _report(
+            "memory-mapped bundle (compiled backend)",
+            _run_workers(
+                {**config, "INFERENCE_BACKEND": "compiled"}, scaler_path, args.workers
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
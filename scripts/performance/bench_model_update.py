@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Model Update Benchmark
+Time and peak memory of feedback rounds: full refit vs incremental update
+
+Each round brings a batch of new samples. The full strategy refits the
+scaler and every tree on the recent window; the incremental strategy
+updates the scaler statistics and refits UPDATE_TREE_FRACTION of the trees
+on the same window.
+
+Usage:
+    python scripts/performance/bench_model_update.py [--rounds 5 --batch 500]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from ml_models.anomaly_detector import AnomalyDetector  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def _detector(workdir: str, name: str, args) -> AnomalyDetector:
+    detector = AnomalyDetector(
+        {
+            "MODEL_PATH": os.path.join(workdir, f"{name}.pkl"),
+            "ANOMALY_THRESHOLD": 0.7,
+            "UPDATE_TREE_FRACTION": args.fraction,
+            "UPDATE_WINDOW_SIZE": args.window,
+        }
+    )
+    detector.scaler_path = os.path.join(workdir, f"{name}-scaler.pkl")
+    detector.train(detector._generate_synthetic_data(args.history))
+    return detector
+
+
+def _run_rounds(update, batches):
+    """Seconds per round, and peak traced MB of one more round."""
+    times = []
+    for batch in batches:
+        started = time.perf_counter()
+        assert update(batch)
+        times.append(time.perf_counter() - started)
+
+    # Traced separately; tracing slows the rounds down several times
+    tracemalloc.start()
+    assert update(batches[-1])
+    peak = tracemalloc.get_traced_memory()[1] / MB
+    tracemalloc.stop()
+    return times, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--window", type=int, default=2048)
+    parser.add_argument("--fraction", type=float, default=0.2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        full = _detector(workdir, "full", args)
+        incremental = _detector(workdir, "incremental", args)
+        batches = [
+            full._generate_synthetic_data(args.batch) for _ in range(args.rounds)
+        ]
+
+        window = []
+
+        def refit(batch: pd.DataFrame) -> bool:
+            window.append(batch)
+            recent = pd.concat(window, ignore_index=True).tail(args.window)
+            return full.train(recent)
+
+        results = {
+            "full refit": _run_rounds(refit, batches),
+            "incremental": _run_rounds(incremental.update_model, batches),
+        }
+
+    print(
+        f"{args.rounds} rounds of {args.batch} samples, window {args.window}, "
+        f"{args.fraction:.0%} of trees replaced per update"
+    )
+    print("strategy       median ms   peak MB")
+    for name, (times, peak) in results.items():
+        print(f"{name:12s} {statistics.median(times) * 1e3:11.1f} {peak:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Multi-Level Cache Invalidation Benchmark
+L1 hit rate and read throughput of MultiLevelCache with and without
+pub/sub invalidation, and how fast an invalidation reaches another worker
+
+Two MultiLevelCache workers share one fakeredis server as L2, with a fixed
+delay per Redis call standing in for the network:
+
+- short TTL: no invalidation, so L1 has to expire quickly to bound
+  staleness, and most reads fall through to Redis
+- invalidated: L1 entries live for an hour and writes evict them in every
+  worker through the invalidation channel
+
+Usage:
+    python scripts/performance/bench_multi_level_cache.py [--seconds 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import fakeredis
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.performance.caching import MultiLevelCache  # noqa: E402
+
+
+class LatencyRedis(fakeredis.FakeRedis):
+    """FakeRedis sleeping for one network round trip per command"""
+
+    rtt = 0.0
+
+    def execute_command(self, *args, **options):
+        time.sleep(LatencyRedis.rtt)
+        return super().execute_command(*args, **options)
+
+
+def _read_workload(cache, keys: int, seconds: float):
+    rng = random.Random(0)
+    reads = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        cache.get(f"experiment:{rng.randrange(keys)}")
+        reads += 1
+    elapsed = time.perf_counter() - started
+    return reads / elapsed, cache.l1.stats.hit_rate
+
+
+def _wait_for_invalidations(cache, count: int):
+    while cache.invalidations_received < count:
+        time.sleep(0.0001)
+
+
+def _propagation(writer, reader, samples: int):
+    delays = []
+    for i in range(samples):
+        key = f"hot:{i % 10}"
+        writer.set(key, i)
+        _wait_for_invalidations(reader, 2 * i + 1)
+        reader.get(key)
+        assert reader.l1.get(key) == i
+
+        writer.set(key, i + 1)
+        started = time.perf_counter()
+        _wait_for_invalidations(reader, 2 * i + 2)
+        delays.append(time.perf_counter() - started)
+    delays.sort()
+    return statistics.median(delays), delays[int(len(delays) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--keys", type=int, default=20000)
+    parser.add_argument("--short-ttl", type=float, default=1.0)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = fakeredis.FakeServer()
+    configs = {
+        "short TTL": dict(l1_ttl=args.short_ttl, invalidation_channel=None),
+        "invalidated": dict(l1_ttl=3600),
+    }
+
+    print(
+        f"{args.keys} keys, {args.seconds:.0f}s of reads, "
+        f"{args.rtt_ms} ms per Redis call, short TTL {args.short_ttl}s"
+    )
+    print(f"{'L1 mode':12} {'reads/s':>10} {'L1 hit rate':>12}")
+    for name, options in configs.items():
+        cache = MultiLevelCache(
+            l1_size=args.keys * 2,
+            l2_cache=LatencyRedis(server=server),
+            **options,
+        )
+        if cache.invalidation_enabled:
+            cache._subscribed.wait(5)
+        for i in range(args.keys):
+            cache.set(f"experiment:{i}", {"id": i, "status": "completed"})
+        LatencyRedis.rtt = args.rtt_ms / 1000
+        throughput, hit_rate = _read_workload(cache, args.keys, args.seconds)
+        LatencyRedis.rtt = 0.0
+        cache.close()
+        print(f"{name:12} {throughput:>10.0f} {hit_rate:>12.1%}")
+
+    writer, reader = (
+        MultiLevelCache(l2_cache=LatencyRedis(server=server)) for _ in range(2)
+    )
+    for cache in (writer, reader):
+        cache._subscribed.wait(5)
+    median, p99 = _propagation(writer, reader, 200)
+    print(
+        f"invalidation reaches another worker in {median * 1000:.2f} ms "
+        f"(median), {p99 * 1000:.2f} ms (p99)"
+    )
+    writer.close()
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
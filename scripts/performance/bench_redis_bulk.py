@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Redis Bulk Operation Benchmark
+Round trips and latency of per-key vs pipelined RedisCache operations
+
+Runs caching.strategies.redis_cache.RedisCache against fakeredis, adding a
+fixed delay to every round trip to stand in for the network:
+
+- per-key: the previous get/set sequence, one round trip for the value,
+  one for its metadata and one to write the access count back on reads
+- bulk: set_many/get_many/delete_many, a fixed number of round trips per
+  batch whatever its size
+
+Usage:
+    python scripts/performance/bench_redis_bulk.py [--keys 200 --rtt-ms 0.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import fakeredis
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from caching.strategies import redis_cache as redis_cache_module  # noqa: E402
+from caching.strategies.redis_cache import RedisCache  # noqa: E402
+
+
+class LatencyRedis(fakeredis.FakeRedis):
+    """FakeRedis sleeping for one network round trip per request"""
+
+    rtt = 0.0
+    round_trips = 0
+
+    def execute_command(self, *args, **options):
+        LatencyRedis.round_trips += 1
+        time.sleep(LatencyRedis.rtt)
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def timed_execute(raise_on_error=True):
+            LatencyRedis.round_trips += 1
+            time.sleep(LatencyRedis.rtt)
+            return execute(raise_on_error)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
+def _legacy_get(cache: RedisCache, key: str):
+    """RedisCache.get() as it was: value, metadata and metadata write-back"""
+    redis_key = cache._generate_key(key)
+    data = cache.client.get(redis_key)
+    if data is None:
+        return None
+    metadata_key = f"{redis_key}:meta"
+    metadata = json.loads(cache.client.get(metadata_key))
+    metadata["access_count"] = metadata.get("access_count", 0) + 1
+    metadata["last_access"] = datetime.now().isoformat()
+    cache.client.set(metadata_key, json.dumps(metadata))
+    return cache.serializer.loads(data)
+
+
+def _measure(func):
+    LatencyRedis.round_trips = 0
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started, LatencyRedis.round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    redis_cache_module.redis.Redis = lambda **kwargs: LatencyRedis()
+    cache = RedisCache()
+    LatencyRedis.rtt = args.rtt_ms / 1000
+
+    keys = [f"experiment:{i}" for i in range(args.keys)]
+    items = {key: {"id": key, "metrics": list(range(20))} for key in keys}
+
+    runs = [
+        ("set", "per-key", lambda: [cache.set(k, v) for k, v in items.items()]),
+        ("set", "bulk", lambda: cache.set_many(items)),
+        ("get", "per-key", lambda: [_legacy_get(cache, k) for k in keys]),
+        ("get", "bulk", lambda: cache.get_many(keys)),
+        ("delete", "per-key", lambda: [cache.delete(k) for k in keys]),
+        ("delete", "bulk", lambda: cache.delete_many(keys)),
+    ]
+
+    print(f"{args.keys} keys, {args.rtt_ms} ms per round trip")
+    print(f"{'operation':10} {'mode':8} {'round trips':>12} {'ms':>9}")
+    for operation, mode, func in runs:
+        if operation == "delete":
+            cache.set_many(items)
+        elapsed, round_trips = _measure(func)
+        print(f"{operation:10} {mode:8} {round_trips:>12} {elapsed * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
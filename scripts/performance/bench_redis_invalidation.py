@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Redis Pattern Invalidation Benchmark
+Longest single Redis command during a pattern flush, KEYS vs SCAN/UNLINK
+
+Redis runs commands one at a time, so the longest command of a flush is
+how long every other client waits. Runs against fakeredis:
+
+- keys: the previous flush, one KEYS over the keyspace and one DEL
+- scan: RedisCache.flush(pattern), SCAN and UNLINK in batches of
+  scan_count
+
+fakeredis walks the whole keyspace on every SCAN call where Redis resumes
+from its cursor, so only the longest-command column carries over to a
+real server; the total time here overstates SCAN's cost.
+
+Usage:
+    python scripts/performance/bench_redis_invalidation.py [--keys 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import fakeredis
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from caching.strategies import redis_cache as redis_cache_module  # noqa: E402
+from caching.strategies.redis_cache import RedisCache  # noqa: E402
+
+
+class TimedRedis(fakeredis.FakeRedis):
+    """FakeRedis recording the duration of each command"""
+
+    durations = []
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            TimedRedis.durations.append(time.perf_counter() - started)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def timed_execute(raise_on_error=True):
+            started = time.perf_counter()
+            try:
+                return execute(raise_on_error)
+            finally:
+                TimedRedis.durations.append(time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+
+def _legacy_flush(cache: RedisCache, pattern: str) -> int:
+    """RedisCache.flush(pattern) as it was: KEYS, then one DEL"""
+    keys = [
+        key
+        for key in cache.client.keys(cache._generate_key(pattern))
+        if not key.endswith(b":meta")
+    ]
+    return cache.client.delete(*keys, *[key + b":meta" for key in keys])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=100000)
+    parser.add_argument("--scan-count", type=int, default=500)
+    args = parser.parse_args()
+
+    redis_cache_module.redis.Redis = lambda **kwargs: TimedRedis()
+    cache = RedisCache(scan_count=args.scan_count)
+    items = {f"exp:{i}": i for i in range(args.keys // 2)}
+    others = {f"model:{i}": i for i in range(args.keys // 2)}
+
+    print(f"{args.keys} entries, half matching, scan_count {args.scan_count}")
+    print(f"{'flush':6} {'commands':>9} {'longest ms':>11} {'total ms':>9}")
+    for name, flush in (
+        ("keys", lambda: _legacy_flush(cache, "exp:*")),
+        ("scan", lambda: cache.flush("exp:*")),
+    ):
+        cache.client.flushdb()
+        cache.set_many(items)
+        cache.set_many(others)
+        TimedRedis.durations = []
+        flush()
+        durations = TimedRedis.durations
+        print(
+            f"{name:6} {len(durations):>9} {max(durations) * 1000:>11.1f} "
+            f"{sum(durations) * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
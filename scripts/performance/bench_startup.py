@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+SmartCloudOps AI - Startup Time Benchmark
+Wall time of fresh interpreters importing the packages and creating the app
+
+Each scenario runs in a new process, as a worker or CLI tool would, so
+import caching inside one interpreter does not hide the cost. The app is
+created in a scratch directory, so logs and models trained by the warm-up
+do not land in the checkout.
+
+Usage:
+    python scripts/performance/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+HEAVY_MODULES = ("pandas", "sklearn", "ml_models.anomaly_detector")
+
+SCENARIOS = {
+    "import ml_models": ("import ml_models", {}),
+    "import ml_models.anomaly_detector": ("import ml_models.anomaly_detector", {}),
+    "import app": ("import app", {}),
+    "create_app(), warm-up off": (
+        "from app import create_app; create_app()",
+        {"ANOMALY_WARMUP": "off"},
+    ),
+    "create_app(), warm-up sync": (
+        "from app import create_app; create_app()",
+        {"ANOMALY_WARMUP": "sync"},
+    ),
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run(statement: str, env: dict, cwd: str) -> dict:
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": ROOT, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        print(f"{'scenario':36} {'best':>9} {'median':>9}  heavy modules loaded")
+        for name, (statement, env) in SCENARIOS.items():
+            runs = [_run(statement, env, scratch) for _ in range(args.repeat)]
+            seconds = sorted(run["seconds"] for run in runs)
+            heavy = ", ".join(runs[-1]["heavy"]) or "-"
+            print(
+                f"{name:36} {seconds[0] * 1e3:7.0f}ms "
+                f"{seconds[len(seconds) // 2] * 1e3:7.0f}ms  {heavy}"
+            )
+
+
+if __name__ == "__main__":
+    main()
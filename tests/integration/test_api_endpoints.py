@@ -27,6 +27,8 @@ class TestAPIEndpointsIntegration:
         db_fd, db_path = tempfile.mkstemp()
 
         app = create_app()
+        # Have a model ready, as the server entrypoint's warm-up would
+        app.anomaly_detector.warm_up()
         app.config.update(
             {
                 "TESTING": True,
@@ -526,6 +528,8 @@ class TestEndToEndWorkflow:
         db_fd, db_path = tempfile.mkstemp()
 
         app = create_app()
+        # Have a model ready, as the server entrypoint's warm-up would
+        app.anomaly_detector.warm_up()
         app.config.update(
             {
                 "TESTING": True,
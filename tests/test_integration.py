@@ -72,6 +72,8 @@ class TestCompleteWorkflow:
     def test_app(self):
         """Create test app."""
         app.config["TESTING"] = True
+        # Have a model ready, as the server entrypoint's warm-up would
+        app.anomaly_detector.warm_up()
         return app
 
     @pytest.fixture
@@ -425,6 +427,8 @@ class TestLoadTesting:
     def test_app(self):
         """Create test app."""
         app.config["TESTING"] = True
+        # Have a model ready, as the server entrypoint's warm-up would
+        app.anomaly_detector.warm_up()
         return app
 
     @pytest.fixture
@@ -0,0 +1,54 @@
+"""
+Shared fixtures for the unit tests
+"""
+
+import fakeredis
+import pytest
+
+from caching.strategies import redis_cache as redis_cache_module
+
+
+def _fakeredis_has_lua():
+    try:
+        fakeredis.FakeRedis().eval("return 1", 0)
+        return True
+    except Exception:
+        return False
+
+
+FAKEREDIS_HAS_LUA = _fakeredis_has_lua()
+
+
+@pytest.fixture
+def fakeredis_lua():
+    """Skip tests whose Redis scripts need fakeredis[lua]"""
+    if not FAKEREDIS_HAS_LUA:
+        pytest.skip("lease release needs Lua (fakeredis[lua])")
+
+
+@pytest.fixture
+def fake_redis_server():
+    """One in-memory Redis server, shared by every client made in a test"""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def fake_redis_class():
+    """Client class make_redis_cache connects with; override to wrap commands"""
+    return fakeredis.FakeRedis
+
+
+@pytest.fixture
+def make_redis_cache(monkeypatch, fake_redis_server, fake_redis_class):
+    """
+    Factory of RedisCache instances on fake_redis_server
+
+    Each call stands in for a separate worker process: its own client,
+    the same server.
+    """
+    monkeypatch.setattr(
+        redis_cache_module.redis,
+        "Redis",
+        lambda **kwargs: fake_redis_class(server=fake_redis_server),
+    )
+    return lambda **kwargs: redis_cache_module.RedisCache(**kwargs)
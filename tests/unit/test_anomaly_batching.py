@@ -0,0 +1,400 @@
+"""
+Tests for the anomaly detection micro-batcher
+"""
+
+import asyncio
+import gc
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.performance.anomaly_optimization import (
+    AnomalyConfig,
+    AsyncBatchProcessor,
+    BatchProcessor,
+    BatchQueueFullError,
+    OptimizedAnomalyDetector,
+)
+from ml_models.anomaly_detector import AnomalyDetector
+
+
+def _metrics(value: float) -> dict:
+    return {
+        "cpu_usage": value,
+        "memory_usage": 50.0,
+        "disk_usage": 40.0,
+        "load_avg_1min": 1.0,
+    }
+
+
+class RecordingDetector:
+    """Detector stub that records batch sizes and can hold a batch open"""
+
+    def __init__(self, hold: float = 0.0):
+        self.hold = hold
+        self.batch_sizes = []
+        self.single_calls = 0
+        self._lock = threading.Lock()
+
+    def batch_detect(self, metrics_list):
+        with self._lock:
+            self.batch_sizes.append(len(metrics_list))
+        time.sleep(self.hold)
+        return [
+            {
+                "status": "success",
+                "is_anomaly": m["cpu_usage"] > 90,
+                "anomaly_score": m["cpu_usage"] / 100,
+                "confidence": 0.5,
+                "bundle_version": "stub",
+            }
+            for m in metrics_list
+        ]
+
+    def detect_anomaly(self, metrics):
+        self.single_calls += 1
+        return self.batch_detect([metrics])[0]
+
+
+@pytest.fixture
+def make_processor():
+    processors = []
+
+    def make(detector, **config):
+        processor = BatchProcessor(AnomalyConfig(**config), detector=detector)
+        processors.append(processor)
+        return processor
+
+    yield make
+    for processor in processors:
+        processor.stop()
+
+
+def _detect_concurrently(processor, values):
+    with ThreadPoolExecutor(max_workers=len(values)) as pool:
+        return list(pool.map(lambda v: processor.detect(_metrics(v)), values))
+
+
+class TestBatchProcessor:
+    def test_results_routed_to_their_requests(self, make_processor):
+        processor = make_processor(RecordingDetector(hold=0.01), max_workers=1)
+        values = [float(v) for v in range(40)]
+
+        results = _detect_concurrently(processor, values)
+
+        assert [r["anomaly_score"] for r in results] == [v / 100 for v in values]
+
+    def test_concurrent_requests_are_coalesced(self, make_processor):
+        detector = RecordingDetector(hold=0.05)
+        processor = make_processor(detector, max_workers=1, batch_size=100)
+
+        _detect_concurrently(processor, [float(v) for v in range(30)])
+
+        assert sum(detector.batch_sizes) == 30
+        assert len(detector.batch_sizes) < 30
+        assert max(detector.batch_sizes) > 1
+
+    def test_max_batch_size_respected(self, make_processor):
+        detector = RecordingDetector(hold=0.05)
+        processor = make_processor(detector, max_workers=1, batch_size=4)
+
+        _detect_concurrently(processor, [float(v) for v in range(20)])
+
+        assert sum(detector.batch_sizes) == 20
+        assert max(detector.batch_sizes) <= 4
+
+    def test_idle_request_does_not_linger(self, make_processor):
+        processor = make_processor(RecordingDetector(), max_linger=2.0)
+        processor.detect(_metrics(10.0))
+
+        start = time.perf_counter()
+        processor.detect(_metrics(20.0))
+
+        assert time.perf_counter() - start < 1.0
+
+    def test_detector_error_fails_whole_batch(self, make_processor):
+        detector = RecordingDetector()
+        detector.batch_detect = lambda metrics_list: 1 / 0
+        processor = make_processor(detector)
+
+        result = processor.detect(_metrics(10.0))
+
+        assert result["status"] == "error"
+        assert "division by zero" in result["error"]
+
+    def test_timeout_scores_alone(self, make_processor):
+        detector = RecordingDetector(hold=0.5)
+        processor = make_processor(detector, batch_timeout=0.05)
+
+        result = processor.detect(_metrics(10.0))
+
+        assert result["status"] == "success"
+        assert detector.single_calls == 1
+
+    def test_submit_returns_future(self, make_processor):
+        processor = make_processor(RecordingDetector())
+
+        future = processor.submit("req-1", _metrics(42.0))
+
+        assert future.result(timeout=2)["anomaly_score"] == pytest.approx(0.42)
+
+    def test_scored_futures_not_retained(self, make_processor):
+        processor = make_processor(RecordingDetector())
+        futures = [processor.submit(f"req-{i}", _metrics(float(i))) for i in range(5)]
+        for future in futures:
+            future.result(timeout=2)
+        refs = [weakref.ref(future) for future in futures]
+        del future, futures
+        # Later batches replace whatever the scoring threads last touched
+        for i in range(5):
+            processor.detect(_metrics(float(i)))
+
+        gc.collect()
+
+        assert all(ref() is None for ref in refs)
+
+    def test_waiters_wake_without_polling(self, make_processor):
+        processor = make_processor(RecordingDetector())
+        processor.detect(_metrics(10.0))
+
+        start = time.perf_counter()
+        for _ in range(20):
+            processor.detect(_metrics(10.0))
+
+        # The old shared-queue poll slept 10 ms per wait
+        assert (time.perf_counter() - start) / 20 < 0.01
+
+    def test_timed_out_request_is_not_scored(self, make_processor):
+        detector = RecordingDetector(hold=0.3)
+        processor = make_processor(detector, max_workers=1, batch_timeout=0.05)
+        blocker = processor.submit("blocker", _metrics(1.0))
+        time.sleep(0.05)
+
+        # Queued behind the blocker; times out and is scored on its own
+        result = processor.detect(_metrics(2.0))
+        blocker.result(timeout=2)
+        time.sleep(0.3)
+
+        assert result["status"] == "success"
+        assert detector.single_calls == 1
+        assert detector.batch_sizes == [1, 1]
+
+    def test_stop_cancels_queued_requests(self, make_processor):
+        processor = make_processor(RecordingDetector(hold=0.2), max_workers=1)
+        processor.submit("running", _metrics(1.0))
+        time.sleep(0.05)
+        queued = processor.submit("queued", _metrics(2.0))
+
+        processor.stop()
+
+        assert queued.cancelled() or queued.done()
+
+    def test_histograms_observed(self, make_processor):
+        before = REGISTRY.get_sample_value("anomaly_batch_size_count") or 0
+        waits_before = (
+            REGISTRY.get_sample_value("anomaly_batch_queue_wait_seconds_count") or 0
+        )
+        processor = make_processor(RecordingDetector())
+
+        processor.detect(_metrics(10.0))
+        processor.detect(_metrics(20.0))
+
+        assert REGISTRY.get_sample_value("anomaly_batch_size_count") == before + 2
+        waits = REGISTRY.get_sample_value("anomaly_batch_queue_wait_seconds_count")
+        assert waits == waits_before + 2
+
+    def test_stats(self, make_processor):
+        processor = make_processor(RecordingDetector(), batch_size=8)
+        processor.detect(_metrics(10.0))
+
+        stats = processor.get_stats()
+
+        assert stats["batches"] == 1
+        assert stats["items"] == 1
+        assert stats["max_batch_size"] == 8
+
+    def test_matches_unbatched_detector(self, make_processor, tmp_path):
+        detector = AnomalyDetector(
+            {"MODEL_PATH": str(tmp_path / "model.pkl"), "ANOMALY_THRESHOLD": 0.7}
+        )
+        detector.scaler_path = str(tmp_path / "scaler.pkl")
+        detector.train(detector._generate_synthetic_data(200))
+        processor = make_processor(detector, max_workers=2)
+        values = [5.0, 35.0, 60.0, 85.0, 99.0, 15.0]
+
+        batched = _detect_concurrently(processor, values)
+        direct = [detector.detect_anomaly(_metrics(v)) for v in values]
+
+        for got, expected in zip(batched, direct):
+            assert got["is_anomaly"] == expected["is_anomaly"]
+            assert got["anomaly_score"] == pytest.approx(expected["anomaly_score"])
+
+
+def _run_async(processor, coroutine):
+    """Run a coroutine, then stop the processor on the same loop"""
+
+    async def main():
+        try:
+            return await coroutine()
+        finally:
+            await processor.stop()
+
+    return asyncio.run(main())
+
+
+class TestAsyncBatchProcessor:
+    def test_concurrent_requests_are_coalesced(self):
+        detector = RecordingDetector(hold=0.05)
+        processor = AsyncBatchProcessor(AnomalyConfig(max_workers=1), detector)
+        values = [float(v) for v in range(30)]
+
+        async def run():
+            return await asyncio.gather(
+                *(processor.detect(_metrics(v)) for v in values)
+            )
+
+        results = _run_async(processor, run)
+
+        assert [r["anomaly_score"] for r in results] == [v / 100 for v in values]
+        assert sum(detector.batch_sizes) == 30
+        assert max(detector.batch_sizes) > 1
+
+    def test_scoring_runs_off_the_event_loop(self):
+        scoring_threads = []
+
+        class ThreadRecordingDetector(RecordingDetector):
+            def batch_detect(self, metrics_list):
+                scoring_threads.append(threading.current_thread().name)
+                return super().batch_detect(metrics_list)
+
+        processor = AsyncBatchProcessor(
+            AnomalyConfig(), ThreadRecordingDetector(hold=0.05)
+        )
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            task = asyncio.create_task(ticker())
+            await processor.detect(_metrics(10.0))
+            task.cancel()
+            return ticks
+
+        ticks = _run_async(processor, run)
+
+        assert scoring_threads[0].startswith("anomaly-score")
+        assert ticks > 5
+
+    def test_backpressure_when_queue_full(self):
+        detector = RecordingDetector(hold=0.3)
+        config = AnomalyConfig(
+            max_workers=1, batch_size=1, max_queue_size=1, batch_timeout=0.05
+        )
+        processor = AsyncBatchProcessor(config, detector)
+
+        async def run():
+            first = asyncio.create_task(processor.detect(_metrics(1.0)))
+            await asyncio.sleep(0.02)
+            queued = asyncio.create_task(processor.detect(_metrics(2.0)))
+            await asyncio.sleep(0)
+            with pytest.raises(BatchQueueFullError):
+                await processor.detect(_metrics(3.0))
+            first.cancel()
+            queued.cancel()
+            await asyncio.gather(first, queued, return_exceptions=True)
+
+        _run_async(processor, run)
+
+        assert processor.get_stats()["rejected"] == 1
+
+    def test_cancelled_request_is_not_scored(self):
+        detector = RecordingDetector(hold=0.1)
+        processor = AsyncBatchProcessor(AnomalyConfig(max_workers=1), detector)
+
+        async def run():
+            blocker = asyncio.create_task(processor.detect(_metrics(1.0)))
+            await asyncio.sleep(0.02)
+            cancelled = asyncio.create_task(processor.detect(_metrics(2.0)))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            await blocker
+            await asyncio.sleep(0.05)
+            return cancelled
+
+        cancelled = _run_async(processor, run)
+
+        assert cancelled.cancelled()
+        assert detector.batch_sizes == [1]
+
+    def test_detector_error_fails_whole_batch(self):
+        detector = RecordingDetector()
+        detector.batch_detect = lambda metrics_list: 1 / 0
+        processor = AsyncBatchProcessor(AnomalyConfig(), detector)
+
+        result = _run_async(processor, lambda: processor.detect(_metrics(10.0)))
+
+        assert result["status"] == "error"
+
+    def test_restarts_on_a_new_event_loop(self):
+        processor = AsyncBatchProcessor(AnomalyConfig(), RecordingDetector())
+
+        first = _run_async(processor, lambda: processor.detect(_metrics(10.0)))
+        second = _run_async(processor, lambda: processor.detect(_metrics(20.0)))
+
+        assert first["anomaly_score"] == pytest.approx(0.1)
+        assert second["anomaly_score"] == pytest.approx(0.2)
+
+
+class TestOptimizedAnomalyDetector:
+    def test_uses_ml_detector_result(self):
+        detector = OptimizedAnomalyDetector(
+            AnomalyConfig(enable_caching=False), detector=RecordingDetector()
+        )
+        try:
+            result = detector.detect_anomaly(_metrics(95.0))
+        finally:
+            detector.shutdown()
+
+        assert result.is_anomaly is True
+        assert result.score == pytest.approx(0.95)
+        assert result.model_version == "stub"
+
+    def test_error_result(self):
+        stub = RecordingDetector()
+        stub.detect_anomaly = lambda metrics: {"status": "error", "error": "bad"}
+        detector = OptimizedAnomalyDetector(
+            AnomalyConfig(enable_caching=False, enable_batching=False), detector=stub
+        )
+
+        result = detector.detect_anomaly(_metrics(95.0))
+
+        assert result.is_anomaly is False
+        assert result.model_version == "error"
+
+    def test_detect_anomaly_async(self):
+        detector = OptimizedAnomalyDetector(
+            AnomalyConfig(enable_caching=False), detector=RecordingDetector()
+        )
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(detector.detect_anomaly_async(_metrics(v)) for v in (5.0, 95.0))
+                )
+            finally:
+                await detector.async_batcher.stop()
+                detector.shutdown()
+
+        low, high = asyncio.run(run())
+
+        assert (low.is_anomaly, high.is_anomaly) == (False, True)
+        assert high.model_version == "stub"
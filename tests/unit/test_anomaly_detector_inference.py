@@ -0,0 +1,650 @@
+"""
+Unit tests for the AnomalyDetector inference paths
+Covers batched scoring and its agreement with single-sample detection
+"""
+
+import os
+import threading
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models.forest_engine import CompiledIsolationForest
+from ml_models.scoring_pool import ProcessScoringPool
+
+
+@pytest.fixture
+def trained_detector(tmp_path):
+    """AnomalyDetector trained on synthetic data, persisted under tmp_path."""
+    detector = AnomalyDetector(
+        {
+            "MODEL_PATH": str(tmp_path / "anomaly_detector.pkl"),
+            "ANOMALY_THRESHOLD": 0.7,
+            "MIN_SAMPLES": 100,
+            "RANDOM_STATE": 42,
+        }
+    )
+    detector.scaler_path = str(tmp_path / "scaler.pkl")
+    assert detector.train(detector._generate_synthetic_data(200)) is True
+    return detector
+
+
+@pytest.fixture
+def metrics_batch():
+    """Mixed batch of normal, anomalous and partially specified samples."""
+    rng = np.random.default_rng(7)
+    batch = []
+    for _ in range(40):
+        batch.append(
+            {
+                "cpu_usage": float(rng.uniform(5, 99)),
+                "memory_usage": float(rng.uniform(10, 99)),
+                "disk_usage": float(rng.uniform(10, 99)),
+                "load_avg_1min": float(rng.uniform(0.1, 12)),
+                "network_bytes_sent": float(rng.uniform(1e5, 5e7)),
+            }
+        )
+    # Samples relying on defaults and aliases
+    batch.append({"cpu_usage": 150, "memory_usage": -5, "disk_usage": 50})
+    batch.append(
+        {"cpu_usage": 20, "memory_usage": 30, "disk_usage": 40, "network_io": 1e6}
+    )
+    batch.append(
+        {"cpu_usage": 20, "memory_usage": 30, "disk_usage": 40, "load_avg_1min": None}
+    )
+    return batch
+
+
+class TestBatchDetect:
+    """Tests for the vectorized batch_detect path."""
+
+    def test_batch_matches_single_sample_detection(
+        self, trained_detector, metrics_batch
+    ):
+        """Batch scoring gives the same answer as scoring each sample alone."""
+        batch_results = trained_detector.batch_detect(metrics_batch)
+        single_results = [trained_detector.detect_anomaly(m) for m in metrics_batch]
+
+        assert len(batch_results) == len(metrics_batch)
+        for batch_result, single_result in zip(batch_results, single_results):
+            assert batch_result["status"] == "success"
+            assert batch_result["is_anomaly"] == single_result["is_anomaly"]
+            assert batch_result["decision_score"] == pytest.approx(
+                single_result["decision_score"]
+            )
+            assert batch_result["anomaly_score"] == pytest.approx(
+                single_result["anomaly_score"]
+            )
+
+    def test_batch_scores_with_single_model_call(
+        self, trained_detector, metrics_batch, monkeypatch
+    ):
+        """The whole batch is scored with one pass over the forest."""
+        calls = []
+        original = trained_detector.model.score_samples
+
+        def counting_score_samples(features):
+            calls.append(len(features))
+            return original(features)
+
+        monkeypatch.setattr(
+            trained_detector.model, "score_samples", counting_score_samples
+        )
+
+        trained_detector.batch_detect(metrics_batch)
+
+        assert calls == [len(metrics_batch)]
+
+    def test_batch_reports_errors_per_row(self, trained_detector):
+        """Invalid samples get an error at their index; others are still scored."""
+        batch = [
+            {"cpu_usage": 40, "memory_usage": 50, "disk_usage": 60},
+            "not a dict",
+            {"cpu_usage": 40, "memory_usage": 50},
+            {"cpu_usage": "high", "memory_usage": 50, "disk_usage": 60},
+            {
+                "cpu_usage": 40,
+                "memory_usage": 50,
+                "disk_usage": 60,
+                "load_avg_1min": "x",
+            },
+            {"cpu_usage": 95, "memory_usage": 97, "disk_usage": 99},
+        ]
+
+        results = trained_detector.batch_detect(batch)
+
+        assert [r["status"] for r in results] == [
+            "success",
+            "error",
+            "error",
+            "error",
+            "error",
+            "success",
+        ]
+        assert results[1]["error"] == "Metrics must be a dictionary"
+        assert results[2]["error"] == "Missing required metric: disk_usage"
+        assert "must be numeric" in results[3]["error"]
+        assert "Failed to prepare features" in results[4]["error"]
+
+    def test_batch_of_only_invalid_rows_skips_model(self, tmp_path):
+        """A batch with no valid rows never loads or trains a model."""
+        detector = AnomalyDetector(
+            {"MODEL_PATH": str(tmp_path / "model.pkl"), "ANOMALY_THRESHOLD": 0.7}
+        )
+
+        results = detector.batch_detect([{}, None])
+
+        assert all(r["status"] == "error" for r in results)
+        assert detector.is_trained is False
+
+    def test_empty_batch(self, trained_detector):
+        """An empty batch returns an empty result list."""
+        assert trained_detector.batch_detect([]) == []
+
+
+class TestFeatureExtractor:
+    """Tests for the pandas-free inference feature extractor."""
+
+    @pytest.mark.parametrize(
+        "metrics",
+        [
+            {"cpu_usage": 150, "memory_usage": -5, "disk_usage": 50},
+            {
+                "cpu_usage": 20,
+                "memory_usage": 30,
+                "disk_usage": 40,
+                "network_io": 1e6,
+                "network_bytes_recv": 5e5,
+            },
+            {
+                "cpu_usage": 20,
+                "memory_usage": 30,
+                "disk_usage": 40,
+                "load_avg_1min": None,
+                "network_bytes_sent": float("nan"),
+            },
+            {"cpu_usage_percent": 99, "memory_usage": 30, "disk_usage": 40},
+            {"cpu_usage": "75", "memory_usage": 30, "disk_usage": 40},
+        ],
+    )
+    def test_matches_prepare_features(self, metrics):
+        """Extractor output equals the DataFrame path for a single sample."""
+        detector = AnomalyDetector()
+
+        expected = detector.prepare_features([metrics]).to_numpy(dtype=float)[0]
+        actual = detector.feature_extractor.extract(metrics)
+
+        np.testing.assert_allclose(actual, expected)
+
+    def test_reuses_row_buffer(self):
+        """Repeated extraction writes into the same preallocated row."""
+        extractor = AnomalyDetector().feature_extractor
+
+        first = extractor.extract({"cpu_usage": 10})
+        second = extractor.extract({"cpu_usage": 20})
+
+        assert first is second
+        assert second[0] == 20.0
+
+    def test_extract_into_caller_buffer(self):
+        """extract_many fills one row per sample."""
+        extractor = AnomalyDetector().feature_extractor
+
+        features = extractor.extract_many([{"cpu_usage": 10}, {"disk_usage": 30}])
+
+        assert features.shape == (2, extractor.n_features)
+        assert features[0, 0] == 10.0
+        assert features[1, 2] == 30.0
+
+    def test_rebuilt_when_feature_columns_change(self):
+        """Changing feature_columns recompiles the extractor."""
+        detector = AnomalyDetector()
+        detector.feature_columns = ["cpu_usage_percent", "load_avg_1min"]
+
+        assert detector.feature_extractor.extract({"cpu_usage": 5}).tolist() == [
+            5.0,
+            1.0,
+        ]
+
+    def test_non_numeric_value_raises(self):
+        """Non-numeric metrics are rejected rather than silently defaulted."""
+        extractor = AnomalyDetector().feature_extractor
+
+        with pytest.raises(ValueError):
+            extractor.extract({"cpu_usage": "high"})
+
+
+class TestSinglePassScoring:
+    """Tests for deriving labels from a single scoring pass."""
+
+    def test_matches_predict_and_decision_function(self, trained_detector):
+        """Single-pass labels and scores equal the two-call sklearn results."""
+        rng = np.random.default_rng(3)
+        features = rng.normal(0, 2, size=(500, len(trained_detector.feature_columns)))
+
+        predictions, decision_scores = trained_detector._score_and_label(features)
+
+        np.testing.assert_array_equal(
+            predictions, trained_detector.model.predict(features)
+        )
+        np.testing.assert_allclose(
+            decision_scores, trained_detector.model.decision_function(features)
+        )
+
+    def test_detect_anomaly_walks_forest_once(self, trained_detector, monkeypatch):
+        """detect_anomaly no longer calls predict() next to the scoring pass."""
+        model = trained_detector.model
+        monkeypatch.setattr(
+            model, "predict", lambda X: pytest.fail("predict() should not be called")
+        )
+        monkeypatch.setattr(
+            model,
+            "decision_function",
+            lambda X: pytest.fail("decision_function() should not be called"),
+        )
+
+        result = trained_detector.detect_anomaly(
+            {"cpu_usage": 99, "memory_usage": 99, "disk_usage": 99}
+        )
+
+        assert result["status"] == "success"
+
+    def test_disabled_uses_two_calls(self, trained_detector, metrics_batch):
+        """SINGLE_PASS_SCORING=False keeps the original predict/decision path."""
+        expected = trained_detector.batch_detect(metrics_batch)
+
+        trained_detector.single_pass_scoring = False
+        assert trained_detector._scoring_offset() is None
+        actual = trained_detector.batch_detect(metrics_batch)
+
+        assert [r["is_anomaly"] for r in actual] == [r["is_anomaly"] for r in expected]
+        np.testing.assert_allclose(
+            [r["decision_score"] for r in actual],
+            [r["decision_score"] for r in expected],
+        )
+
+    def test_predict_with_scores_single_pass(self, trained_detector):
+        """predict_with_scores labels agree with predict()."""
+        data = trained_detector._generate_synthetic_data(50)
+
+        predictions, scores = trained_detector.predict_with_scores(data)
+
+        np.testing.assert_array_equal(predictions, trained_detector.predict(data))
+        assert len(scores) == len(data)
+
+    def test_model_without_offset_falls_back(self, trained_detector):
+        """Models without a numeric offset_ use predict and decision_function."""
+        model = Mock()
+        model.predict.return_value = np.array([-1])
+        model.decision_function.return_value = np.array([-0.3])
+        trained_detector.model = model
+
+        result = trained_detector.detect_anomaly(
+            {"cpu_usage": 50, "memory_usage": 50, "disk_usage": 50}
+        )
+
+        assert result["is_anomaly"] is True
+        assert result["decision_score"] == pytest.approx(-0.3)
+        model.score_samples.assert_not_called()
+
+
+class TestCompiledForest:
+    """Tests for the flattened-array IsolationForest scoring backend."""
+
+    @pytest.mark.parametrize("max_features", [1.0, 0.5])
+    def test_scores_match_sklearn(self, max_features):
+        """Compiled scores equal IsolationForest.score_samples()."""
+        rng = np.random.default_rng(11)
+        model = IsolationForest(
+            n_estimators=50, max_features=max_features, random_state=0
+        ).fit(rng.normal(size=(300, 6)))
+        compiled = CompiledIsolationForest.from_sklearn(model)
+        X = rng.normal(0, 3, size=(1000, 6))
+
+        np.testing.assert_allclose(
+            compiled.score_samples(X, chunk_size=128),
+            model.score_samples(X),
+            rtol=0,
+            atol=1e-12,
+        )
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+    def test_rejects_wrong_feature_count(self):
+        """Inputs with the wrong number of columns are refused."""
+        model = IsolationForest(n_estimators=5, random_state=0).fit(np.eye(10, 4))
+        compiled = CompiledIsolationForest.from_sklearn(model)
+
+        with pytest.raises(ValueError):
+            compiled.score_samples(np.zeros((2, 3)))
+
+    def test_backend_matches_sklearn_backend(self, trained_detector, metrics_batch):
+        """INFERENCE_BACKEND=compiled gives the sklearn backend's results."""
+        expected = trained_detector.batch_detect(metrics_batch)
+
+        trained_detector.inference_backend = "compiled"
+        actual = trained_detector.batch_detect(metrics_batch)
+
+        assert trained_detector._compiled_scorer() is not None
+        assert [r["is_anomaly"] for r in actual] == [r["is_anomaly"] for r in expected]
+        np.testing.assert_allclose(
+            [r["decision_score"] for r in actual],
+            [r["decision_score"] for r in expected],
+            atol=1e-12,
+        )
+
+    def test_recompiled_after_retraining(self, trained_detector):
+        """Refitting the model invalidates the compiled copy."""
+        trained_detector.inference_backend = "compiled"
+        first = trained_detector._compiled_scorer()
+
+        trained_detector.train(trained_detector._generate_synthetic_data(150))
+
+        assert trained_detector._compiled_scorer() is not first
+
+    def test_non_forest_model_uses_sklearn_path(self, trained_detector):
+        """Models that are not fitted forests are scored by the model itself."""
+        model = Mock()
+        model.predict.return_value = np.array([1])
+        model.decision_function.return_value = np.array([0.2])
+        trained_detector.model = model
+        trained_detector.inference_backend = "compiled"
+
+        result = trained_detector.detect_anomaly(
+            {"cpu_usage": 50, "memory_usage": 50, "disk_usage": 50}
+        )
+
+        assert result["is_anomaly"] is False
+        assert trained_detector._compiled_scorer() is None
+
+    def test_invalid_backend_rejected(self):
+        """Unknown backends fail at construction."""
+        with pytest.raises(ValueError, match="INFERENCE_BACKEND"):
+            AnomalyDetector({"MODEL_PATH": "model.pkl", "INFERENCE_BACKEND": "gpu"})
+
+
+@pytest.fixture(scope="module")
+def scoring_pool():
+    """Two-process scoring pool shared by the tests in this module."""
+    pool = ProcessScoringPool(max_workers=2, min_batch_size=16)
+    yield pool
+    pool.shutdown()
+
+
+class TestProcessScoringPool:
+    """Tests for scoring large batches on worker processes."""
+
+    def test_scores_match_in_process(self, scoring_pool):
+        """Rows split across workers come back in order with equal scores."""
+        rng = np.random.default_rng(5)
+        model = IsolationForest(n_estimators=30, random_state=0).fit(
+            rng.normal(size=(300, 6))
+        )
+        compiled = CompiledIsolationForest.from_sklearn(model)
+        X = rng.normal(0, 3, size=(3000, 6))
+
+        np.testing.assert_array_equal(
+            scoring_pool.score_samples(compiled, X), compiled.score_samples(X)
+        )
+
+    def test_new_forest_is_picked_up(self, scoring_pool):
+        """Workers score with the forest they are given, not a cached one."""
+        rng = np.random.default_rng(6)
+        X = rng.normal(size=(100, 6))
+        for seed in (1, 2):
+            model = IsolationForest(n_estimators=10, random_state=seed).fit(X)
+            compiled = CompiledIsolationForest.from_sklearn(model)
+
+            np.testing.assert_array_equal(
+                scoring_pool.score_samples(compiled, X), compiled.score_samples(X)
+            )
+
+    def test_detector_uses_pool_for_large_batches(
+        self, trained_detector, metrics_batch, scoring_pool
+    ):
+        """batch_detect results are unchanged when scored on the pool."""
+        expected = trained_detector.batch_detect(metrics_batch)
+        trained_detector.scoring_pool = scoring_pool
+        with patch.object(
+            scoring_pool, "score_samples", wraps=scoring_pool.score_samples
+        ) as spy:
+            actual = trained_detector.batch_detect(metrics_batch)
+            trained_detector.detect_anomaly(metrics_batch[0])
+
+        # The single-sample call is below min_batch_size and stays in process
+        spy.assert_called_once()
+        assert len(spy.call_args[0][1]) == len(metrics_batch)
+        assert [r["is_anomaly"] for r in actual] == [r["is_anomaly"] for r in expected]
+        np.testing.assert_allclose(
+            [r["anomaly_score"] for r in actual],
+            [r["anomaly_score"] for r in expected],
+        )
+
+    def test_pool_failure_scores_in_process(self, trained_detector, metrics_batch):
+        """A broken pool falls back to scoring in the calling process."""
+        expected = trained_detector.batch_detect(metrics_batch)
+        pool = Mock()
+        pool.accepts.return_value = True
+        pool.score_samples.side_effect = RuntimeError("pool is down")
+        trained_detector.scoring_pool = pool
+
+        actual = trained_detector.batch_detect(metrics_batch)
+
+        pool.score_samples.assert_called_once()
+        assert [r["anomaly_score"] for r in actual] == [
+            r["anomaly_score"] for r in expected
+        ]
+
+    def test_negative_process_count_rejected(self, tmp_path):
+        """SCORING_PROCESSES must not be negative."""
+        with pytest.raises(ValueError):
+            AnomalyDetector(
+                {"MODEL_PATH": str(tmp_path / "m.pkl"), "SCORING_PROCESSES": -1}
+            )
+
+
+class TestForestBundle:
+    """Tests for the memory-mapped compiled forest artifact."""
+
+    def _compiled_detector(self, trained_detector):
+        detector = AnomalyDetector(
+            {**trained_detector.config, "INFERENCE_BACKEND": "compiled"}
+        )
+        detector.scaler_path = trained_detector.scaler_path
+        return detector
+
+    def test_save_load_round_trip(self, tmp_path):
+        """A saved bundle loads memory-mapped and scores identically."""
+        rng = np.random.default_rng(5)
+        model = IsolationForest(n_estimators=20, random_state=0).fit(
+            rng.normal(size=(200, 4))
+        )
+        compiled = CompiledIsolationForest.from_sklearn(model)
+        compiled.save(str(tmp_path / "forest"), note="test")
+
+        loaded = CompiledIsolationForest.load(str(tmp_path / "forest"))
+        metadata = CompiledIsolationForest.read_metadata(str(tmp_path / "forest"))
+        X = rng.normal(size=(50, 4))
+
+        assert isinstance(loaded.threshold, np.memmap)
+        assert not loaded.threshold.flags.writeable
+        assert metadata["note"] == "test"
+        np.testing.assert_array_equal(
+            loaded.score_samples(X), compiled.score_samples(X)
+        )
+
+    def test_saved_with_model(self, trained_detector):
+        """Saving a trained forest writes the bundle next to the model."""
+        bundle_path = trained_detector.forest_bundle_path
+        metadata = CompiledIsolationForest.read_metadata(bundle_path)
+
+        assert bundle_path.endswith("anomaly_detector.forest")
+        assert metadata["feature_columns"] == trained_detector.feature_columns
+
+    def test_compiled_backend_scores_from_bundle(self, trained_detector, metrics_batch):
+        """The compiled backend scores from the bundle without unpickling."""
+        expected = trained_detector.batch_detect(metrics_batch)
+        detector = self._compiled_detector(trained_detector)
+
+        actual = detector.batch_detect(metrics_batch)
+
+        assert detector._model is None
+        assert isinstance(detector._compiled_scorer().children, np.memmap)
+        np.testing.assert_allclose(
+            [r["decision_score"] for r in actual],
+            [r["decision_score"] for r in expected],
+            atol=1e-12,
+        )
+
+    def test_model_unpickled_on_demand(self, trained_detector):
+        """Touching .model loads it and keeps scoring on the mapped bundle."""
+        detector = self._compiled_detector(trained_detector)
+        assert detector._load_model() is True
+        bundle = detector._compiled_scorer()
+
+        assert isinstance(detector.model, IsolationForest)
+        assert detector._compiled_scorer() is bundle
+
+    def test_stale_bundle_ignored(self, trained_detector):
+        """A bundle not written with the current model file is not used."""
+        stat = os.stat(trained_detector.model_path)
+        os.utime(
+            trained_detector.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1)
+        )
+        detector = self._compiled_detector(trained_detector)
+
+        assert detector._load_model() is True
+        assert isinstance(detector._model, IsolationForest)
+
+    def test_sklearn_backend_ignores_bundle(self, trained_detector):
+        """The default backend keeps loading the pickled model."""
+        detector = AnomalyDetector(trained_detector.config)
+
+        assert detector._load_model() is True
+        assert isinstance(detector._model, IsolationForest)
+        assert detector._compiled is None
+
+
+class TestModelHotSwap:
+    """Tests for publishing retrained models through the bundle holder."""
+
+    SAMPLE = {"cpu_usage": 50, "memory_usage": 50, "disk_usage": 50}
+
+    def test_training_publishes_new_bundle(self, trained_detector):
+        """Each training run serves from a new, versioned bundle."""
+        first = trained_detector.model_holder.current
+
+        trained_detector.train(trained_detector._generate_synthetic_data(150))
+        second = trained_detector.model_holder.current
+
+        assert second.version != first.version
+        assert second.model is trained_detector.model
+        assert second.scaler is trained_detector.scaler
+        assert first.model is not second.model
+        assert first.scaler is not second.scaler
+        result = trained_detector.detect_anomaly(self.SAMPLE)
+        assert result["bundle_version"] == second.version
+
+    def test_in_flight_request_finishes_on_old_bundle(self, trained_detector):
+        """A request that started before a swap is scored by its own bundle."""
+        old_bundle = trained_detector.model_holder.current
+        old_model = old_bundle.model
+        scoring_started = threading.Event()
+        release = threading.Event()
+        original = old_model.score_samples
+
+        def blocking_score_samples(features):
+            scoring_started.set()
+            assert release.wait(10)
+            return original(features)
+
+        old_model.score_samples = blocking_score_samples
+        results = []
+        request = threading.Thread(
+            target=lambda: results.append(trained_detector.detect_anomaly(self.SAMPLE))
+        )
+        request.start()
+        assert scoring_started.wait(10)
+
+        trained_detector.train(trained_detector._generate_synthetic_data(150))
+        release.set()
+        request.join(10)
+
+        assert results[0]["status"] == "success"
+        assert results[0]["bundle_version"] == old_bundle.version
+        assert trained_detector.model_holder.current is not old_bundle
+
+    def test_bundle_warmed_before_publish(self, trained_detector, monkeypatch):
+        """Warm-up runs on the new bundle while the old one still serves."""
+        old_bundle = trained_detector.model_holder.current
+        warmed = []
+        original = trained_detector._warm_up
+
+        def recording_warm_up(bundle):
+            warmed.append((bundle, trained_detector.model_holder.current))
+            original(bundle)
+
+        monkeypatch.setattr(trained_detector, "_warm_up", recording_warm_up)
+
+        trained_detector.train(trained_detector._generate_synthetic_data(150))
+
+        assert len(warmed) == 1
+        new_bundle, serving_during_warm_up = warmed[0]
+        assert serving_during_warm_up is old_bundle
+        assert trained_detector.model_holder.current is new_bundle
+
+    def test_failed_training_keeps_serving_bundle(self, trained_detector, monkeypatch):
+        """A model that fails to fit never replaces the serving one."""
+        old_bundle = trained_detector.model_holder.current
+        broken = Mock()
+        broken.fit.side_effect = RuntimeError("fit failed")
+        monkeypatch.setattr(trained_detector, "_create_model", lambda install: broken)
+
+        result = trained_detector.train(trained_detector._generate_synthetic_data(150))
+
+        assert result is False
+        assert trained_detector.model_holder.current is old_bundle
+        assert trained_detector.model is old_bundle.model
+
+    def test_directly_assigned_model_is_published(self, trained_detector):
+        """Assigning a model outside of training still serves it as a bundle."""
+        model = Mock()
+        model.predict.return_value = np.array([-1])
+        model.decision_function.return_value = np.array([-0.4])
+        trained_detector.model = model
+
+        result = trained_detector.detect_anomaly(self.SAMPLE)
+
+        assert result["is_anomaly"] is True
+        assert trained_detector.model_holder.current.model is model
+        assert result["bundle_version"] == trained_detector.model_holder.current.version
+
+    def test_concurrent_requests_during_retraining(
+        self, trained_detector, metrics_batch
+    ):
+        """Requests keep succeeding while models are swapped underneath them."""
+        errors = []
+        stop = threading.Event()
+
+        def serve():
+            while not stop.is_set():
+                for result in trained_detector.batch_detect(metrics_batch):
+                    if result["status"] != "success":
+                        errors.append(result)
+
+        readers = [threading.Thread(target=serve) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for size in (120, 140, 160):
+                assert trained_detector.train(
+                    trained_detector._generate_synthetic_data(size)
+                )
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join(10)
+
+        assert errors == []
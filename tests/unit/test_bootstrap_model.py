@@ -0,0 +1,126 @@
+"""
+Tests for the build-time bootstrap model and startup warm-up
+"""
+
+import json
+import os
+
+import pytest
+
+from ml_models.anomaly_detector import AnomalyDetector, ModelNotReadyError
+from ml_models.bootstrap import (
+    MANIFEST_FILE,
+    BootstrapModelError,
+    build_bootstrap_model,
+    load_bootstrap_model,
+)
+
+SAMPLE = {"cpu_usage": 40, "memory_usage": 50, "disk_usage": 30}
+
+
+@pytest.fixture(scope="module")
+def bootstrap_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bootstrap"))
+    build_bootstrap_model(path, n_samples=300)
+    return path
+
+
+def _detector(tmp_path, bootstrap_dir, **config):
+    detector = AnomalyDetector(
+        {
+            "MODEL_PATH": str(tmp_path / "model.pkl"),
+            "BOOTSTRAP_MODEL_DIR": bootstrap_dir,
+            **config,
+        }
+    )
+    detector.scaler_path = str(tmp_path / "scaler.pkl")
+    return detector
+
+
+@pytest.fixture
+def no_training(monkeypatch):
+    def train(self, training_data):
+        raise AssertionError("trained on the request path")
+
+    monkeypatch.setattr(AnomalyDetector, "train", train)
+
+
+class TestBootstrapModel:
+    def test_build_writes_manifest(self, bootstrap_dir):
+        model, scaler, manifest = load_bootstrap_model(bootstrap_dir)
+
+        assert manifest["n_samples"] == 300
+        assert hasattr(model, "estimators_")
+        assert hasattr(scaler, "mean_")
+
+    def test_missing_dir_rejected(self, tmp_path):
+        with pytest.raises(BootstrapModelError):
+            load_bootstrap_model(str(tmp_path / "missing"))
+
+    def test_other_sklearn_version_rejected(self, bootstrap_dir, tmp_path):
+        stale = tmp_path / "stale"
+        stale.mkdir()
+        with open(os.path.join(bootstrap_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        manifest["sklearn_version"] = "0.0"
+        (stale / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+        with pytest.raises(BootstrapModelError):
+            load_bootstrap_model(str(stale))
+
+
+class TestDetectorStartup:
+    def test_first_request_served_by_bootstrap(
+        self, tmp_path, bootstrap_dir, no_training
+    ):
+        detector = _detector(tmp_path, bootstrap_dir)
+
+        result = detector.detect_anomaly(SAMPLE)
+
+        assert result["status"] == "success"
+        assert detector.model_source == "bootstrap"
+        assert not os.path.exists(detector.model_path)
+
+    def test_persisted_model_preferred(self, tmp_path, bootstrap_dir):
+        trained = _detector(tmp_path, bootstrap_dir)
+        trained.train(trained._generate_synthetic_data(200))
+
+        detector = _detector(tmp_path, bootstrap_dir)
+        detector.detect_anomaly(SAMPLE)
+
+        assert detector.model_source == "persisted"
+
+    def test_no_model_and_no_fallback_errors(self, tmp_path, no_training):
+        detector = _detector(
+            tmp_path, str(tmp_path / "missing"), SYNC_TRAINING_FALLBACK=False
+        )
+
+        result = detector.detect_anomaly(SAMPLE)
+
+        assert result["status"] == "error"
+        with pytest.raises(ModelNotReadyError):
+            detector._ensure_model_ready()
+
+    def test_warm_up_may_train(self, tmp_path):
+        detector = _detector(
+            tmp_path, str(tmp_path / "missing"), SYNC_TRAINING_FALLBACK=False
+        )
+
+        status = detector.warm_up()
+
+        assert status["status"] == "ready"
+        assert status["model_source"] == "synthetic"
+        assert detector.is_trained
+
+    def test_create_app_warms_up(self, tmp_path, monkeypatch):
+        from app import create_app
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("ANOMALY_WARMUP", "sync")
+        monkeypatch.setenv("ANOMALY_MICRO_BATCHING", "false")
+
+        app = create_app()
+
+        assert app.anomaly_warm_up["status"] == "ready"
+        assert app.anomaly_detector.sync_training_fallback is False
+        assert app.anomaly_detector.is_trained
@@ -0,0 +1,296 @@
+"""
+Tests for caching.strategies.cache_manager.CacheManager over fakeredis
+"""
+
+import threading
+import time
+
+import pytest
+
+from caching.strategies import cache_manager as cache_manager_module
+from caching.strategies.cache_manager import (
+    CacheManager,
+    CachePolicy,
+    CacheStrategy,
+    CacheTag,
+)
+from caching.strategies.multi_tier_cache import CacheLevel, MultiTierCache
+
+SHARED = CachePolicy(
+    ttl=600, target_level=CacheLevel.L2_REDIS, tags=[CacheTag.MLOPS_MODELS]
+)
+
+
+@pytest.fixture
+def make_manager(make_redis_cache):
+    managers = []
+
+    def make():
+        manager = CacheManager(redis_cache=make_redis_cache())
+        manager.set_policy("models", SHARED)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.close()
+
+
+@pytest.fixture
+def manager(make_manager):
+    return make_manager()
+
+
+class TestGet:
+    def test_concurrent_misses_share_one_fetch(self, manager):
+        calls = []
+        start = threading.Barrier(8)
+        results = [None] * 8
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"accuracy": 0.9}
+
+        def read(index):
+            start.wait()
+            results[index] = manager.get("models:1", fetch)
+
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(calls) == 1
+        assert results == [{"accuracy": 0.9}] * 8
+        assert manager.get("models:1") == {"accuracy": 0.9}
+
+    def test_shared_entries_stay_out_of_memory(self, manager):
+        manager.get("models:1", lambda: "v1")
+
+        assert manager.multi_tier_cache.get_cache_distribution()["l1_memory"] == 0
+        assert manager.redis_cache.get("models:1") == "v1"
+
+    def test_failed_fetch_falls_back_to_none(self, manager):
+        def fetch():
+            raise RuntimeError("storage down")
+
+        assert manager.get("models:1", fetch) is None
+        assert manager.get_stats()["operation_stats"]["errors"] == 1
+
+
+class TestWrites:
+    def test_set_records_tags_in_redis(self, manager):
+        assert manager.set("models:1", "v1")
+
+        assert manager.redis_cache.tag_members("mlops_models") == ["models:1"]
+        assert manager.tag_keys[CacheTag.MLOPS_MODELS] == {"models:1"}
+
+    def test_delete_many(self, manager):
+        for i in range(3):
+            manager.set(f"models:{i}", i)
+        manager.set("notes:1", "memory only", CachePolicy(ttl=60))
+
+        deleted = manager.delete_many(["models:0", "models:2", "notes:1", "missing"])
+
+        assert deleted == 3
+        assert manager.get("models:1") == 1
+        assert manager.get("models:0") is None
+        assert manager.get("notes:1", policy=CachePolicy(ttl=60)) is None
+        assert manager.tag_keys[CacheTag.MLOPS_MODELS] == {"models:1"}
+
+    def test_warm_cache_batches_shared_entries(self, manager, monkeypatch):
+        batches = []
+        set_many = manager.redis_cache.set_many
+
+        def recording_set_many(items, **kwargs):
+            batches.append(sorted(items))
+            return set_many(items, **kwargs)
+
+        monkeypatch.setattr(manager.redis_cache, "set_many", recording_set_many)
+        manager.register_warmup_function("models", lambda key: key.upper())
+        keys = [f"models:{i}" for i in range(5)]
+
+        result = manager.warm_cache("models", keys)
+
+        assert result["loaded_keys"] == 5
+        assert batches == [keys]
+        assert sorted(manager.redis_cache.tag_members("mlops_models")) == keys
+        assert manager.get("models:3") == "MODELS:3"
+
+    def test_cache_set_many_mixes_levels(self, manager):
+        manager.set_policy("notes", CachePolicy(ttl=60, tags=[CacheTag.USER_DATA]))
+
+        loaded = manager._cache_set_many({"models:1": "shared", "notes:1": "both"})
+
+        assert loaded == 2
+        assert manager.redis_cache.get("models:1") == "shared"
+        assert manager.redis_cache.tag_members("user_data") == ["notes:1"]
+        assert manager.tag_keys[CacheTag.USER_DATA] == {"notes:1"}
+
+
+class TestMultiTierCache:
+    def test_memory_only_without_redis(self):
+        cache = MultiTierCache()
+
+        cache.set("key", "value", ttl=60, target_level=CacheLevel.L2_REDIS)
+
+        assert cache.get("key") == "value"
+
+    def test_redis_hits_promoted_briefly(self, manager):
+        cache = MultiTierCache(redis_cache=manager.redis_cache, promotion_ttl=60)
+        manager.redis_cache.set("key", "value", ttl=600)
+
+        assert cache.get("key") == "value"
+        manager.redis_cache.delete("key")
+
+        assert cache.get("key") == "value"
+        assert cache.get("key", CacheLevel.L2_REDIS) is None
+        assert cache.get_metrics()["l1_hits"] == 1
+
+    def test_delete_many_one_redis_call(self, manager, monkeypatch):
+        cache = MultiTierCache(redis_cache=manager.redis_cache)
+        cache.set("both", 1)
+        cache.set("memory", 2, target_level=CacheLevel.L1_MEMORY)
+        cache.set("redis", 3, target_level=CacheLevel.L2_REDIS)
+        calls = []
+        delete_many = manager.redis_cache.delete_many
+        monkeypatch.setattr(
+            manager.redis_cache,
+            "delete_many",
+            lambda keys: calls.append(keys) or delete_many(keys),
+        )
+
+        deleted = cache.delete_many(["both", "memory", "redis", "missing"])
+
+        assert deleted == 3
+        assert len(calls) == 1
+        assert [cache.get(key) for key in ("both", "memory", "redis")] == [None] * 3
+
+    def test_invalidate_pattern_covers_both_levels(self, manager):
+        cache = MultiTierCache(redis_cache=manager.redis_cache)
+        cache.set("exp:1", 1)
+        cache.set("exp:2", 2, target_level=CacheLevel.L1_MEMORY)
+        cache.set("model:1", 3)
+
+        cache.invalidate_pattern("exp:*")
+
+        assert cache.get("exp:1") is None
+        assert cache.get("exp:2") is None
+        assert cache.get("model:1") == 3
+
+
+class TestCrossWorkerTags:
+    def test_tag_invalidated_from_another_worker(self, make_manager):
+        first, second = make_manager(), make_manager()
+        first.set("models:1", "v1")
+        first.get("models:2", lambda: "v2")
+        first.set("notes:1", "untagged", CachePolicy(ttl=60))
+
+        # The second worker never cached these and has no local tag record
+        assert second.tag_keys[CacheTag.MLOPS_MODELS] == set()
+        invalidated = second.invalidate_by_tag(CacheTag.MLOPS_MODELS)
+
+        assert invalidated == 2
+        assert first.get("models:1") is None
+        assert first.get("models:2") is None
+        assert first.redis_cache.tag_members("mlops_models") == []
+        assert first.get("notes:1", policy=CachePolicy(ttl=60)) == "untagged"
+
+    def test_entries_tagged_after_invalidation_survive(self, make_manager):
+        first, second = make_manager(), make_manager()
+        first.set("models:1", "v1")
+        second.invalidate_by_tag(CacheTag.MLOPS_MODELS)
+
+        first.set("models:1", "v2")
+
+        assert second.get("models:1") == "v2"
+        assert second.redis_cache.tag_members("mlops_models") == ["models:1"]
+
+
+@pytest.mark.usefixtures("fakeredis_lua")
+class TestRefreshAhead:
+    POLICY = CachePolicy(
+        ttl=100,
+        strategy=CacheStrategy.REFRESH_AHEAD,
+        target_level=CacheLevel.L2_REDIS,
+        refresh_ahead_ratio=0.8,
+    )
+
+    @pytest.fixture
+    def workers(self, make_manager):
+        first, second = make_manager(), make_manager()
+        first.set("hot:1", "v1", self.POLICY)
+        # 90 of the 100 seconds have passed: inside the 20 second window
+        first.redis_cache.expire("hot:1", 10)
+        return first, second
+
+    def test_one_refresh_per_lease(self, workers):
+        first, second = workers
+        fetching, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            fetching.set()
+            release.wait(5)
+            return "v2"
+
+        refresh = threading.Thread(
+            target=first._background_refresh, args=("hot:1", fetch, self.POLICY)
+        )
+        refresh.start()
+        assert fetching.wait(5)
+
+        second._background_refresh("hot:1", fetch, self.POLICY)
+        release.set()
+        refresh.join(5)
+
+        assert len(calls) == 1
+        assert first.operation_stats["refreshes"] == 1
+        assert second.operation_stats["refreshes_leased_elsewhere"] == 1
+        assert second.get("hot:1", policy=self.POLICY) == "v2"
+        assert first.redis_cache.ttl("hot:1") > 90
+
+    def test_entry_refreshed_elsewhere_skipped(self, workers):
+        first, second = workers
+        first._background_refresh("hot:1", lambda: "v2", self.POLICY)
+        calls = []
+
+        # Queued before the first worker's refresh landed
+        second._background_refresh(
+            "hot:1", lambda: calls.append(1) or "v3", self.POLICY
+        )
+
+        assert calls == []
+        assert second.operation_stats["refreshes"] == 0
+        assert second.get("hot:1", policy=self.POLICY) == "v2"
+
+    def test_hit_schedules_one_refresh(self, workers, monkeypatch):
+        first, _ = workers
+        monkeypatch.setattr(
+            cache_manager_module, "should_refresh_early", lambda *args: True
+        )
+        release = threading.Event()
+
+        def fetch():
+            release.wait(5)
+            return "v2"
+
+        for _ in range(5):
+            assert first.get("hot:1", fetch, self.POLICY) == "v1"
+        task = first.refresh_tasks["hot:1"]
+        release.set()
+        task.result(5)
+
+        assert first.operation_stats["refreshes"] == 1
+        assert first.get("hot:1", policy=self.POLICY) == "v2"
+
+    def test_no_refresh_outside_window(self, workers):
+        first, _ = workers
+        first.redis_cache.expire("hot:1", 50)
+
+        first.get("hot:1", lambda: "v2", self.POLICY)
+
+        assert first.refresh_tasks == {}
@@ -0,0 +1,161 @@
+"""
+Tests for the codec-tagged cache serializer
+"""
+
+import gzip
+import json
+import math
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from caching.strategies.serialization import (
+    MSGPACK_AVAILABLE,
+    CacheSerializer,
+    Compressor,
+    SerializationError,
+    register_compressor,
+)
+
+PAYLOAD = {"experiments": [{"id": i, "name": f"exp-{i}"} for i in range(200)]}
+
+
+@pytest.fixture
+def serializer():
+    return CacheSerializer(compression_threshold=1024)
+
+
+class TestFraming:
+    @pytest.mark.parametrize("method", ["json", "pickle"])
+    def test_round_trip(self, serializer, method):
+        data = serializer.dumps(PAYLOAD, method)
+
+        assert serializer.describe(data)[0] == method
+        assert serializer.loads(data) == PAYLOAD
+
+    def test_mixed_codecs_read_without_metadata(self, serializer):
+        payloads = [
+            serializer.dumps(PAYLOAD, "json", compress=False),
+            serializer.dumps(PAYLOAD, "pickle", compress=True),
+            serializer.dumps("small", "json"),
+        ]
+
+        assert [serializer.loads(data) for data in payloads] == [
+            PAYLOAD,
+            PAYLOAD,
+            "small",
+        ]
+
+    def test_compression_chosen_by_size(self, serializer):
+        assert serializer.describe(serializer.dumps("x" * 10)) == ("json", None)
+        assert serializer.describe(serializer.dumps(PAYLOAD))[1] is not None
+
+    def test_legacy_payloads_are_not_framed(self, serializer):
+        assert not serializer.is_framed(json.dumps(PAYLOAD).encode())
+        assert not serializer.is_framed(gzip.compress(b"[]"))
+        assert not serializer.is_framed(CacheSerializer.serialize(PAYLOAD, "pickle"))
+
+    def test_json_keeps_non_finite_floats(self, serializer):
+        value = {"nan": math.nan, "inf": math.inf, "-inf": -math.inf}
+
+        restored = serializer.loads(serializer.dumps(value))
+
+        assert math.isnan(restored["nan"])
+        assert restored["inf"] == math.inf
+        assert restored["-inf"] == -math.inf
+
+    def test_json_writes_datetimes_as_str(self, serializer):
+        when = datetime(2025, 1, 2, 3, 4, 5)
+
+        assert serializer.loads(serializer.dumps({"at": when})) == {"at": str(when)}
+
+    def test_orjson_is_opt_in(self, serializer):
+        pytest.importorskip("orjson")
+
+        data = serializer.dumps(PAYLOAD, "orjson")
+
+        assert serializer.describe(serializer.dumps(PAYLOAD))[0] == "json"
+        assert serializer.describe(data)[0] == "orjson"
+        assert serializer.loads(data) == PAYLOAD
+
+    @pytest.mark.parametrize("module, name", [("zstandard", "zstd"), ("lz4", "lz4")])
+    def test_optional_compressors(self, serializer, module, name):
+        pytest.importorskip(module)
+
+        data = serializer.dumps(PAYLOAD, compression=name, compress=True)
+
+        assert serializer.describe(data) == ("json", name)
+        assert serializer.loads(data) == PAYLOAD
+
+    def test_unknown_codec_rejected(self, serializer):
+        with pytest.raises(SerializationError):
+            serializer.dumps(PAYLOAD, "yaml")
+        with pytest.raises(SerializationError):
+            serializer.loads(b"\xff\x63\x00{}")
+
+    def test_custom_compressor(self, serializer):
+        class ZlibCompressor(Compressor):
+            name = "zlib-test"
+            compressor_id = 200
+
+            def compress(self, data, fast):
+                return zlib.compress(data, 1)
+
+            def decompress(self, data):
+                return zlib.decompress(data)
+
+        register_compressor(ZlibCompressor())
+        data = serializer.dumps(PAYLOAD, compression="zlib-test", compress=True)
+
+        assert serializer.describe(data) == ("json", "zlib-test")
+        assert serializer.loads(data) == PAYLOAD
+
+
+class TestNumpy:
+    def test_array_read_back_without_copy(self, serializer):
+        array = np.arange(20000, dtype=np.float32).reshape(100, 200)
+
+        data = serializer.dumps(array)
+        restored = serializer.loads(data)
+
+        assert serializer.describe(data) == ("numpy", None)
+        assert restored.dtype == np.float32
+        np.testing.assert_array_equal(restored, array)
+        assert np.shares_memory(restored, np.frombuffer(data, dtype=np.uint8))
+        assert not restored.flags.writeable
+
+    def test_non_contiguous_and_compressed(self, serializer):
+        array = np.arange(100, dtype=np.int64).reshape(10, 10).T
+
+        restored = serializer.loads(serializer.dumps(array, compress=True))
+
+        np.testing.assert_array_equal(restored, array)
+
+    def test_pickle_still_honoured(self, serializer):
+        data = serializer.dumps(np.arange(3), "pickle")
+
+        assert serializer.describe(data)[0] == "pickle"
+
+    @pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+    def test_msgpack_nested_arrays(self, serializer):
+        value = {"weights": np.ones((4, 4)), "name": "model"}
+
+        restored = serializer.loads(serializer.dumps(value, "msgpack"))
+
+        assert restored["name"] == "model"
+        np.testing.assert_array_equal(restored["weights"], value["weights"])
+
+
+def test_redis_cache_reads_entries_written_before_headers(make_redis_cache):
+    cache = make_redis_cache()
+    redis_key = cache._generate_key("legacy")
+    cache.client.set(redis_key, gzip.compress(json.dumps(PAYLOAD).encode()))
+    cache.client.set(
+        f"{redis_key}:meta", json.dumps({"compressed": True, "serializer": "json"})
+    )
+    cache.set("new", np.arange(5))
+
+    assert cache.get("legacy") == PAYLOAD
+    np.testing.assert_array_equal(cache.get("new"), np.arange(5))
@@ -0,0 +1,103 @@
+"""
+Tests for probabilistic early refresh and refresh leases
+"""
+
+import random
+
+import pytest
+
+from caching.strategies.early_refresh import (
+    DEFAULT_RECOMPUTE_COST,
+    RecomputeCosts,
+    should_refresh_early,
+)
+
+
+def _refresh_rate(ttl_remaining, cost, beta=1.0, trials=20000):
+    rng = random.Random(0)
+    return (
+        sum(
+            should_refresh_early(ttl_remaining, cost, beta, rand=rng.random())
+            for _ in range(trials)
+        )
+        / trials
+    )
+
+
+class TestShouldRefreshEarly:
+    def test_expired_always_refreshes(self):
+        assert should_refresh_early(0, 0.01, rand=0.0)
+
+    def test_probability_rises_towards_expiry(self):
+        rates = [_refresh_rate(ttl, cost=1.0) for ttl in (10, 3, 1, 0.1)]
+
+        assert rates == sorted(rates)
+        assert rates[0] < 0.001
+        assert rates[-1] > 0.85
+
+    def test_slow_values_refresh_earlier(self):
+        assert _refresh_rate(5, cost=2.0) > _refresh_rate(5, cost=0.2)
+
+    def test_beta_scales_eagerness(self):
+        assert _refresh_rate(2, 1.0, beta=2.0) > _refresh_rate(2, 1.0, beta=0.5)
+
+    def test_matches_exponential_distribution(self):
+        # P(refresh) = exp(-ttl / (cost * beta))
+        assert _refresh_rate(1.0, 1.0) == pytest.approx(0.368, abs=0.02)
+
+
+class TestRecomputeCosts:
+    def test_unmeasured_key_uses_default(self):
+        assert RecomputeCosts().get("key") == DEFAULT_RECOMPUTE_COST
+
+    def test_moving_average(self):
+        costs = RecomputeCosts()
+        costs.record("key", 1.0)
+        costs.record("key", 2.0)
+
+        assert costs.get("key") == pytest.approx(1.3)
+
+    def test_bounded(self):
+        costs = RecomputeCosts(max_keys=3)
+        for i in range(10):
+            costs.record(f"key-{i}", i)
+
+        assert len(costs) == 3
+        assert costs.get("key-9") == 9
+        assert costs.get("key-0") == DEFAULT_RECOMPUTE_COST
+
+
+@pytest.mark.usefixtures("fakeredis_lua")
+class TestRefreshLease:
+    @pytest.fixture
+    def workers(self, make_redis_cache):
+        return make_redis_cache(), make_redis_cache()
+
+    def test_one_holder_across_workers(self, workers):
+        first, second = workers
+
+        lease = first.acquire_lease("hot", timeout=5)
+
+        assert lease is not None
+        assert second.acquire_lease("hot", timeout=5) is None
+        assert second.acquire_lease("other", timeout=5) is not None
+
+        first.release_lease(lease)
+        assert second.acquire_lease("hot", timeout=5) is not None
+
+    def test_lapsed_lease_release_is_harmless(self, workers):
+        first, second = workers
+        lease = first.acquire_lease("hot", timeout=5)
+        first.client.delete("lease:hot")
+        taken_over = second.acquire_lease("hot", timeout=5)
+
+        first.release_lease(lease)
+
+        assert taken_over is not None
+        assert first.acquire_lease("hot", timeout=5) is None
+
+    def test_lease_not_listed_as_cache_key(self, workers):
+        first, _ = workers
+        first.acquire_lease("hot", timeout=5)
+
+        assert first.keys() == []
@@ -0,0 +1,135 @@
+"""
+Tests for path-length attributions of the compiled isolation forest
+"""
+
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models.forest_engine import CompiledIsolationForest
+
+SPIKE = {"cpu_usage": 99, "memory_usage": 40, "disk_usage": 40, "load_avg_1min": 1}
+
+
+@pytest.fixture
+def forest():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(400, 5))
+    model = IsolationForest(n_estimators=40, random_state=0).fit(X)
+    return model, CompiledIsolationForest.from_sklearn(model), X
+
+
+@pytest.fixture
+def detector(tmp_path):
+    detector = AnomalyDetector(
+        {"MODEL_PATH": str(tmp_path / "model.pkl"), "ANOMALY_THRESHOLD": 0.7}
+    )
+    detector.scaler_path = str(tmp_path / "scaler.pkl")
+    detector.train(detector._generate_synthetic_data(200))
+    return detector
+
+
+class TestCompiledAttributions:
+    def test_scores_match_sklearn(self, forest):
+        model, compiled, X = forest
+
+        scores, _ = compiled.score_samples_with_attributions(X, chunk_size=64)
+
+        np.testing.assert_allclose(scores, model.score_samples(X), rtol=1e-12)
+
+    def test_attributions_sum_to_path_shortening(self, forest):
+        _, compiled, X = forest
+
+        scores, attributions = compiled.score_samples_with_attributions(X)
+
+        # score = -2 ** (-mean_path / c(max_samples))
+        mean_path = -np.log2(-scores) * compiled._denominator / compiled.n_trees
+        np.testing.assert_allclose(
+            attributions.sum(axis=1),
+            compiled.expected_path_length - mean_path,
+            atol=1e-9,
+        )
+
+    def test_outlying_feature_dominates(self, forest):
+        _, compiled, X = forest
+        outliers = X[:10].copy()
+        outliers[:, 3] = 8.0
+
+        _, attributions = compiled.score_samples_with_attributions(outliers)
+
+        assert attributions.mean(axis=0).argmax() == 3
+
+    def test_round_trip_keeps_edge_gains(self, forest, tmp_path):
+        _, compiled, X = forest
+        compiled.save(str(tmp_path / "forest"))
+
+        loaded = CompiledIsolationForest.load(str(tmp_path / "forest"))
+
+        np.testing.assert_allclose(
+            loaded.score_samples_with_attributions(X)[1],
+            compiled.score_samples_with_attributions(X)[1],
+        )
+
+    def test_bundle_without_edge_gains(self, forest, tmp_path):
+        _, compiled, X = forest
+        path = str(tmp_path / "forest")
+        compiled.save(path)
+        os.remove(os.path.join(path, "edge_gain.npy"))
+
+        loaded = CompiledIsolationForest.load(path)
+
+        assert loaded.supports_attributions is False
+        np.testing.assert_allclose(loaded.score_samples(X), compiled.score_samples(X))
+        with pytest.raises(ValueError):
+            loaded.score_samples_with_attributions(X)
+
+
+class TestDetectorAttributions:
+    def test_single_sample(self, detector):
+        plain = detector.detect_anomaly(SPIKE)
+        explained = detector.detect_anomaly(SPIKE, explain=True)
+
+        assert "attributions" not in plain
+        assert explained["decision_score"] == pytest.approx(plain["decision_score"])
+        attributions = explained["attributions"]
+        assert set(attributions) == set(detector.feature_columns)
+        assert max(attributions, key=attributions.get) == "cpu_usage_percent"
+
+    def test_batch_matches_single(self, detector):
+        batch = [SPIKE, {"cpu_usage": 30}, dict(SPIKE, disk_usage=99)]
+
+        results = detector.batch_detect(batch, explain=True)
+
+        assert results[1]["status"] == "error"
+        for index in (0, 2):
+            single = detector.detect_anomaly(batch[index], explain=True)
+            assert results[index]["decision_score"] == pytest.approx(
+                single["decision_score"]
+            )
+            for name, value in single["attributions"].items():
+                assert results[index]["attributions"][name] == pytest.approx(value)
+
+    def test_non_forest_model_has_no_attributions(self, detector):
+        class Model:
+            def predict(self, X):
+                return np.ones(len(X))
+
+            def decision_function(self, X):
+                return np.zeros(len(X))
+
+        detector.model = Model()
+
+        result = detector.detect_anomaly(SPIKE, explain=True)
+
+        assert result["status"] == "success"
+        assert result["attributions"] is None
+
+    def test_feature_importance_from_attributions(self, detector):
+        importance = detector.get_feature_importance()
+
+        assert importance["method"] == "path_length_attribution"
+        assert importance["feature_count"] == len(detector.feature_columns)
+        assert sum(importance["features"].values()) == pytest.approx(1.0)
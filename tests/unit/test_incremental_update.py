@@ -0,0 +1,217 @@
+"""
+Tests for incremental IsolationForest updates
+"""
+
+import copy
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models import incremental_forest
+from ml_models.incremental_forest import (
+    UnsupportedForestError,
+    refresh_forest,
+    refresh_unsupported_reason,
+    rescale_tree,
+)
+
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).normal(5, 3, size=(1000, 4))
+
+
+@pytest.fixture
+def fitted(data):
+    scaler = StandardScaler().fit(data)
+    model = IsolationForest(n_estimators=20, contamination=0.1, random_state=0)
+    model.fit(scaler.transform(data))
+    return model, scaler
+
+
+class TestRefreshForest:
+    def test_replaces_oldest_trees(self, fitted, data):
+        model, scaler = fitted
+
+        refreshed = refresh_forest(model, scaler.transform(data[:300]), 5)
+
+        assert len(refreshed.estimators_) == 20
+        assert refreshed.estimators_[:15] == model.estimators_[5:]
+        assert all(tree not in model.estimators_ for tree in refreshed.estimators_[15:])
+        assert len(refreshed.estimators_features_) == 20
+        assert len(refreshed._decision_path_lengths) == 20
+
+    def test_original_model_untouched(self, fitted, data):
+        model, scaler = fitted
+        trees, offset = list(model.estimators_), model.offset_
+
+        refresh_forest(model, scaler.transform(data[:300]) + 1, 5)
+
+        assert model.estimators_ == trees
+        assert model.offset_ == offset
+
+    def test_offset_matches_contamination_on_window(self, fitted, data):
+        model, scaler = fitted
+        window = scaler.transform(data[:500])
+
+        refreshed = refresh_forest(model, window, 5)
+
+        flagged = np.mean(refreshed.predict(window) == -1)
+        assert flagged == pytest.approx(model.contamination, abs=0.01)
+
+    def test_small_window_limits_tree_size(self, fitted, data):
+        model, scaler = fitted
+
+        refreshed = refresh_forest(model, scaler.transform(data[:50]), 3)
+
+        assert all(
+            tree.tree_.n_node_samples[0] <= 50 for tree in refreshed.estimators_[-3:]
+        )
+
+
+class TestRefreshGuard:
+    def test_tested_release_supported(self, fitted):
+        model, _ = fitted
+
+        assert refresh_unsupported_reason(model, "1.5.2") is None
+        assert refresh_unsupported_reason(model, "1.9.1") is None
+
+    def test_untested_release_rejected(self, fitted):
+        model, _ = fitted
+
+        assert "outside the tested range" in refresh_unsupported_reason(model, "1.4.2")
+        assert "outside the tested range" in refresh_unsupported_reason(model, "2.0.0")
+
+    def test_missing_private_attribute_rejected(self, fitted, data):
+        model, scaler = fitted
+        del model._decision_path_lengths
+
+        assert "_decision_path_lengths" in refresh_unsupported_reason(model)
+        with pytest.raises(UnsupportedForestError):
+            refresh_forest(model, scaler.transform(data[:300]), 5)
+
+
+class TestRescaleTree:
+    def test_tree_partitions_raw_samples_the_same(self, fitted, data):
+        model, old_scaler = fitted
+        new_scaler = copy.deepcopy(old_scaler)
+        new_scaler.partial_fit(np.random.default_rng(1).normal(20, 1, size=(500, 4)))
+        tree = model.estimators_[0]
+
+        rescaled = rescale_tree(
+            tree, model.estimators_features_[0], old_scaler, new_scaler
+        )
+
+        before = tree.apply(old_scaler.transform(data).astype(np.float32))
+        after = rescaled.apply(new_scaler.transform(data).astype(np.float32))
+        assert np.mean(before == after) > 0.999
+        assert rescaled is not tree
+
+    def test_rescaled_forest_keeps_scores(self, fitted, data):
+        model, old_scaler = fitted
+        new_scaler = copy.deepcopy(old_scaler)
+        new_scaler.partial_fit(data[:100] * 2)
+
+        refreshed = refresh_forest(
+            model,
+            new_scaler.transform(data[:300]),
+            1,
+            old_scaler=old_scaler,
+            new_scaler=new_scaler,
+        )
+
+        # Only the replaced tree may score raw samples differently
+        before = model.score_samples(old_scaler.transform(data))
+        after = refreshed.score_samples(new_scaler.transform(data))
+        assert np.corrcoef(before, after)[0, 1] > 0.95
+
+
+class TestAnomalyDetectorUpdate:
+    @pytest.fixture
+    def detector(self, tmp_path):
+        detector = AnomalyDetector(
+            {
+                "MODEL_PATH": str(tmp_path / "model.pkl"),
+                "ANOMALY_THRESHOLD": 0.7,
+                "UPDATE_TREE_FRACTION": 0.1,
+                "UPDATE_WINDOW_SIZE": 300,
+            }
+        )
+        detector.scaler_path = str(tmp_path / "scaler.pkl")
+        detector.train(detector._generate_synthetic_data(400))
+        return detector
+
+    def test_update_replaces_fraction_of_trees(self, detector):
+        trees = list(detector.model.estimators_)
+        scaler = detector.scaler
+
+        assert detector.update_model(detector._generate_synthetic_data(50))
+
+        # Kept trees are copies with thresholds moved to the updated scaler
+        kept = detector.model.estimators_[:90]
+        assert [t.tree_.node_count for t in kept] == [
+            t.tree_.node_count for t in trees[10:]
+        ]
+        assert len(detector.model.estimators_) == 100
+        assert detector.scaler is not scaler
+        assert detector.scaler.n_samples_seen_ == 450
+        assert detector.last_update["strategy"] == "incremental"
+        assert detector.last_update["trees_replaced"] == 10
+        assert detector.last_update["window_samples"] == 300
+
+    def test_update_publishes_new_bundle(self, detector):
+        version = detector.model_holder.current.version
+
+        detector.update_model(detector._generate_synthetic_data(50))
+
+        assert detector.model_holder.current.version != version
+        assert detector.model_holder.current.model is detector.model
+
+    def test_full_strategy_refits_every_tree(self, detector):
+        detector.update_strategy = "full"
+        trees = list(detector.model.estimators_)
+
+        assert detector.update_model(detector._generate_synthetic_data(50))
+
+        assert not set(map(id, detector.model.estimators_)) & set(map(id, trees))
+        assert detector.last_update["strategy"] == "full"
+
+    def test_untested_sklearn_falls_back_to_full_refit(
+        self, detector, monkeypatch, caplog
+    ):
+        monkeypatch.setattr(incremental_forest.sklearn, "__version__", "2.0.0")
+        trees = list(detector.model.estimators_)
+
+        assert detector.update_model(detector._generate_synthetic_data(50))
+
+        assert not set(map(id, detector.model.estimators_)) & set(map(id, trees))
+        assert detector.last_update["strategy"] == "full"
+        assert "Incremental update unavailable" in caplog.text
+
+    def test_refits_until_window_reaches_tree_size(self, detector):
+        # As after loading the model in a new process
+        detector._recent_features = None
+
+        assert detector.update_model(detector._generate_synthetic_data(200))
+        assert detector.last_update["strategy"] == "full"
+
+        assert detector.update_model(detector._generate_synthetic_data(60))
+        assert detector.last_update["strategy"] == "incremental"
+        assert detector.last_update["window_samples"] == 260
+
+    def test_retrain_model_updates_incrementally(self, detector):
+        result = detector.retrain_model(
+            detector._generate_synthetic_data(50).to_dict("records")
+        )
+
+        assert result["success"] is True
+        assert result["retraining_metrics"]["strategy"] == "incremental"
+
+    def test_invalid_settings_rejected(self):
+        with pytest.raises(ValueError):
+            AnomalyDetector({"UPDATE_STRATEGY": "partial"})
+        with pytest.raises(ValueError):
+            AnomalyDetector({"UPDATE_TREE_FRACTION": 0})
@@ -0,0 +1,113 @@
+"""
+Tests for deferred imports in the ml_models and app packages
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _loaded_modules(statement, tmp_path, **env):
+    """Heavy modules loaded by statement in a fresh interpreter."""
+    code = (
+        f"{statement}\nimport json, sys\n"
+        "print(json.dumps([m for m in ('pandas', 'sklearn', "
+        "'ml_models.anomaly_detector') if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestImportCost:
+    def test_ml_models_package_is_cheap(self, tmp_path):
+        assert _loaded_modules("import ml_models", tmp_path) == []
+
+    def test_create_app_without_warm_up_skips_ml(self, tmp_path):
+        loaded = _loaded_modules(
+            "from app import create_app; create_app()",
+            tmp_path,
+            ANOMALY_WARMUP="off",
+        )
+
+        assert loaded == []
+
+
+class TestLazyExports:
+    def test_ml_models_names_resolve(self):
+        import ml_models
+        from ml_models.anomaly_detector import AnomalyDetector
+
+        assert ml_models.AnomalyDetector is AnomalyDetector
+        assert "AnomalyDetector" in dir(ml_models)
+        with pytest.raises(AttributeError):
+            ml_models.NoSuchModel
+
+    def test_services_names_resolve(self):
+        import app.services
+        from app.services.mlops_service import MLOpsService
+
+        assert app.services.MLOpsService is MLOpsService
+
+
+class TestLazyAppAttributes:
+    @pytest.fixture
+    def app(self):
+        from app import SmartCloudOpsFlask
+
+        return SmartCloudOpsFlask(__name__)
+
+    def test_built_once_on_first_access(self, app):
+        calls = []
+        app.lazy("component", lambda: calls.append(1) or object())
+
+        assert calls == []
+        first = app.component
+        assert app.component is first
+        assert calls == [1]
+
+    def test_assignment_shadows_built_value(self, app):
+        app.lazy("component", lambda: "built")
+
+        app.component = "assigned"
+
+        assert app.component == "assigned"
+        assert app.built("component") == "built"
+
+    def test_unknown_attribute(self, app):
+        assert getattr(app, "missing", None) is None
+
+    def test_detector_built_on_first_access(self, monkeypatch, tmp_path):
+        from app import create_app
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("ANOMALY_WARMUP", "off")
+        monkeypatch.setenv("ANOMALY_MICRO_BATCHING", "true")
+
+        app = create_app()
+
+        assert "anomaly_detector" not in app._lazy_values
+        assert app.anomaly_batcher.detector is app.anomaly_detector
+        assert app.anomaly_detector.sync_training_fallback is False
+
+
+def test_mlops_data_pipeline_loaded_on_use():
+    from app.services.mlops_service import MLOpsService
+
+    service = MLOpsService()
+    assert service._data_pipeline_loaded is False
+
+    service.data_pipeline = "pipeline"
+
+    assert service.data_pipeline == "pipeline"
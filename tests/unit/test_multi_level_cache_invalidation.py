@@ -0,0 +1,133 @@
+"""
+Tests for pub/sub L1 invalidation in app.performance.caching.MultiLevelCache
+"""
+
+import os
+import time
+
+import fakeredis
+import pytest
+
+from app.performance.caching import MultiLevelCache
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def workers():
+    server = fakeredis.FakeServer()
+    caches = [
+        MultiLevelCache(
+            l1_size=100, l1_ttl=3600, l2_cache=fakeredis.FakeRedis(server=server)
+        )
+        for _ in range(2)
+    ]
+    for cache in caches:
+        assert cache._subscribed.wait(3)
+    yield caches
+    for cache in caches:
+        cache.close()
+
+
+def test_write_evicts_other_workers_l1(workers):
+    first, second = workers
+    first.set("experiment:1", {"status": "running"})
+    assert _wait_for(lambda: second.invalidations_received == 1)
+    assert second.get("experiment:1") == {"status": "running"}
+    assert second.l1.get("experiment:1") is not None
+
+    first.set("experiment:1", {"status": "completed"})
+
+    assert _wait_for(lambda: second.l1.get("experiment:1") is None)
+    assert second.get("experiment:1") == {"status": "completed"}
+    assert second.invalidations_received == 2
+    # A worker's own broadcasts don't evict what it just wrote
+    assert first.l1.get("experiment:1") == {"status": "completed"}
+
+
+def test_delete_evicts_everywhere(workers):
+    first, second = workers
+    first.set("model:1", "v1")
+    assert _wait_for(lambda: second.invalidations_received == 1)
+    second.get("model:1")
+
+    assert second.delete("model:1")
+
+    assert _wait_for(lambda: first.l1.get("model:1") is None)
+    assert first.get("model:1") is None
+
+
+def test_clear_empties_every_l1_but_keeps_l2(workers):
+    first, second = workers
+    first.set("key", "value")
+    assert _wait_for(lambda: second.invalidations_received == 1)
+    second.get("key")
+
+    first.clear()
+
+    assert _wait_for(lambda: second.l1.size() == 0)
+    assert second.get("key") == "value"
+
+
+def test_read_racing_a_write_not_promoted(workers):
+    first, _ = workers
+    first.set("key", "old")
+    first.l1.delete("key")
+
+    generation = first._generation
+    first.set("key", "new")
+
+    assert not first._can_promote(generation)
+
+
+def test_invalidation_during_promotion_drops_copy(workers, monkeypatch):
+    first, _ = workers
+    first.set("key", "old")
+    first.l1.delete("key")
+    l1_set = first.l1.set
+
+    def set_then_invalidate(*args):
+        l1_set(*args)
+        first._bump_generation()
+
+    monkeypatch.setattr(first.l1, "set", set_then_invalidate)
+
+    assert first.get("key") == "old"
+    assert first.l1.get("key") is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_starts_own_listener(workers):
+    first, _ = workers
+
+    pid = os.fork()
+    if pid == 0:
+        # The parent's listener thread does not exist in the child
+        ok = first._subscribed.is_set()
+        first.get("key")
+        ok = ok and first._subscribed.wait(3) and first._listener.is_alive()
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+
+def test_no_listener_without_pubsub():
+    class DictL2(dict):
+        def set(self, key, value):
+            self[key] = value
+
+    cache = MultiLevelCache(l1_size=10, l2_cache=DictL2())
+    cache.set("key", "value")
+    cache.l1.clear()
+
+    assert not cache.invalidation_enabled
+    assert cache.get("key") == "value"
+    assert cache.l1.get("key") == "value"
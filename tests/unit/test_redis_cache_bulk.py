@@ -0,0 +1,125 @@
+"""
+Tests for the pipelined bulk operations of caching.strategies.redis_cache
+"""
+
+import fakeredis
+import pytest
+
+from caching.strategies.redis_cache import CacheDecorator
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """FakeRedis counting the round trips made through it"""
+
+    round_trips = 0
+
+    def execute_command(self, *args, **options):
+        CountingRedis.round_trips += 1
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        def counted_execute(raise_on_error=True):
+            # Commands queued on a pipeline are sent together
+            CountingRedis.round_trips += 1
+            return execute(raise_on_error)
+
+        pipe.execute = counted_execute
+        return pipe
+
+
+@pytest.fixture
+def fake_redis_class():
+    return CountingRedis
+
+
+@pytest.fixture
+def cache(make_redis_cache):
+    cache = make_redis_cache(compression_threshold=64)
+    CountingRedis.round_trips = 0
+    return cache
+
+
+def test_set_many_and_get_many_round_trip(cache):
+    items = {f"key-{i}": {"value": i} for i in range(50)}
+
+    assert cache.set_many(items, ttl=60) == 50
+    values = cache.get_many(list(items) + ["missing"])
+
+    assert values == items
+    # One pipeline to write, one MGET plus one metadata pipeline to read
+    assert CountingRedis.round_trips == 3
+    assert cache.stats.hits == 50
+    assert cache.stats.misses == 1
+
+
+def test_get_keeps_ttl_and_counts_access(cache):
+    cache.set("key", "value", ttl=60)
+    cache.get("key")
+    cache.get("key")
+
+    metadata_key = cache._generate_key("key:meta")
+    assert cache.client.ttl(metadata_key) > 0
+    assert b'"access_count": 2' in cache.client.get(metadata_key)
+
+
+def test_large_values_compressed(cache):
+    cache.set_many({"small": "x", "large": "x" * 500})
+
+    assert cache.get_many(["small", "large"]) == {"small": "x", "large": "x" * 500}
+    assert b'"compressed": true' in cache.client.get(cache._generate_key("large:meta"))
+
+
+def test_unserializable_value_skipped(cache):
+    stored = cache.set_many({"good": 1, "bad": lambda: None}, serializer="pickle")
+
+    assert stored == 1
+    assert cache.get("good") == 1
+    assert cache.stats.errors == 1
+
+
+def test_delete_many(cache):
+    cache.set_many({"a": 1, "b": 2, "c": 3})
+    CountingRedis.round_trips = 0
+
+    assert cache.delete_many(["a", "b", "missing"]) == 2
+    assert CountingRedis.round_trips == 1
+    assert cache.get_many(["a", "b", "c"]) == {"c": 3}
+    assert not cache.client.exists(cache._generate_key("a:meta"))
+
+
+def test_warm_cache_batches_round_trips(cache):
+    cache.set("key-0", "cached")
+    CountingRedis.round_trips = 0
+    fetched = []
+
+    def fetch(key):
+        fetched.append(key)
+        return f"fetched:{key}"
+
+    loaded = cache.warm_cache([f"key-{i}" for i in range(100)], fetch)
+
+    # One EXISTS pipeline and one write pipeline for the whole batch
+    assert CountingRedis.round_trips == 2
+    assert loaded == 99
+    assert "key-0" not in fetched
+    assert cache.get("key-0") == "cached"
+
+
+def test_decorator_reads_through_bulk_get(cache):
+    decorator = CacheDecorator(cache)
+    calls = []
+
+    @decorator.cached(ttl=60)
+    def compute(x):
+        calls.append(x)
+        return x * 2
+
+    assert compute(2) == 4
+    CountingRedis.round_trips = 0
+    assert compute(2) == 4
+
+    assert calls == [2]
+    assert CountingRedis.round_trips == 2
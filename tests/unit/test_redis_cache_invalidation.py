@@ -0,0 +1,72 @@
+"""
+Tests for SCAN-based invalidation and Redis-side tag sets in
+caching.strategies.redis_cache
+"""
+
+import fakeredis
+import pytest
+
+
+class NoKeysRedis(fakeredis.FakeRedis):
+    """FakeRedis refusing the blocking KEYS command"""
+
+    def execute_command(self, *args, **options):
+        assert args[0].upper() != "KEYS", "KEYS blocks the server"
+        return super().execute_command(*args, **options)
+
+
+@pytest.fixture
+def fake_redis_class():
+    return NoKeysRedis
+
+
+def test_keys_scans_and_skips_internal_keys(make_redis_cache):
+    cache = make_redis_cache(scan_count=10)
+    cache.set_many({f"exp:{i}": i for i in range(35)}, tags=["experiments"])
+    cache.set("model:1", "m")
+
+    keys = cache.keys("exp:*")
+
+    assert sorted(keys) == sorted(f"exp:{i}" for i in range(35))
+    assert "tag:experiments" not in cache.keys()
+
+
+def test_flush_pattern_unlinks_in_batches(make_redis_cache):
+    cache = make_redis_cache(scan_count=10)
+    cache.set_many({f"exp:{i}": i for i in range(35)})
+    cache.set("model:1", "m")
+
+    assert cache.flush("exp:*") == 35
+    assert cache.keys() == ["model:1"]
+    # Metadata goes with its entry
+    assert not cache.client.exists(cache._generate_key("exp:0:meta"))
+
+
+def test_tag_invalidation_seen_by_other_workers(make_redis_cache):
+    worker_a = make_redis_cache()
+    worker_b = make_redis_cache()
+    worker_a.set_many({"exp:1": 1, "exp:2": 2}, tags=["experiments"])
+    worker_a.set("model:1", "m", tags=["models"])
+
+    assert worker_b.invalidate_tag("experiments") == 2
+    assert worker_a.get_many(["exp:1", "exp:2", "model:1"]) == {"model:1": "m"}
+    assert worker_a.tag_members("experiments") == []
+    assert worker_b.invalidate_tag("experiments") == 0
+
+
+def test_tag_invalidation_in_batches_skips_expired_members(make_redis_cache):
+    cache = make_redis_cache(scan_count=7)
+    cache.set_many({f"exp:{i}": i for i in range(30)}, tags=["experiments"])
+    cache.delete("exp:0")
+
+    assert cache.invalidate_tag("experiments") == 29
+    assert cache.keys() == []
+
+
+def test_tag_set_expiry_follows_longest_member(make_redis_cache):
+    cache = make_redis_cache()
+    cache.set("exp:long", 1, ttl=600, tags=["experiments"])
+    cache.set("exp:short", 2, ttl=60, tags=["experiments"])
+
+    tag_ttl = cache.client.ttl(cache._tag_key("experiments"))
+    assert 600 < tag_ttl <= 900
@@ -0,0 +1,158 @@
+"""
+Tests for cached failure predictions and batched anomaly explanations
+"""
+
+import numpy as np
+import pytest
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models.explanations import explanation_factors, risk_factors
+from ml_models.result_cache import ResultCache
+
+CRITICAL = {
+    "cpu_usage": 97,
+    "memory_usage": 88,
+    "disk_usage": 96,
+    "load_avg_1min": 5,
+}
+
+
+class TestResultCache:
+    def test_nearby_features_share_entry(self):
+        cache = ResultCache(quantum=0.01)
+        cache.put("v1", cache.key("kind", [1.0, 2.0]), "result")
+
+        assert cache.get("v1", cache.key("kind", [1.001, 2.002])) == "result"
+        assert cache.get("v1", cache.key("kind", [1.1, 2.0])) is None
+
+    def test_batch_keys_match_single_keys(self):
+        cache = ResultCache()
+        matrix = np.array([[1.0, 2.0], [3.0, 4.0]])
+
+        assert cache.keys("kind", matrix) == [cache.key("kind", row) for row in matrix]
+
+    def test_new_version_invalidates(self):
+        cache = ResultCache()
+        key = cache.key("kind", [1.0])
+        cache.put("v1", key, "result")
+
+        assert cache.get("v2", key) is None
+        assert len(cache) == 0
+        assert cache.get_stats()["invalidations"] == 1
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(max_entries=2)
+        a, b, c = (cache.key("kind", [v]) for v in (1.0, 2.0, 3.0))
+        cache.put("v1", a, "a")
+        cache.put("v1", b, "b")
+        cache.get("v1", a)
+        cache.put("v1", c, "c")
+
+        assert cache.get("v1", b) is None
+        assert cache.get("v1", a) == "a"
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_zero_size_disables(self):
+        cache = ResultCache(max_entries=0)
+        key = cache.key("kind", [1.0])
+        cache.put("v1", key, "result")
+
+        assert cache.get("v1", key) is None
+
+
+class TestRules:
+    def test_explanation_factors_per_sample(self):
+        factors = explanation_factors(
+            [{"cpu_usage_percent": 97}, {"cpu_usage": 90, "load_avg_1min": 3}, {}]
+        )
+
+        assert [f["impact"] for f in factors[0]] == ["critical"]
+        assert factors[0][0]["explanation"] == (
+            "Critical CPU usage at 97% (>95% threshold)"
+        )
+        assert [(f["metric"], f["impact"]) for f in factors[1]] == [
+            ("cpu_usage_percent", "high"),
+            ("load_avg_1min", "medium"),
+        ]
+        assert factors[2] == []
+
+    def test_risk_factors_carry_weights(self):
+        factors = risk_factors([CRITICAL])[0]
+
+        assert [f["factor"] for f in factors] == [
+            "high_cpu_usage",
+            "high_memory_usage",
+            "critical_disk_usage",
+        ]
+        assert sum(f["weight"] for f in factors) == pytest.approx(1.1)
+
+
+class TestDetectorCaching:
+    @pytest.fixture
+    def detector(self, tmp_path):
+        detector = AnomalyDetector(
+            {"MODEL_PATH": str(tmp_path / "model.pkl"), "ANOMALY_THRESHOLD": 0.7}
+        )
+        detector.scaler_path = str(tmp_path / "scaler.pkl")
+        detector.train(detector._generate_synthetic_data(200))
+        return detector
+
+    def test_failure_prediction_cached(self, detector):
+        first = detector.predict_failure_probability(CRITICAL)
+        second = detector.predict_failure_probability(CRITICAL)
+
+        assert first["status"] == "success"
+        assert first["risk_score"] == 1.0
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["failure_probability"] == first["failure_probability"]
+
+    def test_failure_prediction_keyed_by_horizon(self, detector):
+        detector.predict_failure_probability(CRITICAL, time_horizon=3600)
+
+        result = detector.predict_failure_probability(CRITICAL, time_horizon=600)
+
+        assert result["cached"] is False
+
+    def test_retraining_invalidates(self, detector):
+        detector.predict_failure_probability(CRITICAL)
+        detector.update_model(detector._generate_synthetic_data(50))
+
+        assert detector.predict_failure_probability(CRITICAL)["cached"] is False
+
+    def test_batch_explanations(self, detector):
+        results = [
+            {"is_anomaly": True, "severity": "critical", "metrics": CRITICAL},
+            {"is_anomaly": False},
+            {"is_anomaly": True, "severity": "medium", "metrics": {"cpu_usage": 10}},
+        ]
+
+        explanations = detector.get_anomaly_explanations(results)
+
+        assert explanations[0]["factor_count"] == 4
+        assert explanations[1]["status"] == "not_anomaly"
+        assert explanations[2]["contributing_factors"] == []
+        assert explanations[2]["recommendations"] == [
+            "Monitor system metrics for pattern analysis"
+        ]
+
+    def test_explanation_cached(self, detector):
+        result = {"is_anomaly": True, "severity": "high", "metrics": CRITICAL}
+
+        first = detector.get_anomaly_explanation(result)
+        second = detector.get_anomaly_explanation(result)
+
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert second["contributing_factors"] == first["contributing_factors"]
+
+    def test_mutating_a_result_leaves_cache_intact(self, detector):
+        result = {"is_anomaly": True, "severity": "high", "metrics": CRITICAL}
+        first = detector.get_anomaly_explanation(result)
+        expected = list(first["recommendations"])
+
+        first["recommendations"].clear()
+        detector.get_anomaly_explanation(result)["contributing_factors"].clear()
+
+        again = detector.get_anomaly_explanation(result)
+        assert again["cached"] is True
+        assert again["recommendations"] == expected
+        assert again["contributing_factors"] == first["contributing_factors"] != []
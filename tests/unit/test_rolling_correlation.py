@@ -0,0 +1,179 @@
+"""
+Tests for the rolling correlation engine and multi-metric anomaly detection
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models.rolling_correlation import RollingCorrelation, align_series
+
+METRICS = ["cpu", "memory", "disk"]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    rows = rng.normal(size=(200, 3))
+    rows[:, 1] += 2 * rows[:, 0]
+    # Large offsets must not cost precision
+    rows[:, 2] = rows[:, 2] * 10 + 1e9
+    return rows
+
+
+def _timestamps(n, start="2025-08-17T10:00:00Z"):
+    return pd.date_range(start, periods=n, freq="min")
+
+
+def _series(rows, timestamps):
+    return {
+        metric: [
+            {"value": float(row[i]), "timestamp": ts.isoformat()}
+            for row, ts in zip(rows, timestamps)
+        ]
+        for i, metric in enumerate(METRICS)
+    }
+
+
+class TestRollingCorrelation:
+    def test_matches_pandas_after_row_updates(self, data):
+        engine = RollingCorrelation(METRICS, window=10)
+        for row in data:
+            engine.update(row)
+
+        df = pd.DataFrame(data)
+        np.testing.assert_allclose(engine.correlation(), df.corr(), atol=1e-9)
+        np.testing.assert_allclose(
+            engine.correlation("recent"), df.tail(10).corr(), atol=1e-9
+        )
+        np.testing.assert_allclose(
+            engine.correlation("historical"), df.head(-10).corr(), atol=1e-9
+        )
+
+    def test_bulk_update_matches_row_updates(self, data):
+        by_row = RollingCorrelation(METRICS, window=10)
+        for row in data:
+            by_row.update(row)
+        bulk = RollingCorrelation(METRICS, window=10)
+        bulk.update_many(data[:7])
+        bulk.update_many(data[7:150])
+        bulk.update_many(data[150:])
+
+        assert bulk.samples == by_row.samples == 200
+        np.testing.assert_allclose(
+            bulk.correlation("historical"), by_row.correlation("historical")
+        )
+        np.testing.assert_allclose(
+            bulk.correlation("recent"), by_row.correlation("recent")
+        )
+
+    def test_detects_correlation_break(self, data):
+        data[-10:, 1] = -data[-10:, 0]
+        engine = RollingCorrelation(METRICS, window=10)
+
+        engine.update_many(data[:-1])
+        breaks = engine.update(data[-1])
+
+        assert [b["metrics"] for b in breaks] == [["cpu", "memory"]]
+        assert breaks[0]["severity"] == "high"
+        assert breaks[0]["recent_correlation"] < 0 < breaks[0]["historical_correlation"]
+
+    def test_old_timestamps_ignored(self, data):
+        engine = RollingCorrelation(METRICS)
+        timestamps = _timestamps(len(data))
+        engine.update_many(data, timestamps)
+
+        assert engine.update_many(data[-5:], timestamps[-5:]) == 0
+        assert engine.update(data[0], timestamps[0]) == []
+        assert engine.samples == len(data)
+
+    def test_points_align_by_timestamp(self):
+        engine = RollingCorrelation(["cpu", "memory"])
+        engine.add_point("cpu", "2025-08-17T10:00:00Z", 1.0)
+        engine.add_point("cpu", "2025-08-17T10:01:00Z", 2.0)
+        assert engine.samples == 0
+
+        engine.add_point("memory", "2025-08-17T10:01:00Z", 5.0)
+
+        assert engine.samples == 1
+        # The incomplete earlier timestamp can no longer be completed
+        engine.add_point("memory", "2025-08-17T10:00:00Z", 3.0)
+        assert engine.samples == 1
+
+    def test_constant_metric_has_no_correlation(self):
+        engine = RollingCorrelation(["cpu", "memory"], window=3)
+        engine.update_many(np.column_stack([np.arange(10.0), np.ones(10)]))
+
+        assert np.isnan(engine.correlation()[0, 1])
+        assert engine.correlation_breaks() == []
+
+    def test_needs_two_metrics(self):
+        with pytest.raises(ValueError):
+            RollingCorrelation(["cpu"])
+
+
+class TestAlignSeries:
+    def test_inner_join_on_timestamps(self):
+        rows, timestamps = align_series(
+            {
+                "cpu": [
+                    {"value": 2, "timestamp": "2025-08-17T10:01:00Z"},
+                    {"value": 1, "timestamp": "2025-08-17T10:00:00Z"},
+                ],
+                "memory": [
+                    {"value": 10, "timestamp": "2025-08-17T10:00:00Z"},
+                    {"value": 30, "timestamp": "2025-08-17T10:02:00Z"},
+                ],
+            },
+            ["cpu", "memory"],
+        )
+
+        np.testing.assert_array_equal(rows, [[1, 10]])
+        assert len(timestamps) == 1
+
+    def test_positional_without_timestamps(self):
+        rows, timestamps = align_series(
+            {"cpu": [{"value": 1}, {"value": 2}], "memory": [{"value": 3}]},
+            ["cpu", "memory"],
+        )
+
+        np.testing.assert_array_equal(rows, [[1, 3]])
+        assert timestamps is None
+
+
+class TestDetectMultiMetricAnomaly:
+    def test_reports_break_and_strong_correlation(self, data):
+        data[-10:, 1] = -data[-10:, 0]
+        result = AnomalyDetector().detect_multi_metric_anomaly(
+            _series(data, _timestamps(len(data)))
+        )
+
+        assert result["status"] == "success"
+        assert result["samples_analyzed"] == len(data)
+        assert ["cpu", "memory"] in [a["metrics"] for a in result["anomalies"]]
+        assert result["correlation_matrix"]["cpu"]["cpu"] == pytest.approx(1.0)
+
+    def test_stream_only_takes_in_new_points(self, data):
+        detector = AnomalyDetector()
+        timestamps = _timestamps(len(data))
+
+        detector.detect_multi_metric_anomaly(
+            _series(data[:150], timestamps[:150]), stream_id="web-1"
+        )
+        result = detector.detect_multi_metric_anomaly(
+            _series(data[100:], timestamps[100:]), stream_id="web-1"
+        )
+
+        assert result["samples_analyzed"] == len(data)
+        expected = pd.DataFrame(data, columns=METRICS).corr()
+        assert result["correlation_matrix"]["cpu"]["memory"] == pytest.approx(
+            expected.loc["cpu", "memory"]
+        )
+
+    def test_single_metric_is_insufficient(self):
+        result = AnomalyDetector().detect_multi_metric_anomaly(
+            {"cpu": [{"value": 1}], "memory": []}
+        )
+
+        assert result["status"] == "insufficient_data"
@@ -0,0 +1,128 @@
+"""
+Tests for the sharded LRU cache in app.performance.caching
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.performance.caching import (
+    EXPIRY_BATCH,
+    CacheManager,
+    LRUCache,
+    MultiLevelCache,
+)
+
+
+class TestSharding:
+    def test_small_caches_use_one_shard(self):
+        assert len(LRUCache(max_size=50)._shards) == 1
+
+    def test_capacity_split_exactly(self):
+        cache = LRUCache(max_size=1000)
+
+        assert len(cache._shards) == 15
+        assert sum(shard.max_size for shard in cache._shards) == 1000
+
+    def test_size_bounded_by_max_size(self):
+        cache = LRUCache(max_size=256, num_shards=4)
+        for i in range(2000):
+            cache.set(f"key-{i}", i)
+
+        assert cache.size() <= 256
+        assert cache.stats.evictions == 2000 - cache.size()
+
+    def test_recently_used_keys_survive_within_shard(self):
+        cache = LRUCache(max_size=128, num_shards=2)
+        cache.set("hot", "value")
+        for i in range(1000):
+            cache.set(f"key-{i}", i)
+            cache.get("hot")
+
+        assert cache.get("hot") == "value"
+
+
+class TestLazyExpiry:
+    def test_expired_entries_dropped_without_scan(self):
+        cache = LRUCache(max_size=1000, default_ttl=0.05, num_shards=1)
+        for i in range(100):
+            cache.set(f"key-{i}", i)
+        time.sleep(0.08)
+
+        cache.get("missing")
+
+        # One access drops a bounded batch; later ones finish the job
+        assert cache.size() == 100 - EXPIRY_BATCH
+        for _ in range(5):
+            cache.get("missing")
+        assert cache.size() == 0
+        assert cache.stats.evictions == 100
+
+    def test_overwritten_entry_not_expired_by_stale_heap_item(self):
+        cache = LRUCache(max_size=10, num_shards=1)
+        cache.set("key", "old", ttl=0.05)
+        cache.set("key", "new", ttl=60)
+        time.sleep(0.08)
+
+        assert cache.get("key") == "new"
+
+    def test_stale_heap_items_compacted(self):
+        cache = LRUCache(max_size=10, num_shards=1)
+        for i in range(500):
+            cache.set("key", i, ttl=60)
+
+        shard = cache._shards[0]
+        assert len(shard.expiry_heap) <= 2 * len(shard.entries) + EXPIRY_BATCH
+
+
+class TestStats:
+    def test_concurrent_counts_are_exact(self):
+        cache = LRUCache(max_size=4096, num_shards=8)
+        for i in range(100):
+            cache.set(f"key-{i}", i)
+
+        def reader():
+            for i in range(2000):
+                cache.get(f"key-{i % 200}")
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert cache.stats.hits == 8 * 1000
+        assert cache.stats.misses == 8 * 1000
+        assert cache.stats.hit_rate == pytest.approx(0.5)
+
+    def test_clear_resets(self):
+        cache = LRUCache(max_size=100)
+        cache.set("key", "value")
+        cache.get("key")
+
+        cache.clear()
+
+        assert cache.size() == 0
+        assert cache.stats.to_dict()["hits"] == 0
+
+    def test_manager_stats(self):
+        stats = CacheManager().get_stats()
+
+        assert stats["api_responses"]["shards"] == 15
+        assert stats["statistics"]["shards"] == 1
+
+
+def test_multi_level_cache_survives_l2_errors():
+    class BrokenL2:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value):
+            raise ConnectionError("down")
+
+    cache = MultiLevelCache(l1_size=10, l2_cache=BrokenL2())
+    cache.set("key", "value")
+    cache.l1.clear()
+
+    assert cache.get("key") is None
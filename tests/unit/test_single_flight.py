@@ -0,0 +1,107 @@
+"""
+Tests for per-key request coalescing of cache misses
+"""
+
+import threading
+import time
+
+import pytest
+
+from caching.strategies.single_flight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def run(index):
+        start.wait()
+        try:
+            results[index] = target(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        results = _run_concurrently(8, lambda i: flight.do("key", fetch))
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == ["value"] * 8
+        assert sum(shared for _, shared in results) == 7
+        assert flight.in_flight() == 0
+
+    def test_different_keys_run_in_parallel(self):
+        flight = SingleFlight()
+
+        def fetch():
+            time.sleep(0.1)
+            return True
+
+        started = time.perf_counter()
+        _run_concurrently(4, lambda i: flight.do(f"key-{i}", fetch))
+
+        assert time.perf_counter() - started < 0.3
+        assert flight.get_stats()["calls"] == 4
+
+    def test_error_shared_with_waiters(self):
+        flight = SingleFlight()
+
+        def fetch():
+            time.sleep(0.05)
+            raise ValueError("backend down")
+
+        results = _run_concurrently(4, lambda i: flight.do("key", fetch))
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.get_stats()["calls"] == 1
+
+    def test_next_call_after_completion_runs_again(self):
+        flight = SingleFlight()
+
+        assert flight.do("key", lambda: 1) == (1, False)
+        assert flight.do("key", lambda: 2) == (2, False)
+
+    def test_forget_starts_a_new_flight(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        first = threading.Thread(
+            target=flight.do, args=("key", lambda: release.wait(5) and "old")
+        )
+        first.start()
+        while not flight.in_flight():
+            time.sleep(0.001)
+
+        flight.forget("key")
+
+        assert flight.do("key", lambda: "new") == ("new", False)
+        release.set()
+        first.join(timeout=5)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.parametrize("error", [KeyboardInterrupt, SystemExit])
+    def test_base_exceptions_release_waiters(self, error):
+        flight = SingleFlight()
+
+        def fetch():
+            raise error()
+
+        with pytest.raises(error):
+            flight.do("key", fetch)
+
+        assert flight.in_flight() == 0
@@ -0,0 +1,336 @@
+"""
+Tests for streaming per-host feature state and streaming anomaly detection
+"""
+
+import threading
+
+import fakeredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_models.anomaly_detector import AnomalyDetector
+from ml_models.feature_extractor import DEFAULT_RATE, FeatureExtractor
+from ml_models.streaming_features import (
+    RedisStreamingFeatureState,
+    StreamingFeatureState,
+    counter_rates,
+)
+
+COLUMNS = (
+    "cpu_usage_percent",
+    "memory_usage_percent",
+    "disk_usage_percent",
+    "load_avg_1min",
+    "network_bytes_sent_rate",
+    "network_bytes_recv_rate",
+)
+SENT = COLUMNS.index("network_bytes_sent_rate")
+RECV = COLUMNS.index("network_bytes_recv_rate")
+
+
+def _sample(cpu=20.0, sent=None, recv=None, at=None, **extra):
+    metrics = {"cpu_usage": cpu, "memory_usage": 40.0, "disk_usage": 30.0}
+    if sent is not None:
+        metrics["network_bytes_sent"] = sent
+    if recv is not None:
+        metrics["network_bytes_recv"] = recv
+    if at is not None:
+        metrics["timestamp"] = at
+    metrics.update(extra)
+    return metrics
+
+
+@pytest.fixture
+def state():
+    return StreamingFeatureState(FeatureExtractor(COLUMNS), window_size=4, alpha=0.5)
+
+
+class TestRates:
+    def test_first_sample_gets_default_rate(self, state):
+        features = state.update("web-1", _sample(sent=1000.0, at=0)).features
+
+        assert features[SENT] == DEFAULT_RATE
+
+    def test_rate_is_change_per_second(self, state):
+        state.update("web-1", _sample(sent=1000.0, recv=50.0, at=100.0))
+        features = state.update(
+            "web-1", _sample(sent=1600.0, recv=80.0, at=110.0)
+        ).features
+
+        assert features[SENT] == 60.0
+        assert features[RECV] == 3.0
+
+    def test_iso_timestamps(self, state):
+        state.update("web-1", _sample(sent=0.0, at="2025-01-01T00:00:00Z"))
+        features = state.update(
+            "web-1", _sample(sent=300.0, at="2025-01-01T00:00:30Z")
+        ).features
+
+        assert features[SENT] == 10.0
+
+    def test_matches_training_over_history(self, state):
+        history = [
+            _sample(sent=v, recv=2 * v, at=t, host_id=host)
+            for v, t, host in (
+                (100.0, 0, "a"),
+                (250.0, 15, "a"),
+                (80.0, 20, "b"),
+                (700.0, 30, "a"),
+                (200.0, 40, "b"),
+                (900.0, 60, "a"),
+            )
+        ]
+        detector = AnomalyDetector()
+        expected = detector._preprocess_data(pd.DataFrame(history))
+
+        streamed = np.array([state.update(m["host_id"], m).features for m in history])
+
+        for column in ("network_bytes_sent_rate", "network_bytes_recv_rate"):
+            np.testing.assert_allclose(
+                streamed[:, COLUMNS.index(column)], expected[column]
+            )
+
+    def test_single_sample_matches_training(self):
+        sample = {
+            "cpu_usage_percent": 20.0,
+            "memory_usage_percent": 40.0,
+            "disk_usage_percent": 30.0,
+            "network_bytes_sent": 5e6,
+            "network_bytes_recv": 7e6,
+            "timestamp": 0,
+        }
+        detector = AnomalyDetector()
+        trained = detector._preprocess_data(pd.DataFrame([sample]))
+
+        extracted = detector.feature_extractor.extract(sample)
+        prepared = detector.prepare_features([sample]).to_numpy(dtype=float)[0]
+
+        np.testing.assert_allclose(extracted, trained.to_numpy(dtype=float)[0])
+        np.testing.assert_allclose(prepared, extracted)
+        assert extracted[SENT] == extracted[RECV] == DEFAULT_RATE
+
+    def test_counter_reset_counts_from_zero(self, state):
+        state.update("web-1", _sample(sent=5000.0, at=0))
+        features = state.update("web-1", _sample(sent=200.0, at=10)).features
+
+        assert features[SENT] == 20.0
+
+    def test_out_of_order_sample_gets_default_rate(self, state):
+        state.update("web-1", _sample(sent=5000.0, at=10))
+        features = state.update("web-1", _sample(sent=6000.0, at=10)).features
+
+        assert features[SENT] == DEFAULT_RATE
+
+    def test_explicit_rate_wins_over_counter(self, state):
+        state.update("web-1", _sample(sent=1000.0, at=0))
+        features = state.update(
+            "web-1", _sample(sent=3000.0, at=1, network_bytes_sent_rate=7.0)
+        ).features
+
+        assert features[SENT] == 7.0
+
+    def test_hosts_are_independent(self, state):
+        state.update("web-1", _sample(sent=1000.0, at=0))
+        features = state.update("web-2", _sample(sent=1500.0, at=1)).features
+
+        assert features[SENT] == DEFAULT_RATE
+
+
+class TestCounterRates:
+    def test_vectorised(self):
+        rates = counter_rates(
+            [300.0, 50.0, 10.0], [100.0, 80.0, np.nan], [10.0, 5.0, 1.0]
+        )
+
+        np.testing.assert_allclose(rates, [20.0, 10.0, np.nan])
+
+
+class TestRollingStatistics:
+    def test_zscores_use_history_before_the_sample(self, state):
+        for cpu in (10.0, 12.0, 10.0, 12.0):
+            state.update("web-1", _sample(cpu=cpu))
+
+        spike = state.update("web-1", _sample(cpu=95.0))
+
+        assert spike.zscores[0] > 10
+        assert spike.zscores[1] == 0.0
+
+    def test_first_sample_has_zero_zscores(self, state):
+        assert not state.update("web-1", _sample(cpu=90.0)).zscores.any()
+
+    def test_rolling_mean_covers_last_window(self, state):
+        for cpu in (10.0, 20.0, 30.0, 40.0, 50.0, 60.0):
+            result = state.update("web-1", _sample(cpu=cpu))
+
+        assert result.rolling_mean[0] == pytest.approx(45.0)
+        assert result.samples == 6
+
+    def test_rolling_mean_stays_exact_over_long_streams(self):
+        state = StreamingFeatureState(FeatureExtractor(COLUMNS), window_size=8)
+        values = np.random.default_rng(0).uniform(0, 100, size=1000)
+        for cpu in values:
+            result = state.update("web-1", _sample(cpu=float(cpu)))
+
+        assert result.rolling_mean[0] == pytest.approx(values[-8:].mean(), abs=1e-9)
+
+    def test_least_recently_seen_host_evicted(self):
+        state = StreamingFeatureState(FeatureExtractor(COLUMNS), max_hosts=2)
+        state.update("a", _sample(sent=100.0, at=0))
+        state.update("b", _sample(sent=100.0, at=0))
+        state.update("a", _sample(sent=150.0, at=1))
+        state.update("c", _sample(sent=100.0, at=1))
+
+        assert state.n_hosts == 2
+        assert state.update("a", _sample(sent=170.0, at=2)).features[SENT] == 20.0
+        # "b" was evicted, so its next sample starts a fresh stream
+        assert state.update("b", _sample(sent=400.0, at=2)).features[SENT] == (
+            DEFAULT_RATE
+        )
+
+    def test_invalid_settings_rejected(self):
+        with pytest.raises(ValueError):
+            StreamingFeatureState(FeatureExtractor(COLUMNS), window_size=0)
+        with pytest.raises(ValueError):
+            StreamingFeatureState(FeatureExtractor(COLUMNS), alpha=0)
+
+
+class TestRedisState:
+    @pytest.fixture
+    def server(self):
+        return fakeredis.FakeServer()
+
+    @pytest.fixture
+    def workers(self, server):
+        return [
+            RedisStreamingFeatureState(
+                FeatureExtractor(COLUMNS),
+                fakeredis.FakeRedis(server=server),
+                window_size=4,
+                alpha=0.5,
+            )
+            for _ in range(2)
+        ]
+
+    def test_workers_continue_one_stream(self, workers):
+        first, second = workers
+
+        first.update("web-1", _sample(cpu=10.0, sent=1000.0, at=0))
+        result = second.update("web-1", _sample(cpu=30.0, sent=1600.0, at=10))
+
+        assert result.features[SENT] == 60.0
+        assert result.samples == 2
+        assert result.rolling_mean[0] == pytest.approx(20.0)
+        assert first.n_hosts == 1
+
+    def test_matches_local_state(self, workers, state):
+        first, second = workers
+        for i in range(10):
+            metrics = _sample(cpu=float(i * 7 % 50), sent=100.0 * i * i, at=i)
+            shared = (first, second)[i % 2].update("web-1", metrics)
+            local = state.update("web-1", metrics)
+
+        np.testing.assert_allclose(shared.features, local.features)
+        np.testing.assert_allclose(shared.zscores, local.zscores)
+        np.testing.assert_allclose(shared.rolling_mean, local.rolling_mean)
+
+    def test_concurrent_updates_all_applied(self, workers):
+        def stream(worker):
+            for i in range(25):
+                worker.update("web-1", _sample(at=i))
+
+        threads = [threading.Thread(target=stream, args=(w,)) for w in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert workers[0].update("web-1", _sample(at=30)).samples == 51
+
+    def test_reset(self, workers):
+        first, second = workers
+        first.update("web-1", _sample())
+        first.update("web-2", _sample())
+
+        second.reset("web-1")
+        assert first.n_hosts == 1
+        second.reset()
+        assert first.n_hosts == 0
+
+    def test_falls_back_while_redis_unreachable(self, workers, server, monkeypatch):
+        first, _ = workers
+        server.connected = False
+        calls = []
+        update_shared = first._update_shared
+        monkeypatch.setattr(
+            first,
+            "_update_shared",
+            lambda *args: calls.append(1) or update_shared(*args),
+        )
+
+        first.update("web-2", _sample(sent=1000.0, at=0))
+        result = first.update("web-2", _sample(sent=1600.0, at=10))
+
+        assert first.using_fallback
+        assert calls == [1]
+        assert result.features[SENT] == 60.0
+        assert result.samples == 2
+
+    def test_retries_redis_after_interval(self, workers, server):
+        first, second = workers
+        first.retry_interval = 0
+        server.connected = False
+        first.update("web-1", _sample(sent=1000.0, at=0))
+
+        server.connected = True
+        first.update("web-1", _sample(sent=1000.0, at=0))
+        result = second.update("web-1", _sample(sent=1600.0, at=10))
+
+        assert not first.using_fallback
+        assert result.features[SENT] == 60.0
+
+
+class TestDetectAnomalyStream:
+    @pytest.fixture
+    def detector(self, tmp_path):
+        detector = AnomalyDetector(
+            {"MODEL_PATH": str(tmp_path / "model.pkl"), "ANOMALY_THRESHOLD": 0.7}
+        )
+        detector.scaler_path = str(tmp_path / "scaler.pkl")
+        detector.train(detector._generate_synthetic_data(200))
+        return detector
+
+    def test_scores_with_streamed_rates(self, detector):
+        detector.detect_anomaly_stream("web-1", _sample(sent=1e6, recv=2e6, at=0))
+        result = detector.detect_anomaly_stream(
+            "web-1", _sample(sent=3e6, recv=5e6, at=1)
+        )
+
+        assert result["status"] == "success"
+        assert result["host_id"] == "web-1"
+        assert result["stream"]["samples"] == 2
+        assert result["stream"]["features"]["network_bytes_sent_rate"] == 2e6
+
+        rates = _sample(network_bytes_sent_rate=2e6, network_bytes_recv_rate=3e6)
+        expected = detector.detect_anomaly(rates)
+        assert result["anomaly_score"] == pytest.approx(expected["anomaly_score"])
+
+    def test_unready_model_does_not_touch_state(self, tmp_path):
+        detector = AnomalyDetector(
+            {
+                "MODEL_PATH": str(tmp_path / "model.pkl"),
+                "BOOTSTRAP_MODEL_DIR": str(tmp_path / "bootstrap"),
+                "SYNC_TRAINING_FALLBACK": False,
+            }
+        )
+
+        result = detector.detect_anomaly_stream("web-1", _sample())
+
+        assert result["status"] == "error"
+        assert detector.stream_state.n_hosts == 0
+
+    def test_invalid_sample_does_not_touch_state(self, detector):
+        result = detector.detect_anomaly_stream("web-1", {"cpu_usage": 10})
+
+        assert result["status"] == "error"
+        assert detector.stream_state.n_hosts == 0
@@ -0,0 +1,123 @@
+"""
+Tests for vectorized and incremental trend analysis
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_models.anomaly_detector import TimeSeriesAnalyzer
+from ml_models.trend_analysis import TrendTracker, classify_trends, linear_trends
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(6, 40)).cumsum(axis=1) + 1e6
+    values[2, [0, 5, 39]] = np.nan
+    return values
+
+
+def _polyfit_slope(row):
+    row = row[~np.isnan(row)]
+    return np.polyfit(np.arange(len(row)), row, 1)[0]
+
+
+class TestLinearTrends:
+    def test_matches_polyfit(self, values):
+        fit = linear_trends(values)
+
+        expected = [_polyfit_slope(row) for row in values]
+        np.testing.assert_allclose(fit["slope"], expected, rtol=1e-8)
+        assert fit["count"][2] == 37
+        assert fit["current"][2] == values[2, 38]
+
+    def test_too_few_points_have_no_slope(self):
+        fit = linear_trends([[1.0, np.nan, np.nan], [np.nan] * 3])
+
+        assert np.isnan(fit["slope"]).all()
+        assert fit["current"][0] == 1.0
+
+    def test_classify(self):
+        labels = classify_trends(np.array([0.05, 2.0, -2.0]))
+
+        assert list(labels) == ["stable", "increasing", "decreasing"]
+
+
+class TestTrendTracker:
+    def test_point_updates_match_batch_fit(self, values):
+        names = [f"s{i}" for i in range(len(values))]
+        tracker = TrendTracker()
+        for column in values.T:
+            tracker.update(names=names, points=column)
+
+        np.testing.assert_allclose(
+            tracker.fit()["slope"], linear_trends(values)["slope"], rtol=1e-8
+        )
+
+    def test_block_updates_merge(self, values):
+        names = [f"s{i}" for i in range(len(values))]
+        tracker = TrendTracker()
+        tracker.update_many(names, values[:, :15])
+        tracker.update(dict(zip(names, values[:, 15])))
+        tracker.update_many(names, values[:, 16:])
+
+        fit = tracker.fit()
+        expected = linear_trends(values)
+        np.testing.assert_allclose(fit["slope"], expected["slope"], rtol=1e-8)
+        np.testing.assert_allclose(fit["mean"], expected["mean"])
+        np.testing.assert_array_equal(fit["count"], expected["count"])
+
+    def test_series_added_on_first_point(self):
+        tracker = TrendTracker(["a"])
+        for i in range(5):
+            tracker.update({"a": float(i), "b": 10.0 - 2 * i})
+
+        trends = tracker.trends()
+        assert trends["a"]["trend"] == "increasing"
+        assert trends["b"]["slope"] == pytest.approx(-2.0)
+        assert len(tracker) == 2
+
+
+class TestDetectTrends:
+    def test_list_of_dicts(self):
+        history = [{"cpu": 10.0 + 5 * i, "memory": 50.0, "host": "a"} for i in range(8)]
+
+        result = TimeSeriesAnalyzer().detect_trends(history)
+
+        assert result["status"] == "success"
+        assert result["trends"]["cpu"]["trend"] == "increasing"
+        assert result["trends"]["cpu"]["slope"] == pytest.approx(5.0)
+        assert result["trends"]["memory"]["trend"] == "stable"
+        assert "host" not in result["trends"]
+
+    def test_columnar_array(self, values):
+        names = [f"host-{i}.cpu" for i in range(len(values))]
+
+        result = TimeSeriesAnalyzer().detect_trends(values, names)
+
+        assert set(result["trends"]) == set(names)
+        assert result["trends"]["host-2.cpu"]["slope"] == pytest.approx(
+            _polyfit_slope(values[2])
+        )
+
+    def test_dict_of_uneven_arrays(self):
+        result = TimeSeriesAnalyzer().detect_trends(
+            {"a": np.arange(10.0), "b": np.array([5.0, 4.0, 3.0])}
+        )
+
+        assert result["trends"]["a"]["slope"] == pytest.approx(1.0)
+        assert result["trends"]["b"]["trend"] == "decreasing"
+
+    def test_insufficient_data(self):
+        result = TimeSeriesAnalyzer().detect_trends(pd.DataFrame({"a": [1, 2]}))
+
+        assert result["status"] == "insufficient_data"
+
+    def test_update_trends(self):
+        analyzer = TimeSeriesAnalyzer()
+        for i in range(4):
+            result = analyzer.update_trends({"web-1.cpu": 20.0 + i})
+
+        assert result["series_tracked"] == 1
+        assert result["trends"]["web-1.cpu"]["slope"] == pytest.approx(1.0)